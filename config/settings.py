@@ -10,3 +10,8 @@ DB_PATH = os.getenv('DB_PATH', os.path.join(BASE_DIR, DB_NAME))
 # Application settings
 APP_NAME = "Biosolids Management ERP"
 VERSION = "0.1.0"
+
+# Event bus: entrega asíncrona de eventos a los listeners
+EVENT_BUS_ASYNC = os.getenv('EVENT_BUS_ASYNC', '1') == '1'
+EVENT_BUS_WORKERS = int(os.getenv('EVENT_BUS_WORKERS', '4'))
+EVENT_BUS_MAX_PENDING = int(os.getenv('EVENT_BUS_MAX_PENDING', '1000'))
@@ -15,6 +15,8 @@ from types import SimpleNamespace
 from infrastructure.persistence.database_manager import DatabaseManager
 from domain.logistics.repositories.load_repository import LoadRepository
 from infrastructure.persistence.reporting_repository import ReportingRepository
+from infrastructure.persistence.daily_ops_rollup_repository import DailyOpsRollupRepository
+from infrastructure.persistence.traceability_repository import TraceabilityRepository
 from infrastructure.persistence.generic_repository import BaseRepository
 
 # Models for Generic Repositories
@@ -33,10 +35,12 @@ from domain.logistics.entities.container import Container
 from domain.disposal.services.location_service import LocationService
 from domain.logistics.services.dispatch_service import LogisticsDomainService
 from domain.logistics.services.load_state_service import LoadStateService
+from domain.logistics.services.pending_task_index import PendingTaskIndex
 from domain.logistics.services.load_planning_service import LoadPlanningService
 from domain.logistics.services.load_dispatch_service import LoadDispatchService
 from domain.logistics.services.load_reception_service import LoadReceptionService
 from domain.logistics.services.trip_linking_service import TripLinkingService
+from domain.logistics.services.trip_consolidation_service import TripConsolidationService
 from domain.logistics.application.logistics_app_service import LogisticsApplicationService
 from domain.logistics.services.pickup_request_service import PickupRequestService
 from domain.disposal.services.agronomy_service import AgronomyDomainService
@@ -55,7 +59,9 @@ from infrastructure.reporting.dashboard_service import DashboardService
 from ui.utils.task_resolver import TaskResolver
 
 # Event Bus
-from infrastructure.events.event_bus import EventBus, EventTypes
+from infrastructure.events.event_bus import EventBus, EventTypes, expand_status_batch
+from infrastructure.events.outbox import EventOutboxRepository, OutboxRelay
+from config.settings import EVENT_BUS_ASYNC, EVENT_BUS_WORKERS, EVENT_BUS_MAX_PENDING
 
 # Machinery & Field Reception
 from domain.agronomy.services.machinery_service import MachineryService
@@ -65,11 +71,15 @@ from domain.agronomy.services.field_reception_handler import FieldReceptionHandl
 # Financial Reporting (Phase 5)
 from domain.finance.repositories.economic_indicators_repository import EconomicIndicatorsRepository
 from domain.finance.repositories.proforma_repository import ProformaRepository
+from domain.finance.repositories.settlement_snapshot_repository import SettlementSnapshotRepository
+from domain.finance.repositories.load_cost_ledger_repository import LoadCostLedgerRepository
 from domain.finance.repositories.contractor_tariffs_repository import ContractorTariffsRepository
 from domain.finance.repositories.client_tariffs_repository import ClientTariffsRepository
 from domain.finance.repositories.disposal_site_tariffs_repository import DisposalSiteTariffsRepository
 from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
+from domain.finance.repositories.financial_reporting_repository import FinancialReportingRepository
 from domain.finance.services.financial_reporting_service import FinancialReportingService
+from domain.finance.services.segment_costing_service import SegmentCostingService
 
 # Satellite Modules (Phase 3)
 from domain.maintenance.services.maintenance_listener import MaintenanceListener
@@ -100,8 +110,16 @@ def get_container() -> SimpleNamespace:
     # Initialize DatabaseManager using centralized configuration
     db_manager = DatabaseManager()
     
-    # Initialize EventBus as singleton
-    event_bus = EventBus()
+    # Initialize EventBus as singleton (listeners run off the request thread)
+    event_bus = EventBus(
+        async_mode=EVENT_BUS_ASYNC,
+        max_workers=EVENT_BUS_WORKERS,
+        max_pending=EVENT_BUS_MAX_PENDING
+    )
+    
+    # Durable load events: written with the transition, delivered by the relay
+    event_outbox = EventOutboxRepository(db_manager)
+    outbox_relay = OutboxRelay(event_outbox)
     
     # Initialize Repositories
     # Generic Repositories
@@ -119,15 +137,20 @@ def get_container() -> SimpleNamespace:
     # Specific Repositories (Custom SQL or Logic)
     load_repo = LoadRepository(db_manager)
     reporting_repo = ReportingRepository(db_manager)
+    daily_ops_rollup_repo = DailyOpsRollupRepository(db_manager)  # KPIs maintained by triggers on loads
+    traceability_repo = TraceabilityRepository(db_manager)  # traceability_mv, maintained by triggers
     machine_log_repo = MachineLogRepository(db_manager)
     
     # Financial Repositories
     economic_indicators_repo = EconomicIndicatorsRepository(db_manager)
     proforma_repo = ProformaRepository(db_manager)
+    settlement_snapshot_repo = SettlementSnapshotRepository(db_manager)
+    load_cost_ledger_repo = LoadCostLedgerRepository(db_manager)
     contractor_tariffs_repo = ContractorTariffsRepository(db_manager)
     client_tariffs_repo = ClientTariffsRepository(db_manager)
     disposal_site_tariffs_repo = DisposalSiteTariffsRepository(db_manager)
     distance_matrix_repo = DistanceMatrixRepository(db_manager)
+    financial_reporting_repo = FinancialReportingRepository(db_manager)
     
     # Initialize Services with dependency injection
     location_service = LocationService(site_repo, plot_repo)
@@ -145,10 +168,13 @@ def get_container() -> SimpleNamespace:
 
     # --- NEW: Specialized Logistics Services (Refactored from LogisticsDomainService) ---
     
-    # 1. State Management Service
+    # 1. State Management Service (refreshes the inbox tasks of each changed load)
+    pending_task_index = PendingTaskIndex(db_manager)
     load_state_service = LoadStateService(
         db_manager=db_manager,
-        event_bus=event_bus
+        event_bus=event_bus,
+        outbox=event_outbox,
+        task_index=pending_task_index
     )
     
     # 2. Planning Service
@@ -162,6 +188,10 @@ def get_container() -> SimpleNamespace:
     
     # 5. Trip Linking Service
     trip_linking_service = TripLinkingService(db_manager=db_manager)
+    trip_consolidation_service = TripConsolidationService(
+        db_manager=db_manager,
+        trip_linking_service=trip_linking_service
+    )
 
     # Logistics Domain Service (Legacy - maintained for backward compatibility)
     # TODO: Gradually migrate UI to use specialized services above
@@ -169,6 +199,8 @@ def get_container() -> SimpleNamespace:
         db_manager,
         compliance_service,
         agronomy_service,
+        load_state_service=load_state_service,
+        load_dispatch_service=load_dispatch_service,
     )
     
     # Machinery Service
@@ -177,26 +209,53 @@ def get_container() -> SimpleNamespace:
     # Field Reception Handler (Cross-domain integration)
     field_handler = FieldReceptionHandler(db_manager)
     
+    # Financial Reporting Service
+    financial_reporting_service = FinancialReportingService(
+        load_repo=load_repo,
+        economic_repo=economic_indicators_repo,
+        contractor_tariffs_repo=contractor_tariffs_repo,
+        client_tariffs_repo=client_tariffs_repo,
+        distance_repo=distance_matrix_repo,
+        disposal_site_tariffs_repo=disposal_site_tariffs_repo,
+        proforma_repo=proforma_repo,  # New: Proforma repository for payment states
+        snapshot_repo=settlement_snapshot_repo,  # Frozen settlements for closed proformas
+        ledger_repo=load_cost_ledger_repo,  # Settlements read it; written by CostingListener and scripts/rebuild_cost_ledger.py
+        reporting_repo=financial_reporting_repo
+    )
+    
     # Satellite Listeners (Phase 3)
     maintenance_listener = MaintenanceListener(db_manager)
     compliance_listener = ComplianceListener(db_manager)
-    costing_listener = CostingListener(db_manager)
+    costing_listener = CostingListener(db_manager, reporting_service=financial_reporting_service)
     
     # Register Event Listeners
+    # Load events come from the outbox (durable subscriber names key their offsets);
+    # machine work events still go through the in-process bus. The load handlers
+    # also stay on the bus for publishers without outbox (LoadStateService built
+    # without one publishes after commit, transition_many as a single batch event).
     # 1. Agronomy
+    outbox_relay.subscribe('agronomy.field_reception', EventTypes.LOAD_ARRIVED_AT_FIELD, field_handler.handle_load_arrived_at_field)
     event_bus.subscribe(EventTypes.LOAD_ARRIVED_AT_FIELD, field_handler.handle_load_arrived_at_field)
     
     # 2. Maintenance
+    outbox_relay.subscribe('maintenance', EventTypes.LOAD_STATUS_CHANGED, maintenance_listener.handle_load_completed)
     event_bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, maintenance_listener.handle_load_completed)
+    event_bus.subscribe(EventTypes.LOAD_STATUS_CHANGED_BATCH, expand_status_batch(maintenance_listener.handle_load_completed))
     event_bus.subscribe(EventTypes.MACHINE_WORK_RECORDED, maintenance_listener.handle_machine_work)
     
     # 3. Compliance
+    outbox_relay.subscribe('compliance', EventTypes.LOAD_STATUS_CHANGED, compliance_listener.handle_load_completed)
     event_bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, compliance_listener.handle_load_completed)
+    event_bus.subscribe(EventTypes.LOAD_STATUS_CHANGED_BATCH, expand_status_batch(compliance_listener.handle_load_completed))
     
     # 4. Finance
+    outbox_relay.subscribe('costing', EventTypes.LOAD_STATUS_CHANGED, costing_listener.handle_load_completed)
     event_bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, costing_listener.handle_load_completed)
+    event_bus.subscribe(EventTypes.LOAD_STATUS_CHANGED_BATCH, expand_status_batch(costing_listener.handle_load_completed))
     event_bus.subscribe(EventTypes.MACHINE_WORK_RECORDED, costing_listener.handle_machine_work)
     
+    outbox_relay.start()
+    
     # Master Disposal Service - debe crearse antes del alias
     master_disposal_service = DisposalService(db_manager)
     
@@ -227,10 +286,10 @@ def get_container() -> SimpleNamespace:
     treatment_service = TreatmentService(db_manager)
     
     # Reporting Service
-    reporting_service = ReportingService(reporting_repo)
+    reporting_service = ReportingService(reporting_repo, daily_ops_rollup_repo)
     
     # Dashboard Service
-    dashboard_service = DashboardService(db_manager)
+    dashboard_service = DashboardService(db_manager, daily_ops_rollup_repo)
     
     # Auth Service
     auth_service = AuthService(user_repo)
@@ -250,17 +309,12 @@ def get_container() -> SimpleNamespace:
     )
 
     # Task Resolver (UI Service)
-    task_resolver = TaskResolver(load_repo, machine_log_repo)
+    task_resolver = TaskResolver(load_repo, machine_log_repo, pending_task_index)
     
-    # Financial Reporting Service
-    financial_reporting_service = FinancialReportingService(
-        load_repo=load_repo,
-        economic_repo=economic_indicators_repo,
-        contractor_tariffs_repo=contractor_tariffs_repo,
-        client_tariffs_repo=client_tariffs_repo,
-        distance_repo=distance_matrix_repo,
-        disposal_site_tariffs_repo=disposal_site_tariffs_repo,
-        proforma_repo=proforma_repo  # New: Proforma repository for payment states
+    # Transport Segment Costing (linked trips T1/T2)
+    segment_costing_service = SegmentCostingService(
+        reporting_repo=financial_reporting_repo,
+        distance_repo=distance_matrix_repo
     )
     
     # Financial Export Service
@@ -272,13 +326,17 @@ def get_container() -> SimpleNamespace:
     accounting_closure_service = AccountingClosureService(
         economic_repo=economic_indicators_repo,
         load_repo=load_repo,
-        reporting_service=financial_reporting_service
+        reporting_service=financial_reporting_service,
+        snapshot_repo=settlement_snapshot_repo,
+        proforma_repo=proforma_repo
     )
     
     # Return a simple container object with services as attributes
     return SimpleNamespace(
         db_manager=db_manager,
         event_bus=event_bus,
+        event_outbox=event_outbox,
+        outbox_relay=outbox_relay,
         location_service=location_service,
         disposal_service=disposal_service,
         disposal_app_service=disposal_app_service,
@@ -296,6 +354,7 @@ def get_container() -> SimpleNamespace:
         load_dispatch_service=load_dispatch_service,
         load_reception_service=load_reception_service,
         trip_linking_service=trip_linking_service,
+        trip_consolidation_service=trip_consolidation_service,
         
         treatment_reception_service=treatment_reception_service,
         treatment_app_service=treatment_app_service,
@@ -312,13 +371,16 @@ def get_container() -> SimpleNamespace:
         compliance_service=compliance_service,
         nitrogen_app_service=nitrogen_app_service,
         reporting_service=reporting_service,
+        traceability_repo=traceability_repo,  # Full rebuild / explicit refresh of traceability_mv
 
         agronomy_service=agronomy_service,
         machinery_service=machinery_service,  # New service
         task_resolver=task_resolver,
+        pending_task_index=pending_task_index,  # Persisted inbox tasks per role
         pickup_request_service=pickup_request_service,  # Client pickup requests
         container_tracking_service=container_tracking_service,  # DS4 container tracking
         financial_reporting_service=financial_reporting_service,  # Financial settlement reports
+        segment_costing_service=segment_costing_service,  # Transport segments (linked trips)
         financial_export_service=financial_export_service, # Financial Excel/PDF export
         accounting_closure_service=accounting_closure_service, # Accounting period closure
         
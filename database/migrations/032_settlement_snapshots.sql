@@ -0,0 +1,48 @@
+-- Migration 032: Settlement snapshots for closed proformas
+-- Purpose: Freeze the monthly settlement (transport, disposal and client rows plus totals)
+--          at accounting closure so closed periods are served without recomputation
+--          and stay immutable when master data (tariffs, distances, vehicles) changes.
+-- Keyed by proforma_code (e.g. "PROF 25-03").
+
+CREATE TABLE IF NOT EXISTS settlement_snapshots (
+    proforma_code TEXT PRIMARY KEY,
+    period_year INTEGER NOT NULL,
+    period_month INTEGER NOT NULL CHECK (period_month >= 1 AND period_month <= 12),
+
+    -- cycle_info dict as returned by FinancialReportingService (JSON)
+    cycle_info TEXT NOT NULL DEFAULT '{}',
+
+    -- Column order per section: {"CONTRACTOR": [...], "DISPOSAL": [...], "CLIENT": [...]}
+    section_columns TEXT NOT NULL DEFAULT '{}',
+
+    -- Totals (UF)
+    total_transport_costs_uf REAL NOT NULL DEFAULT 0,
+    total_disposal_costs_uf REAL NOT NULL DEFAULT 0,
+    total_costs_uf REAL NOT NULL DEFAULT 0,
+    total_revenue_uf REAL NOT NULL DEFAULT 0,
+
+    -- Audit fields
+    closed_by INTEGER,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    UNIQUE(period_year, period_month)
+);
+
+CREATE TABLE IF NOT EXISTS settlement_snapshot_rows (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    proforma_code TEXT NOT NULL,
+    section TEXT NOT NULL CHECK (section IN ('CONTRACTOR', 'DISPOSAL', 'CLIENT')),
+    row_order INTEGER NOT NULL,
+    load_id INTEGER,
+
+    -- Settlement row as JSON object (DataFrame record)
+    row_data TEXT NOT NULL,
+
+    FOREIGN KEY (proforma_code) REFERENCES settlement_snapshots(proforma_code) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_settlement_snapshot_rows_section
+ON settlement_snapshot_rows(proforma_code, section, row_order);
+
+CREATE INDEX IF NOT EXISTS idx_settlement_snapshot_rows_load
+ON settlement_snapshot_rows(load_id);
@@ -0,0 +1,7 @@
+-- Migration 033: Row versions for optimistic concurrency on loads
+-- Purpose: Every UPDATE through LoadRepository is a compare-and-swap
+--          (WHERE id = ? AND version = ?) that increments the version, so two
+--          sessions acting on the same load (e.g. driver acceptance and gate
+--          keeper) detect the conflict instead of silently losing a write.
+
+ALTER TABLE loads ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,31 @@
+-- Migration 034: Transactional outbox for domain events
+-- Purpose: Load transitions append their events to event_outbox in the same
+--          transaction as the status change, so an event exists if and only if
+--          the transition committed. OutboxRelay delivers them to durable
+--          subscribers (compliance, costing, ...) in batches and records each
+--          subscriber's last delivered event in event_subscriber_offsets:
+--          at-least-once delivery, and replay by moving an offset back.
+
+CREATE TABLE IF NOT EXISTS event_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    aggregate_id INTEGER, -- load_id when the payload carries one
+
+    -- Event.data as JSON object
+    payload TEXT NOT NULL DEFAULT '{}',
+
+    occurred_at DATETIME NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_outbox_type
+ON event_outbox(event_type, id);
+
+CREATE INDEX IF NOT EXISTS idx_event_outbox_aggregate
+ON event_outbox(aggregate_id, id);
+
+CREATE TABLE IF NOT EXISTS event_subscriber_offsets (
+    subscriber TEXT PRIMARY KEY,
+    last_event_id INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,32 @@
+-- Migration 035: Per-load cost ledger
+-- Purpose: CostingListener prices each load when it completes with the same
+--          rules as the monthly settlement (proforma tariffs by vehicle type,
+--          minimum billable weights, distance matrix, client and disposal site
+--          tariffs) and stores one row per amount. Period totals and live
+--          margins are then a SUM ... GROUP BY over this table.
+-- entry_type: TRANSPORT (contractor cost), DISPOSAL (site cost), REVENUE (client)
+-- concept: TRANSPORTE / DISPOSICION, or the client tariff concept for REVENUE
+
+CREATE TABLE IF NOT EXISTS load_cost_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    load_id INTEGER NOT NULL,
+    entry_type TEXT NOT NULL CHECK (entry_type IN ('TRANSPORT', 'DISPOSAL', 'REVENUE')),
+    concept TEXT NOT NULL,
+
+    -- Settlement period (cycle 19th to 18th) the load belongs to
+    period_year INTEGER NOT NULL,
+    period_month INTEGER NOT NULL CHECK (period_month >= 1 AND period_month <= 12),
+
+    quantity_tons REAL NOT NULL DEFAULT 0, -- Billable weight
+    distance_km REAL, -- TRANSPORT only
+    rate_uf REAL NOT NULL DEFAULT 0,
+    amount_uf REAL NOT NULL DEFAULT 0,
+
+    computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (load_id) REFERENCES loads(id) ON DELETE CASCADE,
+    UNIQUE(load_id, entry_type, concept)
+);
+
+CREATE INDEX IF NOT EXISTS idx_load_cost_ledger_period
+ON load_cost_ledger(period_year, period_month, entry_type);
@@ -0,0 +1,38 @@
+-- Migration 036: Persisted inbox task index
+-- Purpose: The inbox no longer runs every transition validator against every
+--          active load on each render. PendingTaskIndex recomputes the tasks
+--          of a load when its attributes or status change (LoadStateService)
+--          and stores one row per (load, form, role); the inbox of a role is a
+--          single indexed query.
+-- role_rank: position of the task among the pending tasks of the load visible
+--            to that role (the inbox shows the top 3 per load)
+-- pending_task_loads: version of each load the index was computed from, so
+--          writes made outside LoadStateService (planning, dispatch, reception)
+--          are detected and recomputed by PendingTaskIndex.sync()
+
+CREATE TABLE IF NOT EXISTS pending_tasks (
+    load_id INTEGER NOT NULL,
+    form_type TEXT NOT NULL,
+    allowed_role TEXT NOT NULL,
+    role_rank INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    priority TEXT NOT NULL,
+    priority_order INTEGER NOT NULL,
+    target_status TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (load_id, form_type, allowed_role),
+    FOREIGN KEY (load_id) REFERENCES loads(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_pending_tasks_role
+ON pending_tasks(allowed_role, role_rank, priority_order);
+
+CREATE TABLE IF NOT EXISTS pending_task_loads (
+    load_id INTEGER PRIMARY KEY,
+    load_version INTEGER NOT NULL DEFAULT 0,
+    indexed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (load_id) REFERENCES loads(id) ON DELETE CASCADE
+);
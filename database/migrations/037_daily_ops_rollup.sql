@@ -0,0 +1,163 @@
+-- Migration 037: Daily operations rollup
+-- Purpose: Dashboard KPIs (active loads, completed and tonnage per day, per
+--          client/facility/site) read a pre-aggregated table in O(days)
+--          instead of scanning loads with date(...) predicates that defeat
+--          every index.
+-- Maintenance: triggers on loads record every status change in the same
+--          transaction as the write, whatever service performs it:
+--          loads_in   = loads that entered `status` on `day`
+--          loads_out  = loads that left `status` on `day`
+--          net_weight_in = net weight (kg) of the loads that entered, plus
+--                          later weight corrections (booked on the day they
+--                          are made, under the load's current status)
+--          Loads currently in a status = SUM(loads_in - loads_out) over all days.
+--          Net weight is COALESCE(net_weight, gross - tare) with missing
+--          weights as 0, as in view_full_traceability and the backfill.
+--          A facility reassigned to another client moves its rows (history
+--          included) to the new client, as a rebuild would.
+-- Dimensions: 0 = none (e.g. origin is a treatment plant, no destination site)
+-- Backfill: scripts/backfill_daily_ops_rollup.py (DailyOpsRollupRepository.rebuild)
+-- Triggers are dropped and recreated so re-applying updates them.
+
+CREATE TABLE IF NOT EXISTS daily_ops_rollup (
+    day DATE NOT NULL,
+    client_id INTEGER NOT NULL DEFAULT 0,
+    facility_id INTEGER NOT NULL DEFAULT 0,
+    site_id INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+
+    loads_in INTEGER NOT NULL DEFAULT 0,
+    loads_out INTEGER NOT NULL DEFAULT 0,
+    net_weight_in REAL NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (day, client_id, facility_id, site_id, status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_daily_ops_rollup_status
+ON daily_ops_rollup(status, day);
+
+CREATE INDEX IF NOT EXISTS idx_daily_ops_rollup_client
+ON daily_ops_rollup(client_id, day);
+
+-- New load: enters its initial status
+DROP TRIGGER IF EXISTS trg_daily_ops_rollup_insert;
+CREATE TRIGGER trg_daily_ops_rollup_insert
+    AFTER INSERT ON loads
+    FOR EACH ROW
+BEGIN
+    INSERT INTO daily_ops_rollup (day, client_id, facility_id, site_id, status, loads_in, net_weight_in)
+    VALUES (
+        date('now', 'localtime'),
+        COALESCE((SELECT client_id FROM facilities WHERE id = NEW.origin_facility_id), 0),
+        COALESCE(NEW.origin_facility_id, 0),
+        COALESCE(NEW.destination_site_id, 0),
+        NEW.status,
+        1,
+        COALESCE(NEW.net_weight, (COALESCE(NEW.gross_weight, 0) - COALESCE(NEW.tare_weight, 0)))
+    )
+    ON CONFLICT (day, client_id, facility_id, site_id, status) DO UPDATE SET
+        loads_in = loads_in + 1,
+        net_weight_in = net_weight_in + excluded.net_weight_in;
+END;
+
+-- Status transition (or origin/destination change): leaves the old key, enters the new one
+DROP TRIGGER IF EXISTS trg_daily_ops_rollup_update;
+CREATE TRIGGER trg_daily_ops_rollup_update
+    AFTER UPDATE OF status, origin_facility_id, destination_site_id ON loads
+    FOR EACH ROW
+    WHEN OLD.status IS NOT NEW.status
+      OR OLD.origin_facility_id IS NOT NEW.origin_facility_id
+      OR OLD.destination_site_id IS NOT NEW.destination_site_id
+BEGIN
+    INSERT INTO daily_ops_rollup (day, client_id, facility_id, site_id, status, loads_out)
+    VALUES (
+        date('now', 'localtime'),
+        COALESCE((SELECT client_id FROM facilities WHERE id = OLD.origin_facility_id), 0),
+        COALESCE(OLD.origin_facility_id, 0),
+        COALESCE(OLD.destination_site_id, 0),
+        OLD.status,
+        1
+    )
+    ON CONFLICT (day, client_id, facility_id, site_id, status) DO UPDATE SET
+        loads_out = loads_out + 1;
+
+    INSERT INTO daily_ops_rollup (day, client_id, facility_id, site_id, status, loads_in, net_weight_in)
+    VALUES (
+        date('now', 'localtime'),
+        COALESCE((SELECT client_id FROM facilities WHERE id = NEW.origin_facility_id), 0),
+        COALESCE(NEW.origin_facility_id, 0),
+        COALESCE(NEW.destination_site_id, 0),
+        NEW.status,
+        1,
+        COALESCE(NEW.net_weight, (COALESCE(NEW.gross_weight, 0) - COALESCE(NEW.tare_weight, 0)))
+    )
+    ON CONFLICT (day, client_id, facility_id, site_id, status) DO UPDATE SET
+        loads_in = loads_in + 1,
+        net_weight_in = net_weight_in + excluded.net_weight_in;
+END;
+
+-- Deleted load: leaves its status
+DROP TRIGGER IF EXISTS trg_daily_ops_rollup_delete;
+CREATE TRIGGER trg_daily_ops_rollup_delete
+    AFTER DELETE ON loads
+    FOR EACH ROW
+BEGIN
+    INSERT INTO daily_ops_rollup (day, client_id, facility_id, site_id, status, loads_out)
+    VALUES (
+        date('now', 'localtime'),
+        COALESCE((SELECT client_id FROM facilities WHERE id = OLD.origin_facility_id), 0),
+        COALESCE(OLD.origin_facility_id, 0),
+        COALESCE(OLD.destination_site_id, 0),
+        OLD.status,
+        1
+    )
+    ON CONFLICT (day, client_id, facility_id, site_id, status) DO UPDATE SET
+        loads_out = loads_out + 1;
+END;
+
+-- Weight correction without a transition: book the net weight delta today
+DROP TRIGGER IF EXISTS trg_daily_ops_rollup_weight;
+CREATE TRIGGER trg_daily_ops_rollup_weight
+    AFTER UPDATE OF net_weight, gross_weight, tare_weight ON loads
+    FOR EACH ROW
+    WHEN OLD.status IS NEW.status
+      AND OLD.origin_facility_id IS NEW.origin_facility_id
+      AND OLD.destination_site_id IS NEW.destination_site_id
+      AND COALESCE(OLD.net_weight, (COALESCE(OLD.gross_weight, 0) - COALESCE(OLD.tare_weight, 0)))
+          IS NOT COALESCE(NEW.net_weight, (COALESCE(NEW.gross_weight, 0) - COALESCE(NEW.tare_weight, 0)))
+BEGIN
+    INSERT INTO daily_ops_rollup (day, client_id, facility_id, site_id, status, net_weight_in)
+    VALUES (
+        date('now', 'localtime'),
+        COALESCE((SELECT client_id FROM facilities WHERE id = NEW.origin_facility_id), 0),
+        COALESCE(NEW.origin_facility_id, 0),
+        COALESCE(NEW.destination_site_id, 0),
+        NEW.status,
+        COALESCE(NEW.net_weight, (COALESCE(NEW.gross_weight, 0) - COALESCE(NEW.tare_weight, 0)))
+          - COALESCE(OLD.net_weight, (COALESCE(OLD.gross_weight, 0) - COALESCE(OLD.tare_weight, 0)))
+    )
+    ON CONFLICT (day, client_id, facility_id, site_id, status) DO UPDATE SET
+        net_weight_in = net_weight_in + excluded.net_weight_in;
+END;
+
+-- Facility reassigned to another client: move its rows to the new client
+DROP TRIGGER IF EXISTS trg_daily_ops_rollup_facility_client;
+CREATE TRIGGER trg_daily_ops_rollup_facility_client
+    AFTER UPDATE OF client_id ON facilities
+    FOR EACH ROW
+    WHEN OLD.client_id IS NOT NEW.client_id
+BEGIN
+    INSERT INTO daily_ops_rollup (day, client_id, facility_id, site_id, status, loads_in, loads_out, net_weight_in)
+    SELECT day, COALESCE(NEW.client_id, 0), facility_id, site_id, status,
+           SUM(loads_in), SUM(loads_out), SUM(net_weight_in)
+    FROM daily_ops_rollup
+    WHERE facility_id = NEW.id AND client_id != COALESCE(NEW.client_id, 0)
+    GROUP BY day, facility_id, site_id, status
+    ON CONFLICT (day, client_id, facility_id, site_id, status) DO UPDATE SET
+        loads_in = loads_in + excluded.loads_in,
+        loads_out = loads_out + excluded.loads_out,
+        net_weight_in = net_weight_in + excluded.net_weight_in;
+
+    DELETE FROM daily_ops_rollup
+    WHERE facility_id = NEW.id AND client_id != COALESCE(NEW.client_id, 0);
+END;
@@ -0,0 +1,8 @@
+-- Migration 038: Index for fleet board delta polling
+-- Purpose: ReportingRepository.get_fleet_monitoring_changes reads only the
+--          loads changed since a client-held watermark
+--          (updated_at >= ? OR status history id > ?), so a fleet board left
+--          open all day does not repeat the full six-way join on every refresh.
+
+CREATE INDEX IF NOT EXISTS idx_loads_updated_at
+ON loads(updated_at);
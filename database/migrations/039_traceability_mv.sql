@@ -0,0 +1,232 @@
+-- Migration 039: Materialized traceability table
+-- Purpose: The client portal read view_full_traceability, an eight-way LEFT
+--          JOIN over every load, on each open. traceability_mv stores one
+--          denormalized row per load (the view columns plus the dimension
+--          ids) with indexes on client, dispatch date and status.
+-- Maintenance: triggers refresh only the affected rows, in the same
+--          transaction as the write:
+--          - loads insert/update: re-read that load's row through the joins
+--          - loads delete: drop its row
+--          - name changes in clients, facilities, batches, sites, drivers,
+--            contractors and vehicles: rewrite the denormalized columns of
+--            the rows that reference the changed record
+--          view_full_traceability is kept for ad-hoc queries.
+-- Backfill: the migration ends by materializing every existing load (same
+--          SELECT as TraceabilityRepository.SOURCE_QUERY), so the client
+--          portal has the full history as soon as it is applied.
+-- Rebuild: scripts/rebuild_traceability_mv.py (TraceabilityRepository.rebuild)
+
+CREATE TABLE IF NOT EXISTS traceability_mv (
+    load_id INTEGER PRIMARY KEY,
+    ticket_number TEXT NOT NULL DEFAULT '',
+    guide_number TEXT NOT NULL DEFAULT '',
+    status TEXT,
+    requested_date DATETIME,
+    scheduled_date DATETIME,
+    dispatch_time DATETIME,
+    arrival_time DATETIME,
+    weight_gross REAL,
+    weight_tare REAL,
+    weight_net REAL,
+
+    client_id INTEGER,
+    client_name TEXT,
+    facility_id INTEGER,
+    facility_name TEXT,
+    batch_id INTEGER,
+    batch_code TEXT,
+    class_type TEXT,
+    site_id INTEGER,
+    site_name TEXT,
+    site_region TEXT,
+    driver_id INTEGER,
+    driver_name TEXT,
+    driver_rut TEXT,
+    vehicle_id INTEGER,
+    license_plate TEXT,
+    contractor_id INTEGER,
+    contractor_name TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_client
+ON traceability_mv(client_id, dispatch_time);
+
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_dispatch
+ON traceability_mv(dispatch_time);
+
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_status
+ON traceability_mv(status, dispatch_time);
+
+-- Dimension lookups used by the master-data triggers
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_facility ON traceability_mv(facility_id);
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_batch ON traceability_mv(batch_id);
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_site ON traceability_mv(site_id);
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_driver ON traceability_mv(driver_id);
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_vehicle ON traceability_mv(vehicle_id);
+CREATE INDEX IF NOT EXISTS idx_traceability_mv_contractor ON traceability_mv(contractor_id);
+
+-- New load: materialize its row
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_load_insert
+    AFTER INSERT ON loads
+    FOR EACH ROW
+BEGIN
+    INSERT OR REPLACE INTO traceability_mv (
+        load_id, ticket_number, guide_number, status, requested_date, scheduled_date,
+        dispatch_time, arrival_time, weight_gross, weight_tare, weight_net,
+        client_id, client_name, facility_id, facility_name, batch_id, batch_code, class_type,
+        site_id, site_name, site_region, driver_id, driver_name, driver_rut,
+        vehicle_id, license_plate, contractor_id, contractor_name
+    )
+    SELECT
+        l.id, COALESCE(l.ticket_number, ''), COALESCE(l.guide_number, ''), l.status,
+        l.requested_date, l.scheduled_date, l.dispatch_time, l.arrival_time,
+        l.gross_weight, l.tare_weight,
+        COALESCE(l.net_weight, (COALESCE(l.gross_weight, 0) - COALESCE(l.tare_weight, 0))),
+        c.id, c.name, f.id, f.name, b.id, b.batch_code, b.class_type,
+        s.id, s.name, s.region, dr.id, dr.name, dr.rut,
+        v.id, v.license_plate, ctr.id, ctr.name
+    FROM loads l
+    LEFT JOIN facilities f ON l.origin_facility_id = f.id
+    LEFT JOIN clients c ON f.client_id = c.id
+    LEFT JOIN batches b ON l.batch_id = b.id
+    LEFT JOIN sites s ON l.destination_site_id = s.id
+    LEFT JOIN drivers dr ON l.driver_id = dr.id
+    LEFT JOIN contractors ctr ON dr.contractor_id = ctr.id
+    LEFT JOIN vehicles v ON l.vehicle_id = v.id
+    WHERE l.id = NEW.id;
+END;
+
+-- Load update touching a materialized column: re-read its row
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_load_update
+    AFTER UPDATE OF ticket_number, guide_number, status, requested_date, scheduled_date,
+        dispatch_time, arrival_time, gross_weight, tare_weight, net_weight,
+        origin_facility_id, batch_id, destination_site_id, driver_id, vehicle_id
+    ON loads
+    FOR EACH ROW
+BEGIN
+    INSERT OR REPLACE INTO traceability_mv (
+        load_id, ticket_number, guide_number, status, requested_date, scheduled_date,
+        dispatch_time, arrival_time, weight_gross, weight_tare, weight_net,
+        client_id, client_name, facility_id, facility_name, batch_id, batch_code, class_type,
+        site_id, site_name, site_region, driver_id, driver_name, driver_rut,
+        vehicle_id, license_plate, contractor_id, contractor_name
+    )
+    SELECT
+        l.id, COALESCE(l.ticket_number, ''), COALESCE(l.guide_number, ''), l.status,
+        l.requested_date, l.scheduled_date, l.dispatch_time, l.arrival_time,
+        l.gross_weight, l.tare_weight,
+        COALESCE(l.net_weight, (COALESCE(l.gross_weight, 0) - COALESCE(l.tare_weight, 0))),
+        c.id, c.name, f.id, f.name, b.id, b.batch_code, b.class_type,
+        s.id, s.name, s.region, dr.id, dr.name, dr.rut,
+        v.id, v.license_plate, ctr.id, ctr.name
+    FROM loads l
+    LEFT JOIN facilities f ON l.origin_facility_id = f.id
+    LEFT JOIN clients c ON f.client_id = c.id
+    LEFT JOIN batches b ON l.batch_id = b.id
+    LEFT JOIN sites s ON l.destination_site_id = s.id
+    LEFT JOIN drivers dr ON l.driver_id = dr.id
+    LEFT JOIN contractors ctr ON dr.contractor_id = ctr.id
+    LEFT JOIN vehicles v ON l.vehicle_id = v.id
+    WHERE l.id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_load_delete
+    AFTER DELETE ON loads
+    FOR EACH ROW
+BEGIN
+    DELETE FROM traceability_mv WHERE load_id = OLD.id;
+END;
+
+-- Master data: rewrite the denormalized columns of the referencing rows
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_client_update
+    AFTER UPDATE OF name ON clients
+    FOR EACH ROW
+    WHEN OLD.name IS NOT NEW.name
+BEGIN
+    UPDATE traceability_mv SET client_name = NEW.name WHERE client_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_facility_update
+    AFTER UPDATE OF name, client_id ON facilities
+    FOR EACH ROW
+    WHEN OLD.name IS NOT NEW.name OR OLD.client_id IS NOT NEW.client_id
+BEGIN
+    UPDATE traceability_mv SET
+        facility_name = NEW.name,
+        client_id = (SELECT id FROM clients WHERE id = NEW.client_id),
+        client_name = (SELECT name FROM clients WHERE id = NEW.client_id)
+    WHERE facility_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_batch_update
+    AFTER UPDATE OF batch_code, class_type ON batches
+    FOR EACH ROW
+    WHEN OLD.batch_code IS NOT NEW.batch_code OR OLD.class_type IS NOT NEW.class_type
+BEGIN
+    UPDATE traceability_mv SET batch_code = NEW.batch_code, class_type = NEW.class_type
+    WHERE batch_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_site_update
+    AFTER UPDATE OF name, region ON sites
+    FOR EACH ROW
+    WHEN OLD.name IS NOT NEW.name OR OLD.region IS NOT NEW.region
+BEGIN
+    UPDATE traceability_mv SET site_name = NEW.name, site_region = NEW.region
+    WHERE site_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_driver_update
+    AFTER UPDATE OF name, rut, contractor_id ON drivers
+    FOR EACH ROW
+    WHEN OLD.name IS NOT NEW.name OR OLD.rut IS NOT NEW.rut
+      OR OLD.contractor_id IS NOT NEW.contractor_id
+BEGIN
+    UPDATE traceability_mv SET
+        driver_name = NEW.name,
+        driver_rut = NEW.rut,
+        contractor_id = (SELECT id FROM contractors WHERE id = NEW.contractor_id),
+        contractor_name = (SELECT name FROM contractors WHERE id = NEW.contractor_id)
+    WHERE driver_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_contractor_update
+    AFTER UPDATE OF name ON contractors
+    FOR EACH ROW
+    WHEN OLD.name IS NOT NEW.name
+BEGIN
+    UPDATE traceability_mv SET contractor_name = NEW.name WHERE contractor_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_traceability_mv_vehicle_update
+    AFTER UPDATE OF license_plate ON vehicles
+    FOR EACH ROW
+    WHEN OLD.license_plate IS NOT NEW.license_plate
+BEGIN
+    UPDATE traceability_mv SET license_plate = NEW.license_plate WHERE vehicle_id = NEW.id;
+END;
+
+-- Backfill: materialize the loads that existed before the triggers
+INSERT OR REPLACE INTO traceability_mv (
+    load_id, ticket_number, guide_number, status, requested_date, scheduled_date,
+    dispatch_time, arrival_time, weight_gross, weight_tare, weight_net,
+    client_id, client_name, facility_id, facility_name, batch_id, batch_code, class_type,
+    site_id, site_name, site_region, driver_id, driver_name, driver_rut,
+    vehicle_id, license_plate, contractor_id, contractor_name
+)
+SELECT
+    l.id, COALESCE(l.ticket_number, ''), COALESCE(l.guide_number, ''), l.status,
+    l.requested_date, l.scheduled_date, l.dispatch_time, l.arrival_time,
+    l.gross_weight, l.tare_weight,
+    COALESCE(l.net_weight, (COALESCE(l.gross_weight, 0) - COALESCE(l.tare_weight, 0))),
+    c.id, c.name, f.id, f.name, b.id, b.batch_code, b.class_type,
+    s.id, s.name, s.region, dr.id, dr.name, dr.rut,
+    v.id, v.license_plate, ctr.id, ctr.name
+FROM loads l
+LEFT JOIN facilities f ON l.origin_facility_id = f.id
+LEFT JOIN clients c ON f.client_id = c.id
+LEFT JOIN batches b ON l.batch_id = b.id
+LEFT JOIN sites s ON l.destination_site_id = s.id
+LEFT JOIN drivers dr ON l.driver_id = dr.id
+LEFT JOIN contractors ctr ON dr.contractor_id = ctr.id
+LEFT JOIN vehicles v ON l.vehicle_id = v.id;
@@ -0,0 +1,24 @@
+-- Migration 040: Failed outbox deliveries and parked events
+-- Purpose: A subscriber stops at the first event its handler fails, so a
+--          poison event blocked it forever (retried every relay cycle).
+--          event_delivery_failures records the attempts per (subscriber,
+--          event): OutboxRelay waits an exponential backoff before retrying,
+--          and after max_attempts failures parks the event (dead letter,
+--          parked_at set) and moves the subscriber's offset past it.
+--          A successful retry deletes the row; parked rows are kept for
+--          inspection and re-delivery via OutboxRelay.replay().
+
+CREATE TABLE IF NOT EXISTS event_delivery_failures (
+    subscriber TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at DATETIME,
+    parked_at DATETIME, -- NULL while the event is still being retried
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (subscriber, event_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_delivery_failures_parked
+ON event_delivery_failures(parked_at, subscriber);
@@ -0,0 +1,21 @@
+-- Migration 041: Applied meter increments per asset
+-- Purpose: MaintenanceListener adds each completed load's route distance to
+--          the vehicle odometer (and each machine log's hours to the
+--          hourmeter). Outbox delivery is at-least-once and replay() re-sends
+--          old events, so a plain "current_odometer += distance" counted a
+--          redelivered load twice. Each increment is recorded here, keyed by
+--          its source, in the same transaction as the meter update: a
+--          duplicate source hits the UNIQUE constraint and is skipped.
+
+CREATE TABLE IF NOT EXISTS asset_meter_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asset_id INTEGER NOT NULL,
+    source_type TEXT NOT NULL, -- 'LOAD' (load_id) or 'MACHINE_LOG' (machine_logs.id)
+    source_id INTEGER NOT NULL,
+    strategy TEXT NOT NULL, -- 'BY_KM' or 'BY_HOURS'
+    increment REAL NOT NULL,
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    UNIQUE (asset_id, source_type, source_id),
+    FOREIGN KEY (asset_id) REFERENCES vehicles(id)
+);
@@ -0,0 +1,283 @@
+-- Migration 042: Change counters for the settlement fingerprint
+-- Purpose: FinancialReportingRepository.get_settlement_fingerprint versioned
+--          each table with COUNT(*), MAX(id) and MAX(updated_at). updated_at
+--          has CURRENT_TIMESTAMP (second) resolution, so a second edit to an
+--          existing row within the same second left the fingerprint
+--          unchanged and get_monthly_settlement served a stale memo.
+--          Triggers now count every insert, update and delete of the tables
+--          that feed a settlement, in the same transaction as the write;
+--          the counter is part of the fingerprint. load_cost_ledger is
+--          counted too: get_monthly_settlement aggregates it.
+-- The loads counter is table-wide: any load write invalidates the memo of
+-- every open period (each one is recomputed only when it is read again).
+
+CREATE TABLE IF NOT EXISTS table_change_counters (
+    table_name TEXT PRIMARY KEY,
+    changes INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO table_change_counters (table_name) VALUES
+    ('loads'),
+    ('client_tariffs'),
+    ('disposal_site_tariffs'),
+    ('proformas'),
+    ('economic_indicators'),
+    ('distance_matrix'),
+    ('vehicles'),
+    ('facilities'),
+    ('clients'),
+    ('sites'),
+    ('treatment_plants'),
+    ('load_cost_ledger');
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_loads_insert
+    AFTER INSERT ON loads
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'loads';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_loads_update
+    AFTER UPDATE ON loads
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'loads';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_loads_delete
+    AFTER DELETE ON loads
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'loads';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_client_tariffs_insert
+    AFTER INSERT ON client_tariffs
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'client_tariffs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_client_tariffs_update
+    AFTER UPDATE ON client_tariffs
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'client_tariffs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_client_tariffs_delete
+    AFTER DELETE ON client_tariffs
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'client_tariffs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_disposal_site_tariffs_insert
+    AFTER INSERT ON disposal_site_tariffs
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'disposal_site_tariffs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_disposal_site_tariffs_update
+    AFTER UPDATE ON disposal_site_tariffs
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'disposal_site_tariffs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_disposal_site_tariffs_delete
+    AFTER DELETE ON disposal_site_tariffs
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'disposal_site_tariffs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_proformas_insert
+    AFTER INSERT ON proformas
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'proformas';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_proformas_update
+    AFTER UPDATE ON proformas
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'proformas';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_proformas_delete
+    AFTER DELETE ON proformas
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'proformas';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_economic_indicators_insert
+    AFTER INSERT ON economic_indicators
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'economic_indicators';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_economic_indicators_update
+    AFTER UPDATE ON economic_indicators
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'economic_indicators';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_economic_indicators_delete
+    AFTER DELETE ON economic_indicators
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'economic_indicators';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_distance_matrix_insert
+    AFTER INSERT ON distance_matrix
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'distance_matrix';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_distance_matrix_update
+    AFTER UPDATE ON distance_matrix
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'distance_matrix';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_distance_matrix_delete
+    AFTER DELETE ON distance_matrix
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'distance_matrix';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_vehicles_insert
+    AFTER INSERT ON vehicles
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'vehicles';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_vehicles_update
+    AFTER UPDATE ON vehicles
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'vehicles';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_vehicles_delete
+    AFTER DELETE ON vehicles
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'vehicles';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_facilities_insert
+    AFTER INSERT ON facilities
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'facilities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_facilities_update
+    AFTER UPDATE ON facilities
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'facilities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_facilities_delete
+    AFTER DELETE ON facilities
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'facilities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_clients_insert
+    AFTER INSERT ON clients
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_clients_update
+    AFTER UPDATE ON clients
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_clients_delete
+    AFTER DELETE ON clients
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_sites_insert
+    AFTER INSERT ON sites
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'sites';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_sites_update
+    AFTER UPDATE ON sites
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'sites';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_sites_delete
+    AFTER DELETE ON sites
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'sites';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_treatment_plants_insert
+    AFTER INSERT ON treatment_plants
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'treatment_plants';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_treatment_plants_update
+    AFTER UPDATE ON treatment_plants
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'treatment_plants';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_treatment_plants_delete
+    AFTER DELETE ON treatment_plants
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'treatment_plants';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_load_cost_ledger_insert
+    AFTER INSERT ON load_cost_ledger
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'load_cost_ledger';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_load_cost_ledger_update
+    AFTER UPDATE ON load_cost_ledger
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'load_cost_ledger';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_counter_load_cost_ledger_delete
+    AFTER DELETE ON load_cost_ledger
+    FOR EACH ROW
+BEGIN
+    UPDATE table_change_counters SET changes = changes + 1 WHERE table_name = 'load_cost_ledger';
+END;
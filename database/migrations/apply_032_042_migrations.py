@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Script para aplicar las migraciones 032-042 relacionadas con:
+- Snapshots de liquidación (032) y ledger de costos por carga (035)
+- Versiones de fila en loads (033)
+- Outbox de eventos y entregas fallidas (034, 040)
+- Índice de tareas pendientes (036)
+- Rollup diario de operaciones e índice de polling (037, 038)
+- Trazabilidad materializada (039)
+- Incrementos de medidores por activo (041)
+- Contadores de cambios para la huella de liquidación (042)
+
+El contenedor registra el outbox y el relay siempre, así que sin estas
+tablas toda transición de carga falla con "no such table". Es idempotente:
+cada migración usa IF NOT EXISTS y la 033 se omite si la columna ya existe.
+Tras la 037 reconstruye el rollup diario si está vacío.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from infrastructure.persistence.database_manager import DatabaseManager
+from infrastructure.persistence.daily_ops_rollup_repository import DailyOpsRollupRepository
+from config.settings import DB_PATH
+
+MIGRATIONS = [
+    ("032", "032_settlement_snapshots.sql", "settlement_snapshots"),
+    ("033", "033_load_versions.sql", "loads.version"),
+    ("034", "034_event_outbox.sql", "event_outbox"),
+    ("035", "035_load_cost_ledger.sql", "load_cost_ledger"),
+    ("036", "036_pending_tasks.sql", "pending_tasks"),
+    ("037", "037_daily_ops_rollup.sql", "daily_ops_rollup"),
+    ("038", "038_loads_updated_at_index.sql", "idx_loads_updated_at"),
+    ("039", "039_traceability_mv.sql", "traceability_mv"),
+    ("040", "040_event_delivery_failures.sql", "event_delivery_failures"),
+    ("041", "041_asset_meter_entries.sql", "asset_meter_entries"),
+    ("042", "042_table_change_counters.sql", "table_change_counters"),
+]
+
+# Objetos que deben existir tras aplicar todas las migraciones
+EXPECTED_TABLES = [
+    "settlement_snapshots", "settlement_snapshot_rows", "event_outbox",
+    "event_subscriber_offsets", "load_cost_ledger", "pending_tasks",
+    "pending_task_loads", "daily_ops_rollup", "traceability_mv",
+    "event_delivery_failures", "asset_meter_entries", "table_change_counters",
+]
+
+
+def load_columns(conn: sqlite3.Connection) -> list:
+    return [row['name'] for row in conn.execute("PRAGMA table_info(loads)").fetchall()]
+
+
+def apply_migration(db_manager: DatabaseManager, number: str, filename: str, description: str):
+    """Aplica una migración SQL (executescript) en su propia transacción."""
+    print(f"📋 Aplicando migración {number}: {description}...")
+
+    with db_manager as conn:
+        if number == "033" and 'version' in load_columns(conn):
+            print("⏭️  Columna loads.version ya existe, se omite")
+            return
+
+        migration_path = Path(__file__).parent / filename
+        with open(migration_path, 'r', encoding='utf-8') as f:
+            sql = f.read()
+
+        # Ejecutar SQL
+        conn.executescript(sql)
+
+    print(f"✅ Migración {number} aplicada correctamente")
+
+
+def backfill_daily_ops_rollup(db_manager: DatabaseManager):
+    """Los triggers solo registran cambios futuros: el historial se reconstruye una vez."""
+    repo = DailyOpsRollupRepository(db_manager)
+    with db_manager as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM daily_ops_rollup").fetchone()[0]
+    if existing:
+        print(f"⏭️  daily_ops_rollup ya tiene {existing} filas, no se reconstruye")
+        return
+    rows = repo.rebuild()
+    print(f"✅ Rollup diario reconstruido: {rows} filas")
+
+
+def verify_migrations(db_manager: DatabaseManager) -> bool:
+    """Verifica que las migraciones se aplicaron correctamente"""
+    print("\n🔍 Verificando migraciones...")
+
+    with db_manager as conn:
+        existing = {
+            row['name'] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'index')"
+            ).fetchall()
+        }
+        columns = load_columns(conn)
+
+    ok = True
+    for table in EXPECTED_TABLES + ["idx_loads_updated_at"]:
+        if table in existing:
+            print(f"✅ {table} existe")
+        else:
+            print(f"❌ ERROR: {table} no encontrada")
+            ok = False
+
+    if 'version' in columns:
+        print("✅ Columna version agregada a loads")
+    else:
+        print("❌ ERROR: Columna version no encontrada en loads")
+        ok = False
+
+    return ok
+
+
+def main():
+    """Función principal para aplicar todas las migraciones"""
+    print("=" * 70)
+    print("🚀 APLICADOR DE MIGRACIONES 032-042")
+    print("   Outbox, ledger, rollups, trazabilidad materializada")
+    print("=" * 70)
+    print(f"\n📂 Base de datos: {DB_PATH}\n")
+
+    # Confirmar con el usuario
+    response = input("¿Desea continuar con la aplicación de migraciones? (s/n): ")
+    if response.lower() not in ('s', 'si', 'yes', 'y'):
+        print("❌ Operación cancelada por el usuario")
+        return
+
+    try:
+        db_manager = DatabaseManager(DB_PATH)
+
+        # Aplicar migraciones en orden
+        for number, filename, description in MIGRATIONS:
+            apply_migration(db_manager, number, filename, description)
+            if number == "037":
+                backfill_daily_ops_rollup(db_manager)
+
+        # Verificar
+        if verify_migrations(db_manager):
+            print("\n" + "=" * 70)
+            print("✅ TODAS LAS MIGRACIONES APLICADAS CORRECTAMENTE")
+            print("=" * 70)
+            print("\n📌 Próximos pasos:")
+            print("   1. Reiniciar la aplicación Streamlit")
+            print("   2. Poblar el ledger de los periodos abiertos:")
+            print("      python scripts/rebuild_cost_ledger.py <año> <mes>")
+            print("\n")
+        else:
+            print("\n❌ ERROR: Verificación de migraciones falló")
+            sys.exit(1)
+
+    except Exception as e:
+        print(f"\n❌ ERROR aplicando migraciones: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -36,7 +36,7 @@ class MachineLogRepository(BaseRepository[MachineLog]):
                 (machine_id,)
             )
             row = cursor.fetchone()
-            return self._map_row_to_model(dict(row)) if row else None
+            return self._map_row(row) if row else None
     
     def get_by_machine_id(self, machine_id: int) -> List[MachineLog]:
         """
@@ -57,7 +57,7 @@ class MachineLogRepository(BaseRepository[MachineLog]):
                 (machine_id,)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
     
     def get_by_site_id(self, site_id: int) -> List[MachineLog]:
         """
@@ -78,4 +78,4 @@ class MachineLogRepository(BaseRepository[MachineLog]):
                 (site_id,)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
@@ -15,4 +15,4 @@ class RegulatoryDocumentRepository(BaseRepository[RegulatoryDocument]):
                 (load_id,)
             )
             row = cursor.fetchone()
-            return self._map_row_to_model(dict(row)) if row else None
+            return self._map_row(row) if row else None
@@ -4,6 +4,7 @@ from infrastructure.events.event_bus import Event
 from infrastructure.persistence.database_manager import DatabaseManager
 from domain.compliance.repositories.regulatory_document_repository import RegulatoryDocumentRepository
 from domain.compliance.entities.regulatory_document import RegulatoryDocument
+from domain.logistics.entities.load_snapshot import LoadSnapshot
 from domain.logistics.repositories.load_repository import LoadRepository
 
 class ComplianceListener:
@@ -27,28 +28,31 @@ class ComplianceListener:
         if not load_id:
             return
             
-        # 1. Obtener datos completos de la carga (Snapshot)
-        load = self.load_repo.get_by_id(load_id)
-        if not load:
-            print(f"⚠️ Compliance: Load {load_id} not found for snapshot.")
-            return
-            
         # Verificar si ya existe para evitar duplicados
         existing = self.doc_repo.get_by_load_id(load_id)
         if existing:
             return
 
+        # 1. Datos de la carga: foto del evento (o consulta si el evento no la trae)
+        load = LoadSnapshot.from_event(event)
+        if load is None:
+            entity = self.load_repo.get_by_id(load_id)
+            if not entity:
+                print(f"⚠️ Compliance: Load {load_id} not found for snapshot.")
+                return
+            load = LoadSnapshot.from_load(entity)
+
         # Crear Snapshot (serialización simple de lo vital)
         # En producción usaríamos un serializer más robusto (Pydantic .dict() o similar)
         snapshot = {
-            'load_id': load.id,
+            'load_id': load.load_id,
             'manifest': load.manifest_code,
             'origin_id': load.origin_facility_id,
             'destination_id': load.destination_site_id,
             'weight_net': load.net_weight,
             'dates': {
-                'dispatch': load.dispatch_time.isoformat() if load.dispatch_time else None,
-                'arrival': load.arrival_time.isoformat() if load.arrival_time else None
+                'dispatch': load.dispatch_time,
+                'arrival': load.arrival_time
             },
             'attributes': load.attributes
         }
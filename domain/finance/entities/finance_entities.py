@@ -118,14 +118,24 @@ class DistanceRoute:
     
     Attributes:
         origin_id: ID del nodo de origen (siempre una Facility)
-        destination_id: ID del nodo de destino (Facility o Site)
+        destination_id: ID del nodo de destino (Facility, TreatmentPlant o Site)
         km: Distancia en kilómetros
         is_segment_link: True si es un tramo intermedio en un viaje consolidado (A→B en A→B→C)
+        destination_type: 'FACILITY', 'TREATMENT_PLANT' o 'SITE'; por defecto
+            FACILITY para enlaces y SITE para rutas directas
     """
     origin_id: int
     destination_id: int
     km: float
     is_segment_link: bool = False
+    destination_type: Optional[str] = None
+    
+    @property
+    def destination_node_type(self) -> str:
+        """Tipo del nodo de destino (explícito o inferido del tipo de tramo)."""
+        if self.destination_type:
+            return self.destination_type
+        return 'FACILITY' if self.is_segment_link else 'SITE'
     
     def __post_init__(self):
         """Validación de negocio."""
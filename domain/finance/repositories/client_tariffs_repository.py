@@ -93,3 +93,32 @@ class ClientTariffsRepository:
             )
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
+    
+    def get_effective_between(self, start_date: str, end_date: str) -> List[dict]:
+        """
+        Returns every tariff whose validity window overlaps [start_date, end_date].
+        
+        Used by settlement to match each load against the tariff that was in
+        force on its date (valid_from <= load_date <= valid_to).
+        
+        Args:
+            start_date: Period start (ISO date)
+            end_date: Period end (ISO date)
+            
+        Returns:
+            List of dicts with tariff data
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT id, client_id, concept, rate_uf,
+                           min_weight_guaranteed, valid_from, valid_to,
+                           created_at, updated_at
+                    FROM {self.table_name}
+                    WHERE valid_from <= ?
+                      AND (valid_to IS NULL OR valid_to >= ?)
+                    ORDER BY client_id, concept, valid_from""",
+                (end_date, start_date)
+            )
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
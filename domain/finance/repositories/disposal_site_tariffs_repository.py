@@ -74,6 +74,35 @@ class DisposalSiteTariffsRepository:
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
+    def get_effective_between(self, start_date: str, end_date: str) -> List[dict]:
+        """
+        Returns every disposal site tariff whose validity window overlaps
+        [start_date, end_date], including site_name from JOIN.
+        
+        Args:
+            start_date: Period start (ISO date)
+            end_date: Period end (ISO date)
+            
+        Returns:
+            List of tariff dicts
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT dst.id, dst.site_id, s.name as site_name,
+                           dst.rate_uf, dst.min_weight_guaranteed,
+                           dst.valid_from, dst.valid_to,
+                           dst.created_at, dst.updated_at
+                    FROM {self.table_name} dst
+                    JOIN sites s ON dst.site_id = s.id
+                    WHERE dst.valid_from <= ?
+                      AND (dst.valid_to IS NULL OR dst.valid_to >= ?)
+                    ORDER BY dst.site_id, dst.valid_from""",
+                (end_date, start_date)
+            )
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
     def get_by_site(self, site_id: int) -> List[dict]:
         """
         Returns all tariffs (active and historical) for a specific site.
@@ -99,4 +99,3 @@ class EconomicIndicatorsRepository:
                 f"UPDATE {self.table_name} SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE period_key = ?",
                 (new_status, period_key)
             )
-            conn.commit()
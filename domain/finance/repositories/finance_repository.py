@@ -23,7 +23,7 @@ class RateSheetRepository(BaseRepository[RateSheet]):
                 )
                 row = cursor.fetchone()
                 if row:
-                    return self._map_row_to_model(dict(row))
+                    return self._map_row(row)
             
             # Buscar default
             cursor.execute(
@@ -31,8 +31,18 @@ class RateSheetRepository(BaseRepository[RateSheet]):
                 (activity_type,)
             )
             row = cursor.fetchone()
-            return self._map_row_to_model(dict(row)) if row else None
+            return self._map_row(row) if row else None
 
 class CostRecordRepository(BaseRepository[CostRecord]):
     def __init__(self, db_manager: DatabaseManager):
         super().__init__(db_manager, CostRecord, "cost_records")
+
+    def exists_for_entity(self, entity_id: int, entity_type: str) -> bool:
+        """Indica si ya hay un costo registrado para la entidad (entregas repetidas de eventos)."""
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT 1 FROM {self.table_name} WHERE related_entity_id = ? AND related_entity_type = ? LIMIT 1",
+                (entity_id, entity_type)
+            )
+            return cursor.fetchone() is not None
@@ -1,4 +1,5 @@
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from infrastructure.persistence.database_manager import DatabaseManager
 
@@ -7,57 +8,239 @@ class FinancialReportingRepository:
     Repository for financial reporting data access.
     Encapsulates SQL queries used in financial reports.
     """
+    # Per-connection fingerprints kept for the PRAGMA data_version fast path
+    MAX_CACHED_FINGERPRINTS = 64
+
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
+        self._fingerprints: Dict[tuple, tuple] = {}
+        self._fingerprints_lock = threading.Lock()
 
-    def get_vehicle_type(self, vehicle_id: int) -> str:
-        """Get vehicle type by ID."""
-        if not vehicle_id:
-            return 'AMPLIROLL'
-        
-        try:
-            with self.db_manager as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT type FROM vehicles WHERE id = ?", (vehicle_id,))
-                row = cursor.fetchone()
-                if row and row['type']:
-                    return row['type'].upper()
-        except Exception:
-            pass
-        return 'AMPLIROLL'
+    # Settlement columns per load; vehicle type and route distance resolved by JOIN.
+    # Matrix rows start at facilities, so loads from a treatment plant get a NULL
+    # distance here and are derived by origin type in the service.
+    LOADS_QUERY = """
+        SELECT 
+            l.id,
+            l.manifest_code as manifest_number,
+            l.vehicle_id,
+            COALESCE(NULLIF(UPPER(v.type), ''), 'AMPLIROLL') as vehicle_type,
+            dm.distance_km,
+            f_origin.client_id,
+            l.status,
+            l.scheduled_date,
+            l.net_weight / 1000.0 as net_weight_tons,
+            l.origin_facility_id,
+            l.origin_treatment_plant_id,
+            l.destination_site_id,
+            l.destination_treatment_plant_id,
+            v.license_plate as vehicle_name,
+            c.name as client_name,
+            COALESCE(f_origin.name, tp_origin.name, 'N/A') as origin_name,
+            COALESCE(s.name, tp_dest.name, 'N/A') as destination_name
+        FROM loads l
+        LEFT JOIN vehicles v ON l.vehicle_id = v.id
+        LEFT JOIN facilities f_origin ON l.origin_facility_id = f_origin.id
+        LEFT JOIN clients c ON f_origin.client_id = c.id
+        LEFT JOIN treatment_plants tp_origin ON l.origin_treatment_plant_id = tp_origin.id
+        LEFT JOIN sites s ON l.destination_site_id = s.id
+        LEFT JOIN treatment_plants tp_dest ON l.destination_treatment_plant_id = tp_dest.id
+        LEFT JOIN distance_matrix dm
+            ON dm.origin_facility_id = l.origin_facility_id
+           AND dm.destination_id = COALESCE(l.destination_site_id, l.destination_treatment_plant_id)
+           AND dm.destination_type = CASE
+                   WHEN l.destination_site_id IS NOT NULL THEN 'SITE'
+                   ELSE 'TREATMENT_PLANT'
+               END
+        WHERE l.status IN ('ARRIVED', 'COMPLETED')
+    """
+
+    # Loads belong to a cycle by the calendar day of scheduled_date. Stored values
+    # are 'YYYY-MM-DD HH:MM:SS' (or ISO with 'T'), which do not compare as text
+    # against datetime bounds; every cycle query filters with date() and cycle_bounds().
+    CYCLE_FILTER = "date(l.scheduled_date) BETWEEN ? AND ?"
+
+    @staticmethod
+    def cycle_bounds(cycle_start: datetime, cycle_end: datetime) -> Tuple[str, str]:
+        """Inclusive 'YYYY-MM-DD' bounds of a cycle for CYCLE_FILTER."""
+        return cycle_start.strftime('%Y-%m-%d'), cycle_end.strftime('%Y-%m-%d')
 
     def fetch_loads_in_cycle(self, cycle_start: datetime, cycle_end: datetime) -> List[Dict[str, Any]]:
-        """Fetch completed loads within a billing cycle."""
-        query = """
+        """
+        Fetch completed loads within a billing cycle.
+
+        Vehicle type and route distance are resolved in the same query
+        (vehicles and distance_matrix joins) so settlement needs no per-load lookups.
+        vehicle_type defaults to 'AMPLIROLL'; distance_km is NULL when the route is missing.
+        """
+        query = self.LOADS_QUERY + f"""
+              AND {self.CYCLE_FILTER}
+            ORDER BY l.scheduled_date ASC
+        """
+        
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, self.cycle_bounds(cycle_start, cycle_end))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def fetch_loads_by_ids(self, load_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch specific completed loads with the same columns as fetch_loads_in_cycle
+        (per-load ledger pricing).
+        """
+        if not load_ids:
+            return []
+        placeholders = ', '.join('?' for _ in load_ids)
+        query = self.LOADS_QUERY + f"""
+              AND l.id IN ({placeholders})
+            ORDER BY l.scheduled_date ASC
+        """
+        
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, list(load_ids))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def fetch_transport_loads_in_cycle(self, cycle_start: datetime, cycle_end: datetime) -> List[Dict[str, Any]]:
+        """
+        Fetch completed loads within a billing cycle for transport segment costing.
+
+        Includes trip linking fields (trip_id, segment_type) and the origin
+        facility's is_link_point flag used to split linked trips into segments.
+        """
+        query = f"""
             SELECT 
                 l.id,
                 l.manifest_code as manifest_number,
-                l.vehicle_id,
-                f_origin.client_id,
-                l.status,
-                l.scheduled_date,
+                l.scheduled_date as date,
                 l.net_weight / 1000.0 as net_weight_tons,
+                l.segment_type,
+                l.trip_id,
                 l.origin_facility_id,
                 l.origin_treatment_plant_id,
                 l.destination_site_id,
                 l.destination_treatment_plant_id,
-                v.license_plate as vehicle_name,
-                c.name as client_name,
+                v.license_plate as vehicle_plate,
+                v.type as vehicle_type,
+                f_origin.is_link_point as origin_is_link_point,
                 COALESCE(f_origin.name, tp_origin.name, 'N/A') as origin_name,
                 COALESCE(s.name, tp_dest.name, 'N/A') as destination_name
             FROM loads l
             LEFT JOIN vehicles v ON l.vehicle_id = v.id
             LEFT JOIN facilities f_origin ON l.origin_facility_id = f_origin.id
-            LEFT JOIN clients c ON f_origin.client_id = c.id
             LEFT JOIN treatment_plants tp_origin ON l.origin_treatment_plant_id = tp_origin.id
             LEFT JOIN sites s ON l.destination_site_id = s.id
             LEFT JOIN treatment_plants tp_dest ON l.destination_treatment_plant_id = tp_dest.id
             WHERE l.status IN ('ARRIVED', 'COMPLETED')
-              AND l.scheduled_date BETWEEN ? AND ?
-            ORDER BY l.scheduled_date ASC
+              AND {self.CYCLE_FILTER}
+            ORDER BY l.scheduled_date ASC, l.trip_id ASC, l.segment_type ASC
         """
-        
+
         with self.db_manager as conn:
             cursor = conn.cursor()
-            cursor.execute(query, (cycle_start.isoformat(), cycle_end.isoformat()))
+            cursor.execute(query, self.cycle_bounds(cycle_start, cycle_end))
             return [dict(row) for row in cursor.fetchall()]
+
+    def get_settlement_fingerprint(self, cycle_start: datetime, cycle_end: datetime) -> tuple:
+        """
+        Cheap data-version fingerprint of every row that feeds a settlement.
+
+        Versions the cycle's loads, tariffs, proformas/indicators, distances,
+        vehicles and the master data joined by LOADS_QUERY (facilities carry
+        the load's client_id; clients, sites and treatment plants the names)
+        with the change counters of migration 042: triggers count every
+        insert, update and delete, so the fingerprint changes whenever a
+        recomputation could differ, even for two edits within the second
+        resolution of updated_at. The cycle's loads also keep COUNT(*),
+        MAX(id) and MAX(updated_at), scoping the loads element to the cycle.
+
+        PRAGMA data_version (commits by other connections) together with the
+        connection's own total_changes tells whether the database changed at
+        all since this connection last computed the fingerprint; if not, the
+        previous fingerprint is returned without scanning any table.
+        data_version is connection-local, so it gates the lookup but is not
+        part of the returned fingerprint.
+
+        The first element versions the cycle's loads, the last one the
+        load_cost_ledger the settlement is aggregated from; the others
+        version the reference data (tariffs, proformas, distances, master
+        data).
+        """
+        table_version = "COUNT(*) || ':' || COALESCE(MAX(id), '') || ':' || COALESCE(MAX(updated_at), '')"
+        query = f"""
+            SELECT
+                (SELECT {table_version}
+                   FROM loads l WHERE {self.CYCLE_FILTER}) || ':' || {self._changes('loads')} as loads_version,
+                {self._changes('client_tariffs')} as client_tariffs_version,
+                {self._changes('disposal_site_tariffs')} as disposal_tariffs_version,
+                {self._changes('proformas')} as proformas_version,
+                {self._changes('economic_indicators')} as indicators_version,
+                {self._changes('distance_matrix')} as distances_version,
+                {self._changes('vehicles')} as vehicles_version,
+                {self._changes('facilities')} as facilities_version,
+                {self._changes('clients')} as clients_version,
+                {self._changes('sites')} as sites_version,
+                {self._changes('treatment_plants')} as treatment_plants_version,
+                {self._changes('load_cost_ledger')} as ledger_version
+        """
+        with self.db_manager as conn:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            # Keyed by the connection object itself (not id()) so ids are never reused
+            key = (conn, cycle_start, cycle_end)
+            cached = self._fingerprints.get(key)
+            if cached and cached[0] == (data_version, conn.total_changes):
+                return cached[1]
+
+            cursor = conn.cursor()
+            cursor.execute(query, self.cycle_bounds(cycle_start, cycle_end))
+            fingerprint = tuple(cursor.fetchone())
+
+            with self._fingerprints_lock:
+                if len(self._fingerprints) >= self.MAX_CACHED_FINGERPRINTS:
+                    self._fingerprints.clear()
+                self._fingerprints[key] = ((data_version, conn.total_changes), fingerprint)
+            return fingerprint
+
+    @staticmethod
+    def _changes(table: str) -> str:
+        """Trigger-maintained change counter of a table (migration 042)."""
+        return f"(SELECT changes FROM table_change_counters WHERE table_name = '{table}')"
+
+    def fetch_stale_ledger_load_ids(
+        self,
+        year: int,
+        month: int,
+        cycle_start: datetime,
+        cycle_end: datetime
+    ) -> List[int]:
+        """
+        Loads whose load_cost_ledger entries no longer match the loads table
+        for a period:
+        - ARRIVED/COMPLETED loads of the cycle without entries in the period,
+          or modified since their entries were computed (same second included)
+        - loads with entries in the period that left the cycle or the
+          billable statuses (or were deleted)
+        """
+        query = f"""
+            SELECT l.id FROM loads l
+            WHERE l.status IN ('ARRIVED', 'COMPLETED')
+              AND {self.CYCLE_FILTER}
+              AND NOT EXISTS (
+                  SELECT 1 FROM load_cost_ledger lg
+                  WHERE lg.load_id = l.id
+                    AND lg.period_year = ? AND lg.period_month = ?
+                    AND lg.computed_at > COALESCE(datetime(l.updated_at), '')
+              )
+            UNION
+            SELECT lg.load_id FROM load_cost_ledger lg
+            LEFT JOIN loads l ON l.id = lg.load_id
+            WHERE lg.period_year = ? AND lg.period_month = ?
+              AND (l.id IS NULL
+                   OR l.status NOT IN ('ARRIVED', 'COMPLETED')
+                   OR NOT COALESCE({self.CYCLE_FILTER}, 0))
+        """
+        bounds = self.cycle_bounds(cycle_start, cycle_end)
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (*bounds, year, month, year, month, *bounds))
+            return sorted(row[0] for row in cursor.fetchall())
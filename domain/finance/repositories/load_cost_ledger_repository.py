@@ -0,0 +1,184 @@
+"""
+Repository for the per-load cost ledger.
+
+CostingListener prices every completed load with the settlement rules
+(FinancialReportingService.refresh_ledger) and stores one row per amount:
+TRANSPORT and DISPOSAL costs and REVENUE per client concept. Period totals
+and per-load margins are aggregated here with SUM ... GROUP BY instead of
+recomputing the settlement from raw loads.
+"""
+
+from typing import Dict, List, Sequence
+
+from infrastructure.persistence.database_manager import DatabaseManager
+
+
+class LoadCostLedgerRepository:
+    """
+    Repository for querying and writing the load_cost_ledger table.
+    """
+
+    ENTRY_TYPES = ('TRANSPORT', 'DISPOSAL', 'REVENUE')
+
+    COLUMNS = (
+        'load_id', 'entry_type', 'concept', 'period_year', 'period_month',
+        'quantity_tons', 'distance_km', 'rate_uf', 'amount_uf'
+    )
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.table_name = "load_cost_ledger"
+
+    def replace_for_loads(self, load_ids: Sequence[int], entries: Sequence[dict]) -> None:
+        """
+        Replaces every ledger entry of the given loads in one transaction.
+
+        Loads in load_ids without entries end up with none (e.g. no tariff
+        applies anymore), so recomputing a load is always idempotent.
+
+        Args:
+            load_ids: Loads being recomputed
+            entries: Ledger rows (dicts with COLUMNS) for those loads
+        """
+        load_ids = list(dict.fromkeys(load_ids))
+        if not load_ids:
+            return
+        placeholders = ', '.join('?' for _ in load_ids)
+        with self.db_manager as conn:
+            conn.execute(
+                f"DELETE FROM {self.table_name} WHERE load_id IN ({placeholders})",
+                load_ids
+            )
+            self._insert(conn, entries)
+
+    def replace_for_period(self, year: int, month: int, entries: Sequence[dict]) -> None:
+        """
+        Replaces the whole ledger of a settlement period in one transaction
+        (rebuild after tariff or proforma changes).
+        """
+        load_ids = list(dict.fromkeys(entry['load_id'] for entry in entries))
+        with self.db_manager as conn:
+            conn.execute(
+                f"DELETE FROM {self.table_name} WHERE period_year = ? AND period_month = ?",
+                (year, month)
+            )
+            if load_ids:
+                # Loads whose date moved into this period leave their old period
+                placeholders = ', '.join('?' for _ in load_ids)
+                conn.execute(
+                    f"DELETE FROM {self.table_name} WHERE load_id IN ({placeholders})",
+                    load_ids
+                )
+            self._insert(conn, entries)
+
+    def _insert(self, conn, entries: Sequence[dict]) -> None:
+        if not entries:
+            return
+        conn.executemany(
+            f"""INSERT INTO {self.table_name} ({', '.join(self.COLUMNS)})
+                VALUES ({', '.join('?' for _ in self.COLUMNS)})""",
+            [tuple(entry.get(column) for column in self.COLUMNS) for entry in entries]
+        )
+
+    def get_by_load(self, load_id: int) -> List[dict]:
+        """Ledger entries of one load."""
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT {', '.join(self.COLUMNS)}, computed_at
+                    FROM {self.table_name}
+                    WHERE load_id = ?
+                    ORDER BY entry_type, concept""",
+                (load_id,)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_period_totals(self, year: int, month: int) -> Dict[str, float]:
+        """
+        Settlement totals of a period (UF).
+
+        Returns:
+            Dict with total_transport_costs_uf, total_disposal_costs_uf,
+            total_costs_uf, total_revenue_uf, margin_uf and load_count
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT entry_type, SUM(amount_uf) AS amount_uf
+                    FROM {self.table_name}
+                    WHERE period_year = ? AND period_month = ?
+                    GROUP BY entry_type""",
+                (year, month)
+            )
+            amounts = {row['entry_type']: row['amount_uf'] or 0.0 for row in cursor.fetchall()}
+            cursor.execute(
+                f"""SELECT COUNT(DISTINCT load_id) FROM {self.table_name}
+                    WHERE period_year = ? AND period_month = ?""",
+                (year, month)
+            )
+            load_count = cursor.fetchone()[0]
+
+        transport = amounts.get('TRANSPORT', 0.0)
+        disposal = amounts.get('DISPOSAL', 0.0)
+        revenue = amounts.get('REVENUE', 0.0)
+        return {
+            'total_transport_costs_uf': transport,
+            'total_disposal_costs_uf': disposal,
+            'total_costs_uf': transport + disposal,
+            'total_revenue_uf': revenue,
+            'margin_uf': revenue - transport - disposal,
+            'load_count': load_count,
+        }
+
+    def get_settlement_entries(self, year: int, month: int, entry_type: str) -> List[dict]:
+        """
+        Ledger entries of one type for a period, with the load, vehicle,
+        client, origin and destination names the settlement shows.
+
+        Ordered by load date, load and concept.
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT lg.load_id, lg.concept, lg.quantity_tons, lg.distance_km,
+                           lg.rate_uf, lg.amount_uf,
+                           l.manifest_code AS manifest_number,
+                           l.scheduled_date AS date,
+                           v.license_plate AS vehicle_plate,
+                           COALESCE(NULLIF(UPPER(v.type), ''), 'AMPLIROLL') AS vehicle_type,
+                           c.name AS client_name,
+                           COALESCE(f_origin.name, tp_origin.name, 'N/A') AS origin_name,
+                           COALESCE(s.name, tp_dest.name, 'N/A') AS destination_name
+                    FROM {self.table_name} lg
+                    JOIN loads l ON l.id = lg.load_id
+                    LEFT JOIN vehicles v ON l.vehicle_id = v.id
+                    LEFT JOIN facilities f_origin ON l.origin_facility_id = f_origin.id
+                    LEFT JOIN clients c ON f_origin.client_id = c.id
+                    LEFT JOIN treatment_plants tp_origin ON l.origin_treatment_plant_id = tp_origin.id
+                    LEFT JOIN sites s ON l.destination_site_id = s.id
+                    LEFT JOIN treatment_plants tp_dest ON l.destination_treatment_plant_id = tp_dest.id
+                    WHERE lg.period_year = ? AND lg.period_month = ? AND lg.entry_type = ?
+                    ORDER BY l.scheduled_date, lg.load_id, lg.concept""",
+                (year, month, entry_type)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_load_margins(self, year: int, month: int) -> List[dict]:
+        """
+        Costs, revenue and margin per load for a period (UF), by load_id.
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT load_id,
+                           SUM(CASE WHEN entry_type = 'TRANSPORT' THEN amount_uf ELSE 0 END) AS transport_uf,
+                           SUM(CASE WHEN entry_type = 'DISPOSAL' THEN amount_uf ELSE 0 END) AS disposal_uf,
+                           SUM(CASE WHEN entry_type = 'REVENUE' THEN amount_uf ELSE 0 END) AS revenue_uf,
+                           SUM(CASE WHEN entry_type = 'REVENUE' THEN amount_uf ELSE -amount_uf END) AS margin_uf
+                    FROM {self.table_name}
+                    WHERE period_year = ? AND period_month = ?
+                    GROUP BY load_id
+                    ORDER BY load_id""",
+                (year, month)
+            )
+            return [dict(row) for row in cursor.fetchall()]
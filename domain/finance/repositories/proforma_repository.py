@@ -326,7 +326,6 @@ class ProformaRepository:
                     json.dumps(proforma.extra_indicators or {})
                 )
             )
-            conn.commit()
             return cursor.lastrowid
     
     def update(self, proforma: Proforma) -> bool:
@@ -456,7 +455,6 @@ class ProformaRepository:
                     WHERE id = ?""",
                 (proforma_id,)
             )
-            conn.commit()
         
         # Auto-create next proforma
         if auto_create_next:
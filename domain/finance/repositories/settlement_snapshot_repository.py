@@ -0,0 +1,178 @@
+"""
+Repository for persisted settlement snapshots.
+
+When an accounting period is closed, the monthly settlement (contractor,
+disposal and client rows plus totals) is frozen into settlement_snapshots /
+settlement_snapshot_rows, keyed by proforma_code. Closed periods are then
+served from here instead of being recomputed from raw loads.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from infrastructure.persistence.database_manager import DatabaseManager
+from domain.finance.entities.financial_reporting_dtos import SettlementResult
+
+
+def _json_default(value: Any) -> Any:
+    """Serializes numpy scalars and timestamps found in DataFrame records."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+
+class SettlementSnapshotRepository:
+    """
+    Repository for querying and writing the settlement snapshot tables.
+    """
+
+    SECTIONS = {
+        'CONTRACTOR': 'contractor_df',
+        'DISPOSAL': 'disposal_df',
+        'CLIENT': 'client_df',
+    }
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.table_name = "settlement_snapshots"
+        self.rows_table_name = "settlement_snapshot_rows"
+
+    def exists(self, proforma_code: str) -> bool:
+        """Returns True if a snapshot has been stored for the proforma."""
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT 1 FROM {self.table_name} WHERE proforma_code = ?",
+                (proforma_code,)
+            )
+            return cursor.fetchone() is not None
+
+    def get_by_code(self, proforma_code: str) -> Optional[SettlementResult]:
+        """
+        Rebuilds the frozen SettlementResult for a proforma.
+
+        Args:
+            proforma_code: Proforma code (e.g., "PROF 25-03")
+
+        Returns:
+            SettlementResult with the stored rows and totals, or None if the
+            period has no snapshot
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT proforma_code, cycle_info, section_columns,
+                           total_transport_costs_uf, total_disposal_costs_uf,
+                           total_costs_uf, total_revenue_uf
+                    FROM {self.table_name}
+                    WHERE proforma_code = ?""",
+                (proforma_code,)
+            )
+            header = cursor.fetchone()
+            if not header:
+                return None
+
+            cursor.execute(
+                f"""SELECT section, row_data
+                    FROM {self.rows_table_name}
+                    WHERE proforma_code = ?
+                    ORDER BY section, row_order""",
+                (proforma_code,)
+            )
+            rows = cursor.fetchall()
+
+        records: Dict[str, List[dict]] = {section: [] for section in self.SECTIONS}
+        for row in rows:
+            records[row['section']].append(json.loads(row['row_data']))
+
+        section_columns = json.loads(header['section_columns'] or '{}')
+        frames = {
+            attr: pd.DataFrame.from_records(records[section], columns=section_columns.get(section))
+            for section, attr in self.SECTIONS.items()
+        }
+
+        return SettlementResult(
+            cycle_info=json.loads(header['cycle_info'] or '{}'),
+            total_transport_costs_uf=header['total_transport_costs_uf'],
+            total_disposal_costs_uf=header['total_disposal_costs_uf'],
+            total_costs_uf=header['total_costs_uf'],
+            total_revenue_uf=header['total_revenue_uf'],
+            **frames
+        )
+
+    def save(
+        self,
+        settlement: SettlementResult,
+        year: int,
+        month: int,
+        closed_by: Optional[int] = None
+    ) -> None:
+        """
+        Persists a settlement snapshot (header and all rows) in one transaction.
+
+        An existing snapshot for the same proforma is replaced.
+
+        Args:
+            settlement: Settlement to freeze
+            year: Period year
+            month: Period month
+            closed_by: ID of the user performing the closure
+        """
+        proforma_code = settlement.cycle_info['proforma_code']
+        cycle_info = dict(settlement.cycle_info, is_closed=True)
+
+        section_columns = {}
+        row_params = []
+        for section, attr in self.SECTIONS.items():
+            df: pd.DataFrame = getattr(settlement, attr)
+            section_columns[section] = list(df.columns)
+            has_load_id = 'load_id' in df.columns
+            for order, record in enumerate(df.to_dict('records')):
+                load_id = record.get('load_id') if has_load_id else None
+                row_params.append((
+                    proforma_code,
+                    section,
+                    order,
+                    int(load_id) if load_id is not None and not pd.isna(load_id) else None,
+                    json.dumps(record, default=_json_default)
+                ))
+
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"DELETE FROM {self.rows_table_name} WHERE proforma_code = ?",
+                (proforma_code,)
+            )
+            cursor.execute(
+                f"DELETE FROM {self.table_name} WHERE proforma_code = ?",
+                (proforma_code,)
+            )
+            cursor.execute(
+                f"""INSERT INTO {self.table_name} (
+                        proforma_code, period_year, period_month,
+                        cycle_info, section_columns,
+                        total_transport_costs_uf, total_disposal_costs_uf,
+                        total_costs_uf, total_revenue_uf, closed_by
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    proforma_code, year, month,
+                    json.dumps(cycle_info, default=_json_default),
+                    json.dumps(section_columns),
+                    float(settlement.total_transport_costs_uf),
+                    float(settlement.total_disposal_costs_uf),
+                    float(settlement.total_costs_uf),
+                    float(settlement.total_revenue_uf),
+                    closed_by
+                )
+            )
+            cursor.executemany(
+                f"""INSERT INTO {self.rows_table_name}
+                        (proforma_code, section, row_order, load_id, row_data)
+                    VALUES (?, ?, ?, ?, ?)""",
+                row_params
+            )
@@ -6,12 +6,14 @@ This involves:
 1. Validating that the period is ready for closure (Indicators exist).
 2. Locking the Economic Cycle (is_closed = True).
 3. Freezing all loads in the cycle (financial_status = 'CLOSED').
+4. Persisting the settlement snapshot served for the closed period.
 """
 
-from typing import List, Tuple
-from datetime import datetime
+from typing import List
 
 from domain.finance.repositories.economic_indicators_repository import EconomicIndicatorsRepository
+from domain.finance.repositories.proforma_repository import ProformaRepository
+from domain.finance.repositories.settlement_snapshot_repository import SettlementSnapshotRepository
 from domain.logistics.repositories.load_repository import LoadRepository
 from domain.finance.services.financial_reporting_service import FinancialReportingService
 
@@ -24,13 +26,17 @@ class AccountingClosureService:
         self,
         economic_repo: EconomicIndicatorsRepository,
         load_repo: LoadRepository,
-        reporting_service: FinancialReportingService
+        reporting_service: FinancialReportingService,
+        snapshot_repo: SettlementSnapshotRepository = None,
+        proforma_repo: ProformaRepository = None
     ):
         self.economic_repo = economic_repo
         self.load_repo = load_repo
         self.reporting_service = reporting_service
+        self.snapshot_repo = snapshot_repo
+        self.proforma_repo = proforma_repo
         
-    def close_period(self, year: int, month: int, user_id: int) -> dict:
+    def close_period(self, year: int, month: int, user_id: int, auto_create_next: bool = False) -> dict:
         """
         Executes the closure of an accounting period.
         
@@ -40,6 +46,7 @@ class AccountingClosureService:
             year: Year of the period
             month: Month of the period
             user_id: ID of the user performing the closure
+            auto_create_next: Also create the next month's proforma (Proforma master UI)
             
         Returns:
             Summary dict with 'loads_closed_count' and 'status'
@@ -48,44 +55,36 @@ class AccountingClosureService:
             ValueError: If indicators are missing or period validation fails
             RuntimeError: If closure fails
         """
-        # 1. Validate period exists and has indicators
-        cycle_info = self.reporting_service.get_monthly_settlement(year, month).cycle_info
-        period_key = cycle_info['period_key']
+        period_key = f"{year}-{month:02d}"
         
-        # Check if already closed
-        indicators = self.economic_repo.get_by_period_key(period_key)
-        if indicators and indicators.get('status') == 'CLOSED':  # Assuming string or bool, let's normalize
-             # If reusing existing check logic, fine.
-             pass
-
-        # 2. Get all loads in the cycle
-        start_date = datetime.strptime(cycle_info['start_date'], '%Y-%m-%d')
-        end_date = datetime.strptime(cycle_info['end_date'], '%Y-%m-%d')
-        
-        # Use the reporting service helper or repo directly
-        # Reporting service has _fetch_loads_in_cycle but it's protected.
-        # Better to replicate the date range query or expose a method. 
-        # But we only need IDs to update.
-        
-        # Let's use the load repo to find loads in that date range that are completed
-        # The reporting service filters by 'ARRIVED', 'COMPLETED'. 
-        # We should probably close anything that was considered in the settlement.
-        
-        loads = self.reporting_service._fetch_loads_in_cycle(start_date, end_date)
-        load_ids = [load['id'] for load in loads]
-        
-        if not load_ids:
-            # Even if no loads, we might want to close the period
-            pass
-            
-        # 3. Perform Closure Transaction (conceptually)
+        # Closure transaction: settlement, snapshot, period status and loads commit together
         try:
-            # A. Close the economic period
-            self.economic_repo.update_status(period_key, is_closed=True)
-            
-            # B. Bulk update loads
-            if load_ids:
-                self.load_repo.update_financial_status_bulk(load_ids, 'CLOSED')
+            with self.load_repo.db_manager as conn:
+                # Write lock before reading: no edit can land between computing
+                # the snapshot and freezing the loads it contains
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                
+                # 1. Compute the settlement (validates that indicators exist)
+                settlement = self.reporting_service.get_monthly_settlement(year, month)
+                period_key = settlement.cycle_info['period_key']
+                
+                # 2. Loads considered in the settlement are the ones to freeze
+                load_ids = self._settled_load_ids(settlement)
+                
+                if self.snapshot_repo:
+                    self.snapshot_repo.save(settlement, year, month, closed_by=user_id)
+                
+                # A. Close the economic period
+                self.economic_repo.update_status(period_key, is_closed=True)
+                if self.proforma_repo:
+                    proforma = self.proforma_repo.get_by_period(year, month)
+                    if proforma and not proforma.is_closed:
+                        self.proforma_repo.close_proforma(proforma.id, auto_create_next=auto_create_next)
+                
+                # B. Bulk update loads
+                if load_ids:
+                    self.load_repo.update_financial_status_bulk(load_ids, 'CLOSED')
                 
             return {
                 "status": "SUCCESS",
@@ -93,6 +92,23 @@ class AccountingClosureService:
                 "loads_closed_count": len(load_ids)
             }
             
+        except ValueError:
+            # Missing or invalid indicators: nothing was written
+            raise
         except Exception as e:
-            # In a real AC systems we'd want rollback here.
             raise RuntimeError(f"Failed to close period {period_key}: {str(e)}")
+    
+    @staticmethod
+    def _settled_load_ids(settlement) -> List[int]:
+        """Unique load IDs present in any section of the settlement, in first-seen order."""
+        load_ids: List[int] = []
+        seen = set()
+        for df in (settlement.contractor_df, settlement.disposal_df, settlement.client_df):
+            if df is None or df.empty or 'load_id' not in df.columns:
+                continue
+            for load_id in df['load_id'].dropna():
+                load_id = int(load_id)
+                if load_id not in seen:
+                    seen.add(load_id)
+                    load_ids.append(load_id)
+        return load_ids
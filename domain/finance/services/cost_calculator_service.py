@@ -8,7 +8,7 @@ y ajuste por variación de combustible.
 Responsabilidad: Lógica de negocio pura. NO accede a base de datos.
 """
 
-from typing import List, Dict, TYPE_CHECKING
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 
 # Import solo para type checking, no en runtime (evita dependencias circulares)
 if TYPE_CHECKING:
@@ -21,6 +21,7 @@ from domain.finance.entities.finance_entities import (
     TripCostResult
 )
 from domain.finance.services.tariff_adjustment_service import TariffAdjustmentService
+from domain.logistics.routing import ShortestPathRouter, route_nodes
 from domain.shared.exceptions import InvalidRouteError, MissingTariffError
 
 
@@ -33,8 +34,23 @@ class TransportCostCalculator:
     - Aplicación de pesos mínimos garantizados por tramo
     - Ajuste polinómico por variación de combustible
     - Diferenciación de tarifas según configuración vehicular
+    
+    Las distancias que faltan en route_map se derivan por camino más corto.
+    Si se inyecta el router de la matriz de distancias
+    (DistanceMatrixRepository.get_router), se usa ese; si no, se construye
+    uno sobre route_map y se reutiliza mientras las rutas no cambien. Ambos
+    usan los mismos nodos tipados (routing.route_nodes).
     """
     
+    def __init__(self, router: Optional[ShortestPathRouter] = None):
+        self._router = router
+        self._cached_router: Optional[Tuple[tuple, ShortestPathRouter]] = None
+    
+    @staticmethod
+    def _destination_type(load: 'Load') -> str:
+        """Tipo del destino final de una carga: sitio o planta de tratamiento."""
+        return 'SITE' if load.destination_site_id else 'TREATMENT_PLANT'
+    
     def calculate_trip_cost(
         self,
         loads: List['Load'],  # String literal para evitar NameError
@@ -139,7 +155,8 @@ class TransportCostCalculator:
             origin_id=load.origin_facility_id,
             destination_id=load.destination_site_id or load.destination_treatment_plant_id,
             route_map=route_map,
-            is_segment=False
+            is_segment=False,
+            destination_type=self._destination_type(load)
         )
         
         # Aplicar mínimo garantizado
@@ -225,7 +242,8 @@ class TransportCostCalculator:
             origin_id=second_load.origin_facility_id,
             destination_id=final_destination,
             route_map=route_map,
-            is_segment=False
+            is_segment=False,
+            destination_type=self._destination_type(loads[-1])
         )
         
         # Peso del tramo 2: suma de todas las cargas
@@ -253,7 +271,8 @@ class TransportCostCalculator:
         origin_id: int,
         destination_id: int,
         route_map: List[DistanceRoute],
-        is_segment: bool
+        is_segment: bool,
+        destination_type: Optional[str] = None
     ) -> DistanceRoute:
         """
         Busca una ruta en la matriz de distancias.
@@ -263,22 +282,73 @@ class TransportCostCalculator:
             destination_id: ID del nodo de destino
             route_map: Lista de rutas disponibles
             is_segment: True si se busca un tramo intermedio (enlace)
+            destination_type: 'FACILITY', 'TREATMENT_PLANT' o 'SITE'; por
+                defecto FACILITY para enlaces y SITE para rutas directas
         
         Returns:
-            DistanceRoute encontrada
+            DistanceRoute encontrada, o derivada por camino más corto si el
+            par no está configurado directamente
         
         Raises:
-            InvalidRouteError: Si la ruta no existe en route_map
+            InvalidRouteError: Si no existe ruta ni camino en route_map
         """
-        for route in route_map:
-            if (route.origin_id == origin_id and
-                route.destination_id == destination_id and
-                route.is_segment_link == is_segment):
+        if destination_type is None:
+            destination_type = 'FACILITY' if is_segment else 'SITE'
+        same_pair = [
+            route for route in route_map
+            if route.origin_id == origin_id
+            and route.destination_id == destination_id
+            and route.destination_node_type == destination_type
+        ]
+        for route in same_pair:
+            if route.is_segment_link == is_segment:
                 return route
         
-        # Ruta no encontrada
         segment_type = "enlace" if is_segment else "directa"
+        
+        # El par existe solo con el otro tipo de tramo: error de configuración, no se deriva
+        if same_pair:
+            raise InvalidRouteError(
+                f"La ruta desde {origin_id} hasta {destination_id} no está configurada como "
+                f"ruta {segment_type} en la matriz de distancias."
+            )
+        
+        # Sin ruta directa: camino más corto sobre el grafo de rutas configuradas
+        km = self._router_for(route_map).distance(
+            *route_nodes(origin_id, destination_id, destination_type)
+        )
+        if km:
+            return DistanceRoute(
+                origin_id=origin_id,
+                destination_id=destination_id,
+                km=km,
+                is_segment_link=is_segment,
+                destination_type=destination_type
+            )
+        
+        # Ruta no encontrada
         raise InvalidRouteError(
             f"No se encontró ruta {segment_type} desde {origin_id} hasta {destination_id} "
             f"en la matriz de distancias. Verifique que la ruta esté configurada correctamente."
         )
+    
+    def _router_for(self, route_map: List[DistanceRoute]) -> ShortestPathRouter:
+        """
+        Router de caminos más cortos: el inyectado (matriz completa) o uno
+        sobre route_map, reutilizado mientras las rutas no cambien
+        (construirlo es O(n³)).
+        """
+        if self._router is not None:
+            return self._router
+        key = tuple(
+            (route.origin_id, route.destination_id, route.destination_node_type, route.km)
+            for route in route_map
+        )
+        if self._cached_router is not None and self._cached_router[0] == key:
+            return self._cached_router[1]
+        router = ShortestPathRouter(
+            route_nodes(route.origin_id, route.destination_id, route.destination_node_type) + (route.km,)
+            for route in route_map
+        )
+        self._cached_router = (key, router)
+        return router
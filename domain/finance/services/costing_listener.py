@@ -1,17 +1,27 @@
 from datetime import datetime
+from typing import Optional, TYPE_CHECKING
 from infrastructure.events.event_bus import Event
 from infrastructure.persistence.database_manager import DatabaseManager
 from domain.finance.repositories.finance_repository import RateSheetRepository, CostRecordRepository
 from domain.finance.entities.finance_entities import CostRecord
+from domain.logistics.entities.load_snapshot import LoadSnapshot
 from domain.logistics.repositories.load_repository import LoadRepository
 
+if TYPE_CHECKING:
+    from domain.finance.services.financial_reporting_service import FinancialReportingService
+
 class CostingListener:
     """
     Calcula costos operativos en tiempo real.
+    
+    Con reporting_service, cada carga completada se valoriza con las reglas
+    de la liquidación mensual (tarifas de la proforma, pesos mínimos, matriz
+    de distancias, tarifas de cliente y de sitio) en el ledger por carga.
     """
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, reporting_service: Optional['FinancialReportingService'] = None):
         self.db_manager = db_manager
+        self.reporting_service = reporting_service
         self.rate_repo = RateSheetRepository(db_manager)
         self.cost_repo = CostRecordRepository(db_manager)
         self.load_repo = LoadRepository(db_manager)
@@ -19,14 +29,28 @@ class CostingListener:
     def handle_load_completed(self, event: Event) -> None:
         """
         Calcula costo de transporte al completar carga.
+
+        Sin reporting_service se usa la tarifa genérica TRANSPORTE (cost_records).
         """
         if event.data.get('to_status') != 'COMPLETED':
             return
             
         load_id = event.data.get('load_id')
-        load = self.load_repo.get_by_id(load_id)
-        if not load:
+        if self.reporting_service is not None:
+            # Transporte, disposición e ingresos; reemplaza las entradas de la carga (idempotente)
+            self.reporting_service.refresh_ledger([load_id])
+            return
+
+        # Idempotente: el outbox entrega at-least-once
+        if self.cost_repo.exists_for_entity(load_id, 'LOAD'):
             return
+        # Foto de la carga adjunta al evento (o consulta si el evento no la trae)
+        load = LoadSnapshot.from_event(event)
+        if load is None:
+            entity = self.load_repo.get_by_id(load_id)
+            if not entity:
+                return
+            load = LoadSnapshot.from_load(entity)
             
         # 1. Buscar Tarifa Transporte
         # Asumimos que el cliente dueño de la carga paga (o tarifa base)
@@ -41,8 +65,8 @@ class CostingListener:
         # 2. Calcular
         amount = 0.0
         if rate.unit_type == 'POR_KM':
-            # Mock distance, idealmente viene de load.attributes o ruta
-            distance = 50.0 
+            # Distancia de la ruta según la matriz de distancias
+            distance = load.distance_km or 0.0
             amount = distance * rate.unit_price
         elif rate.unit_type == 'POR_TON':
             weight = load.net_weight or 0.0
@@ -5,9 +5,12 @@ Implements monthly settlement calculations using vectorized pandas operations.
 Architecture: All calculations in UF, CLP conversion is presentation-only.
 """
 
-from typing import List, Optional, Union
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+import numpy as np
 import pandas as pd
 
 from domain.logistics.repositories.load_repository import LoadRepository
@@ -17,8 +20,11 @@ from domain.finance.repositories.contractor_tariffs_repository import Contractor
 from domain.finance.repositories.client_tariffs_repository import ClientTariffsRepository
 from domain.finance.repositories.disposal_site_tariffs_repository import DisposalSiteTariffsRepository
 from domain.finance.repositories.financial_reporting_repository import FinancialReportingRepository
+from domain.finance.repositories.settlement_snapshot_repository import SettlementSnapshotRepository
+from domain.finance.repositories.load_cost_ledger_repository import LoadCostLedgerRepository
 from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
 from domain.finance.entities.finance_entities import Proforma
+from domain.shared.constants import DEFAULT_TRANSPORT_TARIFFS_UF, MIN_BILLABLE_WEIGHT_TONS
 from domain.finance.entities.financial_reporting_dtos import (
     SettlementResult,
     ContractorSettlement,
@@ -39,9 +45,22 @@ class FinancialReportingService:
     5. Calculate client revenues
     6. Return structured settlement result
     
+    The same pricing feeds the per-load cost ledger (refresh_ledger), written
+    by CostingListener as loads complete and by the explicit rebuild command
+    (scripts/rebuild_cost_ledger.py). The monthly settlement, period totals
+    and live margins are a read-only SUM ... GROUP BY over the ledger
+    (get_monthly_settlement, get_ledger_totals).
+    
     All calculations are performed in UF. CLP conversion happens at UI layer.
     """
     
+    # Tarifas por defecto (UF/ton-km) y pesos mínimos (toneladas): ver domain.shared.constants
+    DEFAULT_TARIFFS_UF = DEFAULT_TRANSPORT_TARIFFS_UF
+    MIN_WEIGHT_TONS = MIN_BILLABLE_WEIGHT_TONS
+    
+    # Settlements de periodos abiertos memorizados (LRU)
+    SETTLEMENT_CACHE_SIZE = 24
+    
     def __init__(
         self,
         load_repo: LoadRepository,
@@ -50,10 +69,13 @@ class FinancialReportingService:
         client_tariffs_repo: ClientTariffsRepository,
         distance_repo: DistanceMatrixRepository,
         disposal_site_tariffs_repo: DisposalSiteTariffsRepository = None,
-        proforma_repo: ProformaRepository = None
+        proforma_repo: ProformaRepository = None,
+        snapshot_repo: SettlementSnapshotRepository = None,
+        ledger_repo: LoadCostLedgerRepository = None,
+        reporting_repo: FinancialReportingRepository = None
     ):
         self.load_repo = load_repo
-        self.reporting_repo = FinancialReportingRepository(load_repo.db_manager)
+        self.reporting_repo = reporting_repo or FinancialReportingRepository(load_repo.db_manager)
         # Support both old EconomicIndicatorsRepository and new ProformaRepository
         self.economic_repo = economic_repo
         self.proforma_repo = proforma_repo or (
@@ -63,6 +85,10 @@ class FinancialReportingService:
         self.client_tariffs_repo = client_tariffs_repo
         self.distance_repo = distance_repo
         self.disposal_site_tariffs_repo = disposal_site_tariffs_repo
+        self.snapshot_repo = snapshot_repo
+        self.ledger_repo = ledger_repo
+        self._settlement_cache: "OrderedDict[tuple, SettlementResult]" = OrderedDict()
+        self._settlement_cache_lock = threading.Lock()
     
     def get_monthly_settlement(self, year: int, month: int) -> SettlementResult:
         """
@@ -71,10 +97,23 @@ class FinancialReportingService:
         Process:
         1. Calculate cycle dates (19th of previous month to 18th of current month)
         2. Fetch economic indicators (UF value at closure, fuel price)
-        3. Fetch completed loads in the cycle
-        4. Calculate contractor costs (vectorized with pandas)
-        5. Calculate client revenues (vectorized with pandas)
-        6. Return SettlementResult
+        3. Aggregate the period's ledger (SUM ... GROUP BY over
+           load_cost_ledger, names joined)
+        4. Return SettlementResult
+        
+        Read-only: the ledger is maintained by CostingListener and by
+        rebuild_ledger/sync_ledger (scripts/rebuild_cost_ledger.py after
+        tariff, proforma or distance changes), never by this read.
+        
+        Closed periods are served from the settlement snapshot frozen by
+        AccountingClosureService.close_period. A closed period without
+        snapshot (closed before snapshots existed) is computed like an open
+        one and never frozen here; re-run close_period to freeze it.
+        
+        Open periods are memoized in an LRU keyed by (year, month, data
+        fingerprint); the fingerprint covers the cycle's loads, the ledger,
+        tariffs, proformas, distances and master data, so a cached result is
+        reused only while none of its input rows have changed.
         
         Args:
             year: Year of the settlement (e.g., 2025)
@@ -86,6 +125,7 @@ class FinancialReportingService:
         Raises:
             ValueError: If economic indicators are missing for the period
             ValueError: If year/month are invalid
+            ValueError: If no ledger repository is configured
             
         Example:
             >>> service.get_monthly_settlement(2025, 11)
@@ -146,50 +186,275 @@ class FinancialReportingService:
                 f"Por favor configure el precio del diésel en el Maestro de Proformas."
             )
         
-        # Step 3: Fetch completed loads in the cycle
-        loads_data = self._fetch_loads_in_cycle(cycle_start, cycle_end)
-        
-        # Step 4: Calculate contractor costs (vectorized) - TRANSPORT
-        # Usar tarifas desde la Proforma del período
-        contractor_df = self._calculate_contractor_costs(
-            loads_data,
-            fuel_price_month=economic_indicators['fuel_price'],
-            proforma=proforma
-        )
-        
-        # Step 5: Calculate disposal site costs (vectorized) - DISPOSAL
-        disposal_df = self._calculate_disposal_costs(loads_data)
+        proforma_code = economic_indicators.get('proforma_code', Proforma.generate_code(year, month))
+        is_closed = self._is_period_closed(economic_indicators)
         
-        # Step 6: Calculate client revenues (vectorized)
-        client_df = self._calculate_client_revenues(loads_data)
+        # Closed periods are immutable: serve the frozen snapshot
+        if is_closed and self.snapshot_repo:
+            snapshot = self.snapshot_repo.get_by_code(proforma_code)
+            if snapshot:
+                return snapshot
         
-        # Step 7: Build result with separated costs
-        total_transport_costs_uf = contractor_df['subtotal_uf'].sum() if not contractor_df.empty else 0.0
-        total_disposal_costs_uf = disposal_df['subtotal_uf'].sum() if not disposal_df.empty else 0.0
-        total_costs_uf = total_transport_costs_uf + total_disposal_costs_uf
-        total_revenue_uf = client_df['subtotal_uf'].sum() if not client_df.empty else 0.0
+        cache_key = (year, month, self.reporting_repo.get_settlement_fingerprint(cycle_start, cycle_end))
+        cached = self._get_cached_settlement(cache_key)
+        if cached is not None:
+            return cached
         
         cycle_info = {
             'period_key': economic_indicators.get('period_key', f"{year}-{month:02d}"),
-            'proforma_code': economic_indicators.get('proforma_code', Proforma.generate_code(year, month)),
+            'proforma_code': proforma_code,
             'uf_value': economic_indicators['uf_value'],
             'fuel_price': economic_indicators['fuel_price'],
             'extra_indicators': economic_indicators.get('extra_indicators', {}),
             'start_date': cycle_start.strftime('%Y-%m-%d'),
             'end_date': cycle_end.strftime('%Y-%m-%d'),
-            'is_closed': economic_indicators.get('is_closed', False)
+            'is_closed': is_closed
         }
         
+        # Step 3: Aggregate the per-load ledger
+        self._require_ledger()
+        settlement = self._settlement_from_ledger(year, month, cycle_info)
+        
+        # Snapshots are only written by AccountingClosureService.close_period
+        self._cache_settlement(cache_key, settlement)
+        
+        return settlement
+    
+    def _get_cached_settlement(self, cache_key: tuple) -> Optional[SettlementResult]:
+        with self._settlement_cache_lock:
+            settlement = self._settlement_cache.get(cache_key)
+            if settlement is not None:
+                self._settlement_cache.move_to_end(cache_key)
+            return settlement
+    
+    def _cache_settlement(self, cache_key: tuple, settlement: SettlementResult) -> None:
+        year, month = cache_key[0], cache_key[1]
+        with self._settlement_cache_lock:
+            # A period keeps only its latest version
+            for key in [k for k in self._settlement_cache if k[0] == year and k[1] == month]:
+                del self._settlement_cache[key]
+            self._settlement_cache[cache_key] = settlement
+            while len(self._settlement_cache) > self.SETTLEMENT_CACHE_SIZE:
+                self._settlement_cache.popitem(last=False)
+    
+    def clear_settlement_cache(self) -> None:
+        """Drops all memoized open-period settlements."""
+        with self._settlement_cache_lock:
+            self._settlement_cache.clear()
+    
+    # ------------------------------------------------------------------
+    # Per-load cost ledger
+    # ------------------------------------------------------------------
+    
+    def refresh_ledger(self, load_ids: Sequence[int]) -> int:
+        """
+        Prices loads with the settlement rules and replaces their ledger entries.
+        
+        Each load is priced in the settlement period of its scheduled_date,
+        with that period's proforma tariffs and the tariffs in force on the
+        load date. Loads that are not ARRIVED/COMPLETED (or have no date)
+        end up without entries. Idempotent.
+        
+        Args:
+            load_ids: Loads to (re)price
+            
+        Returns:
+            Number of ledger entries written
+            
+        Raises:
+            ValueError: If no ledger repository is configured
+        """
+        self._require_ledger()
+        load_ids = list(dict.fromkeys(load_ids))
+        rows_by_period: Dict[Tuple[int, int], List[dict]] = {}
+        for row in self.reporting_repo.fetch_loads_by_ids(load_ids):
+            period = self._period_of(row.get('scheduled_date'))
+            if period:
+                rows_by_period.setdefault(period, []).append(row)
+        
+        entries = []
+        for (year, month), rows in rows_by_period.items():
+            entries.extend(self._ledger_entries(rows, year, month))
+        self.ledger_repo.replace_for_loads(load_ids, entries)
+        return len(entries)
+    
+    def rebuild_ledger(self, year: int, month: int) -> int:
+        """
+        Recomputes the ledger of a whole period from its loads (after tariff,
+        proforma or distance changes).
+        
+        Returns:
+            Number of ledger entries written
+            
+        Raises:
+            ValueError: If the period is closed (its figures are frozen)
+        """
+        self._require_open_period(year, month)
+        cycle_start, cycle_end = self._calculate_cycle_dates(year, month)
+        entries = self._ledger_entries(self._fetch_loads_in_cycle(cycle_start, cycle_end), year, month)
+        self.ledger_repo.replace_for_period(year, month, entries)
+        return len(entries)
+    
+    def sync_ledger(self, year: int, month: int) -> int:
+        """
+        Reprices only the loads of a period whose ledger entries are stale:
+        changed since they were computed, or that entered or left the cycle
+        (writes that bypass CostingListener).
+        
+        Returns:
+            Number of loads repriced
+            
+        Raises:
+            ValueError: If the period is closed (its figures are frozen)
+        """
+        self._require_open_period(year, month)
+        cycle_start, cycle_end = self._calculate_cycle_dates(year, month)
+        stale = self.reporting_repo.fetch_stale_ledger_load_ids(year, month, cycle_start, cycle_end)
+        if stale:
+            self.refresh_ledger(stale)
+        return len(stale)
+    
+    def _require_open_period(self, year: int, month: int) -> None:
+        self._require_ledger()
+        if self.proforma_repo:
+            proforma = self.proforma_repo.get_by_period(year, month)
+            closed = bool(proforma and proforma.is_closed)
+        else:
+            indicators = self.economic_repo.get_by_period(year, month) if self.economic_repo else None
+            closed = bool(indicators) and self._is_period_closed(indicators)
+        if closed:
+            raise ValueError(f"El periodo {self._format_month_name(month)} {year} está cerrado")
+    
+    def _settlement_from_ledger(self, year: int, month: int, cycle_info: dict) -> SettlementResult:
+        """
+        SettlementResult aggregated from the ledger: detail rows per entry
+        type with names joined, totals from SUM ... GROUP BY.
+        """
+        transport = pd.DataFrame(self.ledger_repo.get_settlement_entries(year, month, 'TRANSPORT'))
+        if transport.empty:
+            contractor_df = self._calculate_contractor_costs([], fuel_price_month=cycle_info['fuel_price'])
+        else:
+            contractor_df = pd.DataFrame({
+                'load_id': transport['load_id'],
+                'manifest_number': transport['manifest_number'],
+                'vehicle_plate': transport['vehicle_plate'],
+                'vehicle_type': transport['vehicle_type'],
+                'date': transport['date'],
+                'origin_name': transport['origin_name'],
+                'destination_name': transport['destination_name'],
+                'billable_weight': transport['quantity_tons'],
+                'base_rate_uf': transport['rate_uf'],
+                'fuel_factor': 1.0,  # Las tarifas de proforma ya incluyen el ajuste
+                'adjusted_rate_uf': transport['rate_uf'],
+                'distance_km': transport['distance_km'].fillna(0.0),
+                'subtotal_uf': transport['amount_uf']
+            })
+        
+        disposal = pd.DataFrame(self.ledger_repo.get_settlement_entries(year, month, 'DISPOSAL'))
+        disposal_df = pd.DataFrame(columns=self.DISPOSAL_COLUMNS) if disposal.empty else pd.DataFrame({
+            'load_id': disposal['load_id'],
+            'manifest_number': disposal['manifest_number'],
+            'site_name': disposal['destination_name'],
+            'date': disposal['date'],
+            'billable_weight': disposal['quantity_tons'],
+            'rate_uf': disposal['rate_uf'],
+            'subtotal_uf': disposal['amount_uf']
+        })
+        
+        revenue = pd.DataFrame(self.ledger_repo.get_settlement_entries(year, month, 'REVENUE'))
+        client_df = pd.DataFrame(columns=self.CLIENT_COLUMNS) if revenue.empty else pd.DataFrame({
+            'load_id': revenue['load_id'],
+            'manifest_number': revenue['manifest_number'],
+            'client_name': revenue['client_name'],
+            'date': revenue['date'],
+            'weight': revenue['quantity_tons'],
+            'concept': revenue['concept'],
+            'rate_uf': revenue['rate_uf'],
+            'subtotal_uf': revenue['amount_uf']
+        })
+        
+        totals = self.ledger_repo.get_period_totals(year, month)
         return SettlementResult(
             cycle_info=cycle_info,
             contractor_df=contractor_df,
             disposal_df=disposal_df,
             client_df=client_df,
-            total_transport_costs_uf=total_transport_costs_uf,
-            total_disposal_costs_uf=total_disposal_costs_uf,
-            total_costs_uf=total_costs_uf,
-            total_revenue_uf=total_revenue_uf
+            total_transport_costs_uf=totals['total_transport_costs_uf'],
+            total_disposal_costs_uf=totals['total_disposal_costs_uf'],
+            total_costs_uf=totals['total_costs_uf'],
+            total_revenue_uf=totals['total_revenue_uf']
+        )
+    
+    def get_ledger_totals(self, year: int, month: int) -> Dict[str, float]:
+        """
+        Period totals and margin (UF) aggregated from the ledger, without
+        recomputing the settlement. See LoadCostLedgerRepository.get_period_totals.
+        """
+        self._require_ledger()
+        return self.ledger_repo.get_period_totals(year, month)
+    
+    def _require_ledger(self) -> None:
+        if self.ledger_repo is None:
+            raise ValueError("Load cost ledger repository is not configured")
+    
+    def _period_of(self, scheduled_date) -> Optional[Tuple[int, int]]:
+        """
+        Settlement period (year, month) of a load date, by calendar day and
+        from the same cycle bounds as the cycle queries (_calculate_cycle_dates):
+        the 19th onward belongs to the next month.
+        """
+        date = pd.to_datetime(scheduled_date, errors='coerce')
+        if pd.isna(date):
+            return None
+        day = date.normalize()
+        _, cycle_end = self._calculate_cycle_dates(day.year, day.month)
+        period = day + relativedelta(months=1) if day > cycle_end else day
+        return period.year, period.month
+    
+    def _ledger_entries(self, loads_data: List[dict], year: int, month: int) -> List[dict]:
+        """
+        Ledger rows for loads of one period, from the settlement calculations:
+        TRANSPORT (contractor), DISPOSAL (site) and one REVENUE per client concept.
+        """
+        if not loads_data:
+            return []
+        proforma = self.proforma_repo.get_by_period(year, month) if self.proforma_repo else None
+        cycle_start, cycle_end = self._calculate_cycle_dates(year, month)
+        
+        contractor_df = self._calculate_contractor_costs(
+            loads_data,
+            fuel_price_month=proforma.fuel_price if proforma else None,
+            proforma=proforma
         )
+        disposal_df = self._calculate_disposal_costs(loads_data, cycle_start, cycle_end)
+        client_df = self._calculate_client_revenues(loads_data, cycle_start, cycle_end)
+        
+        def entries(df, entry_type, concept, quantity, rate, distance=None):
+            return [
+                {
+                    'load_id': int(row['load_id']),
+                    'entry_type': entry_type,
+                    'concept': concept if concept else row['concept'],
+                    'period_year': year,
+                    'period_month': month,
+                    'quantity_tons': float(row[quantity]),
+                    'distance_km': float(row[distance]) if distance else None,
+                    'rate_uf': float(row[rate]),
+                    'amount_uf': float(row['subtotal_uf']),
+                }
+                for row in df.to_dict('records')
+            ]
+        
+        return (
+            entries(contractor_df, 'TRANSPORT', 'TRANSPORTE', 'billable_weight', 'adjusted_rate_uf', 'distance_km')
+            + entries(disposal_df, 'DISPOSAL', 'DISPOSICION', 'billable_weight', 'rate_uf')
+            + entries(client_df, 'REVENUE', None, 'weight', 'rate_uf')
+        )
+    
+    @staticmethod
+    def _is_period_closed(economic_indicators: dict) -> bool:
+        """Proformas expose is_closed; legacy economic_indicators use status='CLOSED'."""
+        return bool(economic_indicators.get('is_closed')) or economic_indicators.get('status') == 'CLOSED'
     
     def _calculate_cycle_dates(self, year: int, month: int) -> tuple:
         """
@@ -217,17 +482,28 @@ class FinancialReportingService:
         
         return cycle_start, cycle_end
     
-    def _get_vehicle_type(self, vehicle_id: int) -> str:
+    def _get_tariff_for_type(self, vehicle_type: str, proforma: Optional[Proforma] = None) -> float:
         """
-        Obtiene el tipo de vehículo desde la base de datos.
+        Tarifa de transporte (UF/ton-km) para un tipo de vehículo.
         
-        Args:
-            vehicle_id: ID del vehículo
-            
-        Returns:
-            Tipo de vehículo ('BATEA', 'AMPLIROLL', 'AMPLIROLL_CARRO') o 'AMPLIROLL' por defecto
+        Usa la Proforma del período; si no hay proforma o la tarifa no está
+        configurada, usa las tarifas por defecto.
+        """
+        if proforma:
+            tariff = proforma.get_tariff_for_vehicle_type(vehicle_type)
+            if tariff:
+                return tariff
+        # Fallback: usar tarifas por defecto si no hay proforma
+        return self.DEFAULT_TARIFFS_UF.get(vehicle_type.upper() if vehicle_type else '', 0.002)
+    
+    def _get_min_weight_for_type(self, vehicle_type: str) -> float:
         """
-        return self.reporting_repo.get_vehicle_type(vehicle_id)
+        Peso mínimo garantizado (toneladas) para un tipo de vehículo.
+        """
+        return self.MIN_WEIGHT_TONS.get(
+            vehicle_type.upper() if vehicle_type else '',
+            self.MIN_WEIGHT_TONS['AMPLIROLL']  # Default
+        )
     
     def _fetch_loads_in_cycle(
         self, 
@@ -261,9 +537,9 @@ class FinancialReportingService:
         Usa las tarifas definidas en la Proforma del período según el tipo de vehículo.
         
         Algorithm (vectorized):
-        1. Load data into DataFrame
+        1. Load data into DataFrame (vehicle_type and distance_km already joined by the cycle query)
         2. Get tariffs from proforma (tariff_batea_uf, tariff_ampliroll_uf, tariff_ampliroll_carro_uf)
-        3. Match vehicle_type to get the correct tariff
+        3. Map vehicle_type to the correct tariff and minimum weight
         4. Calculate billable_weight = max(net_weight, min_weight_guaranteed)
         5. Calculate subtotal_uf = billable_weight * distance_km * tariff_uf
         
@@ -278,7 +554,7 @@ class FinancialReportingService:
         if not loads_data:
             # Return empty DataFrame with correct columns
             return pd.DataFrame(columns=[
-                'load_id', 'manifest_number', 'vehicle_plate', 'date',
+                'load_id', 'manifest_number', 'vehicle_plate', 'vehicle_type', 'date',
                 'origin_name', 'destination_name', 'billable_weight',
                 'base_rate_uf', 'fuel_factor', 'adjusted_rate_uf',
                 'distance_km', 'subtotal_uf'
@@ -292,52 +568,22 @@ class FinancialReportingService:
             raise ValueError("Missing required field in load data: id")
         
         # =========================================================================
-        # NUEVA LÓGICA: Usar tarifas desde la Proforma
+        # Tarifas desde la Proforma, resueltas por tipo de vehículo
         # =========================================================================
         
-        # Pesos mínimos garantizados por tipo de vehículo (hardcoded para MVP)
-        MIN_WEIGHT_BATEA = 15.0  # toneladas
-        MIN_WEIGHT_AMPLIROLL = 7.0  # toneladas
-        MIN_WEIGHT_AMPLIROLL_CARRO = 7.0  # toneladas
+        # vehicle_type y distance_km vienen resueltos por JOIN en la query del ciclo
+        if 'vehicle_type' in df.columns:
+            df['vehicle_type'] = df['vehicle_type'].fillna('AMPLIROLL').astype(str).str.upper()
+        else:
+            df['vehicle_type'] = 'AMPLIROLL'
         
-        # Obtener tipo de vehículo para cada carga
-        # Necesitamos hacer un JOIN con vehicles para obtener vehicle_type
-        vehicle_types = []
-        for _, row in df.iterrows():
-            vehicle_id = row.get('vehicle_id')
-            vehicle_type = self._get_vehicle_type(vehicle_id)
-            vehicle_types.append(vehicle_type)
+        # Una evaluación por tipo distinto (no por carga), luego map vectorizado
+        vehicle_types = df['vehicle_type'].unique()
+        rate_by_type = {vtype: self._get_tariff_for_type(vtype, proforma) for vtype in vehicle_types}
+        min_weight_by_type = {vtype: self._get_min_weight_for_type(vtype) for vtype in vehicle_types}
         
-        df['vehicle_type'] = vehicle_types
-        
-        # Asignar tarifa según tipo de vehículo desde proforma
-        def get_tariff_for_type(vtype):
-            if proforma:
-                tariff = proforma.get_tariff_for_vehicle_type(vtype)
-                if tariff:
-                    return tariff
-            # Fallback: usar tarifas por defecto si no hay proforma
-            defaults = {
-                'BATEA': 0.001460,
-                'AMPLIROLL': 0.002962,
-                'AMPLIROLL_SIMPLE': 0.002962,
-                'AMPLIROLL_CARRO': 0.001793
-            }
-            return defaults.get(vtype.upper() if vtype else '', 0.002)
-        
-        def get_min_weight_for_type(vtype):
-            vtype_upper = vtype.upper() if vtype else ''
-            if vtype_upper == 'BATEA':
-                return MIN_WEIGHT_BATEA
-            elif vtype_upper in ('AMPLIROLL', 'AMPLIROLL_SIMPLE'):
-                return MIN_WEIGHT_AMPLIROLL
-            elif vtype_upper == 'AMPLIROLL_CARRO':
-                return MIN_WEIGHT_AMPLIROLL_CARRO
-            return MIN_WEIGHT_AMPLIROLL  # Default
-        
-        # Aplicar tarifas y pesos mínimos
-        df['base_rate_uf'] = df['vehicle_type'].apply(get_tariff_for_type)
-        df['min_weight'] = df['vehicle_type'].apply(get_min_weight_for_type)
+        df['base_rate_uf'] = df['vehicle_type'].map(rate_by_type)
+        df['min_weight'] = df['vehicle_type'].map(min_weight_by_type)
         
         # Las tarifas en proforma ya incluyen el ajuste por combustible
         # El fuel_factor es 1.0 porque la tarifa ya está ajustada
@@ -346,35 +592,13 @@ class FinancialReportingService:
         
         # Calculate billable weight (vectorized)
         # net_weight_tons ya viene convertido de kg a toneladas desde la query
-        df['billable_weight'] = df.apply(
-            lambda row: max(row['net_weight_tons'] if pd.notna(row['net_weight_tons']) else 0, row['min_weight']),
-            axis=1
-        )
+        net_weight = df['net_weight_tons'].fillna(0.0) if 'net_weight_tons' in df.columns else 0.0
+        df['billable_weight'] = np.maximum(net_weight, df['min_weight'])
         
-        # Fetch distances for each route
-        # TODO: Optimize this with bulk lookups or pre-loaded distance matrix
-        distances = []
-        for _, row in df.iterrows():
-            # Usar origin_facility_id o origin_treatment_plant_id como origen
-            origin_id = row.get('origin_facility_id') or row.get('origin_treatment_plant_id')
-            dest_id = row.get('destination_site_id') or row.get('destination_treatment_plant_id')
-            
-            # Determinar tipo de destino según la columna que tiene valor
-            if row.get('destination_site_id'):
-                dest_type = 'SITE'
-            elif row.get('destination_treatment_plant_id'):
-                dest_type = 'TREATMENT_PLANT'
-            else:
-                dest_type = None
-            
-            distance = 0.0
-            if origin_id and dest_id and dest_type:
-                distance = self.distance_repo.get_route_distance(
-                    origin_id, dest_id, dest_type
-                ) or 0.0
-            distances.append(distance)
-        
-        df['distance_km'] = distances
+        # Rutas fuera de la matriz: distancia derivada (camino más corto); sin camino quedan en 0 km
+        if 'distance_km' not in df.columns:
+            df['distance_km'] = np.nan
+        df['distance_km'] = self._fill_missing_distances(df).fillna(0.0).astype(float)
         
         # Calculate subtotal (vectorized)
         df['subtotal_uf'] = df['billable_weight'] * df['distance_km'] * df['adjusted_rate_uf']
@@ -398,164 +622,233 @@ class FinancialReportingService:
         
         return result_df
     
-    def _calculate_disposal_costs(self, loads_data: List[dict]) -> pd.DataFrame:
+    def _fill_missing_distances(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Completes missing distance_km with shortest-path distances over the
+        distance matrix. The origin is typed (FACILITY or TREATMENT_PLANT) so
+        a plant is never looked up as the facility that shares its id.
+        """
+        distances = pd.to_numeric(df['distance_km'], errors='coerce')
+        missing = distances.isna()
+        if self.distance_repo is None or not missing.any():
+            return distances
+        
+        subset = df[missing]
+        origin = self._column(subset, 'origin_facility_id', None)
+        has_facility = origin.notna()
+        origin = origin.where(has_facility, self._column(subset, 'origin_treatment_plant_id', None))
+        origin_type = np.where(has_facility, 'FACILITY', 'TREATMENT_PLANT')
+        site = self._column(subset, 'destination_site_id', None)
+        has_site = site.notna()
+        destination = site.where(has_site, self._column(subset, 'destination_treatment_plant_id', None))
+        destination_type = np.where(has_site, 'SITE', 'TREATMENT_PLANT')
+        
+        distances[missing] = self.distance_repo.get_route_distances(
+            origin, destination, destination_type, derive_missing=True, origin_types=origin_type
+        )
+        return distances
+    
+    DISPOSAL_COLUMNS = [
+        'load_id', 'manifest_number', 'site_name', 'date',
+        'billable_weight', 'rate_uf', 'subtotal_uf'
+    ]
+    
+    CLIENT_COLUMNS = [
+        'load_id', 'manifest_number', 'client_name', 'date',
+        'weight', 'concept', 'rate_uf', 'subtotal_uf'
+    ]
+    
+    def _calculate_disposal_costs(
+        self,
+        loads_data: List[dict],
+        cycle_start: Optional[datetime] = None,
+        cycle_end: Optional[datetime] = None
+    ) -> pd.DataFrame:
         """
         Calculate disposal site costs using vectorized pandas operations.
         
         These are COSTS paid TO disposal sites for receiving waste.
         Only applies to loads with destination_site_id (not treatment plants).
         
-        Algorithm:
+        Algorithm (hash join):
         1. Filter loads that have a destination_site_id
-        2. Fetch active tariffs for each site
+        2. Merge loads against site tariffs on site_id, keeping only the
+           tariff in force on the load date (validity window)
         3. Calculate billable_weight = max(net_weight, min_guaranteed)
         4. Calculate subtotal_uf = billable_weight * rate_uf
         
         Args:
             loads_data: List of load dicts from database
+            cycle_start: Start of the cycle (selects tariffs valid in the period)
+            cycle_end: End of the cycle
             
         Returns:
             DataFrame with columns matching DisposalCostSettlement
         """
-        if not loads_data:
-            return pd.DataFrame(columns=[
-                'load_id', 'manifest_number', 'site_name', 'date',
-                'billable_weight', 'rate_uf', 'subtotal_uf'
-            ])
-        
         # Check if disposal tariffs repository is configured
-        if self.disposal_site_tariffs_repo is None:
-            return pd.DataFrame(columns=[
-                'load_id', 'manifest_number', 'site_name', 'date',
-                'billable_weight', 'rate_uf', 'subtotal_uf'
-            ])
+        if not loads_data or self.disposal_site_tariffs_repo is None:
+            return pd.DataFrame(columns=self.DISPOSAL_COLUMNS)
         
-        # Filter only loads going to disposal sites (not treatment plants)
-        site_loads = [l for l in loads_data if l.get('destination_site_id')]
+        loads_df = pd.DataFrame(loads_data)
         
-        if not site_loads:
-            return pd.DataFrame(columns=[
-                'load_id', 'manifest_number', 'site_name', 'date',
-                'billable_weight', 'rate_uf', 'subtotal_uf'
-            ])
-        
-        # Fetch all active disposal site tariffs
-        active_tariffs = self.disposal_site_tariffs_repo.get_all_active()
-        tariffs_df = pd.DataFrame(active_tariffs)
+        # Filter only loads going to disposal sites (not treatment plants)
+        loads_df = loads_df[self._column(loads_df, 'destination_site_id', None).notna()]
+        if loads_df.empty:
+            return pd.DataFrame(columns=self.DISPOSAL_COLUMNS)
         
+        tariffs_df = self._fetch_tariffs_df(self.disposal_site_tariffs_repo, cycle_start, cycle_end)
         if tariffs_df.empty:
             # No disposal tariffs configured
-            return pd.DataFrame(columns=[
-                'load_id', 'manifest_number', 'site_name', 'date',
-                'billable_weight', 'rate_uf', 'subtotal_uf'
-            ])
+            return pd.DataFrame(columns=self.DISPOSAL_COLUMNS)
+        
+        loads_df = loads_df.assign(site_id=loads_df['destination_site_id'].astype('int64'))
+        merged = loads_df.merge(
+            tariffs_df[['site_id', 'site_name', 'rate_uf', 'min_weight_guaranteed', 'valid_from', 'valid_to']],
+            on='site_id',
+            how='inner',
+            suffixes=('', '_tariff')
+        )
+        # Loads without a tariff for their site are skipped
+        merged = self._select_effective_tariffs(merged, ['id'])
+        if merged.empty:
+            return pd.DataFrame(columns=self.DISPOSAL_COLUMNS)
         
-        # Build result rows
-        rows = []
-        for load in site_loads:
-            site_id = load.get('destination_site_id')
-            
-            # Find tariff for this site
-            site_tariffs = tariffs_df[tariffs_df['site_id'] == site_id]
-            if site_tariffs.empty:
-                continue  # No tariff configured for this site
-            
-            tariff = site_tariffs.iloc[0]
-            
-            # Calculate billable weight
-            # net_weight_tons ya viene convertido de kg a toneladas desde la query
-            net_weight = load.get('net_weight_tons', 0.0) or 0.0
-            min_weight = tariff.get('min_weight_guaranteed', 0.0) or 0.0
-            billable_weight = max(net_weight, min_weight)
-            
-            # Calculate subtotal
-            rate_uf = tariff['rate_uf']
-            subtotal_uf = billable_weight * rate_uf
-            
-            rows.append({
-                'load_id': load['id'],
-                'manifest_number': load.get('manifest_number', 'N/A'),
-                'site_name': tariff.get('site_name', load.get('destination_name', 'N/A')),
-                'date': load.get('scheduled_date', ''),
-                'billable_weight': billable_weight,
-                'rate_uf': rate_uf,
-                'subtotal_uf': subtotal_uf
-            })
+        # net_weight_tons ya viene convertido de kg a toneladas desde la query
+        billable_weight = np.maximum(
+            self._column(merged, 'net_weight_tons', 0.0).fillna(0.0),
+            merged['min_weight_guaranteed'].fillna(0.0)
+        )
         
-        return pd.DataFrame(rows) if rows else pd.DataFrame(columns=[
-            'load_id', 'manifest_number', 'site_name', 'date',
-            'billable_weight', 'rate_uf', 'subtotal_uf'
-        ])
+        return pd.DataFrame({
+            'load_id': merged['id'],
+            'manifest_number': self._column(merged, 'manifest_number', 'N/A'),
+            'site_name': merged['site_name'].fillna(self._column(merged, 'destination_name', 'N/A')),
+            'date': self._column(merged, 'scheduled_date', ''),
+            'billable_weight': billable_weight,
+            'rate_uf': merged['rate_uf'],
+            'subtotal_uf': billable_weight * merged['rate_uf']
+        }).reset_index(drop=True)
     
-    def _calculate_client_revenues(self, loads_data: List[dict]) -> pd.DataFrame:
+    def _calculate_client_revenues(
+        self,
+        loads_data: List[dict],
+        cycle_start: Optional[datetime] = None,
+        cycle_end: Optional[datetime] = None
+    ) -> pd.DataFrame:
         """
         Calculate client revenues using vectorized pandas operations.
         
-        Algorithm (vectorized):
+        Algorithm (hash join):
         1. Load data into DataFrame
-        2. Fetch active client tariffs by concept
-        3. For each load, apply tariffs for all applicable concepts
-        4. Calculate subtotal_uf = weight * rate_uf
+        2. Merge loads against client tariffs on client_id; each load expands
+           into one row per billing concept (TRANSPORTE, DISPOSICION, TRATAMIENTO)
+        3. Keep only the tariff in force on the load date (validity window)
+        4. Calculate weight = max(net_weight, min_guaranteed), subtotal_uf = weight * rate_uf
         
         Args:
             loads_data: List of load dicts from database
+            cycle_start: Start of the cycle (selects tariffs valid in the period)
+            cycle_end: End of the cycle
             
         Returns:
             DataFrame with columns matching ClientSettlement
         """
         if not loads_data:
             # Return empty DataFrame with correct columns
-            return pd.DataFrame(columns=[
-                'load_id', 'manifest_number', 'client_name', 'date',
-                'weight', 'concept', 'rate_uf', 'subtotal_uf'
-            ])
+            return pd.DataFrame(columns=self.CLIENT_COLUMNS)
         
-        # Convert to DataFrame
-        df = pd.DataFrame(loads_data)
+        loads_df = pd.DataFrame(loads_data)
+        loads_df = loads_df[self._column(loads_df, 'client_id', None).notna()]
         
-        # Fetch all active client tariffs
-        active_tariffs = self.client_tariffs_repo.get_all_active()
-        tariffs_df = pd.DataFrame(active_tariffs)
-        
-        if tariffs_df.empty:
+        tariffs_df = self._fetch_tariffs_df(self.client_tariffs_repo, cycle_start, cycle_end)
+        if tariffs_df.empty or loads_df.empty:
             # No tariffs configured
-            return pd.DataFrame(columns=[
-                'load_id', 'manifest_number', 'client_name', 'date',
-                'weight', 'concept', 'rate_uf', 'subtotal_uf'
-            ])
+            return pd.DataFrame(columns=self.CLIENT_COLUMNS)
+        
+        loads_df = loads_df.assign(client_id=loads_df['client_id'].astype('int64'))
+        merged = loads_df.merge(
+            tariffs_df[['client_id', 'concept', 'rate_uf', 'min_weight_guaranteed', 'valid_from', 'valid_to']],
+            on='client_id',
+            how='inner',
+            suffixes=('', '_tariff')
+        )
+        merged = self._select_effective_tariffs(merged, ['id', 'concept'])
+        if merged.empty:
+            return pd.DataFrame(columns=self.CLIENT_COLUMNS)
         
-        # Expand each load by applicable concepts
-        # Each load can have multiple billing concepts (TRANSPORTE, DISPOSICION, TRATAMIENTO)
-        rows = []
-        for _, load in df.iterrows():
-            client_id = load.get('client_id')
-            if not client_id:
-                continue
-            
-            # Get tariffs for this client
-            client_tariffs = tariffs_df[tariffs_df['client_id'] == client_id]
-            
-            for _, tariff in client_tariffs.iterrows():
-                # net_weight_tons ya viene convertido de kg a toneladas desde la query
-                weight = max(
-                    load.get('net_weight_tons', 0.0),
-                    tariff['min_weight_guaranteed']
-                )
-                
-                subtotal_uf = weight * tariff['rate_uf']
-                
-                rows.append({
-                    'load_id': load['id'],
-                    'manifest_number': load.get('manifest_number', 'N/A'),
-                    'client_name': load.get('client_name', 'N/A'),
-                    'date': load.get('scheduled_date', ''),
-                    'weight': weight,
-                    'concept': tariff['concept'],
-                    'rate_uf': tariff['rate_uf'],
-                    'subtotal_uf': subtotal_uf
-                })
-        
-        return pd.DataFrame(rows)
+        # net_weight_tons ya viene convertido de kg a toneladas desde la query
+        weight = np.maximum(
+            self._column(merged, 'net_weight_tons', 0.0).fillna(0.0),
+            merged['min_weight_guaranteed'].fillna(0.0)
+        )
+        
+        return pd.DataFrame({
+            'load_id': merged['id'],
+            'manifest_number': self._column(merged, 'manifest_number', 'N/A'),
+            'client_name': self._column(merged, 'client_name', 'N/A'),
+            'date': self._column(merged, 'scheduled_date', ''),
+            'weight': weight,
+            'concept': merged['concept'],
+            'rate_uf': merged['rate_uf'],
+            'subtotal_uf': weight * merged['rate_uf']
+        }).reset_index(drop=True)
+    
+    @staticmethod
+    def _fetch_tariffs_df(
+        tariffs_repo,
+        cycle_start: Optional[datetime],
+        cycle_end: Optional[datetime]
+    ) -> pd.DataFrame:
+        """
+        Loads the tariffs relevant to the cycle into a DataFrame.
+        
+        With cycle dates, every tariff overlapping the cycle is fetched so each
+        load can be matched by date; without them, only currently active tariffs.
+        """
+        if cycle_start is not None and cycle_end is not None:
+            tariffs = tariffs_repo.get_effective_between(
+                cycle_start.strftime('%Y-%m-%d'), cycle_end.strftime('%Y-%m-%d')
+            )
+        else:
+            tariffs = tariffs_repo.get_all_active()
+        return pd.DataFrame(tariffs)
+    
+    @staticmethod
+    def _select_effective_tariffs(merged: pd.DataFrame, key_columns: List[str]) -> pd.DataFrame:
+        """
+        Keeps, for each key (load or load+concept), the tariff in force on the load date.
+        
+        A tariff applies when valid_from <= load_date <= valid_to (open-ended if
+        valid_to is NULL). Loads without a date only match open-ended tariffs.
+        If windows overlap, the most recent valid_from wins.
+        """
+        if merged.empty:
+            return merged
+        
+        load_date = pd.to_datetime(
+            FinancialReportingService._column(merged, 'scheduled_date', None), errors='coerce'
+        ).dt.normalize()
+        valid_from = pd.to_datetime(merged['valid_from'], errors='coerce')
+        valid_to = pd.to_datetime(merged['valid_to'], errors='coerce')
+        
+        in_window = (
+            (valid_from.isna() | (valid_from <= load_date))
+            & (valid_to.isna() | (valid_to >= load_date))
+        )
+        undated = load_date.isna() & valid_to.isna()
+        
+        effective = merged[in_window | undated].assign(_valid_from=valid_from)
+        effective = effective.sort_values('_valid_from', kind='stable', na_position='first')
+        effective = effective.drop_duplicates(subset=key_columns, keep='last')
+        # Preserve original load order (merge order) in the output
+        return effective.sort_index(kind='stable').drop(columns='_valid_from')
+    
+    @staticmethod
+    def _column(df: pd.DataFrame, name: str, default) -> pd.Series:
+        """Returns df[name], or a Series filled with default when the column is absent."""
+        if name in df.columns:
+            return df[name]
+        return pd.Series(default, index=df.index)
     
     def _format_month_name(self, month: int) -> str:
         """
@@ -0,0 +1,251 @@
+"""
+Motor de Costeo por Tramos (viajes directos y enlazados).
+
+Genera las filas de auditoría del estado de pago de transportistas:
+- Viaje directo: una fila con la tarifa del tipo de vehículo.
+- Viaje enlazado (mismo trip_id, 2 cargas):
+    - T1: Planta origen → Punto de enlace (tarifa AMPLIROLL, carga primaria)
+    - T2: Punto de enlace → Destino final (tarifa AMPLIROLL_CARRO, ambas cargas)
+
+Todo el cálculo es vectorizado con pandas: los tramos se expanden con
+operaciones sobre DataFrames y las distancias se resuelven en bloque contra
+la matriz de distancias en memoria (sin consultas por tramo).
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from domain.finance.entities.finance_entities import Proforma
+from domain.finance.repositories.financial_reporting_repository import FinancialReportingRepository
+from domain.shared.constants import DEFAULT_TRANSPORT_TARIFFS_UF, MIN_BILLABLE_WEIGHT_TONS
+from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
+
+
+SEGMENT_DIRECT = 'Directo'
+SEGMENT_T1 = 'T1: Origen→Enlace'
+SEGMENT_T2 = 'T2: Enlace→Destino'
+
+
+class SegmentCostingService:
+    """
+    Motor de costeo de tramos de transporte para un período (proforma).
+
+    Reutilizable por el portal financiero, exportaciones y cierre contable.
+    """
+
+    def __init__(
+        self,
+        reporting_repo: FinancialReportingRepository,
+        distance_repo: DistanceMatrixRepository
+    ):
+        self.reporting_repo = reporting_repo
+        self.distance_repo = distance_repo
+
+    def get_transport_segments(self, proforma: Proforma) -> pd.DataFrame:
+        """
+        Obtiene los tramos costeados del período de la proforma.
+
+        Args:
+            proforma: Proforma del período (tarifas y fechas del ciclo)
+
+        Returns:
+            DataFrame con una fila por tramo (ver build_segments)
+        """
+        cycle_start, cycle_end = self._cycle_dates(proforma)
+        loads = self.reporting_repo.fetch_transport_loads_in_cycle(cycle_start, cycle_end)
+        if not loads:
+            return pd.DataFrame()
+        return self.build_segments(pd.DataFrame(loads), proforma)
+
+    def build_segments(
+        self,
+        loads_df: pd.DataFrame,
+        proforma: Optional[Proforma]
+    ) -> pd.DataFrame:
+        """
+        Expande cargas en tramos y calcula peso facturable, distancia y subtotal.
+
+        Args:
+            loads_df: Cargas con la forma de fetch_transport_loads_in_cycle
+            proforma: Proforma con tarifas (None usa tarifas por defecto)
+
+        Returns:
+            DataFrame con las columnas de la carga más: segment_desc, tariff_type,
+            tariff_uf, min_weight, link_point_name, dist_to_link, billable_weight,
+            distance_km, subtotal_uf. Cargas sin trip_id primero; luego cada
+            trip_id en orden: T1, T2 (carga primaria), T2 (carga enlace) si es
+            enlazado, o una fila directa si el viaje tiene una sola carga.
+        """
+        if loads_df.empty:
+            return pd.DataFrame()
+
+        df = loads_df.reset_index(drop=True)
+        trip_ids = df['trip_id'].where(df['trip_id'].notna() & (df['trip_id'] != ''))
+        trip_sizes = trip_ids.map(trip_ids.value_counts()).fillna(0)
+        is_linked = trip_sizes >= 2
+        has_trip = trip_ids.notna()
+
+        untripped = self._direct_segments(df[~has_trip], proforma)
+        single_trips = self._direct_segments(df[has_trip & ~is_linked], proforma)
+        linked = self._linked_segments(df[is_linked], proforma)
+        trips = pd.concat([single_trips, linked], ignore_index=True, sort=False)
+        if not trips.empty:
+            trips = trips.sort_values('trip_id', kind='mergesort')
+        result = pd.concat([untripped, trips], ignore_index=True, sort=False)
+
+        # Peso facturable = max(peso_real, peso_mínimo)
+        result['billable_weight'] = np.maximum(
+            pd.to_numeric(result['net_weight_tons'], errors='coerce').fillna(0.0),
+            result['min_weight']
+        )
+
+        # Redondeo igual a lo que ve el usuario, antes de calcular el subtotal
+        result['billable_weight'] = result['billable_weight'].round(2)
+        result['distance_km'] = result['distance_km'].astype(float).round(1)
+        result['tariff_uf'] = result['tariff_uf'].astype(float).round(6)
+        result['subtotal_uf'] = result['billable_weight'] * result['distance_km'] * result['tariff_uf']
+        return result
+
+    # ==========================================
+    # TRAMOS
+    # ==========================================
+
+    def _direct_segments(
+        self,
+        df: pd.DataFrame,
+        proforma: Optional[Proforma]
+    ) -> pd.DataFrame:
+        direct = df.copy()
+        if direct.empty:
+            return direct
+
+        vehicle_types = direct['vehicle_type']
+        direct['tariff_type'] = vehicle_types
+        direct['tariff_uf'] = self._map_by_type(vehicle_types, lambda vt: self._tariff_for(vt, proforma))
+        direct['min_weight'] = self._map_by_type(vehicle_types, self._min_weight_for)
+        direct['segment_desc'] = SEGMENT_DIRECT
+
+        has_facility = direct['origin_facility_id'].notna()
+        origin = direct['origin_facility_id'].where(has_facility, direct['origin_treatment_plant_id'])
+        origin_type = pd.Series(
+            np.where(has_facility, 'FACILITY', 'TREATMENT_PLANT'), index=direct.index
+        )
+        has_site = direct['destination_site_id'].notna()
+        destination = direct['destination_site_id'].where(has_site, direct['destination_treatment_plant_id'])
+        destination_type = pd.Series(
+            np.where(has_site, 'SITE', 'TREATMENT_PLANT'), index=direct.index
+        )
+        direct['distance_km'] = self._lookup(origin, destination, destination_type, origin_type)
+        return direct
+
+    def _linked_segments(
+        self,
+        df: pd.DataFrame,
+        proforma: Optional[Proforma]
+    ) -> pd.DataFrame:
+        if df.empty:
+            return df.copy()
+
+        # Primero la planta que NO es punto de enlace, luego la de enlace
+        ordered = df.assign(
+            _link_rank=df['origin_is_link_point'].fillna(0).astype(int)
+        ).sort_values(['trip_id', '_link_rank'], kind='mergesort')
+        position = ordered.groupby('trip_id').cumcount()
+
+        primary = ordered[position == 0].drop(columns='_link_rank').reset_index(drop=True)
+        link = ordered[position == 1].drop(columns='_link_rank').reset_index(drop=True)
+
+        link_facility = link['origin_facility_id']
+        link_name = link['origin_name']
+        dist_to_link = self._lookup(
+            primary['origin_facility_id'], link_facility,
+            pd.Series('FACILITY', index=primary.index)
+        )
+        dist_from_link = self._lookup(
+            link_facility, primary['destination_treatment_plant_id'],
+            pd.Series('TREATMENT_PLANT', index=primary.index)
+        )
+
+        tariff_t1 = self._tariff_for('AMPLIROLL', proforma)
+        tariff_t2 = self._tariff_for('AMPLIROLL_CARRO', proforma)
+        min_t1 = self._min_weight_for('AMPLIROLL')
+        min_t2 = self._min_weight_for('AMPLIROLL_CARRO')
+
+        t1 = primary.assign(
+            segment_desc=SEGMENT_T1, tariff_type='AMPLIROLL', tariff_uf=tariff_t1, min_weight=min_t1,
+            link_point_name=link_name.fillna(''), dist_to_link=dist_to_link, distance_km=dist_to_link,
+            destination_name='-'  # T1 solo muestra el enlace
+        )
+        t2_primary = primary.assign(
+            segment_desc=SEGMENT_T2, tariff_type='AMPLIROLL_CARRO', tariff_uf=tariff_t2, min_weight=min_t2,
+            link_point_name='-', dist_to_link=0.0, distance_km=dist_from_link,
+            segment_origin_name=link_name.fillna('Enlace')
+        )
+        t2_link = link.assign(
+            segment_desc=SEGMENT_T2, tariff_type='AMPLIROLL_CARRO', tariff_uf=tariff_t2, min_weight=min_t2,
+            link_point_name='-', dist_to_link=0.0, distance_km=dist_from_link
+        )
+
+        segments = pd.concat(
+            [t.assign(_segment_order=order) for order, t in enumerate((t1, t2_primary, t2_link))],
+            sort=False
+        )
+        segments['_trip_order'] = segments.index
+        return (
+            segments.sort_values(['_trip_order', '_segment_order'], kind='mergesort')
+            .drop(columns=['_trip_order', '_segment_order'])
+            .reset_index(drop=True)
+        )
+
+    # ==========================================
+    # DISTANCIAS Y TARIFAS
+    # ==========================================
+
+    def _lookup(
+        self,
+        origin: pd.Series,
+        destination: pd.Series,
+        destination_type: pd.Series,
+        origin_type: Optional[pd.Series] = None
+    ) -> pd.Series:
+        """
+        Resuelve distancias para vectores de (origen, destino, tipo) en una
+        sola búsqueda en bloque. Rutas fuera de la matriz usan el camino más
+        corto; pares inválidos o sin camino retornan 0. Sin origin_type, los
+        orígenes son plantas (FACILITY).
+        """
+        distances = self.distance_repo.get_route_distances(
+            origin, destination, destination_type, derive_missing=True, origin_types=origin_type
+        )
+        return pd.Series(distances, index=origin.index).fillna(0.0)
+
+    @staticmethod
+    def _map_by_type(vehicle_types: pd.Series, resolver) -> pd.Series:
+        """Resuelve un valor por tipo de vehículo, una vez por tipo distinto."""
+        values = {vt: resolver(vt) for vt in vehicle_types.dropna().unique()}
+        return vehicle_types.map(values).fillna(resolver(None)).astype(float)
+
+    @staticmethod
+    def _tariff_for(vehicle_type: Optional[str], proforma: Optional[Proforma]) -> float:
+        if proforma and vehicle_type:
+            tariff = proforma.get_tariff_for_vehicle_type(vehicle_type)
+            if tariff:
+                return tariff
+        return DEFAULT_TRANSPORT_TARIFFS_UF.get(
+            str(vehicle_type).upper() if vehicle_type else '', 0.0
+        )
+
+    @staticmethod
+    def _min_weight_for(vehicle_type: Optional[str]) -> float:
+        return MIN_BILLABLE_WEIGHT_TONS.get(
+            str(vehicle_type).upper() if vehicle_type else '', 7.0
+        )
+
+    @staticmethod
+    def _cycle_dates(proforma: Proforma) -> Tuple[datetime, datetime]:
+        """Ciclo 19 del mes anterior → 18 del mes de la proforma."""
+        start, end = Proforma.calculate_cycle_dates(proforma.period_year, proforma.period_month)
+        return datetime(start.year, start.month, start.day), datetime(end.year, end.month, end.day)
@@ -0,0 +1,66 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def solve_assignment(cost) -> List[Tuple[int, int]]:
+    """
+    Minimum-cost assignment (Hungarian method, O(n²·m) shortest augmenting paths).
+
+    Every row is matched to a distinct column, so the matrix must have at
+    least as many columns as rows; a taller matrix is solved transposed and
+    leaves rows unmatched instead. Forbidden pairs should carry a large
+    finite cost (not inf) so the potentials stay finite.
+
+    Args:
+        cost: 2-D array-like, cost[row, col]
+
+    Returns:
+        (row, col) pairs of the optimal assignment, ordered by row
+    """
+    cost = np.asarray(cost, dtype=float)
+    if cost.size == 0:
+        return []
+    if cost.shape[0] > cost.shape[1]:
+        return sorted((row, col) for col, row in solve_assignment(cost.T))
+
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # owner[col] = row (1-based), 0 = free
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for row in range(1, n + 1):
+        owner[0] = row
+        col = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current_row = owner[col]
+            free = ~used[1:]
+
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = col
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_col = int(np.argmin(candidates)) + 1
+            delta = candidates[next_col - 1]
+
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_reduced[1:][free] -= delta
+
+            col = next_col
+            if owner[col] == 0:
+                break
+
+        # Augment along the alternating path
+        while col:
+            previous = way[col]
+            owner[col] = owner[previous]
+            col = previous
+
+    return sorted((int(owner[col]) - 1, col - 1) for col in range(1, m + 1) if owner[col])
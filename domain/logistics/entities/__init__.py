@@ -9,6 +9,7 @@ from .driver import Driver
 from .vehicle import Vehicle, VehicleType, AssetType
 from .pickup_request import PickupRequest, PickupRequestStatus
 from .status_transition import StatusTransition
+from .load_snapshot import LoadSnapshot
 
 __all__ = [
     'Load',
@@ -26,4 +27,5 @@ __all__ = [
     'PickupRequest',
     'PickupRequestStatus',
     'StatusTransition',
+    'LoadSnapshot',
 ]
\ No newline at end of file
@@ -2,8 +2,10 @@ from dataclasses import dataclass, field
 from typing import Optional, Dict, Any
 from datetime import datetime
 
+from domain.shared.entities.change_tracking import ChangeTracking
+
 @dataclass
-class Load:
+class Load(ChangeTracking):
     id: Optional[int]
     origin_facility_id: int
     
@@ -67,6 +69,9 @@ class Load:
     trip_id: Optional[str] = None  # Agrupa tramos de un mismo viaje con enlace
     segment_type: str = 'DIRECT'  # DIRECT, LINK_T1 (primer tramo), LINK_T2 (segundo tramo)
 
+    # Optimistic Concurrency: incrementado por LoadRepository en cada UPDATE
+    version: int = 0
+
     def calculate_net_weight(self) -> None:
         """
         Updates the net_weight if gross_weight and tare_weight are present.
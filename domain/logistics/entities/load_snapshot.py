@@ -0,0 +1,101 @@
+"""
+LoadSnapshot - Foto inmutable de una carga adjunta a los eventos de estado.
+
+LoadStateService la construye al transicionar (event.data['load']) para que
+los listeners (cumplimiento, costos, mantenimiento) no vuelvan a consultar la
+carga: trae el vehículo y contratista resueltos, la distancia de la ruta
+según la matriz de distancias y los pesos al momento de la transición.
+"""
+import copy
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class LoadSnapshot:
+    """
+    Datos de la carga al momento de la transición (serializable a JSON).
+
+    Ejemplo:
+        snapshot = LoadSnapshot.from_event(event)
+        if snapshot:
+            cost = snapshot.distance_km * rate.unit_price
+    """
+    load_id: int
+    status: str
+    vehicle_id: Optional[int] = None
+    driver_id: Optional[int] = None
+    contractor_id: Optional[int] = None  # De la carga o, si falta, del vehículo
+    manifest_code: Optional[str] = None
+    origin_facility_id: Optional[int] = None
+    origin_treatment_plant_id: Optional[int] = None
+    destination_site_id: Optional[int] = None
+    destination_treatment_plant_id: Optional[int] = None
+    distance_km: Optional[float] = None  # Matriz de distancias (o camino más corto)
+    gross_weight: Optional[float] = None
+    tare_weight: Optional[float] = None
+    net_weight: Optional[float] = None
+    dispatch_time: Optional[str] = None  # ISO 8601
+    arrival_time: Optional[str] = None  # ISO 8601
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_load(
+        cls,
+        load,
+        contractor_id: Optional[int] = None,
+        distance_km: Optional[float] = None
+    ) -> 'LoadSnapshot':
+        """
+        Construye la foto desde una entidad Load.
+
+        Args:
+            load: Carga ya actualizada por la transición
+            contractor_id: Contratista resuelto (por defecto el de la carga)
+            distance_km: Distancia de la ruta de la carga
+        """
+        return cls(
+            load_id=load.id,
+            status=load.status,
+            vehicle_id=load.vehicle_id,
+            driver_id=load.driver_id,
+            contractor_id=contractor_id if contractor_id is not None else load.contractor_id,
+            manifest_code=load.manifest_code,
+            origin_facility_id=load.origin_facility_id,
+            origin_treatment_plant_id=load.origin_treatment_plant_id,
+            destination_site_id=load.destination_site_id,
+            destination_treatment_plant_id=load.destination_treatment_plant_id,
+            distance_km=distance_km,
+            gross_weight=load.gross_weight,
+            tare_weight=load.tare_weight,
+            net_weight=load.net_weight,
+            dispatch_time=_isoformat(load.dispatch_time),
+            arrival_time=_isoformat(load.arrival_time),
+            attributes=copy.deepcopy(load.attributes or {})
+        )
+
+    @classmethod
+    def from_event(cls, event) -> Optional['LoadSnapshot']:
+        """
+        Lee la foto de event.data['load'].
+
+        Returns:
+            LoadSnapshot, o None si el evento no la trae (eventos anteriores
+            al enriquecimiento o publicados por otros servicios)
+        """
+        data = event.data.get('load') if isinstance(event.data, dict) else None
+        if not data:
+            return None
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación para event.data (copia independiente)."""
+        return asdict(self)
+
+
+def _isoformat(value) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
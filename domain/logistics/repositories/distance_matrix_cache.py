@@ -0,0 +1,233 @@
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from infrastructure.persistence.database_manager import DatabaseManager
+from domain.logistics.routing import ShortestPathRouter, route_nodes
+
+RouteKey = Tuple[int, int, str]
+
+
+class _RouteIndex(NamedTuple):
+    distances: Dict[RouteKey, float]
+    link_routes: Dict[int, List[dict]]
+    series: pd.Series
+
+
+class DistanceMatrixCache:
+    """
+    Process-wide in-memory index of the distance_matrix table.
+
+    The whole table is loaded once into a hash index keyed by
+    (origin_facility_id, destination_id, destination_type), plus a pandas
+    MultiIndex series for bulk vector lookups. DistanceMatrixRepository
+    invalidates it on every write; writes made by other processes are picked
+    up by a cheap version check (row count, max id, max updated_at) that runs
+    at most once every `check_interval` seconds.
+
+    Derived distances for pairs missing from the matrix come from a
+    ShortestPathRouter built on first use over typed nodes (route_nodes).
+    Matrix origins are always facilities; derived lookups may start from
+    any node type, e.g. a treatment plant reached by some route. Route
+    edits reported through route_changed() update the router incrementally
+    instead of rebuilding it.
+    """
+
+    def __init__(self, check_interval: float = 60.0):
+        self.check_interval = check_interval
+        self._index: Optional[_RouteIndex] = None
+        self._router: Optional[ShortestPathRouter] = None
+        self._version: Optional[tuple] = None
+        self._last_check = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Drops the index and the router; both are rebuilt on next access."""
+        with self._lock:
+            self._index = None
+            self._router = None
+            self._version = None
+            self._generation += 1
+
+    def route_changed(self, key: RouteKey, distance_km: Optional[float]) -> None:
+        """
+        Reports a single route write (distance_km=None for a deletion).
+
+        The hash index is reloaded on next access; the shortest-path router
+        is updated in place.
+        """
+        with self._lock:
+            self._index = None
+            self._version = None
+            self._generation += 1
+            if self._router is not None:
+                origin, destination = self._nodes(key)
+                self._router.update_edge(origin, destination, distance_km)
+
+    def get(self, db_manager: DatabaseManager, key: RouteKey) -> Optional[float]:
+        """Distance for one route, or None if the route does not exist."""
+        return self._ensure_loaded(db_manager).distances.get(key)
+
+    def get_linkable_routes(self, db_manager: DatabaseManager, origin_facility_id: int) -> List[dict]:
+        """is_link_segment routes leaving an origin, ordered by distance."""
+        link_routes = self._ensure_loaded(db_manager).link_routes
+        return [dict(route) for route in link_routes.get(origin_facility_id, [])]
+
+    def lookup_many(
+        self,
+        db_manager: DatabaseManager,
+        origins: Iterable,
+        destination_ids: Iterable,
+        destination_types: Iterable
+    ) -> np.ndarray:
+        """
+        Vectorized lookup for aligned arrays of route endpoints.
+
+        Returns:
+            float array with the distance per position; NaN where the route is
+            missing or an endpoint is null
+        """
+        series = self._ensure_loaded(db_manager).series
+
+        origins = pd.to_numeric(pd.Series(list(origins), dtype=object), errors='coerce')
+        destination_ids = pd.to_numeric(pd.Series(list(destination_ids), dtype=object), errors='coerce')
+        destination_types = pd.Series(list(destination_types), dtype=object)
+
+        result = np.full(len(origins), np.nan)
+        valid = (origins.notna() & destination_ids.notna() & destination_types.notna()).to_numpy()
+        if valid.any() and not series.empty:
+            index = pd.MultiIndex.from_arrays([
+                origins[valid].astype(np.int64).to_numpy(),
+                destination_ids[valid].astype(np.int64).to_numpy(),
+                destination_types[valid].to_numpy()
+            ])
+            result[valid] = series.reindex(index).to_numpy(dtype=float)
+        return result
+
+    def shortest_distance(
+        self,
+        db_manager: DatabaseManager,
+        key: RouteKey,
+        origin_type: str = 'FACILITY'
+    ) -> Optional[float]:
+        """Shortest path distance over the route graph, or None if unreachable."""
+        origin, destination = self._nodes(key, origin_type)
+        return self.router(db_manager).distance(origin, destination)
+
+    def shortest_many(
+        self,
+        db_manager: DatabaseManager,
+        origins: Iterable,
+        destination_ids: Iterable,
+        destination_types: Iterable,
+        origin_types: Optional[Iterable] = None
+    ) -> np.ndarray:
+        """Vectorized shortest_distance; NaN where unreachable or an endpoint is null."""
+        router = self.router(db_manager)
+        origins = list(origins)
+        origin_types = ['FACILITY'] * len(origins) if origin_types is None else list(origin_types)
+        origin_nodes, destination_nodes = [], []
+        for origin, origin_type, destination_id, destination_type in zip(
+            origins, origin_types, destination_ids, destination_types
+        ):
+            if pd.isna(origin) or pd.isna(destination_id) or destination_type is None or origin_type is None:
+                origin_nodes.append(None)
+                destination_nodes.append(None)
+            else:
+                nodes = self._nodes((int(origin), int(destination_id), destination_type), origin_type)
+                origin_nodes.append(nodes[0])
+                destination_nodes.append(nodes[1])
+        return router.distances(origin_nodes, destination_nodes)
+
+    @staticmethod
+    def _nodes(key: RouteKey, origin_type: str = 'FACILITY') -> Tuple[tuple, tuple]:
+        """Graph nodes of a route (matrix rows always start at a facility)."""
+        origin_id, destination_id, destination_type = key
+        return route_nodes(origin_id, destination_id, destination_type, origin_type)
+
+    def router(self, db_manager: DatabaseManager) -> ShortestPathRouter:
+        """Shortest-path router over the whole matrix (typed nodes), built on first use."""
+        index = self._ensure_loaded(db_manager)
+        router = self._router
+        if router is None:
+            router = ShortestPathRouter(
+                self._nodes(key) + (km,) for key, km in index.distances.items()
+            )
+            with self._lock:
+                if self._index is index:
+                    self._router = router
+        return router
+
+    def _ensure_loaded(self, db_manager: DatabaseManager) -> _RouteIndex:
+        index = self._index
+        now = time.monotonic()
+        if index is not None and now - self._last_check < self.check_interval:
+            return index
+
+        generation = self._generation
+        with db_manager as conn:
+            version = tuple(conn.execute(
+                "SELECT COUNT(*), MAX(id), MAX(updated_at) FROM distance_matrix"
+            ).fetchone())
+            if index is not None and version == self._version:
+                self._last_check = now
+                return index
+
+            rows = conn.execute(
+                """SELECT origin_facility_id, destination_id, destination_type,
+                          distance_km, is_link_segment
+                   FROM distance_matrix
+                   ORDER BY origin_facility_id, distance_km"""
+            ).fetchall()
+
+        distances = {}
+        link_routes: Dict[int, List[dict]] = {}
+        for row in rows:
+            key = (row['origin_facility_id'], row['destination_id'], row['destination_type'])
+            distances.setdefault(key, row['distance_km'])
+            if row['is_link_segment']:
+                link_routes.setdefault(row['origin_facility_id'], []).append({
+                    'destination_id': row['destination_id'],
+                    'destination_type': row['destination_type'],
+                    'distance_km': row['distance_km'],
+                    'is_link_segment': row['is_link_segment'],
+                })
+
+        index = _RouteIndex(
+            distances=distances,
+            link_routes=link_routes,
+            series=pd.Series(
+                list(distances.values()),
+                index=pd.MultiIndex.from_tuples(list(distances.keys())) if distances else None,
+                dtype=float
+            )
+        )
+
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while loading: serve this read, reload on the next one
+                return index
+            if self._version is not None and version != self._version:
+                # Changed outside this process: the router no longer matches
+                self._router = None
+            self._index = index
+            self._version = version
+            self._last_check = now
+        return index
+
+
+_caches: Dict[str, DistanceMatrixCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_distance_cache(db_path: str) -> DistanceMatrixCache:
+    """Returns the shared cache for a database file, creating it on first use."""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = _caches[db_path] = DistanceMatrixCache()
+        return cache
@@ -1,6 +1,9 @@
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 from infrastructure.persistence.database_manager import DatabaseManager
 from infrastructure.persistence.generic_repository import BaseRepository
+from domain.logistics.repositories.distance_matrix_cache import get_distance_cache
+from domain.logistics.routing import ShortestPathRouter
+import numpy as np
 import sqlite3
 
 
@@ -10,11 +13,16 @@ class DistanceMatrixRepository:
     
     Handles route lookups for trip linking and logistics optimization,
     as well as CRUD operations for distance matrix management.
+    
+    Route lookups are served from a process-wide in-memory index
+    (DistanceMatrixCache) shared by every repository on the same database;
+    all write operations invalidate it.
     """
     
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
         self.table_name = "distance_matrix"
+        self.cache = get_distance_cache(db_manager.db_path)
     
     # ==========================================================================
     # READ OPERATIONS
@@ -33,47 +41,94 @@ class DistanceMatrixRepository:
         Returns:
             List of dicts with keys: destination_id, destination_type, distance_km, is_link_segment
         """
-        with self.db_manager as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                f"""SELECT destination_id, destination_type, distance_km, is_link_segment
-                    FROM {self.table_name}
-                    WHERE origin_facility_id = ? AND is_link_segment = 1
-                    ORDER BY distance_km ASC""",
-                (origin_facility_id,)
-            )
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+        return self.cache.get_linkable_routes(self.db_manager, origin_facility_id)
     
     def get_route_distance(
         self,
         origin_facility_id: int,
         destination_id: int,
-        destination_type: str
+        destination_type: str,
+        derive_missing: bool = False,
+        origin_type: str = 'FACILITY'
     ) -> Optional[float]:
         """
         Gets the distance in km for a specific route.
         
         Args:
-            origin_facility_id: Origin facility ID
+            origin_facility_id: Origin node ID (a facility unless origin_type says otherwise)
             destination_id: Destination node ID (facility or site)
             destination_type: 'FACILITY' or 'SITE'
+            derive_missing: If the route is not in the matrix, return the
+                            shortest path over the configured routes instead
+            origin_type: 'FACILITY', 'TREATMENT_PLANT' or 'SITE'. Matrix rows
+                         start at facilities, so other origins are only
+                         resolved through derive_missing
             
         Returns:
-            Distance in km, or None if route not found
+            Distance in km, or None if route not found (or unreachable)
         """
-        with self.db_manager as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                f"""SELECT distance_km FROM {self.table_name}
-                    WHERE origin_facility_id = ? 
-                    AND destination_id = ?
-                    AND destination_type = ?
-                    LIMIT 1""",
-                (origin_facility_id, destination_id, destination_type)
+        key = (origin_facility_id, destination_id, destination_type)
+        distance = self.cache.get(self.db_manager, key) if origin_type == 'FACILITY' else None
+        if distance is None and derive_missing:
+            distance = self.cache.shortest_distance(self.db_manager, key, origin_type)
+        return distance
+    
+    def get_route_distances(
+        self,
+        origin_facility_ids: Iterable,
+        destination_ids: Iterable,
+        destination_types: Iterable,
+        derive_missing: bool = False,
+        origin_types: Optional[Iterable] = None
+    ) -> np.ndarray:
+        """
+        Vectorized route distance lookup for aligned arrays of endpoints.
+        
+        Args:
+            origin_facility_ids: Origin IDs (None/NaN allowed)
+            destination_ids: Destination IDs (None/NaN allowed)
+            destination_types: 'FACILITY', 'TREATMENT_PLANT' or 'SITE' per position
+            derive_missing: Fill routes missing from the matrix with the
+                            shortest path over the configured routes
+            origin_types: Origin node type per position (default: all
+                          'FACILITY'); non-facility origins are only
+                          resolved through derive_missing
+            
+        Returns:
+            float array of distances in km; NaN where the route is not found
+        """
+        origin_facility_ids = list(origin_facility_ids)
+        destination_ids = list(destination_ids)
+        destination_types = list(destination_types)
+        if origin_types is None:
+            origin_types = ['FACILITY'] * len(origin_facility_ids)
+        else:
+            origin_types = list(origin_types)
+        # Matrix rows start at facilities: a plant must not match a facility with its id
+        facility_origins = [
+            origin if origin_type == 'FACILITY' else None
+            for origin, origin_type in zip(origin_facility_ids, origin_types)
+        ]
+        distances = self.cache.lookup_many(self.db_manager, facility_origins, destination_ids, destination_types)
+        
+        missing = np.isnan(distances)
+        if derive_missing and missing.any():
+            positions = np.flatnonzero(missing)
+            distances[positions] = self.cache.shortest_many(
+                self.db_manager,
+                [origin_facility_ids[i] for i in positions],
+                [destination_ids[i] for i in positions],
+                [destination_types[i] for i in positions],
+                [origin_types[i] for i in positions]
             )
-            row = cursor.fetchone()
-            return row['distance_km'] if row else None
+        return distances
+    
+    def get_router(self) -> ShortestPathRouter:
+        """
+        Shortest-path router over the whole matrix, shared with the cache
+        (typed nodes, see domain.logistics.routing.route_nodes).
+        """
+        return self.cache.router(self.db_manager)
     
     def get_all_routes(self, origin_facility_id: Optional[int] = None) -> List[dict]:
         """
@@ -258,9 +313,12 @@ class DistanceMatrixRepository:
                     query,
                     (origin_facility_id, destination_id, destination_type, distance_km, int(is_link_segment))
                 )
-                return cursor.lastrowid
+                route_id = cursor.lastrowid
+                self._route_changed((origin_facility_id, destination_id, destination_type), distance_km)
         except sqlite3.IntegrityError as e:
             raise ValueError(f"Error de integridad: {str(e)}")
+        
+        return route_id
     
     def update(
         self,
@@ -299,9 +357,15 @@ class DistanceMatrixRepository:
         query = f"UPDATE {self.table_name} SET {', '.join(updates)} WHERE id = ?"
         
         with self.db_manager as conn:
+            existing = self.get_by_id(route_id)
             cursor = conn.cursor()
             cursor.execute(query, tuple(params))
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+            if existing:
+                new_km = distance_km if distance_km is not None else existing['distance_km']
+                self._route_changed(self._route_key(existing), new_km)
+        
+        return updated
     
     def delete(self, route_id: int) -> bool:
         """
@@ -314,12 +378,17 @@ class DistanceMatrixRepository:
             True if deleted successfully, False if route not found
         """
         with self.db_manager as conn:
+            existing = self.get_by_id(route_id)
             cursor = conn.cursor()
             cursor.execute(
                 f"DELETE FROM {self.table_name} WHERE id = ?",
                 (route_id,)
             )
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+            if existing:
+                self._route_changed(self._route_key(existing), None)
+        
+        return deleted
     
     def upsert(
         self,
@@ -354,6 +423,18 @@ class DistanceMatrixRepository:
             new_id = self.add(origin_facility_id, destination_id, destination_type, distance_km, is_link_segment)
             return (new_id, False)
     
+    def _route_changed(self, key: Tuple[int, int, str], distance_km: Optional[float]) -> None:
+        """
+        Reports a route write to the shared cache once the transaction commits.
+        A rollback only marks the cache stale (it may have loaded uncommitted rows).
+        """
+        self.db_manager.on_commit(lambda: self.cache.route_changed(key, distance_km))
+        self.db_manager.on_rollback(self.cache.invalidate)
+    
+    @staticmethod
+    def _route_key(route: dict) -> Tuple[int, int, str]:
+        return (route['origin_facility_id'], route['destination_id'], route['destination_type'])
+    
     def get_route_by_endpoints(
         self,
         origin_facility_id: int,
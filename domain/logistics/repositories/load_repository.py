@@ -1,38 +1,22 @@
-from typing import List, Optional, Dict
-from datetime import datetime
+import json
+from typing import Any, List, Optional, Dict, Tuple
+from datetime import date, datetime
 from infrastructure.persistence.generic_repository import BaseRepository
 from domain.logistics.entities.load import Load
 from domain.logistics.entities.load_status import LoadStatus
 from infrastructure.persistence.database_manager import DatabaseManager
 
 class LoadRepository(BaseRepository[Load]):
+    # Datetime conversion from SQLite strings (compiled once per column set)
+    datetime_fields = ('created_at', 'updated_at', 'dispatch_time', 'arrival_time', 'completion_time')
+    # Ensures weight_net alias is populated from net_weight
+    field_aliases = (('weight_net', 'net_weight'),)
+    # Compare-and-swap UPDATEs (migration 033)
+    version_column = 'version'
+
     def __init__(self, db_manager: DatabaseManager):
         super().__init__(db_manager, Load, "loads")
 
-    def _map_row_to_model(self, row: dict) -> Load:
-        """
-        Override to handle datetime conversion from SQLite strings.
-        Also ensures weight_net alias is populated from net_weight.
-        """
-        data = dict(row)
-        
-        # Convert datetime fields
-        datetime_fields = ['created_at', 'updated_at', 'dispatch_time', 'arrival_time', 'completion_time']
-        for field in datetime_fields:
-            if field in data and isinstance(data[field], str):
-                try:
-                    # Handle format "YYYY-MM-DD HH:MM:SS.ssssss" or "YYYY-MM-DD HH:MM:SS"
-                    data[field] = datetime.fromisoformat(data[field])
-                except ValueError:
-                    # Fallback or log error
-                    pass
-        
-        # Ensure weight_net alias is populated from net_weight
-        if 'net_weight' in data and data['net_weight'] is not None:
-            data['weight_net'] = data['net_weight']
-                    
-        return super()._map_row_to_model(data)
-
     def get_next_manifest_sequence(self) -> int:
         """
         Returns the next sequence number using the sequences table.
@@ -65,7 +49,7 @@ class LoadRepository(BaseRepository[Load]):
                 (limit, offset)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_active_loads(self) -> List[Load]:
         """
@@ -77,7 +61,7 @@ class LoadRepository(BaseRepository[Load]):
                 f"SELECT * FROM {self.table_name} WHERE status NOT IN ('COMPLETED', 'CANCELLED') ORDER BY created_at DESC"
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_active_load(self, vehicle_id: int) -> Optional[Load]:
         """
@@ -90,7 +74,7 @@ class LoadRepository(BaseRepository[Load]):
                 (vehicle_id,)
             )
             row = cursor.fetchone()
-            return self._map_row_to_model(dict(row)) if row else None
+            return self._map_row(row) if row else None
 
     def get_assignable_loads(self, vehicle_id: int) -> List[Load]:
         """
@@ -103,7 +87,7 @@ class LoadRepository(BaseRepository[Load]):
                 (LoadStatus.ASSIGNED.value,)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_assigned_loads_by_vehicle(self, vehicle_id: int) -> List[Load]:
         """
@@ -127,7 +111,7 @@ class LoadRepository(BaseRepository[Load]):
                 (vehicle_id, LoadStatus.ASSIGNED.value, LoadStatus.ACCEPTED.value)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_in_transit_loads_by_destination_site(self, site_id: int) -> List[Load]:
         """
@@ -151,7 +135,7 @@ class LoadRepository(BaseRepository[Load]):
                 (site_id, LoadStatus.EN_ROUTE_DESTINATION.value)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_in_transit_loads_by_treatment_plant(self, plant_id: int) -> List[Load]:
         """
@@ -175,7 +159,7 @@ class LoadRepository(BaseRepository[Load]):
                 (plant_id, LoadStatus.EN_ROUTE_DESTINATION.value)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_delivered_by_destination_type(self, destination_type: str, destination_id: int) -> List[Load]:
         """
@@ -198,7 +182,7 @@ class LoadRepository(BaseRepository[Load]):
             
             cursor.execute(query, tuple(params))
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_by_status(self, status: str, limit: int = 50) -> List[Load]:
         """
@@ -211,7 +195,7 @@ class LoadRepository(BaseRepository[Load]):
                 (status, limit)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_loads_with_details(self, status: Optional[str] = None, limit: int = 100) -> List[dict]:
         """
@@ -276,7 +260,7 @@ class LoadRepository(BaseRepository[Load]):
                 (trip_id,)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_pending_loads_by_origin_and_date(
         self,
@@ -309,7 +293,70 @@ class LoadRepository(BaseRepository[Load]):
                 (origin_facility_id, date_start.isoformat(), date_end.isoformat())
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
+
+    def get_requested_for_consolidation(self, date_from: date, date_to: date) -> List[dict]:
+        """
+        Returns unlinked REQUESTED loads in a date range with their origin facility data.
+
+        Used by the trip consolidation optimizer. The date is requested_date,
+        falling back to created_at for legacy requests.
+
+        Args:
+            date_from: First day of the range (inclusive)
+            date_to: Last day of the range (inclusive)
+
+        Returns:
+            List of dicts with load fields plus origin is_link_point,
+            allowed_vehicle_types and origin_name
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT l.id, l.origin_facility_id, l.net_weight,
+                           l.vehicle_type_requested, l.container_quantity,
+                           l.destination_site_id, l.destination_treatment_plant_id,
+                           f.name as origin_name, f.is_link_point, f.allowed_vehicle_types
+                    FROM {self.table_name} l
+                    INNER JOIN facilities f ON l.origin_facility_id = f.id
+                    WHERE l.status = 'REQUESTED'
+                    AND (l.trip_id IS NULL OR l.trip_id = '')
+                    AND f.is_active = 1
+                    AND DATE(COALESCE(l.requested_date, l.created_at)) BETWEEN ? AND ?
+                    ORDER BY l.id""",
+                (date_from.isoformat(), date_to.isoformat())
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_requested_for_planning(self, date_from: date, date_to: date) -> List[dict]:
+        """
+        Returns REQUESTED loads in a date range with the data needed to assign resources.
+
+        Unlike get_requested_for_consolidation, linked loads (trip_id) are
+        included so the planner can assign each trip as a unit.
+
+        Args:
+            date_from: First day of the range (inclusive)
+            date_to: Last day of the range (inclusive)
+
+        Returns:
+            List of dicts with load fields plus origin allowed_vehicle_types
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT l.id, l.origin_facility_id, l.net_weight, l.requested_date,
+                           l.vehicle_type_requested, l.container_quantity,
+                           l.destination_site_id, l.destination_treatment_plant_id,
+                           l.trip_id, l.segment_type, f.allowed_vehicle_types
+                    FROM {self.table_name} l
+                    LEFT JOIN facilities f ON l.origin_facility_id = f.id
+                    WHERE l.status = 'REQUESTED'
+                    AND DATE(COALESCE(l.requested_date, l.created_at)) BETWEEN ? AND ?
+                    ORDER BY COALESCE(l.requested_date, l.created_at), l.id""",
+                (date_from.isoformat(), date_to.isoformat())
+            )
+            return [dict(row) for row in cursor.fetchall()]
 
     def update_trip_id_bulk(self, load_ids: List[int], trip_id: str, segment_types: Dict[int, str]) -> None:
         """
@@ -322,17 +369,15 @@ class LoadRepository(BaseRepository[Load]):
             trip_id: UUID to assign to all loads
             segment_types: Map of load_id -> segment_type ('PICKUP_SEGMENT' or 'MAIN_HAUL')
         """
+        params = [(trip_id, segment_types.get(load_id, 'DIRECT'), load_id) for load_id in load_ids]
         with self.db_manager as conn:
             cursor = conn.cursor()
-            for load_id in load_ids:
-                segment_type = segment_types.get(load_id, 'DIRECT')
-                cursor.execute(
-                    f"""UPDATE {self.table_name} 
-                        SET trip_id = ?, segment_type = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?""",
-                    (trip_id, segment_type, load_id)
-                )
-            conn.commit()
+            cursor.executemany(
+                f"""UPDATE {self.table_name} 
+                    SET trip_id = ?, segment_type = ?, updated_at = CURRENT_TIMESTAMP{self._version_bump(conn)}
+                    WHERE id = ?""",
+                params
+            )
 
     def update_financial_status_bulk(self, load_ids: List[int], status: str) -> None:
         """
@@ -350,7 +395,74 @@ class LoadRepository(BaseRepository[Load]):
             
             params = [(status, load_id) for load_id in load_ids]
             cursor.executemany(
-                f"UPDATE {self.table_name} SET financial_status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                f"UPDATE {self.table_name} SET financial_status = ?, "
+                f"updated_at = CURRENT_TIMESTAMP{self._version_bump(conn)} WHERE id = ?",
                 params
             )
-            conn.commit()
\ No newline at end of file
+
+    def _version_bump(self, conn) -> str:
+        """
+        SET fragment bumping the row version on raw UPDATEs, so stale
+        copies read before the write conflict on their next update().
+        """
+        if not self._is_versioned(self._schema(conn)):
+            return ""
+        return f", {self.version_column} = {self.version_column} + 1"
+
+    def merge_attributes(self, load_id: int, attributes: Dict[str, Any]) -> bool:
+        """
+        Merges top-level keys into the attributes JSON of a load inside SQLite
+        (json_set), with the same semantics as dict.update.
+
+        The merge happens in a single UPDATE instead of a read-modify-write,
+        so concurrent checkpoint forms (lab, gate, weight) writing different
+        keys do not overwrite each other.
+
+        Args:
+            load_id: ID of the load
+            attributes: Keys to add or replace
+
+        Returns:
+            True if the load exists
+        """
+        set_args = []
+        params: List[Any] = []
+        for key, value in attributes.items():
+            set_args.append("?, json(?)")
+            params.extend(['$.' + json.dumps(str(key)), json.dumps(value, default=str)])
+
+        if set_args:
+            new_attributes = (
+                f"json_set(CASE WHEN json_valid(attributes) THEN attributes ELSE '{{}}' END, "
+                f"{', '.join(set_args)})"
+            )
+        else:
+            new_attributes = "attributes"
+
+        with self.db_manager as conn:
+            sync_set, sync_params = self._sync_pending(conn)
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""UPDATE {self.table_name}
+                    SET attributes = {new_attributes}{sync_set},
+                        updated_at = CURRENT_TIMESTAMP{self._version_bump(conn)}
+                    WHERE id = ?""",
+                (*params, *sync_params, load_id)
+            )
+            return cursor.rowcount > 0
+
+    def _sync_pending(self, conn) -> Tuple[str, Tuple[Any, ...]]:
+        """
+        SET fragment and parameters flagging the row for mobile sync
+        (sync_status = 'PENDING', last_updated_local = now), for the sync
+        columns the table has.
+        """
+        columns = self._schema(conn).columns
+        fragment = ""
+        params: Tuple[Any, ...] = ()
+        if 'sync_status' in columns:
+            fragment += ", sync_status = 'PENDING'"
+        if 'last_updated_local' in columns:
+            fragment += ", last_updated_local = ?"
+            params += (datetime.now(),)
+        return fragment, params
@@ -0,0 +1,109 @@
+"""
+PendingTaskRepository - Índice persistido de tareas de la bandeja de entrada
+
+Una fila por (carga, formulario, rol) en pending_tasks, escrita por
+PendingTaskIndex cuando cambian los atributos o el estado de una carga.
+pending_task_loads guarda la versión de cada carga con la que se calculó
+el índice, para detectar cargas modificadas por otros servicios.
+"""
+from typing import Dict, List, Optional, Sequence
+
+from infrastructure.persistence.database_manager import DatabaseManager
+
+
+class PendingTaskRepository:
+    """
+    Repositorio de las tablas pending_tasks y pending_task_loads.
+    """
+
+    COLUMNS = (
+        'load_id', 'form_type', 'allowed_role', 'role_rank', 'title',
+        'description', 'priority', 'priority_order', 'target_status'
+    )
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.table_name = "pending_tasks"
+        self.state_table = "pending_task_loads"
+
+    def replace_for_loads(self, load_versions: Dict[int, Optional[int]], tasks: Sequence[dict]) -> None:
+        """
+        Reemplaza las tareas de las cargas indicadas en una transacción.
+
+        Las cargas sin tareas en `tasks` quedan sin tareas (checkpoint ya
+        registrado, carga completada o eliminada).
+
+        Args:
+            load_versions: load_id -> versión de la carga usada para el cálculo
+                (None si la carga ya no existe)
+            tasks: Filas (dicts con COLUMNS) de esas cargas
+        """
+        if not load_versions:
+            return
+        load_ids = list(load_versions)
+        placeholders = ', '.join('?' for _ in load_ids)
+        with self.db_manager as conn:
+            conn.execute(f"DELETE FROM {self.table_name} WHERE load_id IN ({placeholders})", load_ids)
+            conn.execute(f"DELETE FROM {self.state_table} WHERE load_id IN ({placeholders})", load_ids)
+            if tasks:
+                conn.executemany(
+                    f"""INSERT OR IGNORE INTO {self.table_name} ({', '.join(self.COLUMNS)})
+                        VALUES ({', '.join('?' for _ in self.COLUMNS)})""",
+                    [tuple(task.get(column) for column in self.COLUMNS) for task in tasks]
+                )
+            conn.executemany(
+                f"INSERT INTO {self.state_table} (load_id, load_version) VALUES (?, ?)",
+                [(load_id, version) for load_id, version in load_versions.items() if version is not None]
+            )
+
+    def clear(self) -> None:
+        """Vacía el índice (se recalcula completo en el siguiente sync)."""
+        with self.db_manager as conn:
+            conn.execute(f"DELETE FROM {self.table_name}")
+            conn.execute(f"DELETE FROM {self.state_table}")
+
+    def get_stale_load_ids(self) -> List[int]:
+        """
+        Cargas cuyo índice no corresponde a su versión actual: cargas activas
+        nunca indexadas y cargas modificadas desde el último cálculo (las
+        cargas eliminadas salen del índice por ON DELETE CASCADE).
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT l.id
+                    FROM loads l
+                    LEFT JOIN {self.state_table} s ON s.load_id = l.id
+                    WHERE (s.load_id IS NULL AND l.status != 'COMPLETED')
+                       OR s.load_version != l.version"""
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_by_role(self, role: str, max_per_load: int = 3) -> List[dict]:
+        """
+        Tareas visibles para un rol (idx_pending_tasks_role), hasta
+        `max_per_load` por carga, ordenadas por priority_order.
+        """
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT {', '.join(self.COLUMNS)}
+                    FROM {self.table_name}
+                    WHERE allowed_role = ? AND role_rank <= ?
+                    ORDER BY priority_order, load_id""",
+                (role, max_per_load)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_by_load(self, load_id: int) -> List[dict]:
+        """Tareas indexadas de una carga (todos los roles)."""
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT {', '.join(self.COLUMNS)}
+                    FROM {self.table_name}
+                    WHERE load_id = ?
+                    ORDER BY allowed_role, role_rank""",
+                (load_id,)
+            )
+            return [dict(row) for row in cursor.fetchall()]
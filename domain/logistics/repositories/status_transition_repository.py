@@ -16,6 +16,9 @@ class StatusTransitionRepository(BaseRepository[StatusTransition]):
     Repositorio para gestionar transiciones de estado de cargas.
     """
     
+    # Conversión de timestamp desde SQLite
+    datetime_fields = ('timestamp',)
+    
     def __init__(self, db_manager: DatabaseManager):
         super().__init__(db_manager, StatusTransition, "load_status_history")
     
@@ -36,7 +39,7 @@ class StatusTransitionRepository(BaseRepository[StatusTransition]):
                 (load_id,)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
     
     def get_latest_transition(self, load_id: int) -> Optional[StatusTransition]:
         """
@@ -55,7 +58,7 @@ class StatusTransitionRepository(BaseRepository[StatusTransition]):
                 (load_id,)
             )
             row = cursor.fetchone()
-            return self._map_row_to_model(dict(row)) if row else None
+            return self._map_row(row) if row else None
     
     def get_time_in_status(self, load_id: int, status: str) -> Optional[timedelta]:
         """
@@ -122,19 +125,4 @@ class StatusTransitionRepository(BaseRepository[StatusTransition]):
             
             cursor.execute(query, tuple(params))
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
-    
-    def _map_row_to_model(self, row: dict) -> StatusTransition:
-        """
-        Override para manejar conversión de timestamp desde SQLite.
-        """
-        data = dict(row)
-        
-        # Convertir timestamp si viene como string
-        if 'timestamp' in data and isinstance(data['timestamp'], str):
-            try:
-                data['timestamp'] = datetime.fromisoformat(data['timestamp'])
-            except ValueError:
-                pass
-        
-        return super()._map_row_to_model(data)
+            return self._map_rows(rows)
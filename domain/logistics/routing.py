@@ -0,0 +1,154 @@
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+Node = Hashable
+Edge = Tuple[Node, Node, float]
+
+# Node types of the route graph (ids are unique only within a type)
+NODE_TYPES = ('FACILITY', 'TREATMENT_PLANT', 'SITE')
+
+
+def route_nodes(
+    origin_id: int,
+    destination_id: int,
+    destination_type: str,
+    origin_type: str = 'FACILITY'
+) -> Tuple[Node, Node]:
+    """
+    Typed graph nodes of a route, shared by every router built over the
+    distance matrix: a facility, a treatment plant and a site with the same
+    id are different nodes.
+    """
+    return (origin_type, origin_id), (destination_type, destination_id)
+
+
+class ShortestPathRouter:
+    """
+    All-pairs shortest paths over the logistics road graph.
+
+    Every distance_matrix route (direct or is_link_segment) is an undirected
+    weighted edge; roads are two-way, so A→B also serves B→A. Shortest paths
+    are precomputed with a vectorized Floyd–Warshall (O(n³) once, then O(1)
+    per query).
+
+    Edits are applied incrementally: a new or shorter edge relaxes the
+    matrix in O(n²); a longer or removed edge marks it stale and the next
+    query recomputes it in full.
+
+    One router is shared by the whole process (DistanceMatrixCache), read by
+    UI and worker threads while route edits arrive: queries and edits run
+    under the router's lock, so readers never see a half-relaxed matrix or
+    an index grown past it.
+    """
+
+    def __init__(self, edges: Iterable[Edge] = ()):
+        self._index: Dict[Node, int] = {}
+        self._edge_weights: Dict[Tuple[Node, Node], Dict[Tuple[Node, Node], float]] = {}
+        self._dist = np.zeros((0, 0))
+        self._stale = True
+        self._lock = threading.Lock()
+        for origin, destination, km in edges:
+            self._set_edge(origin, destination, km)
+
+    def distance(self, origin: Node, destination: Node) -> Optional[float]:
+        """Shortest path length in km, or None if unreachable/unknown."""
+        with self._lock:
+            i = self._index.get(origin)
+            j = self._index.get(destination)
+            if i is None or j is None:
+                return None
+            value = self._matrix()[i, j]
+        return None if np.isinf(value) else float(value)
+
+    def distances(self, origins: List[Node], destinations: List[Node]) -> np.ndarray:
+        """Vectorized shortest path lengths; NaN where unreachable/unknown."""
+        with self._lock:
+            matrix = self._matrix()
+            rows = np.array([self._index.get(node, -1) for node in origins], dtype=np.int64)
+            cols = np.array([self._index.get(node, -1) for node in destinations], dtype=np.int64)
+            result = np.full(len(rows), np.nan)
+            known = (rows >= 0) & (cols >= 0)
+            if known.any():
+                values = matrix[rows[known], cols[known]]
+                result[known] = np.where(np.isinf(values), np.nan, values)
+        return result
+
+    def update_edge(self, origin: Node, destination: Node, km: Optional[float]) -> None:
+        """
+        Applies a route edit: km=None removes the route.
+
+        Args:
+            origin: Route origin node
+            destination: Route destination node
+            km: New distance, or None for a deleted route
+        """
+        with self._lock:
+            pair = self._pair(origin, destination)
+            previous = self._pair_weight(pair)
+
+            if km is None:
+                self._edge_weights.get(pair, {}).pop((origin, destination), None)
+            else:
+                self._set_edge(origin, destination, km)
+
+            current = self._pair_weight(pair)
+            if self._stale or current == previous:
+                return
+            if current is not None and (previous is None or current < previous):
+                self._relax(pair, current)
+            else:
+                self._stale = True
+
+    def _set_edge(self, origin: Node, destination: Node, km: float) -> None:
+        for node in (origin, destination):
+            if node not in self._index:
+                self._index[node] = len(self._index)
+                self._grow()
+        self._edge_weights.setdefault(self._pair(origin, destination), {})[(origin, destination)] = float(km)
+
+    def _grow(self) -> None:
+        n = len(self._index)
+        grown = np.full((n, n), np.inf)
+        size = self._dist.shape[0]
+        grown[:size, :size] = self._dist
+        np.fill_diagonal(grown, 0.0)
+        self._dist = grown
+
+    def _relax(self, pair: Tuple[Node, Node], km: float) -> None:
+        i, j = self._index[pair[0]], self._index[pair[1]]
+        d = self._dist
+        via_ij = d[:, i][:, None] + km + d[j, :][None, :]
+        via_ji = d[:, j][:, None] + km + d[i, :][None, :]
+        np.minimum(d, np.minimum(via_ij, via_ji), out=d)
+
+    def _matrix(self) -> np.ndarray:
+        # Caller holds _lock
+        if self._stale:
+            self._recompute()
+        return self._dist
+
+    def _recompute(self) -> None:
+        n = len(self._index)
+        d = np.full((n, n), np.inf)
+        np.fill_diagonal(d, 0.0)
+        for pair in self._edge_weights:
+            km = self._pair_weight(pair)
+            if km is None:
+                continue
+            i, j = self._index[pair[0]], self._index[pair[1]]
+            d[i, j] = d[j, i] = min(d[i, j], km)
+        for k in range(n):
+            np.minimum(d, d[:, k][:, None] + d[k, :][None, :], out=d)
+        self._dist = d
+        self._stale = False
+
+    def _pair_weight(self, pair: Tuple[Node, Node]) -> Optional[float]:
+        weights = self._edge_weights.get(pair)
+        return min(weights.values()) if weights else None
+
+    @staticmethod
+    def _pair(a: Node, b: Node) -> Tuple[Node, Node]:
+        """Order-independent key for the undirected edge between a and b."""
+        return (a, b) if repr(a) <= repr(b) else (b, a)
@@ -11,14 +11,12 @@ from domain.logistics.entities.load_status import LoadStatus
 from domain.logistics.entities.status_transition import StatusTransition
 from domain.logistics.entities.vehicle import Vehicle, VehicleType
 from domain.logistics.entities.container import Container
-from domain.logistics.services.transition_rules import (
-    get_validators_for_transition,
-    is_valid_transition,
-)
 from domain.processing.entities.facility import Facility
 from domain.shared.services.compliance_service import ComplianceService
 from domain.disposal.services.agronomy_service import AgronomyDomainService
 from domain.logistics.services.manifest_service import ManifestService
+from domain.logistics.services.load_state_service import LoadStateService
+from domain.logistics.services.load_dispatch_service import LoadDispatchService
 from domain.shared.exceptions import TransitionException, ComplianceViolationError, DomainException
 from domain.shared.constants import SLUDGE_DENSITY
 
@@ -39,6 +37,8 @@ class LogisticsDomainService:
         agronomy_service: AgronomyDomainService,
         # manifest_service: ManifestService,  <-- DEPRECATED: Moved to App Service
         # event_bus: 'EventBus' = None        <-- DEPRECATED: Moved to App Service
+        load_state_service: Optional[LoadStateService] = None,
+        load_dispatch_service: Optional[LoadDispatchService] = None,
     ):
         self.db_manager = db_manager
         self.load_repo = LoadRepository(db_manager)
@@ -50,6 +50,9 @@ class LogisticsDomainService:
         
         self.compliance_service = compliance_service
         self.agronomy_service = agronomy_service
+        # Transiciones y despacho delegados: una transacción + reintento ante conflicto de versión
+        self.load_state_service = load_state_service or LoadStateService(db_manager)
+        self.load_dispatch_service = load_dispatch_service or LoadDispatchService(db_manager)
         # self.manifest_service = manifest_service
         # self.event_bus = event_bus
 
@@ -96,6 +99,13 @@ class LogisticsDomainService:
         if load.origin_facility_id:
             self._validate_vehicle_type_for_facility(vehicle_id, load.origin_facility_id)
         
+        self._assign_resources(load, driver_id, vehicle_id, scheduled_date, site_id, treatment_plant_id, container_quantity)
+        return self.load_repo.update(load)
+
+    def _assign_resources(self, load: Load, driver_id: int, vehicle_id: int, scheduled_date: datetime,
+                          site_id: Optional[int], treatment_plant_id: Optional[int],
+                          container_quantity: Optional[int]) -> None:
+        """Applies resource and destination assignment in memory (REQUESTED -> ASSIGNED)."""
         load.driver_id = driver_id
         load.vehicle_id = vehicle_id
         load.container_quantity = container_quantity
@@ -112,8 +122,6 @@ class LogisticsDomainService:
         load.updated_at = datetime.now()
         load.sync_status = 'PENDING'
         load.last_updated_local = datetime.now()
-        
-        return self.load_repo.update(load)
 
     def schedule_loads_bulk(self, load_ids: List[int], driver_id: int, vehicle_id: int, scheduled_date: datetime, 
                          site_id: Optional[int] = None, treatment_plant_id: Optional[int] = None, 
@@ -124,35 +132,53 @@ class LogisticsDomainService:
         Enhanced for Trip Linking: Validates that linked trips (with trip_id) 
         use AMPLIROLL vehicles only.
         """
+        if not load_ids:
+            return 0
+        if not site_id and not treatment_plant_id:
+            raise ValueError("Must provide either a Destination Site or a Treatment Plant.")
+        
+        # Fetch all loads in one query
+        loads_by_id = {load.id: load for load in self.load_repo.get_by_ids(load_ids)}
+        if any(load_id not in loads_by_id for load_id in load_ids):
+            raise ValueError("Load not found")
+        
         # Check if loads share a trip_id (Trip Linking scenario)
-        if load_ids:
-            first_load = self.load_repo.get_by_id(load_ids[0])
-            if first_load and first_load.trip_id:
-                # Validate vehicle is AMPLIROLL for linked trips
-                vehicle = self.vehicle_repo.get_by_id(vehicle_id)
-                if vehicle:
-                    try:
-                        vehicle_type = VehicleType(vehicle.type)
-                        if vehicle_type != VehicleType.AMPLIROLL:
-                            raise ValueError(
-                                f"🚫 Viajes enlazados requieren vehículo AMPLIROLL. "
-                                f"El vehículo {vehicle.license_plate} es tipo {vehicle_type.display_name}."
-                            )
-                    except ValueError as e:
-                        if "🚫" in str(e):
-                            raise  # Re-raise our custom error
-                        # Other ValueError = invalid enum, default to BATEA check
+        first_load = loads_by_id[load_ids[0]]
+        if first_load.trip_id:
+            # Validate vehicle is AMPLIROLL for linked trips
+            vehicle = self.vehicle_repo.get_by_id(vehicle_id)
+            if vehicle:
+                try:
+                    vehicle_type = VehicleType(vehicle.type)
+                    if vehicle_type != VehicleType.AMPLIROLL:
                         raise ValueError(
                             f"🚫 Viajes enlazados requieren vehículo AMPLIROLL. "
-                            f"El vehículo {vehicle.license_plate} no está correctamente configurado."
+                            f"El vehículo {vehicle.license_plate} es tipo {vehicle_type.display_name}."
                         )
+                except ValueError as e:
+                    if "🚫" in str(e):
+                        raise  # Re-raise our custom error
+                    # Other ValueError = invalid enum, default to BATEA check
+                    raise ValueError(
+                        f"🚫 Viajes enlazados requieren vehículo AMPLIROLL. "
+                        f"El vehículo {vehicle.license_plate} no está correctamente configurado."
+                    )
+        
+        # Validate in memory; vehicle type is checked once per origin facility
+        loads = []
+        validated_facilities = set()
+        for load_id in load_ids:
+            load = loads_by_id[load_id]
+            if load.status != LoadStatus.REQUESTED.value:
+                raise TransitionException(f"Cannot schedule load {load_id}. Current status: {load.status}. Expected: '{LoadStatus.REQUESTED.value}'.")
+            if load.origin_facility_id and load.origin_facility_id not in validated_facilities:
+                self._validate_vehicle_type_for_facility(vehicle_id, load.origin_facility_id)
+                validated_facilities.add(load.origin_facility_id)
+            self._assign_resources(load, driver_id, vehicle_id, scheduled_date, site_id, treatment_plant_id, container_quantity)
+            loads.append(load)
         
-        success_count = 0
-        with self.db_manager:
-            for load_id in load_ids:
-                self.schedule_load(load_id, driver_id, vehicle_id, scheduled_date, site_id, treatment_plant_id, container_quantity)
-                success_count += 1
-        return success_count
+        # Single transaction, one executemany
+        return self.load_repo.update_many(loads)
 
 
     # --- Dispatch Phase (Gate Out) ---
@@ -266,21 +292,12 @@ class LogisticsDomainService:
             }
 
     def accept_trip(self, load_id: int) -> bool:
-        load = self.load_repo.get_by_id(load_id)
-        if not load or load.status != LoadStatus.ASSIGNED.value:
-            raise ValueError("Invalid load or status")
-        load.status = LoadStatus.ACCEPTED.value
-        load.updated_at = datetime.now()
-        return self.load_repo.update(load)
+        """Delegado a LoadDispatchService.accept_trip (ASSIGNED -> ACCEPTED)."""
+        return self.load_dispatch_service.accept_trip(load_id)
 
     def start_trip(self, load_id: int) -> bool:
-        load = self.load_repo.get_by_id(load_id)
-        if not load or load.status != LoadStatus.ACCEPTED.value:
-            raise ValueError("Invalid load or status")
-        load.status = LoadStatus.EN_ROUTE_DESTINATION.value
-        load.dispatch_time = datetime.now()
-        load.updated_at = datetime.now()
-        return self.load_repo.update(load)
+        """Delegado a LoadDispatchService.start_trip (ACCEPTED -> EN_ROUTE_DESTINATION)."""
+        return self.load_dispatch_service.start_trip(load_id)
 
     # --- Reception Phase (Gate In) ---
     def register_arrival(self, load_id: int, weight_gross: float = None, ph: float = None, 
@@ -395,11 +412,8 @@ class LogisticsDomainService:
         """
         Transiciona una carga a un nuevo estado, validando verificadores.
 
-        Este método implementa:
-        1. Validación de transición válida (FSM)
-        2. Ejecución de validadores de checkpoints
-        3. Registro de transición en historial
-        4. Actualización del estado de la carga
+        Delegado a LoadStateService.transition_load (FSM, validadores,
+        historial y UPDATE versionado en una sola transacción).
 
         Args:
             load_id: ID de la carga
@@ -414,6 +428,7 @@ class LogisticsDomainService:
             ValueError: Si la carga no existe
             TransitionException: Si la transición no es válida desde el estado actual
             DomainException: Si faltan verificadores requeridos
+            ConcurrencyConflictError: Si la carga sigue cambiando tras los reintentos
 
         Example:
             # Transición exitosa con todos los verificadores
@@ -424,111 +439,8 @@ class LogisticsDomainService:
             }
             service.transition_load(load_id, LoadStatus.COMPLETED, user_id=5)
         """
-        # 1. Obtener carga actual
-        load = self.load_repo.get_by_id(load_id)
-        if not load:
-            raise ValueError(f"Load {load_id} not found")
-
-        # Convertir estado actual a LoadStatus si es string legacy
-        try:
-            current_status = LoadStatus(load.status)
-        except ValueError:
-            # Intentar mapeo legacy
-            from domain.logistics.entities.load_status import normalize_status
-            current_status = normalize_status(load.status)
-
-        # 2. Validar que la transición sea permitida (FSM)
-        if not is_valid_transition(current_status, new_status):
-            raise TransitionException(
-                f"Transición inválida: {current_status.value} -> {new_status.value}. "
-                f"Esta transición no está permitida por las reglas de negocio."
-            )
-
-        # 3. Determinar si es flujo de disposición
-        is_disposal_flow = load.destination_site_id is not None
-
-        # 4. Ejecutar validadores de verificadores (checkpoints)
-        validators = get_validators_for_transition(
-            to_status=new_status,
-            from_status=current_status,
-            is_disposal_flow=is_disposal_flow
-        )
-
-        # Asegurar que attributes existe
-        if not hasattr(load, 'attributes') or load.attributes is None:
-            load.attributes = {}
-
-        for validator in validators:
-            try:
-                validator(load.attributes)
-            except DomainException as e:
-                # Re-lanzar con contexto adicional
-                raise DomainException(
-                    f"No se puede transicionar a {new_status.value}: {str(e)}"
-                )
-
-        # 5. Registrar transición en historial
-        transition = StatusTransition(
-            id=None,
-            load_id=load_id,
-            from_status=current_status.value,
-            to_status=new_status.value,
-            timestamp=datetime.now(),
-            user_id=user_id,
-            notes=notes
-        )
-        self.transition_repo.add(transition)
-
-        # 6. Actualizar estado de la carga
-        load.status = new_status.value
-        load.updated_at = datetime.now()
-
-        # --- PROMOTION LOGIC ---
-        # Promote critical data from JSON attributes to SQL columns for BI/Reporting
-        if 'gross_weight' in load.attributes:
-             try:
-                 load.gross_weight = float(load.attributes['gross_weight'])
-             except (ValueError, TypeError):
-                 pass # Keep original or None if conversion fails
-        
-        if 'tare_weight' in load.attributes:
-             try:
-                 load.tare_weight = float(load.attributes['tare_weight'])
-             except (ValueError, TypeError):
-                 pass
-
-        if load.gross_weight is not None and load.tare_weight is not None:
-             load.net_weight = load.gross_weight - load.tare_weight
-             load.weight_net = load.net_weight # Alias
-
-        success = self.load_repo.update(load)
-        
-        # 7. Publicar evento LoadStatusChanged
-        if success and self.event_bus:
-            from infrastructure.events.event_bus import Event, EventTypes
-            self.event_bus.publish(Event(
-                event_type=EventTypes.LOAD_STATUS_CHANGED,
-                data={
-                    'load_id': load_id,
-                    'from_status': current_status.value,
-                    'to_status': new_status.value,
-                    'timestamp': datetime.now().isoformat(),
-                    'user_id': user_id
-                }
-            ))
-            
-            # 8. Caso especial: Detectar llegada a campo (destino tipo FIELD)
-            if new_status == LoadStatus.AT_DESTINATION and load.destination_site_id:
-                self.event_bus.publish(Event(
-                    event_type=EventTypes.LOAD_ARRIVED_AT_FIELD,
-                    data={
-                        'load_id': load_id,
-                        'site_id': load.destination_site_id,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                ))
-        
-        return success
+        # Historial y UPDATE versionado en una sola transacción, con reintento ante conflicto
+        return self.load_state_service.transition_load(load_id, new_status, user_id, notes)
 
     def update_load_attributes(self, load_id: int, attributes_dict: Dict[str, Any]) -> bool:
         """
@@ -557,23 +469,8 @@ class LogisticsDomainService:
                 }
             })
         """
-        load = self.load_repo.get_by_id(load_id)
-        if not load:
-            raise ValueError(f"Load {load_id} not found")
-        
-        # Asegurar que attributes existe
-        if not hasattr(load, 'attributes') or load.attributes is None:
-            load.attributes = {}
-        
-        # Mergear nuevos atributos
-        load.attributes.update(attributes_dict)
-        
-        # Actualizar timestamps de sincronización
-        load.updated_at = datetime.now()
-        load.sync_status = 'PENDING'
-        load.last_updated_local = datetime.now()
-        
-        return self.load_repo.update(load)
+        # Delegado: merge en SQLite y recálculo de tareas pendientes en una transacción
+        return self.load_state_service.update_load_attributes(load_id, attributes_dict)
 
     def get_load_timeline(self, load_id: int) -> List[StatusTransition]:
         """
@@ -692,11 +589,12 @@ class LogisticsDomainService:
             for row in rows:
                 row_dict = dict(row)
                 
-                # Obtener distancia si existe en distance_matrix
+                # Distancia desde distance_matrix (o camino más corto si no está configurada)
                 distance_km = self.distance_matrix_repo.get_route_distance(
                     primary_load.origin_facility_id,
                     row_dict['origin_facility_id'],
-                    'FACILITY'
+                    'FACILITY',
+                    derive_missing=True
                 ) or 0.0
                 
                 candidates.append({
@@ -21,6 +21,7 @@ from domain.logistics.entities.vehicle import Vehicle
 from domain.logistics.entities.container import Container
 from domain.processing.entities.facility import Facility
 from domain.shared.constants import SLUDGE_DENSITY
+from domain.shared.concurrency import retry_on_conflict
 
 
 class LoadDispatchService:
@@ -119,15 +120,21 @@ class LoadDispatchService:
             
         Raises:
             ValueError: Si la carga no existe o no está en estado ASSIGNED
+            ConcurrencyConflictError: Si la carga sigue cambiando tras los reintentos
         """
-        load = self.load_repo.get_by_id(load_id)
-        if not load or load.status != LoadStatus.ASSIGNED.value:
-            raise ValueError("Invalid load or status")
-        
-        load.status = LoadStatus.ACCEPTED.value
-        load.updated_at = datetime.now()
+        def accept(attempt: int) -> bool:
+            load = self.load_repo.get_by_id(load_id)
+            if load and attempt > 0 and load.status == LoadStatus.ACCEPTED.value:
+                return True  # Otra sesión ya aceptó el viaje
+            if not load or load.status != LoadStatus.ASSIGNED.value:
+                raise ValueError("Invalid load or status")
+            
+            load.status = LoadStatus.ACCEPTED.value
+            load.updated_at = datetime.now()
+            
+            return self.load_repo.update(load)
         
-        return self.load_repo.update(load)
+        return retry_on_conflict(accept)
 
     def start_trip(self, load_id: int) -> bool:
         """
@@ -143,16 +150,22 @@ class LoadDispatchService:
             
         Raises:
             ValueError: Si la carga no existe o no está en estado ACCEPTED
+            ConcurrencyConflictError: Si la carga sigue cambiando tras los reintentos
         """
-        load = self.load_repo.get_by_id(load_id)
-        if not load or load.status != LoadStatus.ACCEPTED.value:
-            raise ValueError("Invalid load or status")
-        
-        load.status = LoadStatus.EN_ROUTE_DESTINATION.value
-        load.dispatch_time = datetime.now()
-        load.updated_at = datetime.now()
+        def start(attempt: int) -> bool:
+            load = self.load_repo.get_by_id(load_id)
+            if load and attempt > 0 and load.status == LoadStatus.EN_ROUTE_DESTINATION.value:
+                return True  # Otra sesión ya inició el viaje
+            if not load or load.status != LoadStatus.ACCEPTED.value:
+                raise ValueError("Invalid load or status")
+            
+            load.status = LoadStatus.EN_ROUTE_DESTINATION.value
+            load.dispatch_time = datetime.now()
+            load.updated_at = datetime.now()
+            
+            return self.load_repo.update(load)
         
-        return self.load_repo.update(load)
+        return retry_on_conflict(start)
 
     # --- Query Methods ---
     
@@ -7,14 +7,21 @@ Responsabilidades:
 - Programación de fechas de recolección/entrega
 - Validación de compatibilidad vehículo-planta
 - Programación masiva (bulk scheduling)
+- Motor de asignación diaria de flota (vehículo + conductor por carga)
 """
 
-from typing import Optional, List
-from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Tuple
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
 
 from infrastructure.persistence.database_manager import DatabaseManager
 from infrastructure.persistence.generic_repository import BaseRepository
+from domain.logistics.assignment import solve_assignment
 from domain.logistics.repositories.load_repository import LoadRepository
+from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
 from domain.logistics.entities.load import Load
 from domain.logistics.entities.load_status import LoadStatus
 from domain.logistics.entities.vehicle import Vehicle, VehicleType
@@ -24,6 +31,29 @@ from domain.shared.exceptions import TransitionException
 from domain.shared.constants import SLUDGE_DENSITY
 
 
+@dataclass
+class PlannedAssignment:
+    """Asignación propuesta para una carga o un viaje enlazado completo."""
+    load_ids: List[int]
+    vehicle_id: int
+    driver_id: int
+    scheduled_date: datetime
+    site_id: Optional[int] = None
+    treatment_plant_id: Optional[int] = None
+    deadhead_km: Optional[float] = None  # Posición del vehículo → origen (None = desconocida)
+
+
+@dataclass
+class AssignmentPlan:
+    """Programación completa propuesta por plan_assignments (sin aplicar)."""
+    assignments: List[PlannedAssignment] = field(default_factory=list)
+    unassigned: Dict[int, str] = field(default_factory=dict)  # load_id -> motivo
+
+    @property
+    def total_deadhead_km(self) -> float:
+        return sum(a.deadhead_km or 0.0 for a in self.assignments)
+
+
 class LoadPlanningService:
     """
     Servicio especializado en planificación de cargas.
@@ -38,6 +68,7 @@ class LoadPlanningService:
         self.vehicle_repo = BaseRepository(db_manager, Vehicle, "vehicles")
         self.container_repo = BaseRepository(db_manager, Container, "containers")
         self.facility_repo = BaseRepository(db_manager, Facility, "facilities")
+        self.distance_repo = DistanceMatrixRepository(db_manager)
 
     def create_request(
         self,
@@ -141,6 +172,25 @@ class LoadPlanningService:
         if load.origin_facility_id:
             self._validate_vehicle_type_for_facility(vehicle_id, load.origin_facility_id)
         
+        self._assign_resources(
+            load, driver_id, vehicle_id, scheduled_date,
+            site_id, treatment_plant_id, container_quantity
+        )
+        return self.load_repo.update(load)
+
+    def _assign_resources(
+        self,
+        load: Load,
+        driver_id: int,
+        vehicle_id: int,
+        scheduled_date: datetime,
+        site_id: Optional[int],
+        treatment_plant_id: Optional[int],
+        container_quantity: Optional[int]
+    ) -> None:
+        """
+        Aplica en memoria la asignación de recursos y destino (REQUESTED -> ASSIGNED).
+        """
         # Asignar recursos
         load.driver_id = driver_id
         load.vehicle_id = vehicle_id
@@ -160,8 +210,6 @@ class LoadPlanningService:
         load.updated_at = datetime.now()
         load.sync_status = 'PENDING'
         load.last_updated_local = datetime.now()
-        
-        return self.load_repo.update(load)
 
     def schedule_loads_bulk(
         self,
@@ -197,39 +245,372 @@ class LoadPlanningService:
         Raises:
             ValueError: Si viajes enlazados no usan AMPLIROLL
         """
+        if not load_ids:
+            return 0
+        if not site_id and not treatment_plant_id:
+            raise ValueError("Must provide either a Destination Site or a Treatment Plant.")
+        
+        # Una sola consulta para todas las cargas
+        loads_by_id = {load.id: load for load in self.load_repo.get_by_ids(load_ids)}
+        if any(load_id not in loads_by_id for load_id in load_ids):
+            raise ValueError("Load not found")
+        
         # Validación especial para viajes enlazados
-        if load_ids:
-            first_load = self.load_repo.get_by_id(load_ids[0])
-            if first_load and first_load.trip_id:
-                # Validar que el vehículo sea AMPLIROLL para viajes enlazados
-                vehicle = self.vehicle_repo.get_by_id(vehicle_id)
-                if vehicle:
-                    try:
-                        vehicle_type = VehicleType(vehicle.type)
-                        if vehicle_type != VehicleType.AMPLIROLL:
-                            raise ValueError(
-                                f"🚫 Viajes enlazados requieren vehículo AMPLIROLL. "
-                                f"El vehículo {vehicle.license_plate} es tipo {vehicle_type.display_name}."
-                            )
-                    except ValueError as e:
-                        if "🚫" in str(e):
-                            raise  # Re-lanzar error personalizado
-                        # ValueError de enum inválido
+        first_load = loads_by_id[load_ids[0]]
+        if first_load.trip_id:
+            # Validar que el vehículo sea AMPLIROLL para viajes enlazados
+            vehicle = self.vehicle_repo.get_by_id(vehicle_id)
+            if vehicle:
+                try:
+                    vehicle_type = VehicleType(vehicle.type)
+                    if vehicle_type != VehicleType.AMPLIROLL:
                         raise ValueError(
                             f"🚫 Viajes enlazados requieren vehículo AMPLIROLL. "
-                            f"El vehículo {vehicle.license_plate} no está correctamente configurado."
+                            f"El vehículo {vehicle.license_plate} es tipo {vehicle_type.display_name}."
                         )
+                except ValueError as e:
+                    if "🚫" in str(e):
+                        raise  # Re-lanzar error personalizado
+                    # ValueError de enum inválido
+                    raise ValueError(
+                        f"🚫 Viajes enlazados requieren vehículo AMPLIROLL. "
+                        f"El vehículo {vehicle.license_plate} no está correctamente configurado."
+                    )
+        
+        # Validar en memoria; el tipo de vehículo se valida una vez por planta
+        loads = []
+        validated_facilities = set()
+        for load_id in load_ids:
+            load = loads_by_id[load_id]
+            if load.status != LoadStatus.REQUESTED.value:
+                raise TransitionException(
+                    f"Cannot schedule load {load_id}. Current status: {load.status}. "
+                    f"Expected: '{LoadStatus.REQUESTED.value}'."
+                )
+            if load.origin_facility_id and load.origin_facility_id not in validated_facilities:
+                self._validate_vehicle_type_for_facility(vehicle_id, load.origin_facility_id)
+                validated_facilities.add(load.origin_facility_id)
+            
+            self._assign_resources(
+                load, driver_id, vehicle_id, scheduled_date,
+                site_id, treatment_plant_id, container_quantity
+            )
+            loads.append(load)
         
-        # Programar todas las cargas en transacción
-        success_count = 0
-        with self.db_manager:
-            for load_id in load_ids:
-                self.schedule_load(
-                    load_id, driver_id, vehicle_id, scheduled_date,
-                    site_id, treatment_plant_id, container_quantity
+        # Programar todas las cargas en una sola transacción (executemany)
+        return self.load_repo.update_many(loads)
+
+    # ==========================================
+    # MOTOR DE ASIGNACIÓN DIARIA
+    # ==========================================
+
+    # Costos del problema de asignación (km en vacío hasta el origen)
+    UNKNOWN_POSITION_KM = 100.0  # Vehículo sin historial o sin ruta conocida
+    UNASSIGNED_COST = 1e6  # Dejar una carga sin asignar
+    FORBIDDEN_COST = 1e9  # Vehículo incompatible con la carga
+
+    def plan_assignments(
+        self,
+        date_from: date,
+        date_to: Optional[date] = None,
+        site_id: Optional[int] = None,
+        treatment_plant_id: Optional[int] = None,
+        default_time: time = time(8, 0)
+    ) -> AssignmentPlan:
+        """
+        Propone vehículo y conductor para todas las cargas REQUESTED del rango.
+
+        Resuelve un problema de asignación (método húngaro) que minimiza los
+        km en vacío desde la última posición de cada vehículo hasta el origen
+        de la carga, respetando:
+        - Tipos permitidos por la planta de origen y tipo solicitado
+        - Peso bruto máximo (tara + peso estimado) y cantidad de contenedores
+        - Un viaje activo por vehículo (get_active_load) y por conductor;
+          un viaje enlazado se asigna completo a un solo AMPLIROLL
+        - Conductor libre del mismo contratista que el vehículo
+
+        Args:
+            date_from: Primer día del rango (requested_date)
+            date_to: Último día del rango (None = solo date_from)
+            site_id: Destino por defecto para cargas sin destino (opcional)
+            treatment_plant_id: Planta destino por defecto (opcional)
+            default_time: Hora programada para cargas sin requested_date
+
+        Returns:
+            AssignmentPlan (se aplica con commit_assignment_plan)
+        """
+        loads = pd.DataFrame(self.load_repo.get_requested_for_planning(date_from, date_to or date_from))
+        plan = AssignmentPlan()
+        if loads.empty:
+            return plan
+
+        jobs = []
+        for job in self._build_jobs(loads, site_id, treatment_plant_id, datetime.combine(date_from, default_time)):
+            if job['site_id'] is None and job['treatment_plant_id'] is None:
+                plan.unassigned.update({load_id: "Sin destino definido" for load_id in job['load_ids']})
+            else:
+                jobs.append(job)
+        if not jobs:
+            return plan
+
+        vehicles, drivers = self._fetch_available_fleet()
+        drivers_by_contractor: Dict[int, List[dict]] = {}
+        for driver in drivers:
+            drivers_by_contractor.setdefault(driver['contractor_id'], []).append(driver)
+        vehicles = [v for v in vehicles if v['contractor_id'] in drivers_by_contractor]
+
+        cost, deadhead = self._assignment_costs(jobs, vehicles)
+        n_jobs, n_vehicles = cost.shape
+
+        # Filas "vehículo ocioso": un contratista no puede usar más vehículos que conductores libres
+        contractors = np.array([v['contractor_id'] for v in vehicles], dtype=object)
+        idle_rows = []
+        for contractor_id, contractor_drivers in drivers_by_contractor.items():
+            surplus = int((contractors == contractor_id).sum()) - len(contractor_drivers)
+            idle_rows.extend([contractor_id] * max(surplus, 0))
+
+        matrix = np.full((n_jobs + len(idle_rows), n_vehicles + n_jobs), self.FORBIDDEN_COST)
+        matrix[:n_jobs, :n_vehicles] = cost
+        matrix[:n_jobs, n_vehicles:] = self.UNASSIGNED_COST
+        for row, contractor_id in enumerate(idle_rows, start=n_jobs):
+            matrix[row, :n_vehicles] = np.where(contractors == contractor_id, 0.0, self.FORBIDDEN_COST)
+
+        assigned = {
+            row: col for row, col in solve_assignment(matrix)
+            if row < n_jobs and col < n_vehicles and matrix[row, col] < self.UNASSIGNED_COST
+        }
+
+        # Conductores: se prefiere el que manejó el vehículo por última vez
+        used_drivers = set()
+        for row, col in sorted(assigned.items(), key=lambda item: item[1]):
+            vehicle = vehicles[col]
+            candidates = [d for d in drivers_by_contractor[vehicle['contractor_id']] if d['id'] not in used_drivers]
+            driver = next((d for d in candidates if d['last_vehicle_id'] == vehicle['id']), candidates[0])
+            used_drivers.add(driver['id'])
+            job = jobs[row]
+            plan.assignments.append(PlannedAssignment(
+                load_ids=job['load_ids'],
+                vehicle_id=vehicle['id'],
+                driver_id=driver['id'],
+                scheduled_date=job['scheduled_date'],
+                site_id=job['site_id'],
+                treatment_plant_id=job['treatment_plant_id'],
+                deadhead_km=None if np.isnan(deadhead[row, col]) else float(deadhead[row, col])
+            ))
+
+        for row, job in enumerate(jobs):
+            if row not in assigned:
+                reason = (
+                    "Sin vehículo o conductor disponible" if (cost[row] < self.FORBIDDEN_COST).any()
+                    else "Sin vehículo compatible"
                 )
-                success_count += 1
-        return success_count
+                plan.unassigned.update({load_id: reason for load_id in job['load_ids']})
+
+        plan.assignments.sort(key=lambda a: (a.scheduled_date, a.load_ids[0]))
+        return plan
+
+    def commit_assignment_plan(self, plan: AssignmentPlan) -> int:
+        """
+        Aplica un AssignmentPlan completo en una sola transacción.
+
+        Revalida que las cargas sigan REQUESTED y que vehículos y conductores
+        sigan sin viaje activo; ante cualquier conflicto no se aplica nada.
+
+        Returns:
+            Cantidad de cargas programadas
+
+        Raises:
+            TransitionException: Si alguna carga ya no está REQUESTED
+            ValueError: Si un vehículo o conductor tomó otro viaje
+        """
+        if not plan.assignments:
+            return 0
+
+        load_ids = [load_id for a in plan.assignments for load_id in a.load_ids]
+        vehicle_ids = [a.vehicle_id for a in plan.assignments]
+        driver_ids = [a.driver_id for a in plan.assignments]
+
+        with self.db_manager as conn:
+            vehicle_marks = ",".join("?" * len(vehicle_ids))
+            driver_marks = ",".join("?" * len(driver_ids))
+            busy = conn.execute(
+                f"""SELECT id, vehicle_id, driver_id FROM loads
+                    WHERE status NOT IN ('COMPLETED', 'CANCELLED')
+                    AND (vehicle_id IN ({vehicle_marks}) OR driver_id IN ({driver_marks}))
+                    LIMIT 1""",
+                (*vehicle_ids, *driver_ids)
+            ).fetchone()
+            if busy:
+                raise ValueError(
+                    f"La carga {busy['id']} ya ocupa el vehículo {busy['vehicle_id']} "
+                    f"o el conductor {busy['driver_id']}. Recalcule la planificación."
+                )
+
+            loads_by_id = {load.id: load for load in self.load_repo.get_by_ids(load_ids)}
+            loads = []
+            for assignment in plan.assignments:
+                for load_id in assignment.load_ids:
+                    load = loads_by_id.get(load_id)
+                    if not load:
+                        raise ValueError(f"Load {load_id} not found")
+                    if load.status != LoadStatus.REQUESTED.value:
+                        raise TransitionException(
+                            f"Cannot schedule load {load_id}. Current status: {load.status}. "
+                            f"Expected: '{LoadStatus.REQUESTED.value}'."
+                        )
+                    self._assign_resources(
+                        load, assignment.driver_id, assignment.vehicle_id, assignment.scheduled_date,
+                        assignment.site_id, assignment.treatment_plant_id, load.container_quantity
+                    )
+                    loads.append(load)
+
+            return self.load_repo.update_many(loads)
+
+    def _build_jobs(
+        self,
+        loads: pd.DataFrame,
+        site_id: Optional[int],
+        treatment_plant_id: Optional[int],
+        default_date: datetime
+    ) -> List[dict]:
+        """Agrupa cargas en unidades de asignación: viaje enlazado completo o carga suelta."""
+        loads = loads.assign(
+            _job=loads['trip_id'].where(loads['trip_id'].notna() & (loads['trip_id'] != ''),
+                                        'load-' + loads['id'].astype(str)),
+            _pickup_last=loads['segment_type'] != 'PICKUP_SEGMENT',
+            _requested=pd.to_datetime(loads['requested_date'], errors='coerce')
+        ).sort_values(['_job', '_pickup_last', 'id'], kind='mergesort')
+
+        jobs = []
+        for _, group in loads.groupby('_job', sort=False):
+            linked = len(group) > 1
+            quantities = pd.to_numeric(group['container_quantity'], errors='coerce')
+            sites = group['destination_site_id'].dropna()
+            plants = group['destination_treatment_plant_id'].dropna()
+            if not sites.empty:
+                destination = (int(sites.iloc[0]), None)
+            elif not plants.empty:
+                destination = (None, int(plants.iloc[0]))
+            else:
+                destination = (site_id, None) if site_id else (None, treatment_plant_id)
+            requested = group['_requested'].min()
+
+            jobs.append({
+                'load_ids': group['id'].astype(int).tolist(),
+                'origin_facility_id': group['origin_facility_id'].iloc[0],
+                'allowed_vehicle_types': group['allowed_vehicle_types'].dropna().tolist(),
+                'requested_types': {str(t).upper() for t in group['vehicle_type_requested'].dropna()},
+                'linked': linked,
+                # Viaje enlazado: al menos un contenedor por carga
+                'containers': int(quantities.fillna(1).sum() if linked else quantities.fillna(0).iloc[0]),
+                'net_weight_kg': group['net_weight'].sum(min_count=1),
+                'site_id': destination[0],
+                'treatment_plant_id': destination[1],
+                'scheduled_date': default_date if pd.isna(requested) else requested.to_pydatetime(),
+            })
+        return jobs
+
+    def _assignment_costs(self, jobs: List[dict], vehicles: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Matriz de costo [trabajo, vehículo] en km en vacío.
+
+        Returns:
+            (costo con FORBIDDEN_COST en pares incompatibles,
+             km en vacío conocidos o NaN)
+        """
+        n_jobs, n_vehicles = len(jobs), len(vehicles)
+        feasible = np.array(
+            [[self._vehicle_fits(job, vehicle) for vehicle in vehicles] for job in jobs], dtype=bool
+        ).reshape(n_jobs, n_vehicles)
+
+        # Distancias en bloque: origen de la carga ↔ última posición del vehículo
+        origins = np.repeat([job['origin_facility_id'] for job in jobs], n_vehicles)
+        positions = np.tile([v['position_id'] for v in vehicles], n_jobs)
+        position_types = np.tile([v['position_type'] for v in vehicles], n_jobs)
+        deadhead = self.distance_repo.get_route_distances(
+            origins, positions, position_types, derive_missing=True
+        ).reshape(n_jobs, n_vehicles)
+        same_facility = (
+            (position_types == 'FACILITY') & pd.notna(origins) & (origins == positions)
+        ).reshape(n_jobs, n_vehicles)
+        deadhead[same_facility] = 0.0
+
+        cost = np.where(np.isnan(deadhead), self.UNKNOWN_POSITION_KM, deadhead)
+        return np.where(feasible, cost, self.FORBIDDEN_COST), deadhead
+
+    @staticmethod
+    def _vehicle_fits(job: dict, vehicle: dict) -> bool:
+        """Restricciones duras de compatibilidad vehículo-trabajo."""
+        try:
+            vehicle_type = VehicleType(vehicle['type']) if vehicle['type'] else VehicleType.BATEA
+        except ValueError:
+            vehicle_type = VehicleType.BATEA
+
+        if job['linked'] and vehicle_type != VehicleType.AMPLIROLL:
+            return False
+        if job['requested_types'] and vehicle_type.value not in job['requested_types']:
+            return False
+        if job['containers'] > vehicle_type.max_containers:
+            return False
+        if any(vehicle_type not in VehicleType.from_csv(allowed) for allowed in job['allowed_vehicle_types']):
+            return False
+
+        max_gross = vehicle['max_gross_weight']
+        # tare_weight, max_gross_weight y net_weight se guardan en kg
+        if max_gross and not pd.isna(job['net_weight_kg']):
+            if (vehicle['tare_weight'] or 0.0) + job['net_weight_kg'] > max_gross:
+                return False
+        return True
+
+    def _fetch_available_fleet(self) -> Tuple[List[dict], List[dict]]:
+        """
+        Vehículos y conductores activos sin viaje activo (misma regla que get_active_load).
+
+        La posición de cada vehículo es el destino de su última carga
+        (o su origen si aún no tiene destino).
+        """
+        with self.db_manager as conn:
+            vehicles = [dict(row) for row in conn.execute(
+                """SELECT v.id, v.contractor_id, v.type, v.tare_weight, v.max_gross_weight
+                   FROM vehicles v
+                   WHERE v.is_active = 1
+                   AND COALESCE(v.asset_type, 'ROAD_VEHICLE') = 'ROAD_VEHICLE'
+                   AND NOT EXISTS (
+                       SELECT 1 FROM loads l
+                       WHERE l.vehicle_id = v.id AND l.status NOT IN ('COMPLETED', 'CANCELLED')
+                   )
+                   ORDER BY v.id"""
+            ).fetchall()]
+            last_loads = {row['vehicle_id']: row for row in conn.execute(
+                """SELECT vehicle_id, origin_facility_id, destination_site_id, destination_treatment_plant_id
+                   FROM loads
+                   WHERE id IN (SELECT MAX(id) FROM loads WHERE vehicle_id IS NOT NULL GROUP BY vehicle_id)"""
+            ).fetchall()}
+            drivers = [dict(row) for row in conn.execute(
+                """SELECT d.id, d.contractor_id,
+                          (SELECT l.vehicle_id FROM loads l WHERE l.driver_id = d.id
+                           ORDER BY l.id DESC LIMIT 1) AS last_vehicle_id
+                   FROM drivers d
+                   WHERE d.is_active = 1
+                   AND NOT EXISTS (
+                       SELECT 1 FROM loads l
+                       WHERE l.driver_id = d.id AND l.status NOT IN ('COMPLETED', 'CANCELLED')
+                   )
+                   ORDER BY d.id"""
+            ).fetchall()]
+
+        for vehicle in vehicles:
+            last = last_loads.get(vehicle['id'])
+            position = (None, None)
+            if last is not None:
+                if last['destination_site_id']:
+                    position = (last['destination_site_id'], 'SITE')
+                elif last['destination_treatment_plant_id']:
+                    position = (last['destination_treatment_plant_id'], 'TREATMENT_PLANT')
+                elif last['origin_facility_id']:
+                    position = (last['origin_facility_id'], 'FACILITY')
+            vehicle['position_id'], vehicle['position_type'] = position
+        return vehicles, drivers
 
     def _validate_vehicle_type_for_facility(
         self,
@@ -54,6 +54,8 @@ class LoadReceptionService:
             
         Raises:
             ValueError: Si la carga no existe
+            ConcurrencyConflictError: Si otra sesión modificó la carga (no se reintenta:
+                los datos del operador deben revisarse contra el estado actual)
             
         Note:
             Este método actualiza el modelo Load directamente.
@@ -90,6 +92,7 @@ class LoadReceptionService:
             
         Raises:
             ValueError: Si faltan campos requeridos o la carga no existe
+            ConcurrencyConflictError: Si otra sesión modificó la carga (no se reintenta)
             
         Example:
             data = {
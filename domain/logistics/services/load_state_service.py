@@ -6,16 +6,24 @@ Responsabilidades:
 - Gestionar atributos JSONB (checkpoints)
 - Promover datos críticos de JSON a columnas SQL
 - Registrar historial de transiciones
-- Publicar eventos de cambio de estado
+- Publicar eventos de cambio de estado (o escribirlos en el outbox transaccional)
+- Recalcular las tareas pendientes de la carga (índice de la bandeja de entrada)
+- Transiciones en lote (cierre masivo de turno)
 """
 
-from typing import Optional, Dict, Any, List
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from infrastructure.persistence.database_manager import DatabaseManager
 from domain.logistics.repositories.load_repository import LoadRepository
 from domain.logistics.repositories.status_transition_repository import StatusTransitionRepository
+from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
 from domain.logistics.entities.load import Load
+from domain.logistics.entities.load_snapshot import LoadSnapshot
+from domain.logistics.entities.vehicle import Vehicle
 from domain.logistics.entities.load_status import LoadStatus, normalize_status
 from domain.logistics.entities.status_transition import StatusTransition
 from domain.logistics.services.transition_rules import (
@@ -23,7 +31,22 @@ from domain.logistics.services.transition_rules import (
     is_valid_transition,
 )
 from domain.shared.exceptions import TransitionException, DomainException
+from domain.shared.concurrency import retry_on_conflict
 from infrastructure.events.event_bus import EventBus, Event, EventTypes
+from infrastructure.events.outbox import EventOutboxRepository
+from domain.logistics.services.pending_task_index import PendingTaskIndex
+from infrastructure.persistence.generic_repository import BaseRepository
+
+
+@dataclass
+class BatchTransitionResult:
+    """Resultado por carga de transition_many."""
+    succeeded: List[int] = field(default_factory=list)
+    failed: Dict[int, str] = field(default_factory=dict)  # load_id -> motivo
+
+    @property
+    def all_succeeded(self) -> bool:
+        return not self.failed
 
 
 class LoadStateService:
@@ -33,17 +56,33 @@ class LoadStateService:
     Implementa la máquina de estados finitos (FSM) para el ciclo de vida
     de las cargas, garantizando que todas las transiciones sean válidas
     y cumplan con los verificadores (checkpoints) requeridos.
+
+    Con un outbox configurado, los eventos se escriben en event_outbox en la
+    misma transacción que la transición (los entrega OutboxRelay) en lugar de
+    publicarse en el event_bus tras el commit.
+
+    LOAD_STATUS_CHANGED lleva la foto de la carga (event.data['load'], ver
+    LoadSnapshot) para que los listeners no vuelvan a consultarla.
+
+    Con un task_index configurado, las tareas pendientes de cada carga
+    transicionada o con atributos nuevos se recalculan en la misma transacción.
     """
     
     def __init__(
         self,
         db_manager: DatabaseManager,
-        event_bus: Optional[EventBus] = None
+        event_bus: Optional[EventBus] = None,
+        outbox: Optional[EventOutboxRepository] = None,
+        task_index: Optional[PendingTaskIndex] = None
     ):
         self.db_manager = db_manager
         self.load_repo = LoadRepository(db_manager)
         self.transition_repo = StatusTransitionRepository(db_manager)
+        self.distance_repo = DistanceMatrixRepository(db_manager)
+        self.vehicle_repo = BaseRepository(db_manager, Vehicle, "vehicles")
         self.event_bus = event_bus
+        self.outbox = outbox
+        self.task_index = task_index
 
     def transition_load(
         self,
@@ -76,6 +115,7 @@ class LoadStateService:
             ValueError: Si la carga no existe
             TransitionException: Si la transición no es válida desde el estado actual
             DomainException: Si faltan verificadores requeridos
+            ConcurrencyConflictError: Si la carga sigue cambiando tras los reintentos
 
         Example:
             # Transición exitosa con todos los verificadores
@@ -86,11 +126,203 @@ class LoadStateService:
             }
             service.transition_load(load_id, LoadStatus.COMPLETED, user_id=5)
         """
-        # 1. Obtener carga actual
-        load = self.load_repo.get_by_id(load_id)
-        if not load:
-            raise ValueError(f"Load {load_id} not found")
+        # Conflicto de versión (otra sesión modificó la carga): se relee y revalida
+        outcome = retry_on_conflict(
+            lambda attempt: self._apply_transition(load_id, new_status, user_id, notes, attempt > 0)
+        )
+        if outcome is None:
+            # Otra sesión ya aplicó esta misma transición
+            return True
+        load, current_status, success = outcome
+
+        # 8. Publicar eventos (con outbox ya quedaron escritos en la transacción)
+        if success and self.event_bus and not self.outbox:
+            snapshot = self._load_snapshots([load])[load.id]
+            for event in self._status_change_events(load, current_status, new_status, user_id, snapshot):
+                self.event_bus.publish(event)
+        
+        return success
+
+    def _apply_transition(
+        self,
+        load_id: int,
+        new_status: LoadStatus,
+        user_id: Optional[int],
+        notes: Optional[str],
+        is_retry: bool
+    ) -> Optional[Tuple[Load, LoadStatus, bool]]:
+        """
+        Un intento de transition_load: historial y carga en una sola transacción.
+
+        Returns:
+            (carga, estado anterior, éxito), o None si en un reintento la carga
+            ya está en el estado destino
+
+        Raises:
+            ConcurrencyConflictError: Si la versión de la carga cambió (hace rollback del historial)
+        """
+        with self.db_manager:
+            # 1. Obtener carga actual
+            load = self.load_repo.get_by_id(load_id)
+            if not load:
+                raise ValueError(f"Load {load_id} not found")
+            if is_retry and load.status == new_status.value:
+                return None
+
+            # 2-4. Validar FSM y verificadores (checkpoints)
+            current_status = self._check_transition(load, new_status)
+
+            # 5. Registrar transición en historial
+            transition = StatusTransition(
+                id=None,
+                load_id=load_id,
+                from_status=current_status.value,
+                to_status=new_status.value,
+                timestamp=datetime.now(),
+                user_id=user_id,
+                notes=notes
+            )
+            self.transition_repo.add(transition)
+
+            # 6. Actualizar estado de la carga
+            load.status = new_status.value
+            load.updated_at = datetime.now()
+
+            # 7. Promoción de atributos JSONB a columnas SQL (para BI/Reporting)
+            self._promote_attributes_to_columns(load)
+
+            success = self.load_repo.update(load)
+            if success and self.task_index:
+                self.task_index.refresh([load])
+
+            # 8. Outbox: el evento se confirma junto con la transición
+            if success and self.outbox:
+                snapshot = self._load_snapshots([load])[load.id]
+                self.outbox.append_many(
+                    self._status_change_events(load, current_status, new_status, user_id, snapshot)
+                )
+        return load, current_status, success
+
+    def transition_many(
+        self,
+        load_ids: Sequence[int],
+        new_status: LoadStatus,
+        user_id: Optional[int] = None,
+        notes: Optional[str] = None
+    ) -> BatchTransitionResult:
+        """
+        Transiciona varias cargas al mismo estado en una sola transacción.
+
+        Mismas reglas que transition_load, pero las cargas se leen en una
+        consulta, la FSM y los verificadores corren en memoria, y el historial
+        y las cargas se escriben con executemany. Una carga que no cumple
+        las reglas se informa en el resultado sin bloquear al resto.
+
+        Publica un único evento LOAD_STATUS_CHANGED_BATCH con todas las
+        transiciones aplicadas (más LOAD_ARRIVED_AT_FIELD por carga que
+        llega a un sitio, igual que transition_load). Con outbox se escriben
+        en la transacción los mismos eventos por carga que transition_load,
+        para que cada uno tenga su propio offset de entrega. Si otra sesión modifica
+        alguna carga entre la lectura y la escritura, el lote completo se
+        reintenta desde la lectura.
+
+        Args:
+            load_ids: IDs de las cargas
+            new_status: Estado destino (LoadStatus enum)
+            user_id: Usuario que realiza la transición
+            notes: Notas opcionales (se registran en cada transición)
+
+        Returns:
+            BatchTransitionResult con las cargas exitosas y el motivo de cada fallo
+        """
+        unique_ids = list(dict.fromkeys(load_ids))
+        if not unique_ids:
+            return BatchTransitionResult()
+
+        result, changed = retry_on_conflict(
+            lambda attempt: self._apply_transitions(unique_ids, new_status, user_id, notes)
+        )
+
+        if changed and self.event_bus and not self.outbox:
+            self._publish_batch_status_change_events(changed, new_status, user_id)
+
+        return result
+
+    def _apply_transitions(
+        self,
+        unique_ids: List[int],
+        new_status: LoadStatus,
+        user_id: Optional[int],
+        notes: Optional[str]
+    ) -> Tuple[BatchTransitionResult, List[tuple]]:
+        """
+        Un intento de transition_many (lectura, validación y escritura en una transacción).
 
+        Raises:
+            ConcurrencyConflictError: Si alguna carga cambió de versión (rollback del lote completo)
+        """
+        result = BatchTransitionResult()
+        now = datetime.now()
+        transitions: List[StatusTransition] = []
+        changed: List[tuple] = []
+
+        with self.db_manager:
+            loads_by_id = {load.id: load for load in self.load_repo.get_by_ids(unique_ids)}
+
+            for load_id in unique_ids:
+                load = loads_by_id.get(load_id)
+                if not load:
+                    result.failed[load_id] = f"Load {load_id} not found"
+                    continue
+                try:
+                    current_status = self._check_transition(load, new_status)
+                except (TransitionException, DomainException) as e:
+                    result.failed[load_id] = str(e)
+                    continue
+
+                transitions.append(StatusTransition(
+                    id=None,
+                    load_id=load_id,
+                    from_status=current_status.value,
+                    to_status=new_status.value,
+                    timestamp=now,
+                    user_id=user_id,
+                    notes=notes
+                ))
+                load.status = new_status.value
+                load.updated_at = now
+                self._promote_attributes_to_columns(load)
+                changed.append((load, current_status))
+
+            self.transition_repo.add_many(transitions)
+            self.load_repo.update_many([load for load, _ in changed])
+            if self.task_index:
+                self.task_index.refresh([load for load, _ in changed])
+
+            if self.outbox and changed:
+                snapshots = self._load_snapshots([load for load, _ in changed])
+                self.outbox.append_many([
+                    event
+                    for load, current_status in changed
+                    for event in self._status_change_events(
+                        load, current_status, new_status, user_id, snapshots[load.id]
+                    )
+                ])
+
+        result.succeeded = [load.id for load, _ in changed]
+        return result, changed
+
+    def _check_transition(self, load: Load, new_status: LoadStatus) -> LoadStatus:
+        """
+        Valida FSM y verificadores (checkpoints) para una carga en memoria.
+
+        Returns:
+            Estado actual de la carga (normalizado)
+
+        Raises:
+            TransitionException: Si la transición no es válida desde el estado actual
+            DomainException: Si faltan verificadores requeridos
+        """
         # Convertir estado actual a LoadStatus si es string legacy
         try:
             current_status = LoadStatus(load.status)
@@ -98,17 +330,17 @@ class LoadStateService:
             # Intentar mapeo legacy
             current_status = normalize_status(load.status)
 
-        # 2. Validar que la transición sea permitida (FSM)
+        # Validar que la transición sea permitida (FSM)
         if not is_valid_transition(current_status, new_status):
             raise TransitionException(
                 f"Transición inválida: {current_status.value} -> {new_status.value}. "
                 f"Esta transición no está permitida por las reglas de negocio."
             )
 
-        # 3. Determinar si es flujo de disposición
+        # Determinar si es flujo de disposición
         is_disposal_flow = load.destination_site_id is not None
 
-        # 4. Ejecutar validadores de verificadores (checkpoints)
+        # Ejecutar validadores de verificadores (checkpoints)
         validators = get_validators_for_transition(
             to_status=new_status,
             from_status=current_status,
@@ -128,38 +360,7 @@ class LoadStateService:
                     f"No se puede transicionar a {new_status.value}: {str(e)}"
                 )
 
-        # 5. Registrar transición en historial
-        transition = StatusTransition(
-            id=None,
-            load_id=load_id,
-            from_status=current_status.value,
-            to_status=new_status.value,
-            timestamp=datetime.now(),
-            user_id=user_id,
-            notes=notes
-        )
-        self.transition_repo.add(transition)
-
-        # 6. Actualizar estado de la carga
-        load.status = new_status.value
-        load.updated_at = datetime.now()
-
-        # 7. Promoción de atributos JSONB a columnas SQL (para BI/Reporting)
-        self._promote_attributes_to_columns(load)
-
-        success = self.load_repo.update(load)
-        
-        # 8. Publicar eventos
-        if success and self.event_bus:
-            self._publish_status_change_events(
-                load_id=load_id,
-                current_status=current_status,
-                new_status=new_status,
-                load=load,
-                user_id=user_id
-            )
-        
-        return success
+        return current_status
 
     def _promote_attributes_to_columns(self, load: Load) -> None:
         """
@@ -185,37 +386,115 @@ class LoadStateService:
             load.net_weight = load.gross_weight - load.tare_weight
             load.weight_net = load.net_weight  # Alias
 
-    def _publish_status_change_events(
+    def _load_snapshots(self, loads: Sequence[Load]) -> Dict[int, LoadSnapshot]:
+        """
+        Fotos de las cargas para los eventos: contratista resuelto (del vehículo
+        si la carga no lo tiene) y distancia de la ruta desde la matriz de
+        distancias, con una consulta de vehículos y una búsqueda vectorizada
+        de rutas para todo el lote.
+        """
+        vehicle_ids = list({
+            load.vehicle_id for load in loads
+            if load.contractor_id is None and load.vehicle_id is not None
+        })
+        contractor_by_vehicle = {
+            vehicle.id: vehicle.contractor_id
+            for vehicle in (self.vehicle_repo.get_by_ids(vehicle_ids) if vehicle_ids else [])
+        }
+
+        # Misma resolución de origen/destino que la liquidación de transporte
+        distances = self.distance_repo.get_route_distances(
+            [load.origin_facility_id or load.origin_treatment_plant_id for load in loads],
+            [load.destination_site_id or load.destination_treatment_plant_id for load in loads],
+            ['SITE' if load.destination_site_id else 'TREATMENT_PLANT' for load in loads],
+            derive_missing=True,
+            origin_types=['FACILITY' if load.origin_facility_id else 'TREATMENT_PLANT' for load in loads]
+        )
+
+        return {
+            load.id: LoadSnapshot.from_load(
+                load,
+                contractor_id=load.contractor_id if load.contractor_id is not None
+                else contractor_by_vehicle.get(load.vehicle_id),
+                distance_km=None if np.isnan(distance) else float(distance)
+            )
+            for load, distance in zip(loads, distances)
+        }
+
+    def _status_change_events(
         self,
-        load_id: int,
+        load: Load,
         current_status: LoadStatus,
         new_status: LoadStatus,
-        load: Load,
-        user_id: Optional[int]
-    ) -> None:
-        """Publica eventos relacionados con cambios de estado."""
-        # Evento principal: cambio de estado
-        self.event_bus.publish(Event(
+        user_id: Optional[int],
+        snapshot: LoadSnapshot
+    ) -> List[Event]:
+        """Eventos relacionados con el cambio de estado de una carga."""
+        timestamp = datetime.now().isoformat()
+        # Evento principal: cambio de estado (con la foto de la carga)
+        events = [Event(
             event_type=EventTypes.LOAD_STATUS_CHANGED,
             data={
-                'load_id': load_id,
+                'load_id': load.id,
                 'from_status': current_status.value,
                 'to_status': new_status.value,
-                'timestamp': datetime.now().isoformat(),
-                'user_id': user_id
+                'timestamp': timestamp,
+                'user_id': user_id,
+                'load': snapshot.to_dict()
             }
-        ))
+        )]
         
         # Evento especial: llegada a campo de aplicación
         if new_status == LoadStatus.AT_DESTINATION and load.destination_site_id:
-            self.event_bus.publish(Event(
+            events.append(Event(
                 event_type=EventTypes.LOAD_ARRIVED_AT_FIELD,
                 data={
-                    'load_id': load_id,
+                    'load_id': load.id,
                     'site_id': load.destination_site_id,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': timestamp
                 }
             ))
+        return events
+
+    def _publish_batch_status_change_events(
+        self,
+        changed: List[tuple],
+        new_status: LoadStatus,
+        user_id: Optional[int]
+    ) -> None:
+        """Publica un único evento con todas las transiciones de transition_many."""
+        timestamp = datetime.now().isoformat()
+        snapshots = self._load_snapshots([load for load, _ in changed])
+        self.event_bus.publish(Event(
+            event_type=EventTypes.LOAD_STATUS_CHANGED_BATCH,
+            data={
+                'to_status': new_status.value,
+                'user_id': user_id,
+                'transitions': [
+                    {
+                        'load_id': load.id,
+                        'from_status': current_status.value,
+                        'to_status': new_status.value,
+                        'timestamp': timestamp,
+                        'user_id': user_id,
+                        'load': snapshots[load.id].to_dict()
+                    }
+                    for load, current_status in changed
+                ]
+            }
+        ))
+
+        if new_status == LoadStatus.AT_DESTINATION:
+            for load, _ in changed:
+                if load.destination_site_id:
+                    self.event_bus.publish(Event(
+                        event_type=EventTypes.LOAD_ARRIVED_AT_FIELD,
+                        data={
+                            'load_id': load.id,
+                            'site_id': load.destination_site_id,
+                            'timestamp': timestamp
+                        }
+                    ))
 
     def update_load_attributes(
         self,
@@ -248,23 +527,13 @@ class LoadStateService:
                 }
             })
         """
-        load = self.load_repo.get_by_id(load_id)
-        if not load:
-            raise ValueError(f"Load {load_id} not found")
-        
-        # Asegurar que attributes existe
-        if not hasattr(load, 'attributes') or load.attributes is None:
-            load.attributes = {}
-        
-        # Mergear nuevos atributos
-        load.attributes.update(attributes_dict)
-        
-        # Actualizar timestamps de sincronización
-        load.updated_at = datetime.now()
-        load.sync_status = 'PENDING'
-        load.last_updated_local = datetime.now()
-        
-        return self.load_repo.update(load)
+        with self.db_manager:
+            # Merge en SQLite (json_set): formularios concurrentes no se pisan las claves
+            if not self.load_repo.merge_attributes(load_id, attributes_dict):
+                raise ValueError(f"Load {load_id} not found")
+            if self.task_index:
+                self.task_index.refresh_ids([load_id])
+        return True
 
     def get_load_timeline(self, load_id: int) -> List[StatusTransition]:
         """
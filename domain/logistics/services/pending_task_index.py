@@ -0,0 +1,237 @@
+"""
+PendingTaskIndex - Índice incremental de tareas pendientes (bandeja de entrada).
+
+Responsabilidades:
+- Determinar, para una carga, los checkpoints que faltan para su siguiente estado
+- Persistir esas tareas por rol en pending_tasks (PendingTaskRepository)
+- Recalcular solo las cargas afectadas: LoadStateService llama a refresh()
+  dentro de la transacción de cada transición o merge de atributos
+- Detectar con sync() las cargas modificadas por otros servicios (planificación,
+  despacho, recepción) comparando su versión con la del índice
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from infrastructure.persistence.database_manager import DatabaseManager
+from domain.logistics.entities.load import Load
+from domain.logistics.entities.load_status import LoadStatus, normalize_status
+from domain.logistics.repositories.load_repository import LoadRepository
+from domain.logistics.repositories.pending_task_repository import PendingTaskRepository
+from domain.logistics.services.transition_rules import get_validators_for_transition, VALID_TRANSITIONS
+from domain.logistics.services.transition_validators import (
+    ensure_lab_analysis_ok, ensure_gate_entry, ensure_pickup_confirmation,
+    ensure_entry_weight, ensure_exit_weight, ensure_weight_ticket_final,
+    ensure_geofence_confirmation
+)
+
+
+# Mapeo de Validador -> Configuración de Tarea
+TASK_CONFIG: Dict[str, Dict[str, Any]] = {
+    ensure_lab_analysis_ok.__name__: {
+        "title": "Registrar Análisis de Laboratorio",
+        "form_type": "lab_check",
+        "priority": "High",
+        "priority_order": 1,
+        "allowed_roles": ["LAB_TECH", "ADMIN", "OPERATOR"]
+    },
+    ensure_gate_entry.__name__: {
+        "title": "Registrar Ingreso en Portería",
+        "form_type": "gate_check",
+        "priority": "Medium",
+        "priority_order": 3,
+        "allowed_roles": ["GATE_KEEPER", "ADMIN", "OPERATOR"]
+    },
+    ensure_pickup_confirmation.__name__: {
+        "title": "Confirmar Carga en Origen",
+        "form_type": "pickup_check",
+        "priority": "High",
+        "priority_order": 2,
+        "allowed_roles": ["DRIVER", "ADMIN", "OPERATOR"]
+    },
+    ensure_geofence_confirmation.__name__: {
+        "title": "Confirmar Llegada a Origen",
+        "form_type": "geofence_check",
+        "priority": "Medium",
+        "priority_order": 4,
+        "allowed_roles": ["DRIVER", "ADMIN", "OPERATOR"]
+    },
+    ensure_entry_weight.__name__: {
+        "title": "Registrar Pesaje de Entrada",
+        "form_type": "weight_check",
+        "priority": "High",
+        "priority_order": 1,
+        "allowed_roles": ["GATE_KEEPER", "ADMIN", "OPERATOR"]
+    },
+    ensure_exit_weight.__name__: {
+        "title": "Registrar Pesaje de Salida",
+        "form_type": "weight_check",
+        "priority": "High",
+        "priority_order": 1,
+        "allowed_roles": ["GATE_KEEPER", "ADMIN", "OPERATOR"]
+    },
+    ensure_weight_ticket_final.__name__: {
+        "title": "Subir Ticket de Pesaje Final",
+        "form_type": "ticket_upload",
+        "priority": "Medium",
+        "priority_order": 5,
+        "allowed_roles": ["ADMIN", "OPERATOR"]
+    }
+}
+
+
+class PendingTaskIndex:
+    """
+    Mantiene pending_tasks al día carga por carga.
+
+    El cálculo de una carga (siguiente estado lógico y validadores que fallan)
+    es el mismo que hacía TaskResolver en cada render; aquí se hace una vez por
+    cambio de la carga y la bandeja de un rol se lee con get_tasks_for_role().
+    Las escrituras de otros servicios se recogen con sync(), que corre como
+    máximo una vez cada `sync_interval` segundos.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, db_manager: DatabaseManager, sync_interval: float = 30.0):
+        self.db_manager = db_manager
+        self.load_repo = LoadRepository(db_manager)
+        self.task_repo = PendingTaskRepository(db_manager)
+        self.sync_interval = sync_interval
+        self._last_sync: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, loads: Sequence[Load]) -> None:
+        """
+        Recalcula las tareas de cargas ya leídas (con sus atributos y versión
+        actuales). Llamar dentro de la transacción que las modificó.
+        """
+        if not loads:
+            return
+        self.task_repo.replace_for_loads(
+            {load.id: load.version for load in loads},
+            [task for load in loads for task in self.tasks_for_load(load)]
+        )
+
+    def refresh_ids(self, load_ids: Sequence[int]) -> None:
+        """
+        Relee y recalcula las cargas indicadas; las que ya no existen salen
+        del índice.
+        """
+        load_ids = list(dict.fromkeys(load_ids))
+        for start in range(0, len(load_ids), self.BATCH_SIZE):
+            chunk = load_ids[start:start + self.BATCH_SIZE]
+            with self.db_manager:
+                loads = self.load_repo.get_by_ids(chunk)
+                versions: Dict[int, Optional[int]] = dict.fromkeys(chunk)
+                versions.update({load.id: load.version for load in loads})
+                self.task_repo.replace_for_loads(
+                    versions,
+                    [task for load in loads for task in self.tasks_for_load(load)]
+                )
+
+    def sync(self, force: bool = False) -> int:
+        """
+        Recalcula las cargas cuyo índice quedó desactualizado (escrituras que
+        no pasan por LoadStateService).
+
+        Args:
+            force: Ignorar sync_interval
+
+        Returns:
+            Número de cargas recalculadas
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_sync is not None and now - self._last_sync < self.sync_interval:
+                return 0
+            self._last_sync = now
+
+        stale_ids = self.task_repo.get_stale_load_ids()
+        self.refresh_ids(stale_ids)
+        return len(stale_ids)
+
+    def rebuild(self) -> int:
+        """Recalcula el índice completo (backfill tras la migración)."""
+        self.task_repo.clear()
+        return self.sync(force=True)
+
+    def get_tasks_for_role(self, role: str, max_per_load: int = 3) -> List[dict]:
+        """
+        Tareas pendientes visibles para un rol (una consulta indexada).
+
+        Returns:
+            Filas de pending_tasks (load_id, form_type, title, description,
+            priority, priority_order, target_status, ...)
+        """
+        self.sync()
+        return self.task_repo.get_by_role(role, max_per_load)
+
+    def tasks_for_load(self, load: Load) -> List[dict]:
+        """
+        Tareas pendientes de una carga: una fila por formulario y rol, con
+        role_rank según priority_order entre las tareas visibles para ese rol.
+        """
+        next_status = self.next_status(load)
+        if next_status is None:
+            return []
+        current_status = self._current_status(load)
+        is_disposal = load.destination_site_id is not None
+        validators = get_validators_for_transition(next_status, current_status, is_disposal)
+        attributes = load.attributes or {}
+
+        # Validadores que fallan = checkpoints pendientes (un formulario por tipo)
+        pending: Dict[str, Dict[str, Any]] = {}
+        for validator in validators:
+            config = TASK_CONFIG.get(validator.__name__)
+            if not config or config['form_type'] in pending:
+                continue
+            try:
+                validator(attributes)
+            except Exception:
+                pending[config['form_type']] = config
+        ordered = sorted(pending.values(), key=lambda config: config.get('priority_order', 999))
+
+        tasks = []
+        rank_by_role: Dict[str, int] = {}
+        for config in ordered:
+            for role in config['allowed_roles']:
+                rank_by_role[role] = rank_by_role.get(role, 0) + 1
+                tasks.append({
+                    'load_id': load.id,
+                    'form_type': config['form_type'],
+                    'allowed_role': role,
+                    'role_rank': rank_by_role[role],
+                    'title': f"{config['title']} (Carga #{load.id})",
+                    'description': f"Requerido para avanzar a {next_status.value}",
+                    'priority': config['priority'],
+                    'priority_order': config.get('priority_order', 999),
+                    'target_status': next_status.value,
+                })
+        return tasks
+
+    def next_status(self, load: Load) -> Optional[LoadStatus]:
+        """
+        Siguiente estado lógico de la carga: el primero permitido por la FSM;
+        en la bifurcación de AT_DESTINATION, IN_DISPOSAL si la carga tiene
+        sitio destino y COMPLETED (tratamiento) si no.
+        """
+        current_status = self._current_status(load)
+        if current_status is None:
+            return None
+        next_statuses = VALID_TRANSITIONS.get(current_status, [])
+        if not next_statuses:
+            return None
+        if LoadStatus.IN_DISPOSAL in next_statuses and LoadStatus.COMPLETED in next_statuses:
+            return LoadStatus.IN_DISPOSAL if load.destination_site_id else LoadStatus.COMPLETED
+        return next_statuses[0]
+
+    @staticmethod
+    def _current_status(load: Load) -> Optional[LoadStatus]:
+        if isinstance(load.status, LoadStatus):
+            return load.status
+        try:
+            return normalize_status(load.status)
+        except ValueError:
+            return None  # Estado desconocido: sin tareas
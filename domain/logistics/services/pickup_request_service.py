@@ -77,9 +77,9 @@ class PickupRequestService:
             
             created_request = self.pickup_repo.add(pickup_request)
             
-            # 2. Generar N cargas individuales
-            for i in range(load_quantity):
-                load = Load(
+            # 2. Generar N cargas individuales (un solo INSERT masivo)
+            loads = [
+                Load(
                     id=None,
                     origin_facility_id=facility_id,
                     vehicle_id=None,  # Sin asignar - lo asigna el planificador
@@ -92,7 +92,9 @@ class PickupRequestService:
                     requested_date=datetime.combine(requested_date, datetime.min.time()),
                     created_at=datetime.now()
                 )
-                self.load_repo.add(load)
+                for _ in range(load_quantity)
+            ]
+            self.load_repo.add_many(loads)
             
             return created_request
     
@@ -268,9 +270,9 @@ class PickupRequestService:
             
             created_request = self.pickup_repo.add(pickup_request)
             
-            # 2. Generar N cargas individuales
-            for i in range(load_quantity):
-                load = Load(
+            # 2. Generar N cargas individuales (un solo INSERT masivo)
+            loads = [
+                Load(
                     id=None,
                     origin_facility_id=None,  # No hay facility de cliente
                     origin_treatment_plant_id=treatment_plant_id,  # Planta de tratamiento como origen
@@ -284,7 +286,9 @@ class PickupRequestService:
                     requested_date=datetime.combine(requested_date, datetime.min.time()),
                     created_at=datetime.now()
                 )
-                self.load_repo.add(load)
+                for _ in range(load_quantity)
+            ]
+            self.load_repo.add_many(loads)
             
             return created_request
     
@@ -0,0 +1,391 @@
+"""
+TripConsolidationService - Optimizador de consolidación de viajes enlazados.
+
+Propone, para las cargas REQUESTED de un día, qué pares conviene enlazar en
+un viaje AMPLIROLL (T1: origen → punto de enlace, T2: enlace → destino con
+carro) en vez de despacharlas como viajes directos.
+
+Modelo de costo (igual al estado de pago de transportistas):
+- Directo: tarifa(tipo) × max(peso, mínimo(tipo)) × km(origen → destino)
+- Enlazado: tarifa(AMPLIROLL) × max(peso_primaria, mínimo) × km(origen → enlace)
+            + tarifa(AMPLIROLL_CARRO) × Σ max(peso, mínimo) × km(enlace → destino)
+
+El emparejamiento maximiza el ahorro total con greedy por ahorro descendente
+seguido de búsqueda local (intercambio de socios, inversión de roles y
+reemplazo por cargas libres). Las propuestas se aplican con
+TripLinkingService.link_loads_into_trip.
+"""
+
+import itertools
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from infrastructure.persistence.database_manager import DatabaseManager
+from domain.finance.entities.finance_entities import Proforma
+from domain.finance.repositories.proforma_repository import ProformaRepository
+from domain.shared.constants import DEFAULT_TRANSPORT_TARIFFS_UF, MIN_BILLABLE_WEIGHT_TONS
+from domain.logistics.entities.vehicle import VehicleType
+from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
+from domain.logistics.repositories.load_repository import LoadRepository
+from domain.logistics.services.trip_linking_service import TripLinkingService
+
+
+@dataclass
+class TripProposal:
+    """Par de cargas propuesto como viaje enlazado."""
+    primary_load_id: int  # Tramo T1 (se recoge primero)
+    link_load_id: int  # Origen en punto de enlace
+    direct_cost_uf: float
+    linked_cost_uf: float
+
+    @property
+    def savings_uf(self) -> float:
+        return self.direct_cost_uf - self.linked_cost_uf
+
+    @property
+    def load_ids(self) -> List[int]:
+        """Orden esperado por link_loads_into_trip (PICKUP_SEGMENT, MAIN_HAUL)."""
+        return [self.primary_load_id, self.link_load_id]
+
+
+@dataclass
+class ConsolidationPlan:
+    """Resultado del optimizador para un rango de fechas."""
+    proposals: List[TripProposal] = field(default_factory=list)
+    direct_cost_uf: float = 0.0  # Todas las cargas evaluadas como viajes directos
+    unpriced_load_ids: List[int] = field(default_factory=list)  # Sin destino o sin ruta
+
+    @property
+    def savings_uf(self) -> float:
+        return sum(p.savings_uf for p in self.proposals)
+
+    @property
+    def planned_cost_uf(self) -> float:
+        return self.direct_cost_uf - self.savings_uf
+
+
+class TripConsolidationService:
+    """
+    Optimizador batch de viajes enlazados para la planificación diaria.
+    """
+
+    # Mejora mínima (UF) para aceptar un par o un movimiento de búsqueda local
+    MIN_IMPROVEMENT_UF = 1e-9
+    MAX_LOCAL_SEARCH_ROUNDS = 50
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        trip_linking_service: Optional[TripLinkingService] = None
+    ):
+        self.db_manager = db_manager
+        self.load_repo = LoadRepository(db_manager)
+        self.distance_repo = DistanceMatrixRepository(db_manager)
+        self.proforma_repo = ProformaRepository(db_manager)
+        self.trip_linking_service = trip_linking_service or TripLinkingService(db_manager)
+
+    def propose_consolidation(
+        self,
+        plan_date: date,
+        destination_id: Optional[int] = None,
+        destination_type: str = 'TREATMENT_PLANT',
+        proforma: Optional[Proforma] = None
+    ) -> ConsolidationPlan:
+        """
+        Calcula el plan de enlaces de costo mínimo para las cargas del día.
+
+        Args:
+            plan_date: Día de las cargas (requested_date)
+            destination_id: Destino final por defecto para cargas sin destino
+            destination_type: 'TREATMENT_PLANT' o 'SITE' (destino por defecto)
+            proforma: Tarifas a usar (None = proforma vigente en plan_date)
+
+        Returns:
+            ConsolidationPlan con los pares propuestos (sin aplicar)
+        """
+        loads = self.load_repo.get_requested_for_consolidation(plan_date, plan_date)
+        if proforma is None:
+            proforma = self.proforma_repo.get_for_date(plan_date)
+        return self.optimize(pd.DataFrame(loads), proforma, destination_id, destination_type)
+
+    def apply_plan(self, plan: ConsolidationPlan) -> List[str]:
+        """
+        Aplica todas las propuestas en una sola transacción.
+
+        Returns:
+            trip_id creado por cada propuesta, en el mismo orden
+
+        Raises:
+            ValueError: Si alguna carga ya no es enlazable (no se aplica ninguna)
+        """
+        with self.db_manager:
+            return [
+                self.trip_linking_service.link_loads_into_trip(proposal.load_ids)
+                for proposal in plan.proposals
+            ]
+
+    # ==========================================
+    # OPTIMIZADOR
+    # ==========================================
+
+    def optimize(
+        self,
+        loads_df: pd.DataFrame,
+        proforma: Optional[Proforma],
+        destination_id: Optional[int] = None,
+        destination_type: str = 'TREATMENT_PLANT'
+    ) -> ConsolidationPlan:
+        """
+        Empareja cargas minimizando el costo total (ver docstring del módulo).
+
+        Args:
+            loads_df: Cargas con la forma de get_requested_for_consolidation
+            proforma: Proforma con tarifas (None usa tarifas por defecto)
+            destination_id: Destino por defecto para cargas sin destino
+            destination_type: Tipo del destino por defecto
+
+        Returns:
+            ConsolidationPlan
+        """
+        if loads_df.empty:
+            return ConsolidationPlan()
+
+        df = loads_df.reset_index(drop=True)
+        dest_id, dest_type = self._destinations(df, destination_id, destination_type)
+        direct = self._direct_costs(df, dest_id, dest_type, proforma)
+
+        priced = ~np.isnan(direct)
+        plan = ConsolidationPlan(
+            direct_cost_uf=float(direct[priced].sum()),
+            unpriced_load_ids=df.loc[~priced, 'id'].astype(int).tolist()
+        )
+
+        linked = self._linked_costs(df, dest_id, dest_type, proforma, eligible=priced & self._can_link(df))
+        savings = direct[:, None] + direct[None, :] - linked
+        savings = np.where(np.isnan(savings), -np.inf, savings)
+
+        pairs = self._local_search(savings, self._greedy(savings))
+        ids = df['id'].astype(int).to_numpy()
+        plan.proposals = [
+            TripProposal(
+                primary_load_id=int(ids[p]),
+                link_load_id=int(ids[l]),
+                direct_cost_uf=float(direct[p] + direct[l]),
+                linked_cost_uf=float(linked[p, l])
+            )
+            for p, l in sorted(pairs, key=lambda pair: -savings[pair])
+        ]
+        return plan
+
+    def _greedy(self, savings: np.ndarray) -> List[Tuple[int, int]]:
+        """Toma pares por ahorro descendente mientras ambas cargas estén libres."""
+        candidates = np.argwhere(savings > self.MIN_IMPROVEMENT_UF)
+        order = np.argsort(-savings[candidates[:, 0], candidates[:, 1]], kind='stable')
+        used = set()
+        pairs = []
+        for p, l in candidates[order]:
+            if p not in used and l not in used:
+                pairs.append((int(p), int(l)))
+                used.update((p, l))
+        return pairs
+
+    def _local_search(
+        self,
+        savings: np.ndarray,
+        pairs: List[Tuple[int, int]]
+    ) -> List[Tuple[int, int]]:
+        """
+        Mejora el emparejamiento hasta un óptimo local.
+
+        Movimientos: intercambio de socios entre dos pares, inversión de roles
+        primaria/enlace, reemplazo de un miembro por una carga libre y división
+        de un par en dos pares con cargas libres.
+        """
+        def value(pair):
+            return savings[pair]
+
+        for _ in range(self.MAX_LOCAL_SEARCH_ROUNDS):
+            improved = False
+            used = {load for pair in pairs for load in pair}
+            linkable = np.isfinite(savings).any(axis=0) | np.isfinite(savings).any(axis=1)
+            free = [i for i in np.flatnonzero(linkable) if i not in used]
+
+            for a in range(len(pairs)):
+                p1, l1 = pairs[a]
+                best, best_gain = None, self.MIN_IMPROVEMENT_UF
+
+                # Inversión de roles
+                gain = value((l1, p1)) - value((p1, l1))
+                if gain > best_gain:
+                    best, best_gain = ('pair', [(l1, p1)]), gain
+
+                # Reemplazo por carga libre
+                for u in free:
+                    for candidate in ((u, l1), (p1, u), (l1, u), (u, p1)):
+                        gain = value(candidate) - value((p1, l1))
+                        if gain > best_gain:
+                            best, best_gain = ('free', [candidate]), gain
+
+                # División: cada miembro forma un par nuevo con una carga libre
+                with_p = self._best_partners(savings, p1, free)
+                with_l = self._best_partners(savings, l1, free)
+                for (gain_p, pair_p, u), (gain_l, pair_l, v) in itertools.product(with_p, with_l):
+                    gain = gain_p + gain_l - value((p1, l1))
+                    if u != v and gain > best_gain:
+                        best, best_gain = ('free', [pair_p, pair_l]), gain
+
+                # Intercambio de socios con otro par
+                for b in range(a + 1, len(pairs)):
+                    p2, l2 = pairs[b]
+                    current = value((p1, l1)) + value((p2, l2))
+                    for swapped in (((p1, l2), (p2, l1)), ((p1, p2), (l1, l2)), ((p1, l2), (l1, p2))):
+                        valid = [pair for pair in swapped if np.isfinite(value(pair))]
+                        gain = sum(value(pair) for pair in valid) - current
+                        if gain > best_gain:
+                            best, best_gain = ('swap', valid, b), gain
+
+                if best is None:
+                    continue
+                kind, new_pairs = best[0], best[1]
+                if kind == 'swap':
+                    pairs = [pair for i, pair in enumerate(pairs) if i not in (a, best[2])] + new_pairs
+                else:
+                    pairs = pairs[:a] + pairs[a + 1:] + new_pairs
+                improved = True
+                break
+
+            if not improved:
+                break
+        return [pair for pair in pairs if savings[pair] > self.MIN_IMPROVEMENT_UF]
+
+    @staticmethod
+    def _best_partners(
+        savings: np.ndarray,
+        load: int,
+        free: List[int],
+        limit: int = 2
+    ) -> List[Tuple[float, Tuple[int, int], int]]:
+        """Mejores pares (ahorro, par, carga libre) de una carga con cargas libres, en cualquier rol."""
+        options = []
+        for u in free:
+            pair = (load, u) if savings[load, u] >= savings[u, load] else (u, load)
+            if np.isfinite(savings[pair]):
+                options.append((float(savings[pair]), pair, u))
+        options.sort(key=lambda option: -option[0])
+        return options[:limit]
+
+    # ==========================================
+    # COSTOS
+    # ==========================================
+
+    @staticmethod
+    def _destinations(
+        df: pd.DataFrame,
+        default_id: Optional[int],
+        default_type: str
+    ) -> Tuple[pd.Series, pd.Series]:
+        """Destino propio de la carga si ya lo tiene; si no, el destino por defecto."""
+        has_site = df['destination_site_id'].notna()
+        has_plant = df['destination_treatment_plant_id'].notna()
+        dest_id = df['destination_site_id'].where(has_site, df['destination_treatment_plant_id'])
+        dest_id = dest_id.where(has_site | has_plant, default_id)
+        dest_type = pd.Series(
+            np.where(has_site, 'SITE', np.where(has_plant, 'TREATMENT_PLANT', default_type)),
+            index=df.index
+        )
+        return dest_id, dest_type
+
+    @staticmethod
+    def _can_link(df: pd.DataFrame) -> np.ndarray:
+        """
+        Cargas que caben en un AMPLIROLL compartido (1 contenedor, origen admite AMPLIROLL).
+        Sin tipo solicitado la carga se trata como BATEA, igual que al costearla.
+        """
+        requested = TripConsolidationService._vehicle_types(df)
+        containers = pd.to_numeric(df['container_quantity'], errors='coerce').fillna(1)
+        allowed = df['allowed_vehicle_types'].fillna('').astype(str).str.upper()
+        allows_ampliroll = (allowed == '') | allowed.str.split(',').apply(
+            lambda types: VehicleType.AMPLIROLL.value in [t.strip() for t in types]
+        )
+        return ((requested != VehicleType.BATEA.value) & (containers <= 1) & allows_ampliroll).to_numpy()
+
+    def _direct_costs(
+        self,
+        df: pd.DataFrame,
+        dest_id: pd.Series,
+        dest_type: pd.Series,
+        proforma: Optional[Proforma]
+    ) -> np.ndarray:
+        vehicle_types = self._vehicle_types(df)
+        tariffs = vehicle_types.map(lambda vt: self._tariff_for(vt, proforma)).to_numpy(dtype=float)
+        minimums = vehicle_types.map(self._min_weight_for).to_numpy(dtype=float)
+        km = self.distance_repo.get_route_distances(
+            df['origin_facility_id'], dest_id, dest_type, derive_missing=True
+        )
+        return tariffs * np.maximum(self._weights(df), minimums) * km
+
+    def _linked_costs(
+        self,
+        df: pd.DataFrame,
+        dest_id: pd.Series,
+        dest_type: pd.Series,
+        proforma: Optional[Proforma],
+        eligible: np.ndarray
+    ) -> np.ndarray:
+        """Matriz [primaria, enlace] con el costo del viaje enlazado; NaN si no es válido."""
+        n = len(df)
+        origins = df['origin_facility_id'].to_numpy()
+        weights = self._weights(df)
+
+        # Distancias vectorizadas para todas las combinaciones
+        km_to_link = self.distance_repo.get_route_distances(
+            np.repeat(origins, n), np.tile(origins, n), ['FACILITY'] * (n * n), derive_missing=True
+        ).reshape(n, n)
+        km_from_link = self.distance_repo.get_route_distances(
+            df['origin_facility_id'], dest_id, dest_type, derive_missing=True
+        )
+
+        w_t1 = np.maximum(weights, self._min_weight_for('AMPLIROLL'))
+        w_t2 = np.maximum(weights, self._min_weight_for('AMPLIROLL_CARRO'))
+        linked = (
+            self._tariff_for('AMPLIROLL', proforma) * w_t1[:, None] * km_to_link
+            + self._tariff_for('AMPLIROLL_CARRO', proforma) * (w_t2[:, None] + w_t2[None, :]) * km_from_link[None, :]
+        )
+
+        is_link_point = df['is_link_point'].fillna(0).astype(bool).to_numpy()
+        dest_keys = list(zip(dest_id.tolist(), dest_type.tolist()))
+        same_destination = np.array([[a == b for b in dest_keys] for a in dest_keys])
+        valid = (
+            eligible[:, None] & eligible[None, :]
+            & is_link_point[None, :]
+            & (origins[:, None] != origins[None, :])
+            & same_destination
+        )
+        return np.where(valid, linked, np.nan)
+
+    @staticmethod
+    def _vehicle_types(df: pd.DataFrame) -> pd.Series:
+        """Tipo solicitado en mayúsculas; BATEA si la carga no lo indica."""
+        return df['vehicle_type_requested'].fillna('').astype(str).str.upper().replace('', VehicleType.BATEA.value)
+
+    @staticmethod
+    def _weights(df: pd.DataFrame) -> np.ndarray:
+        """Peso neto en toneladas (net_weight se guarda en kg)."""
+        kg = pd.to_numeric(df['net_weight'], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        return kg / 1000.0
+
+    @staticmethod
+    def _tariff_for(vehicle_type: str, proforma: Optional[Proforma]) -> float:
+        if proforma:
+            tariff = proforma.get_tariff_for_vehicle_type(vehicle_type)
+            if tariff:
+                return tariff
+        return DEFAULT_TRANSPORT_TARIFFS_UF.get(vehicle_type.upper(), 0.0)
+
+    @staticmethod
+    def _min_weight_for(vehicle_type: str) -> float:
+        return MIN_BILLABLE_WEIGHT_TONS.get(vehicle_type.upper(), 7.0)
@@ -101,11 +101,12 @@ class TripLinkingService:
             for row in rows:
                 row_dict = dict(row)
                 
-                # Obtener distancia si existe en distance_matrix
+                # Distancia desde distance_matrix (o camino más corto si no está configurada)
                 distance_km = self.distance_matrix_repo.get_route_distance(
                     primary_load.origin_facility_id,
                     row_dict['origin_facility_id'],
-                    'FACILITY'
+                    'FACILITY',
+                    derive_missing=True
                 ) or 0.0
                 
                 candidates.append({
@@ -15,7 +15,7 @@ class MaintenancePlanRepository(BaseRepository[MaintenancePlan]):
                 (asset_id,)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
 class MaintenanceOrderRepository(BaseRepository[MaintenanceOrder]):
     def __init__(self, db_manager: DatabaseManager):
@@ -29,4 +29,32 @@ class MaintenanceOrderRepository(BaseRepository[MaintenanceOrder]):
                 (asset_id,)
             )
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
+
+class AssetMeterEntryRepository:
+    """
+    Incrementos de contador aplicados por activo (migración 041).
+
+    Cada incremento se identifica por su origen (carga o registro de
+    maquinaria): registrar dos veces el mismo origen no tiene efecto.
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.table_name = "asset_meter_entries"
+
+    def record(self, asset_id: int, source_type: str, source_id: int, strategy: str, increment: float) -> bool:
+        """
+        Registra el incremento (en la transacción abierta, si la hay).
+
+        Returns:
+            False si el origen ya estaba aplicado a este activo
+        """
+        with self.db_manager as conn:
+            cursor = conn.execute(
+                f"""INSERT OR IGNORE INTO {self.table_name}
+                        (asset_id, source_type, source_id, strategy, increment)
+                    VALUES (?, ?, ?, ?, ?)""",
+                (asset_id, source_type, source_id, strategy, increment)
+            )
+            return cursor.rowcount > 0
@@ -2,9 +2,12 @@ from typing import Optional
 from datetime import datetime
 from infrastructure.events.event_bus import Event, EventTypes
 from infrastructure.persistence.database_manager import DatabaseManager
-from domain.maintenance.repositories.maintenance_repository import MaintenancePlanRepository, MaintenanceOrderRepository
+from domain.maintenance.repositories.maintenance_repository import (
+    MaintenancePlanRepository, MaintenanceOrderRepository, AssetMeterEntryRepository
+)
 from domain.maintenance.entities.maintenance_plan import MaintenanceOrder, MaintenanceStrategy
 from domain.logistics.entities.vehicle import Vehicle
+from domain.logistics.entities.load_snapshot import LoadSnapshot
 from infrastructure.persistence.generic_repository import BaseRepository
 
 class MaintenanceListener:
@@ -16,28 +19,32 @@ class MaintenanceListener:
         self.db_manager = db_manager
         self.plan_repo = MaintenancePlanRepository(db_manager)
         self.order_repo = MaintenanceOrderRepository(db_manager)
+        self.meter_entry_repo = AssetMeterEntryRepository(db_manager)
         self.vehicle_repo = BaseRepository(db_manager, Vehicle, "vehicles")
     
     def handle_load_completed(self, event: Event) -> None:
         """
         Maneja evento LoadStatusChanged (solo si es COMPLETED).
         Actualiza odómetro de camiones y verifica planes BY_KM.
+
+        Idempotente: la distancia de cada carga se suma una sola vez aunque el
+        outbox reentregue el evento (entrega at-least-once, replay()).
         """
         if event.data.get('to_status') != 'COMPLETED':
             return
             
-        load_id = event.data.get('load_id')
-        # Nota: Idealmente el evento traería vehicle_id y distancia recorrida.
-        # Por ahora asumiremos que debemos consultar la carga o que el evento evoluciona.
-        # Para simplificar y no acoplar, consultaremos el vehículo si viene en data,
-        # o asumiremos que el evento se enriquecerá.
-        
-        # En una implementación real robusta, el evento debería traer:
-        # vehicle_id, distance_km (si aplica)
-        
-        # Simularemos lógica de extracción de datos del evento (o consulta mínima)
-        # TODO: Enriquecer evento LoadStatusChanged con vehicle_id y distance
-        pass 
+        # vehicle_id y distancia de la ruta vienen en la foto de la carga
+        load = LoadSnapshot.from_event(event)
+        if load is None or not load.vehicle_id or not load.distance_km:
+            return
+
+        self._update_meter_and_check_plans(
+            asset_id=load.vehicle_id,
+            increment=load.distance_km,
+            strategy=MaintenanceStrategy.BY_KM,
+            source_type='LOAD',
+            source_id=load.load_id
+        )
 
     def handle_machine_work(self, event: Event) -> None:
         """
@@ -53,53 +60,71 @@ class MaintenanceListener:
         self._update_meter_and_check_plans(
             asset_id=machine_id,
             increment=total_hours,
-            strategy=MaintenanceStrategy.BY_HOURS
+            strategy=MaintenanceStrategy.BY_HOURS,
+            source_type='MACHINE_LOG',
+            source_id=event.data.get('log_id')
         )
 
-    def _update_meter_and_check_plans(self, asset_id: int, increment: float, strategy: MaintenanceStrategy):
+    def _update_meter_and_check_plans(
+        self,
+        asset_id: int,
+        increment: float,
+        strategy: MaintenanceStrategy,
+        source_type: Optional[str] = None,
+        source_id: Optional[int] = None
+    ):
         """
         Lógica central: Actualiza contador y verifica planes.
+
+        Con source_id, el incremento se registra en asset_meter_entries en la
+        misma transacción que el contador; un origen ya aplicado se ignora.
         """
-        vehicle = self.vehicle_repo.get_by_id(asset_id)
-        if not vehicle:
-            return
-            
-        # 1. Actualizar contador en vehículo
-        current_val = 0.0
-        if strategy == MaintenanceStrategy.BY_HOURS:
-            current_val = (vehicle.current_hourmeter or 0.0) + increment
-            vehicle.current_hourmeter = current_val
-        elif strategy == MaintenanceStrategy.BY_KM:
-            current_val = (vehicle.current_odometer or 0.0) + increment
-            vehicle.current_odometer = current_val
+        with self.db_manager:
+            vehicle = self.vehicle_repo.get_by_id(asset_id)
+            if not vehicle:
+                return
+
+            if source_id is not None and not self.meter_entry_repo.record(
+                asset_id, source_type, source_id, strategy.value, increment
+            ):
+                return
+
+            # 1. Actualizar contador en vehículo
+            current_val = 0.0
+            if strategy == MaintenanceStrategy.BY_HOURS:
+                current_val = (vehicle.current_hourmeter or 0.0) + increment
+                vehicle.current_hourmeter = current_val
+            elif strategy == MaintenanceStrategy.BY_KM:
+                current_val = (vehicle.current_odometer or 0.0) + increment
+                vehicle.current_odometer = current_val
             
-        self.vehicle_repo.update(vehicle)
+            self.vehicle_repo.update(vehicle)
         
-        # 2. Verificar planes activos
-        plans = self.plan_repo.get_active_plans_by_asset(asset_id)
-        for plan in plans:
-            if plan.strategy != strategy:
-                continue
+            # 2. Verificar planes activos
+            plans = self.plan_repo.get_active_plans_by_asset(asset_id)
+            for plan in plans:
+                if plan.strategy != strategy:
+                    continue
                 
-            # Calcular próximo servicio
-            next_service_at = plan.last_service_at_meter + plan.frequency_value
+                # Calcular próximo servicio
+                next_service_at = plan.last_service_at_meter + plan.frequency_value
             
-            if current_val >= next_service_at:
-                # Verificar si ya existe orden pendiente para no duplicar
-                pending = self.order_repo.get_pending_orders(asset_id)
-                # Simplificación: si hay alguna pendiente de este plan, no crear otra
-                if any(o.plan_id == plan.id for o in pending):
-                    continue
+                if current_val >= next_service_at:
+                    # Verificar si ya existe orden pendiente para no duplicar
+                    pending = self.order_repo.get_pending_orders(asset_id)
+                    # Simplificación: si hay alguna pendiente de este plan, no crear otra
+                    if any(o.plan_id == plan.id for o in pending):
+                        continue
                     
-                # Crear Orden de Mantenimiento
-                order = MaintenanceOrder(
-                    id=None,
-                    plan_id=plan.id,
-                    asset_id=asset_id,
-                    status="PENDING",
-                    due_at_meter=next_service_at,
-                    generated_at=datetime.now(),
-                    notes=f"Generado automáticamente. Contador actual: {current_val}"
-                )
-                self.order_repo.add(order)
-                print(f"🔧 Mantenimiento generado para Activo {asset_id}: {plan.maintenance_type}")
+                    # Crear Orden de Mantenimiento
+                    order = MaintenanceOrder(
+                        id=None,
+                        plan_id=plan.id,
+                        asset_id=asset_id,
+                        status="PENDING",
+                        due_at_meter=next_service_at,
+                        generated_at=datetime.now(),
+                        notes=f"Generado automáticamente. Contador actual: {current_val}"
+                    )
+                    self.order_repo.add(order)
+                    print(f"🔧 Mantenimiento generado para Activo {asset_id}: {plan.maintenance_type}")
@@ -0,0 +1,24 @@
+from typing import Callable, TypeVar
+
+from domain.shared.exceptions import ConcurrencyConflictError
+
+T = TypeVar('T')
+
+# Intentos por defecto ante conflictos de versión (optimistic locking)
+DEFAULT_CONFLICT_RETRIES = 3
+
+
+def retry_on_conflict(operation: Callable[[int], T], attempts: int = DEFAULT_CONFLICT_RETRIES) -> T:
+    """
+    Ejecuta operation(intento), reintentándola completa ante ConcurrencyConflictError.
+
+    Solo para operaciones idempotentes: cada intento debe releer la entidad
+    y revalidar las reglas, ya que otra sesión la modificó entre medio
+    (intento > 0 indica reintento). El último conflicto se propaga al llamador.
+    """
+    for attempt in range(attempts):
+        try:
+            return operation(attempt)
+        except ConcurrencyConflictError:
+            if attempt == attempts - 1:
+                raise
@@ -44,4 +44,20 @@ RESTRICTED_SITE_TYPES = ['Public Park', 'Home Garden', 'School', 'Playground']
 DEFAULT_NITROGEN_LIMIT = 200.0
 
 # Alias for agronomy limits (kg N/ha/year)
-MAX_N_PER_HA = DEFAULT_NITROGEN_LIMIT
\ No newline at end of file
+MAX_N_PER_HA = DEFAULT_NITROGEN_LIMIT
+
+# Tarifas de transporte por defecto (UF/ton-km) cuando la proforma no define una
+DEFAULT_TRANSPORT_TARIFFS_UF = {
+    'BATEA': 0.001460,
+    'AMPLIROLL': 0.002962,
+    'AMPLIROLL_SIMPLE': 0.002962,
+    'AMPLIROLL_CARRO': 0.001793
+}
+
+# Pesos mínimos garantizados por tipo de vehículo (hardcoded para MVP), en toneladas
+MIN_BILLABLE_WEIGHT_TONS = {
+    'BATEA': 15.0,
+    'AMPLIROLL': 7.0,
+    'AMPLIROLL_SIMPLE': 7.0,
+    'AMPLIROLL_CARRO': 7.0
+}
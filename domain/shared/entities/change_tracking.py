@@ -0,0 +1,49 @@
+import copy
+from typing import Any, Dict, FrozenSet, Optional, Set
+
+_MISSING = object()
+
+
+class ChangeTracking:
+    """
+    Dirty-field tracking for dataclass entities.
+
+    Tracking starts when the entity is marked clean (the RowMapper does it
+    after loading a row, the repository after a successful write). From then
+    on every assignment that changes a value is recorded, and dict/list
+    values are compared against a snapshot so in-place mutations such as
+    ``load.attributes['ph'] = 7`` are detected too.
+
+    Entities never marked clean (built in memory) report ``dirty_fields()``
+    as None, and repositories write them the legacy way.
+    """
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        dirty = self.__dict__.get('_dirty')
+        if dirty is not None and self.__dict__.get(name, _MISSING) != value:
+            dirty.add(name)
+        object.__setattr__(self, name, value)
+
+    def mark_clean(self) -> None:
+        """Starts (or restarts) tracking: the current values become the baseline."""
+        snapshot: Dict[str, Any] = {
+            name: copy.deepcopy(value)
+            for name, value in self.__dict__.items()
+            if isinstance(value, (dict, list)) and not name.startswith('_')
+        }
+        object.__setattr__(self, '_dirty', set())
+        object.__setattr__(self, '_snapshot', snapshot)
+
+    def dirty_fields(self) -> Optional[FrozenSet[str]]:
+        """
+        Names of the attributes modified since the last mark_clean(),
+        or None when the entity is not tracked.
+        """
+        dirty: Optional[Set[str]] = self.__dict__.get('_dirty')
+        if dirty is None:
+            return None
+        mutated = {
+            name for name, baseline in self.__dict__['_snapshot'].items()
+            if self.__dict__.get(name) != baseline
+        }
+        return frozenset(dirty | mutated)
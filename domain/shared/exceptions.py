@@ -37,3 +37,7 @@ class InvalidRouteError(FinanceException):
 class InvalidFuelPriceError(FinanceException):
     """Raised when base fuel price is zero or negative, preventing polynomial calculation."""
     pass
+
+class ConcurrencyConflictError(DomainException):
+    """Raised when a record was modified by another session since it was read (optimistic locking)."""
+    pass
@@ -1,17 +1,23 @@
 """
-Event Bus - Sistema de eventos simple y sincrónico para desacoplar servicios.
+Event Bus - Sistema de eventos simple para desacoplar servicios.
 
 Este módulo implementa un patrón de publicación/suscripción (pub/sub) que permite
 que los servicios publiquen eventos y otros servicios se suscriban a ellos sin
 acoplamiento directo.
 
+La entrega es sincrónica por defecto. Con async_mode=True los manejadores se
+ejecutan en un pool acotado de hilos (ver EventBus).
+
 Ejemplo de uso:
     >>> bus = EventBus()
     >>> bus.subscribe('LoadDelivered', lambda event: print(f"Load {event.data['load_id']} delivered"))
     >>> bus.publish(Event('LoadDelivered', {'load_id': 123}))
 """
 
-from typing import Callable, Dict, List, Any
+import atexit
+import queue
+import threading
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -37,15 +43,48 @@ class Event:
 
 class EventBus:
     """
-    Bus de eventos sincrónico simple para desacoplar servicios.
+    Bus de eventos para desacoplar servicios.
     
     Permite que los servicios publiquen eventos y se suscriban a ellos
     sin conocer la implementación de otros servicios.
+    
+    Modo asíncrono (async_mode=True):
+    - publish() encola una entrega por manejador y retorna sin esperarlos,
+      así la latencia de los listeners no se suma a la de la transición.
+    - Las entregas se reparten en max_workers colas, una por hilo. La cola
+      se elige por (manejador, agregado), con el agregado tomado de
+      event.data[aggregate_key]: cada manejador recibe en orden los eventos
+      de una misma carga, y un manejador lento solo retrasa su partición.
+    - Backpressure: cada cola admite max_pending entregas; si está llena,
+      publish() espera a que haya espacio.
+    - flush() espera a que se procesen todas las entregas pendientes (tests,
+      cierre de la aplicación).
     """
     
-    def __init__(self):
-        """Inicializa el bus de eventos con un diccionario vacío de suscriptores."""
+    def __init__(
+        self,
+        async_mode: bool = False,
+        max_workers: int = 4,
+        max_pending: int = 1000,
+        aggregate_key: str = 'load_id'
+    ):
+        """
+        Inicializa el bus de eventos con un diccionario vacío de suscriptores.
+        
+        Args:
+            async_mode: Ejecutar los manejadores en hilos de fondo
+            max_workers: Hilos (y colas) del modo asíncrono
+            max_pending: Capacidad de cada cola antes de bloquear publish()
+            aggregate_key: Clave de event.data que define el orden de entrega
+        """
         self._subscribers: Dict[str, List[Callable[[Event], None]]] = {}
+        self.async_mode = async_mode
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.aggregate_key = aggregate_key
+        self._queues: List[queue.Queue] = []
+        self._workers: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
     
     def subscribe(self, event_type: str, handler: Callable[[Event], None]) -> None:
         """
@@ -74,19 +113,94 @@ class EventBus:
             event: Evento a publicar
         
         Note:
-            La ejecución es sincrónica: cada manejador se ejecuta
-            secuencialmente antes de que publish() retorne.
+            En modo sincrónico cada manejador se ejecuta secuencialmente antes
+            de que publish() retorne. En modo asíncrono solo se encolan las
+            entregas (bloquea si la cola de destino está llena).
         
         Example:
             >>> bus.publish(Event('LoadDelivered', {'load_id': 123, 'destination': 'Plant A'}))
         """
-        if event.event_type in self._subscribers:
-            for handler in self._subscribers[event.event_type]:
+        handlers = list(self._subscribers.get(event.event_type, ()))
+        if not self.async_mode:
+            for handler in handlers:
+                self._deliver(handler, event)
+            return
+        
+        self._start_workers()
+        for handler in handlers:
+            delivery_queue = self._queues[self._partition(handler, event)]
+            if threading.current_thread() in self._workers:
+                # Publicación desde un manejador: no bloquear al propio worker
                 try:
-                    handler(event)
-                except Exception as e:
-                    # Log el error pero continúa ejecutando otros handlers
-                    print(f"⚠️  Error in event handler for {event.event_type}: {e}")
+                    delivery_queue.put_nowait((handler, event))
+                except queue.Full:
+                    self._deliver(handler, event)
+            else:
+                delivery_queue.put((handler, event))
+    
+    def flush(self) -> None:
+        """
+        Espera a que se procesen todas las entregas encoladas, incluidas
+        las publicadas por los propios manejadores mientras tanto.
+        No-op en modo sincrónico.
+        """
+        while any(q.unfinished_tasks for q in self._queues):
+            for delivery_queue in self._queues:
+                delivery_queue.join()
+    
+    def shutdown(self) -> None:
+        """
+        Procesa las entregas pendientes y detiene los hilos del modo asíncrono.
+        Un publish() posterior vuelve a iniciarlos.
+        """
+        with self._start_lock:
+            if not self._workers:
+                return
+            for delivery_queue in self._queues:
+                delivery_queue.put(None)
+            for worker in self._workers:
+                worker.join()
+            self._queues, self._workers = [], []
+    
+    def _partition(self, handler: Callable[[Event], None], event: Event) -> int:
+        """Cola de la entrega: mismo manejador y misma carga → misma cola (orden FIFO)."""
+        aggregate = event.data.get(self.aggregate_key) if isinstance(event.data, dict) else None
+        return hash((id(handler), aggregate)) % self.max_workers
+    
+    def _start_workers(self) -> None:
+        if self._workers:
+            return
+        with self._start_lock:
+            if self._workers:
+                return
+            queues = [queue.Queue(maxsize=self.max_pending) for _ in range(self.max_workers)]
+            workers = [
+                threading.Thread(target=self._run_worker, args=(q,), name=f"EventBus-{i}", daemon=True)
+                for i, q in enumerate(queues)
+            ]
+            self._queues = queues
+            for worker in workers:
+                worker.start()
+            self._workers = workers
+            atexit.register(self.shutdown)
+    
+    def _run_worker(self, delivery_queue: queue.Queue) -> None:
+        while True:
+            item: Optional[Tuple[Callable[[Event], None], Event]] = delivery_queue.get()
+            try:
+                if item is None:
+                    return
+                self._deliver(*item)
+            finally:
+                delivery_queue.task_done()
+    
+    @staticmethod
+    def _deliver(handler: Callable[[Event], None], event: Event) -> None:
+        try:
+            handler(event)
+        except Exception as e:
+            # Log el error pero continúa ejecutando otros handlers
+            print(f"⚠️  Error in event handler for {event.event_type}: {e}")
     
     def unsubscribe(self, event_type: str, handler: Callable[[Event], None]) -> None:
         """
@@ -126,6 +240,7 @@ class EventTypes:
     LOAD_ARRIVED = 'LoadArrived'
     LOAD_DELIVERED = 'LoadDelivered'
     LOAD_STATUS_CHANGED = 'LoadStatusChanged'  # Nuevo: Genérico para cualquier cambio de estado
+    LOAD_STATUS_CHANGED_BATCH = 'LoadStatusChangedBatch'  # Lote de cambios (transition_many)
     LOAD_ARRIVED_AT_FIELD = 'LoadArrivedAtField'  # Nuevo: Específico para llegada a campo
     
     # Processing
@@ -141,3 +256,22 @@ class EventTypes:
     # Machinery (Nuevo)
     MACHINE_WORK_RECORDED = 'MachineWorkRecorded'
 
+
+def expand_status_batch(handler: Callable[[Event], None]) -> Callable[[Event], None]:
+    """
+    Adapta un manejador de LOAD_STATUS_CHANGED para LOAD_STATUS_CHANGED_BATCH.
+
+    El manejador se invoca una vez por transición del lote, con el mismo
+    payload que publicaría transition_load.
+
+    Example:
+        >>> bus.subscribe(EventTypes.LOAD_STATUS_CHANGED_BATCH, expand_status_batch(listener.handle))
+    """
+    def handle_batch(event: Event) -> None:
+        for data in event.data.get('transitions', []):
+            try:
+                handler(Event(EventTypes.LOAD_STATUS_CHANGED, data, event.timestamp))
+            except Exception as e:
+                # Un fallo en una carga no detiene el resto del lote
+                print(f"⚠️  Error in batch handler for load {data.get('load_id')}: {e}")
+    return handle_batch
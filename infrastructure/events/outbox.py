@@ -0,0 +1,411 @@
+"""
+Outbox transaccional de eventos de dominio.
+
+Los servicios escriben sus eventos en event_outbox dentro de la misma
+transacción que el cambio de estado (EventOutboxRepository.append), así un
+evento existe si y solo si la escritura se confirmó. OutboxRelay los entrega
+después, en lotes, a suscriptores durables con nombre, y guarda por cada uno
+el último evento entregado (event_subscriber_offsets).
+
+Garantías:
+- At-least-once: el offset avanza solo cuando el manejador termina sin error.
+  Si falla (o el proceso muere), el evento se reintenta, por lo que los
+  manejadores deben ser idempotentes.
+- Reintentos: los intentos fallidos se registran por (suscriptor, evento) en
+  event_delivery_failures (migración 040) con backoff exponencial. Tras
+  max_attempts fallos el evento se estaciona (dead letter) y el suscriptor
+  sigue con el siguiente: un evento envenenado no lo bloquea para siempre.
+- Orden: cada suscriptor recibe los eventos en orden de id.
+- Replay: replay() retrocede el offset de un suscriptor para reconstruir su
+  proyección (ej. cost_records, regulatory_documents) tras una corrección.
+
+Ejemplo de uso:
+    >>> outbox = EventOutboxRepository(db_manager)
+    >>> relay = OutboxRelay(outbox)
+    >>> relay.subscribe('compliance', EventTypes.LOAD_STATUS_CHANGED, listener.handle_load_completed)
+    >>> relay.start()
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from infrastructure.events.event_bus import Event
+from infrastructure.persistence.database_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class EventOutboxRepository:
+    """
+    Acceso a event_outbox y event_subscriber_offsets (migración 034) y a
+    event_delivery_failures (migración 040).
+    """
+
+    def __init__(self, db_manager: DatabaseManager, aggregate_key: str = 'load_id'):
+        self.db_manager = db_manager
+        self.table_name = "event_outbox"
+        self.offsets_table_name = "event_subscriber_offsets"
+        self.failures_table_name = "event_delivery_failures"
+        self.aggregate_key = aggregate_key
+        # Se activa al confirmar una transacción que escribió eventos
+        self._pending = threading.Event()
+
+    def append(self, event: Event) -> None:
+        """Agrega un evento al outbox (en la transacción abierta, si la hay)."""
+        self.append_many([event])
+
+    def append_many(self, events: Sequence[Event]) -> None:
+        """
+        Agrega varios eventos con un único executemany.
+
+        Debe llamarse dentro del `with db_manager` de la escritura de dominio
+        para que evento y cambio de estado se confirmen (o descarten) juntos.
+        """
+        if not events:
+            return
+        rows = [
+            (
+                event.event_type,
+                event.data.get(self.aggregate_key),
+                json.dumps(event.data, default=str),
+                event.timestamp.isoformat()
+            )
+            for event in events
+        ]
+        with self.db_manager as conn:
+            conn.executemany(
+                f"""INSERT INTO {self.table_name} (event_type, aggregate_id, payload, occurred_at)
+                    VALUES (?, ?, ?, ?)""",
+                rows
+            )
+            self.db_manager.on_commit(self._pending.set)
+
+    def fetch_after(
+        self,
+        event_id: int,
+        event_types: Iterable[str],
+        limit: int = 100
+    ) -> List[Tuple[int, Event]]:
+        """
+        Eventos con id mayor a event_id de los tipos indicados, en orden.
+
+        Returns:
+            Lista de (id del outbox, Event)
+        """
+        event_types = list(event_types)
+        if not event_types:
+            return []
+        placeholders = ', '.join('?' for _ in event_types)
+        with self.db_manager as conn:
+            rows = conn.execute(
+                f"""SELECT id, event_type, payload, occurred_at
+                    FROM {self.table_name}
+                    WHERE id > ? AND event_type IN ({placeholders})
+                    ORDER BY id
+                    LIMIT ?""",
+                (event_id, *event_types, limit)
+            ).fetchall()
+        return [
+            (row['id'], Event(
+                event_type=row['event_type'],
+                data=json.loads(row['payload']),
+                timestamp=datetime.fromisoformat(row['occurred_at'])
+            ))
+            for row in rows
+        ]
+
+    def get_offset(self, subscriber: str) -> int:
+        """Último evento entregado al suscriptor (0 si nunca recibió uno)."""
+        with self.db_manager as conn:
+            row = conn.execute(
+                f"SELECT last_event_id FROM {self.offsets_table_name} WHERE subscriber = ?",
+                (subscriber,)
+            ).fetchone()
+        return row['last_event_id'] if row else 0
+
+    def save_offset(self, subscriber: str, event_id: int) -> None:
+        """Registra el último evento entregado al suscriptor."""
+        with self.db_manager as conn:
+            conn.execute(
+                f"""INSERT INTO {self.offsets_table_name} (subscriber, last_event_id, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(subscriber) DO UPDATE SET
+                        last_event_id = excluded.last_event_id,
+                        updated_at = excluded.updated_at""",
+                (subscriber, event_id)
+            )
+
+    def get_failures(self, subscriber: str, event_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Entregas fallidas del suscriptor para los eventos indicados.
+
+        Returns:
+            Dict event_id -> {'attempts', 'next_attempt_at', 'parked'}
+        """
+        if not event_ids:
+            return {}
+        placeholders = ', '.join('?' for _ in event_ids)
+        with self.db_manager as conn:
+            rows = conn.execute(
+                f"""SELECT event_id, attempts, next_attempt_at, parked_at
+                    FROM {self.failures_table_name}
+                    WHERE subscriber = ? AND event_id IN ({placeholders})""",
+                (subscriber, *event_ids)
+            ).fetchall()
+        return {
+            row['event_id']: {
+                'attempts': row['attempts'],
+                'next_attempt_at': (
+                    datetime.fromisoformat(row['next_attempt_at']) if row['next_attempt_at'] else None
+                ),
+                'parked': row['parked_at'] is not None,
+            }
+            for row in rows
+        }
+
+    def save_failure(
+        self,
+        subscriber: str,
+        event_id: int,
+        attempts: int,
+        error: str,
+        next_attempt_at: Optional[datetime],
+        parked: bool = False
+    ) -> None:
+        """Registra un intento fallido (y estaciona el evento si parked)."""
+        with self.db_manager as conn:
+            conn.execute(
+                f"""INSERT INTO {self.failures_table_name}
+                        (subscriber, event_id, attempts, last_error, next_attempt_at, parked_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, CASE WHEN ? THEN CURRENT_TIMESTAMP END, CURRENT_TIMESTAMP)
+                    ON CONFLICT(subscriber, event_id) DO UPDATE SET
+                        attempts = excluded.attempts,
+                        last_error = excluded.last_error,
+                        next_attempt_at = excluded.next_attempt_at,
+                        parked_at = excluded.parked_at,
+                        updated_at = excluded.updated_at""",
+                (
+                    subscriber, event_id, attempts, error,
+                    next_attempt_at.isoformat() if next_attempt_at else None, parked
+                )
+            )
+
+    def clear_failure(self, subscriber: str, event_id: int) -> None:
+        """Olvida los intentos fallidos de un evento ya entregado."""
+        with self.db_manager as conn:
+            conn.execute(
+                f"DELETE FROM {self.failures_table_name} WHERE subscriber = ? AND event_id = ?",
+                (subscriber, event_id)
+            )
+
+    def get_parked(self, subscriber: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Eventos estacionados (dead letter), opcionalmente de un suscriptor.
+
+        Returns:
+            Lista de dicts con subscriber, event_id, event_type, attempts,
+            last_error y parked_at, en orden de evento
+        """
+        query = f"""
+            SELECT f.subscriber, f.event_id, o.event_type, f.attempts, f.last_error, f.parked_at
+            FROM {self.failures_table_name} f
+            LEFT JOIN {self.table_name} o ON o.id = f.event_id
+            WHERE f.parked_at IS NOT NULL
+        """
+        params: Tuple[Any, ...] = ()
+        if subscriber is not None:
+            query += " AND f.subscriber = ?"
+            params = (subscriber,)
+        with self.db_manager as conn:
+            rows = conn.execute(query + " ORDER BY f.event_id, f.subscriber", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def wait_for_events(self, timeout: float) -> bool:
+        """
+        Espera hasta que se confirme una escritura en el outbox o pase timeout.
+
+        Returns:
+            True si hubo escrituras desde la última espera
+        """
+        signaled = self._pending.wait(timeout)
+        self._pending.clear()
+        return signaled
+
+
+class OutboxRelay:
+    """
+    Entrega los eventos del outbox a suscriptores durables.
+
+    Cada suscriptor tiene un nombre estable (clave de su offset) y un manejador
+    por tipo de evento. run_once() procesa lo pendiente; start() lo ejecuta en
+    un hilo de fondo que despierta con cada commit al outbox o cada
+    poll_interval segundos (reintento de entregas fallidas).
+
+    Un evento que falla se reintenta tras retry_backoff * 2^(intentos - 1)
+    segundos (máximo max_backoff); al fallar max_attempts veces se estaciona
+    y el offset del suscriptor avanza sobre él.
+    """
+
+    def __init__(
+        self,
+        outbox: EventOutboxRepository,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        retry_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        """
+        Args:
+            outbox: Repositorio del outbox
+            batch_size: Eventos leídos por consulta y por suscriptor
+            poll_interval: Segundos máximos entre ciclos del hilo de fondo
+            max_attempts: Intentos fallidos tras los que un evento se estaciona
+            retry_backoff: Segundos de espera tras el primer fallo (se duplica en cada uno)
+            max_backoff: Espera máxima entre reintentos, en segundos
+            clock: Hora actual (inyectable en tests)
+        """
+        self.outbox = outbox
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._subscriptions: Dict[str, Dict[str, Callable[[Event], None]]] = {}
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, subscriber: str, event_type: str, handler: Callable[[Event], None]) -> None:
+        """
+        Registra el manejador de un suscriptor durable para un tipo de evento.
+
+        Args:
+            subscriber: Nombre estable del suscriptor (ej. 'costing')
+            event_type: Tipo de evento (ver EventTypes)
+            handler: Función que recibe el Event; debe ser idempotente
+        """
+        self._subscriptions.setdefault(subscriber, {})[event_type] = handler
+
+    def run_once(self) -> int:
+        """
+        Entrega a cada suscriptor todos sus eventos pendientes.
+
+        Un suscriptor cuyo manejador falla se detiene en ese evento (el offset
+        queda en el anterior) sin afectar al resto, hasta que vence su backoff
+        o el evento se estaciona.
+
+        Returns:
+            Cantidad de entregas exitosas
+        """
+        with self._run_lock:
+            return sum(
+                self._deliver_pending(subscriber, handlers)
+                for subscriber, handlers in list(self._subscriptions.items())
+            )
+
+    def replay(self, subscriber: str, from_event_id: int = 1) -> None:
+        """
+        Vuelve a entregar al suscriptor los eventos desde from_event_id (inclusive)
+        en el siguiente ciclo, incluidos los estacionados.
+
+        Raises:
+            ValueError: Si el suscriptor no está registrado
+        """
+        if subscriber not in self._subscriptions:
+            raise ValueError(f"Unknown outbox subscriber: {subscriber}")
+        with self._run_lock:
+            self.outbox.save_offset(subscriber, max(0, from_event_id - 1))
+
+    def start(self) -> None:
+        """Inicia el hilo de fondo (no-op si ya está corriendo)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="OutboxRelay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detiene el hilo de fondo tras terminar el ciclo en curso."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # Error de infraestructura (ej. base bloqueada): reintentar en el próximo ciclo
+                logger.exception("Outbox relay cycle failed")
+            self.outbox.wait_for_events(self.poll_interval)
+
+    def _deliver_pending(self, subscriber: str, handlers: Dict[str, Callable[[Event], None]]) -> int:
+        offset = self.outbox.get_offset(subscriber)
+        delivered = 0
+        while True:
+            batch = self.outbox.fetch_after(offset, handlers.keys(), self.batch_size)
+            failures = self.outbox.get_failures(subscriber, [event_id for event_id, _ in batch])
+            blocked = False
+            last_id = offset
+            for event_id, event in batch:
+                outcome = self._deliver(subscriber, handlers[event.event_type], event_id, event,
+                                        failures.get(event_id))
+                if outcome is None:
+                    blocked = True
+                    break
+                last_id = event_id
+                if outcome:
+                    delivered += 1
+            if last_id != offset:
+                self.outbox.save_offset(subscriber, last_id)
+                offset = last_id
+            if blocked or len(batch) < self.batch_size:
+                return delivered
+
+    def _deliver(
+        self,
+        subscriber: str,
+        handler: Callable[[Event], None],
+        event_id: int,
+        event: Event,
+        failure: Optional[Dict[str, Any]]
+    ) -> Optional[bool]:
+        """
+        Entrega un evento respetando su backoff.
+
+        Returns:
+            True si se entregó, False si quedó estacionado (el offset puede
+            avanzar) y None si el suscriptor debe detenerse en él
+        """
+        now = self._clock()
+        if failure and not failure['parked'] and failure['next_attempt_at'] and failure['next_attempt_at'] > now:
+            return None
+        try:
+            handler(event)
+        except Exception as e:
+            attempts = (failure['attempts'] if failure else 0) + 1
+            parked = attempts >= self.max_attempts
+            delay = min(self.retry_backoff * 2 ** (attempts - 1), self.max_backoff)
+            self.outbox.save_failure(
+                subscriber, event_id, attempts, f"{type(e).__name__}: {e}",
+                next_attempt_at=None if parked else now + timedelta(seconds=delay),
+                parked=parked
+            )
+            if parked:
+                logger.error("Outbox event %s (%s) parked for '%s' after %s failed attempts: %s",
+                             event_id, event.event_type, subscriber, attempts, e)
+                return False
+            logger.warning("Outbox delivery to '%s' failed at event %s (%s), attempt %s/%s, "
+                           "retrying in %.0fs: %s", subscriber, event_id, event.event_type,
+                           attempts, self.max_attempts, delay, e)
+            return None
+        if failure:
+            self.outbox.clear_failure(subscriber, event_id)
+        return True
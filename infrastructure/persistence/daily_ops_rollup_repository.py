@@ -0,0 +1,141 @@
+"""
+Repository for the daily operations rollup.
+
+daily_ops_rollup is maintained by triggers on loads (migration 037): every
+status change adds one load leaving the old status and one entering the new
+one, per (day, client, facility, site); weight corrections add their net
+weight delta and facility client reassignments move the facility's rows. KPIs are sums over this table,
+O(days x dimensions) instead of a scan of loads.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from infrastructure.persistence.database_manager import DatabaseManager
+
+
+class DailyOpsRollupRepository:
+    """
+    Repository for querying and rebuilding the daily_ops_rollup table.
+    """
+
+    # Current and legacy status values grouped for KPIs
+    COMPLETED_STATUSES = ('COMPLETED', 'Disposed')
+    CLOSED_STATUSES = COMPLETED_STATUSES + ('CANCELLED',)
+    DISPATCHED_STATUSES = ('EN_ROUTE_DESTINATION', 'IN_TRANSIT', 'Dispatched', 'InTransit')
+
+    # Day a backfilled load entered its current status (best timestamp available).
+    # Status times are local; updated_at/created_at are CURRENT_TIMESTAMP (UTC)
+    # and are converted, as the triggers bucket by date('now', 'localtime').
+    STATUS_DAY_SQL = """date(COALESCE(
+        CASE
+            WHEN l.status IN ('COMPLETED', 'Disposed') THEN l.disposal_time
+            WHEN l.status IN ('AT_DESTINATION', 'IN_DISPOSAL', 'ARRIVED', 'Arrived') THEN l.arrival_time
+            WHEN l.status IN ('EN_ROUTE_DESTINATION', 'IN_TRANSIT', 'Dispatched', 'InTransit') THEN l.dispatch_time
+        END,
+        datetime(l.updated_at, 'localtime'), datetime(l.created_at, 'localtime'),
+        datetime('now', 'localtime')
+    ))"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.table_name = "daily_ops_rollup"
+
+    def rebuild(self) -> int:
+        """
+        Recomputes the rollup from the current state of loads (backfill).
+
+        Each load counts once, entering its current status on the day given
+        by its status timestamp (disposal, arrival or dispatch time), so
+        current counts per status and completions per day are exact;
+        intermediate transitions before the rebuild are not reconstructed.
+
+        Returns:
+            Number of rollup rows written
+        """
+        with self.db_manager as conn:
+            conn.execute(f"DELETE FROM {self.table_name}")
+            cursor = conn.execute(
+                f"""INSERT INTO {self.table_name}
+                        (day, client_id, facility_id, site_id, status, loads_in, net_weight_in)
+                    SELECT {self.STATUS_DAY_SQL},
+                           COALESCE(f.client_id, 0),
+                           COALESCE(l.origin_facility_id, 0),
+                           COALESCE(l.destination_site_id, 0),
+                           l.status,
+                           COUNT(*),
+                           SUM(COALESCE(l.net_weight, (COALESCE(l.gross_weight, 0) - COALESCE(l.tare_weight, 0))))
+                    FROM loads l
+                    LEFT JOIN facilities f ON f.id = l.origin_facility_id
+                    WHERE l.status IS NOT NULL
+                    GROUP BY 1, 2, 3, 4, 5"""
+            )
+            return cursor.rowcount
+
+    def get_status_counts(self, client_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Loads currently in each status (statuses with no loads are omitted).
+
+        Args:
+            client_id: Restrict to one client
+        """
+        query = f"SELECT status, SUM(loads_in - loads_out) AS loads FROM {self.table_name}"
+        params: List = []
+        if client_id is not None:
+            query += " WHERE client_id = ?"
+            params.append(client_id)
+        query += " GROUP BY status HAVING SUM(loads_in - loads_out) > 0"
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return {row['status']: row['loads'] for row in cursor.fetchall()}
+
+    def get_entries(
+        self,
+        statuses: Sequence[str],
+        start_day: date,
+        end_day: date,
+        client_id: Optional[int] = None
+    ) -> Dict[str, float]:
+        """
+        Loads that entered any of `statuses` between two days (inclusive)
+        and their net weight.
+
+        Returns:
+            Dict with loads and net_weight_kg
+        """
+        rows = self.get_daily_entries(statuses, start_day, end_day, client_id)
+        return {
+            'loads': sum(row['loads'] for row in rows),
+            'net_weight_kg': sum(row['net_weight_kg'] for row in rows),
+        }
+
+    def get_daily_entries(
+        self,
+        statuses: Sequence[str],
+        start_day: date,
+        end_day: date,
+        client_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Loads entering any of `statuses` per day (inclusive range), by day.
+
+        Returns:
+            List of dicts with day, loads and net_weight_kg (days without
+            entries are omitted)
+        """
+        if not statuses:
+            return []
+        placeholders = ', '.join('?' for _ in statuses)
+        query = f"""SELECT day, SUM(loads_in) AS loads, SUM(net_weight_in) AS net_weight_kg
+                    FROM {self.table_name}
+                    WHERE status IN ({placeholders}) AND day BETWEEN ? AND ?"""
+        params: List = [*statuses, start_day.isoformat(), end_day.isoformat()]
+        if client_id is not None:
+            query += " AND client_id = ?"
+            params.append(client_id)
+        query += " GROUP BY day HAVING SUM(loads_in) > 0 ORDER BY day"
+        with self.db_manager as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
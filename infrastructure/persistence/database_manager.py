@@ -1,84 +1,210 @@
 import sqlite3
 import os
+import threading
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any, Generator
+from typing import Optional, List, Dict, Any, Generator, Callable
 
 from config.settings import DB_PATH
+from infrastructure.persistence.schema_registry import SchemaRegistry
+
+DEFAULT_POOL_SIZE = 8
+
 
 class DatabaseManager:
     """
     Manages SQLite database connections and transactions using the Context Manager pattern.
     Ensures foreign keys are enabled and WAL mode is active.
+
+    Connections are pooled: each thread checks out its own connection on the
+    outermost ``with`` block and returns it to a bounded pool of warm connections
+    when that block exits. Pragmas are applied once, when a connection is created,
+    so nested and repeated ``with`` blocks do not pay the connect/configure cost.
     """
 
-    def __init__(self, db_path: str = DB_PATH):
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = DEFAULT_POOL_SIZE):
         """
         Initialize the DatabaseManager.
         
         Args:
             db_path (str): Path to the SQLite database file.
+            pool_size (int): Maximum number of idle connections kept warm.
         """
         self.db_path = db_path
+        self.pool_size = pool_size
         print(f"🔌 DatabaseManager connecting to: {os.path.abspath(self.db_path)}")
-        self.connection: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._idle: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        # Shared table metadata cache for every repository bound to this manager
+        self.schema_registry = SchemaRegistry()
+
+    # ------------------------------------------------------------------
+    # Per-thread state
+    # ------------------------------------------------------------------
+
+    @property
+    def connection(self) -> Optional[sqlite3.Connection]:
+        """Connection currently checked out by the calling thread (if any)."""
+        return getattr(self._local, 'connection', None)
+
+    @property
+    def _transaction_depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    @_transaction_depth.setter
+    def _transaction_depth(self, value: int) -> None:
+        self._local.depth = value
+
+    def _callbacks(self, name: str) -> List[Callable[[], None]]:
+        callbacks = getattr(self._local, name, None)
+        if callbacks is None:
+            callbacks = []
+            setattr(self._local, name, callbacks)
+        return callbacks
+
+    # ------------------------------------------------------------------
+    # Transaction hooks
+    # ------------------------------------------------------------------
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Runs callback once the calling thread's outermost transaction commits
+        (immediately when no transaction is open). Discarded on rollback.
+        Used to keep process-wide caches in sync with committed data only.
+        """
+        if self.connection is None or self._transaction_depth == 0:
+            callback()
+        else:
+            self._callbacks('commit_callbacks').append(callback)
+
+    def on_rollback(self, callback: Callable[[], None]) -> None:
+        """
+        Runs callback if the calling thread's current transaction rolls back.
+        Discarded on commit.
+        """
+        if self.connection is not None and self._transaction_depth > 0:
+            self._callbacks('rollback_callbacks').append(callback)
+
+    def _run_callbacks(self, committed: bool) -> None:
+        commit_callbacks = self._callbacks('commit_callbacks')
+        rollback_callbacks = self._callbacks('rollback_callbacks')
+        callbacks = list(commit_callbacks if committed else rollback_callbacks)
+        commit_callbacks.clear()
+        rollback_callbacks.clear()
+        for callback in callbacks:
+            callback()
+
+    # ------------------------------------------------------------------
+    # Pool management
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens a new connection and configures pragmas.
+        Only called when the pool has no idle connection to hand out.
+        """
+        # Ensure the directory exists
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+
+        # check_same_thread=False: a pooled connection may be reused by a different
+        # thread later, but it is only ever checked out by one thread at a time.
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+
+        # Configure SQLite for integrity and concurrency
+        connection.execute("PRAGMA journal_mode = WAL;")
+        connection.execute("PRAGMA synchronous = NORMAL;")
+        connection.execute("PRAGMA foreign_keys = ON;")
+        return connection
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Checks out a connection for the calling thread."""
+        with self._pool_lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _release(self, connection: sqlite3.Connection) -> None:
+        """
+        Returns a connection to the pool.
+        Any transaction left open is rolled back so the next borrower starts clean.
+        """
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            connection.close()
+            return
+
+        with self._pool_lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _checkout(self) -> sqlite3.Connection:
+        connection = self.connection
+        if connection is None:
+            connection = self._acquire()
+            self._local.connection = connection
+        return connection
+
+    def _checkin(self) -> None:
+        connection = self.connection
+        self._local.connection = None
         self._transaction_depth = 0
+        if connection is not None:
+            self._release(connection)
+
+    # ------------------------------------------------------------------
+    # Context manager protocol
+    # ------------------------------------------------------------------
 
     def __enter__(self) -> sqlite3.Connection:
         """
         Enter the runtime context related to this object.
-        Establishes the connection and configures pragmas.
-        Supports nested transactions via reference counting.
+        Checks out the calling thread's connection from the pool.
+        Supports nested transactions via reference counting (per thread).
         """
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
-        if self.connection is None:
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row
-            
-            # Configure SQLite for integrity and concurrency
-            self.connection.execute("PRAGMA journal_mode = WAL;")
-            self.connection.execute("PRAGMA synchronous = NORMAL;")
-            self.connection.execute("PRAGMA foreign_keys = ON;")
-        
+        connection = self._checkout()
         self._transaction_depth += 1
-        return self.connection
+        return connection
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
         Exit the runtime context.
         Commits if no error, rolls back if error.
-        Only closes if it was the top-level context.
+        Only returns the connection to the pool if it was the top-level context.
         """
         self._transaction_depth -= 1
+        connection = self.connection
         
-        if self.connection:
+        if connection:
             if exc_type:
                 # If an error occurred, we rollback. 
                 # In a nested context, this rollback might affect the whole transaction 
                 # depending on how SQLite handles it, but typically we want to bubble up the error.
-                self.connection.rollback()
+                connection.rollback()
                 print(f"Transaction rolled back due to: {exc_val}")
+                # Writes made so far are gone even if an outer block goes on
+                self._run_callbacks(committed=False)
             
             if self._transaction_depth == 0:
-                if not exc_type:
-                    self.connection.commit()
-                
-                self.connection.close()
-                self.connection = None
+                committed = False
+                try:
+                    if not exc_type:
+                        connection.commit()
+                        committed = True
+                finally:
+                    self._checkin()
+                    self._run_callbacks(committed)
 
     def get_connection(self) -> sqlite3.Connection:
         """
-        Returns a raw connection object. 
-        Useful for manual transaction management.
+        Returns the calling thread's connection, checking one out if needed.
+        Useful for manual transaction management; release it with close().
         """
-        if self.connection is None:
-            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
-            self.connection.execute("PRAGMA foreign_keys = ON;")
-            self.connection.execute("PRAGMA journal_mode = WAL;")
-        return self.connection
+        return self._checkout()
 
     def begin_transaction(self) -> sqlite3.Connection:
         """
@@ -102,11 +228,20 @@ class DatabaseManager:
             
     def close(self):
         """
-        Closes the connection explicitly.
+        Releases the calling thread's connection back to the pool.
         """
         if self.connection:
-            self.connection.close()
-            self.connection = None
+            self._checkin()
+
+    def close_all(self):
+        """
+        Closes every idle pooled connection (e.g. at shutdown or after a schema rebuild).
+        Connections checked out by other threads are unaffected.
+        """
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
 
     @staticmethod
     def initialize_db(schema_path: str = "database/schema.sql", db_path: str = DB_PATH):
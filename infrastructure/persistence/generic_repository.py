@@ -1,5 +1,8 @@
-from typing import TypeVar, Generic, List, Optional, Type, Any
+from typing import TypeVar, Generic, List, Optional, Type, Any, Tuple, Sequence, Dict, FrozenSet
 from infrastructure.persistence.database_manager import DatabaseManager
+from infrastructure.persistence.schema_registry import TableSchema
+from infrastructure.persistence.row_mapper import RowMapper, get_row_mapper
+from domain.shared.exceptions import ConcurrencyConflictError
 from dataclasses import fields
 import sqlite3
 import json
@@ -14,12 +17,45 @@ class BaseRepository(Generic[T]):
     - Generic CRUD operations
     """
     
+    # Columns parsed with datetime.fromisoformat when SQLite returns them as strings
+    datetime_fields: Tuple[str, ...] = ()
+    # (alias_field, source_column) pairs: alias is filled from the source when not NULL
+    field_aliases: Tuple[Tuple[str, str], ...] = ()
+    # Integer row-version column: when set (and present in the table), UPDATEs are
+    # compare-and-swap on it and raise ConcurrencyConflictError on a stale entity
+    version_column: Optional[str] = None
+    
     def __init__(self, db_manager: DatabaseManager, model_cls: Type[T], table_name: str):
         self.db_manager = db_manager
         self.model_cls = model_cls
         self.table_name = table_name
 
+    def _schema(self, conn: sqlite3.Connection) -> TableSchema:
+        """
+        Returns cached column metadata for this repository's table,
+        using the shared SchemaRegistry of the DatabaseManager.
+        """
+        return self.db_manager.schema_registry.get(conn, self.table_name)
+
+    def _mapper_for(self, columns: Tuple[str, ...]) -> RowMapper:
+        """
+        Returns the compiled mapper for this model and the given cursor columns.
+        """
+        return get_row_mapper(self.model_cls, columns, self.datetime_fields, self.field_aliases)
+
+    def _map_row(self, row: sqlite3.Row) -> T:
+        """
+        Maps a single sqlite3.Row to the model class.
+        """
+        return self._mapper_for(tuple(row.keys())).map(row)
 
+    def _map_rows(self, rows: Sequence[sqlite3.Row]) -> List[T]:
+        """
+        Maps a result set to model instances, compiling the mapper once per query.
+        """
+        if not rows:
+            return []
+        return self._mapper_for(tuple(rows[0].keys())).map_all(rows)
 
     def _map_row_to_model(self, row: dict) -> T:
         """
@@ -27,24 +63,7 @@ class BaseRepository(Generic[T]):
         any keys that don't exist in the model's fields.
         Handles JSON deserialization for dict/list fields.
         """
-        model_fields = {f.name: f for f in fields(self.model_cls)}
-        filtered_data = {}
-        
-        for k, v in row.items():
-            if k in model_fields:
-                # Check if we need to deserialize JSON
-                field_type = model_fields[k].type
-                # Simple heuristic: if value is str and field expects dict/list
-                # Note: This is a basic check, might need refinement for complex types
-                if isinstance(v, str) and ('Dict' in str(field_type) or 'List' in str(field_type) or field_type in (dict, list)):
-                    try:
-                        filtered_data[k] = json.loads(v)
-                    except json.JSONDecodeError:
-                        filtered_data[k] = v
-                else:
-                    filtered_data[k] = v
-                    
-        return self.model_cls(**filtered_data)
+        return self._mapper_for(tuple(row.keys())).map(tuple(row.values()))
 
     def get_all(self, active_only: bool = True, order_by: str = "id") -> List[T]:
         """
@@ -60,19 +79,14 @@ class BaseRepository(Generic[T]):
         with self.db_manager as conn:
             cursor = conn.cursor()
             
-            # Check if table has is_active column
-            cursor.execute(f"PRAGMA table_info({self.table_name})")
-            columns = [row[1] for row in cursor.fetchall()]
-            has_is_active = 'is_active' in columns
-            
-            if has_is_active and active_only:
+            if self._schema(conn).has_is_active and active_only:
                 query = f"SELECT * FROM {self.table_name} WHERE is_active = 1 ORDER BY {order_by}"
             else:
                 query = f"SELECT * FROM {self.table_name} ORDER BY {order_by}"
             
             cursor.execute(query)
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
 
     def get_by_id(self, id: int) -> Optional[T]:
         """
@@ -89,65 +103,201 @@ class BaseRepository(Generic[T]):
             cursor.execute(f"SELECT * FROM {self.table_name} WHERE id = ?", (id,))
             row = cursor.fetchone()
             if row:
-                return self._map_row_to_model(dict(row))
+                return self._map_row(row)
             return None
 
-    def add(self, entity: T) -> T:
+    def get_by_ids(self, ids: Sequence[int]) -> List[T]:
         """
-        Create a new record.
+        Get several records by ID with a single query.
         
         Args:
-            entity: Model instance to insert
+            ids: Primary key values
             
         Returns:
-            The same entity with populated ID
+            Model instances found (order not guaranteed; missing IDs are omitted)
         """
-        # Get table columns to filter out relationship fields
+        if not ids:
+            return []
+        
+        placeholders = ", ".join(["?"] * len(ids))
         with self.db_manager as conn:
             cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({self.table_name})")
-            # row[1] is column name
-            table_columns = {row[1] for row in cursor.fetchall()}
+            cursor.execute(f"SELECT * FROM {self.table_name} WHERE id IN ({placeholders})", tuple(ids))
+            return self._map_rows(cursor.fetchall())
+
+    @staticmethod
+    def _to_db_value(val: Any) -> Any:
+        """
+        Serializes dict/list values to JSON; other values pass through.
+        """
+        if isinstance(val, (dict, list)):
+            return json.dumps(val)
+        return val
 
-        # Dynamically build INSERT query based on dataclass fields
-        # Exclude 'id', 'created_at', 'updated_at' as they're auto-generated
-        # And exclude fields that are not in the table (like relationships)
-        # Always include is_active (even if False)
-        entity_fields = [
+    def _insert_fields(self, entity: T, table_columns: FrozenSet[str]) -> Tuple[str, ...]:
+        """
+        Columns written by an INSERT of this entity.
+
+        Excludes 'id', 'created_at', 'updated_at' as they're auto-generated,
+        fields that are not in the table (like relationships) and None values.
+        Always includes is_active (even if False), defaulting it to True.
+        """
+        if 'is_active' in table_columns and getattr(entity, 'is_active', None) is None:
+            entity.is_active = True
+
+        return tuple(
             f.name for f in fields(entity) 
             if f.name not in ('id', 'created_at', 'updated_at') 
             and f.name in table_columns
             and (getattr(entity, f.name) is not None or f.name == 'is_active')
-        ]
-        
-        # Ensure is_active defaults to True if not set
-        if 'is_active' in table_columns and not hasattr(entity, 'is_active'):
-            entity.is_active = True
-        elif 'is_active' in table_columns and getattr(entity, 'is_active', None) is None:
-            entity.is_active = True
-        
-        placeholders = ", ".join(["?"] * len(entity_fields))
-        columns = ", ".join(entity_fields)
-        
-        values = []
-        for f in entity_fields:
-            val = getattr(entity, f)
-            if isinstance(val, (dict, list)):
-                values.append(json.dumps(val))
-            else:
-                values.append(val)
-        
-        query = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
+        )
+
+    def _update_fields(self, entity: T, table_columns: FrozenSet[str]) -> Tuple[str, ...]:
+        """
+        Columns written by an UPDATE of this entity:
+        every non-None field except id, created_at and updated_at that exists in the table.
+
+        Change-tracking entities (see ChangeTracking) write only their dirty
+        fields, including the ones explicitly set to None.
+        """
+        dirty = self._dirty_fields(entity)
+        return tuple(
+            f.name for f in fields(entity) 
+            if f.name not in ('id', 'created_at', 'updated_at', self.version_column) 
+            and f.name in table_columns
+            and (
+                getattr(entity, f.name) is not None if dirty is None
+                else f.name in dirty
+            )
+        )
+
+    @staticmethod
+    def _dirty_fields(entity: T) -> Optional[FrozenSet[str]]:
+        """
+        Modified fields of a change-tracking entity, None for untracked entities.
+        """
+        dirty_fields = getattr(entity, 'dirty_fields', None)
+        return dirty_fields() if dirty_fields is not None else None
+
+    def _is_versioned(self, schema: TableSchema) -> bool:
+        """
+        True when UPDATEs of this table are compare-and-swap on version_column.
+        """
+        return self.version_column is not None and self.version_column in schema.columns
+
+    def _raise_conflict(self, cursor: sqlite3.Cursor, ids: Sequence[int]) -> None:
+        """
+        Raises ConcurrencyConflictError after a versioned UPDATE matched no row.
+        Rows that no longer exist are not a conflict (plain "not updated").
+        """
+        existing = sorted(self._existing_ids(cursor, ids))
+        if existing:
+            raise ConcurrencyConflictError(
+                f"{self.table_name} {', '.join(map(str, existing))} modified by another session; "
+                "reload and retry"
+            )
+
+    def _existing_ids(self, cursor: sqlite3.Cursor, ids: Sequence[int]) -> FrozenSet[int]:
+        """
+        IDs among ids whose row still exists in this table.
+        """
+        placeholders = ", ".join("?" * len(ids))
+        cursor.execute(f"SELECT id FROM {self.table_name} WHERE id IN ({placeholders})", tuple(ids))
+        return frozenset(row[0] for row in cursor.fetchall())
+
+    @staticmethod
+    def _mark_clean(entities: Sequence[T]) -> None:
+        """
+        Resets change tracking after the entities were written.
+        """
+        for entity in entities:
+            mark_clean = getattr(entity, 'mark_clean', None)
+            if mark_clean is not None:
+                mark_clean()
+
+    @staticmethod
+    def _group_by_columns(entities: Sequence[T], columns_of) -> Dict[Tuple[str, ...], List[T]]:
+        """
+        Groups entities sharing the same column signature so each group
+        can be written with a single executemany.
+        """
+        groups: Dict[Tuple[str, ...], List[T]] = {}
+        for entity in entities:
+            groups.setdefault(columns_of(entity), []).append(entity)
+        return groups
+
+    def add(self, entity: T) -> T:
+        """
+        Create a new record.
         
+        Args:
+            entity: Model instance to insert
+            
+        Returns:
+            The same entity with populated ID
+        """
         try:
             with self.db_manager as conn:
+                # Cached table columns filter out relationship fields
+                entity_fields = self._insert_fields(entity, self._schema(conn).columns)
+                
+                placeholders = ", ".join(["?"] * len(entity_fields))
+                columns = ", ".join(entity_fields)
+                values = [self._to_db_value(getattr(entity, f)) for f in entity_fields]
+                
+                query = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
+                
                 cursor = conn.cursor()
                 cursor.execute(query, tuple(values))
                 entity.id = cursor.lastrowid
-                return entity
+            self._mark_clean((entity,))
+            return entity
         except sqlite3.Error as e:
             raise Exception(f"Error creating {self.table_name} record: {str(e)}")
 
+    def add_many(self, entities: Sequence[T]) -> List[T]:
+        """
+        Create many records in a single transaction.
+        
+        Entities are grouped by the set of non-None columns they write
+        (so database defaults still apply), and each group is inserted with
+        one prepared statement.
+        
+        Args:
+            entities: Model instances to insert
+            
+        Returns:
+            The same entities with populated IDs
+        """
+        if not entities:
+            return []
+        
+        try:
+            with self.db_manager as conn:
+                table_columns = self._schema(conn).columns
+                cursor = conn.cursor()
+                groups = self._group_by_columns(
+                    entities, lambda e: self._insert_fields(e, table_columns)
+                )
+                
+                for entity_fields, group in groups.items():
+                    placeholders = ", ".join(["?"] * len(entity_fields))
+                    columns = ", ".join(entity_fields)
+                    query = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
+                    
+                    # One execute per row on the same cached prepared statement:
+                    # rowids are not guaranteed to be contiguous, so each id comes from lastrowid
+                    for entity in group:
+                        cursor.execute(query, tuple(
+                            self._to_db_value(getattr(entity, f)) for f in entity_fields
+                        ))
+                        entity.id = cursor.lastrowid
+            
+            self._mark_clean(entities)
+            return list(entities)
+        except sqlite3.Error as e:
+            raise Exception(f"Error creating {self.table_name} records: {str(e)}")
+
     def update(self, entity: T) -> bool:
         """
         Update an existing record.
@@ -162,47 +312,161 @@ class BaseRepository(Generic[T]):
         if not entity.id:
             return False
         
-        # Get table columns
-        with self.db_manager as conn:
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({self.table_name})")
-            table_columns = {row[1] for row in cursor.fetchall()}
-        
-        # Get all fields except id, created_at, and updated_at
-        # And ensure they exist in table
-        entity_fields = [
-            f.name for f in fields(entity) 
-            if f.name not in ('id', 'created_at', 'updated_at') 
-            and f.name in table_columns
-            and getattr(entity, f.name) is not None
-        ]
-        
-        # Build SET clause
-        set_parts = [f"{field} = ?" for field in entity_fields]
-        
-        if 'updated_at' in table_columns:
-            set_parts.append("updated_at = CURRENT_TIMESTAMP")
+        try:
+            with self.db_manager as conn:
+                schema = self._schema(conn)
+                entity_fields = self._update_fields(entity, schema.columns)
+                if not entity_fields and self._dirty_fields(entity) is not None:
+                    # Tracked entity without changes: nothing to write if the row still exists
+                    return bool(self._existing_ids(conn.cursor(), (entity.id,)))
+                
+                versioned = self._is_versioned(schema)
+                query = self._update_query(entity_fields, schema.has_updated_at, versioned)
+                values = [self._to_db_value(getattr(entity, f)) for f in entity_fields]
+                values.append(entity.id)
+                if versioned:
+                    values.append(getattr(entity, self.version_column))
+                
+                cursor = conn.cursor()
+                cursor.execute(query, tuple(values))
+                updated = cursor.rowcount > 0
+                if not updated and versioned:
+                    self._raise_conflict(cursor, (entity.id,))
+            if updated:
+                if versioned:
+                    setattr(entity, self.version_column, getattr(entity, self.version_column) + 1)
+                self._mark_clean((entity,))
+            return updated
+        except sqlite3.Error as e:
+            raise Exception(f"Error updating {self.table_name} record: {str(e)}")
+
+    def update_many(self, entities: Sequence[T]) -> int:
+        """
+        Update many records in a single transaction, one executemany per
+        group of entities writing the same columns.
+        Same column rules as update(); entities without ID are skipped.
         
-        set_clause = ", ".join(set_parts)
+        Args:
+            entities: Model instances with ID to update
+            
+        Returns:
+            Number of rows updated (rows that no longer exist are not counted,
+            and their entities keep their pending changes)
+        """
+        entities = [e for e in entities if e.id]
+        if not entities:
+            return 0
         
-        values = []
-        for f in entity_fields:
-            val = getattr(entity, f)
-            if isinstance(val, (dict, list)):
-                values.append(json.dumps(val))
-            else:
-                values.append(val)
-        values.append(entity.id)
+        try:
+            with self.db_manager as conn:
+                schema = self._schema(conn)
+                cursor = conn.cursor()
+                groups = self._group_by_columns(
+                    entities, lambda e: self._update_fields(e, schema.columns)
+                )
+                
+                versioned = self._is_versioned(schema)
+                unchanged: List[T] = []
+                written: List[T] = []
+                for entity_fields, group in groups.items():
+                    if not entity_fields:
+                        # Tracked entities without changes: nothing to write
+                        existing = self._existing_ids(cursor, [e.id for e in group])
+                        unchanged.extend(e for e in group if e.id in existing)
+                        continue
+                    query = self._update_query(entity_fields, schema.has_updated_at, versioned)
+                    cursor.executemany(query, [
+                        tuple(self._to_db_value(getattr(e, f)) for f in entity_fields) + (e.id,)
+                        + ((getattr(e, self.version_column),) if versioned else ())
+                        for e in group
+                    ])
+                    if cursor.rowcount == len(group):
+                        written.extend(group)
+                        continue
+                    # Short rowcount: find out per row which entities were written
+                    updated = cursor.rowcount
+                    existing = self._existing_ids(cursor, [e.id for e in group])
+                    if versioned and len(existing) > updated:
+                        # An existing row kept another version: fails the whole batch,
+                        # the enclosing transaction rolls back
+                        self._raise_conflict(cursor, [e.id for e in group])
+                    written.extend(e for e in group if e.id in existing)
+            if versioned:
+                for entity in written:
+                    setattr(entity, self.version_column, getattr(entity, self.version_column) + 1)
+            self._mark_clean(unchanged + written)
+            return len(unchanged) + len(written)
+        except sqlite3.Error as e:
+            raise Exception(f"Error updating {self.table_name} records: {str(e)}")
+
+    def upsert_many(self, entities: Sequence[T], conflict_columns: Sequence[str]) -> int:
+        """
+        Insert or update many records in a single transaction
+        (INSERT ... ON CONFLICT DO UPDATE, requires a UNIQUE index on conflict_columns).
         
-        query = f"UPDATE {self.table_name} SET {set_clause} WHERE id = ?"
+        Args:
+            entities: Model instances to write
+            conflict_columns: Columns of the UNIQUE constraint identifying a row
+            
+        Returns:
+            Number of rows inserted or updated
+        """
+        if not entities:
+            return 0
         
+        conflict_target = ", ".join(conflict_columns)
         try:
             with self.db_manager as conn:
+                schema = self._schema(conn)
                 cursor = conn.cursor()
-                cursor.execute(query, tuple(values))
-                return cursor.rowcount > 0
+                groups = self._group_by_columns(
+                    entities, lambda e: self._insert_fields(e, schema.columns)
+                )
+                
+                written = 0
+                for entity_fields, group in groups.items():
+                    set_parts = [
+                        f"{field} = excluded.{field}"
+                        for field in entity_fields if field not in conflict_columns
+                    ]
+                    if schema.has_updated_at:
+                        set_parts.append("updated_at = CURRENT_TIMESTAMP")
+                    on_conflict = (
+                        f"DO UPDATE SET {', '.join(set_parts)}" if set_parts else "DO NOTHING"
+                    )
+                    
+                    placeholders = ", ".join(["?"] * len(entity_fields))
+                    columns = ", ".join(entity_fields)
+                    query = (
+                        f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders}) "
+                        f"ON CONFLICT({conflict_target}) {on_conflict}"
+                    )
+                    
+                    cursor.executemany(query, [
+                        tuple(self._to_db_value(getattr(e, f)) for f in entity_fields)
+                        for e in group
+                    ])
+                    written += cursor.rowcount
+                return written
         except sqlite3.Error as e:
-            raise Exception(f"Error updating {self.table_name} record: {str(e)}")
+            raise Exception(f"Error upserting {self.table_name} records: {str(e)}")
+
+    def _update_query(self, entity_fields: Sequence[str], has_updated_at: bool, versioned: bool = False) -> str:
+        """
+        Builds "UPDATE table SET f1 = ?, ... WHERE id = ?"
+        (plus "AND version = ?" with the version increment when versioned).
+        """
+        set_parts = [f"{field} = ?" for field in entity_fields]
+        
+        if has_updated_at:
+            set_parts.append("updated_at = CURRENT_TIMESTAMP")
+        
+        where = "id = ?"
+        if versioned:
+            set_parts.append(f"{self.version_column} = {self.version_column} + 1")
+            where += f" AND {self.version_column} = ?"
+        
+        return f"UPDATE {self.table_name} SET {', '.join(set_parts)} WHERE {where}"
 
     def delete(self, id: int) -> bool:
         """
@@ -215,18 +479,15 @@ class BaseRepository(Generic[T]):
         Returns:
             True if record was deleted/deactivated, False otherwise
         """
-        # Check if table has is_active column
         with self.db_manager as conn:
             cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({self.table_name})")
-            columns = [row[1] for row in cursor.fetchall()]
-            has_is_active = 'is_active' in columns
+            schema = self._schema(conn)
             
             try:
-                if has_is_active:
+                if schema.has_is_active:
                     # Soft delete: set is_active = 0
                     # Also update updated_at if it exists
-                    if 'updated_at' in columns:
+                    if schema.has_updated_at:
                         query = f"UPDATE {self.table_name} SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
                     else:
                         query = f"UPDATE {self.table_name} SET is_active = 0 WHERE id = ?"
@@ -255,7 +516,7 @@ class BaseRepository(Generic[T]):
             cursor.execute(f"SELECT * FROM {self.table_name} WHERE {attribute} = ?", (value,))
             row = cursor.fetchone()
             if row:
-                return self._map_row_to_model(dict(row))
+                return self._map_row(row)
             return None
 
     def get_all_filtered(self, **kwargs) -> List[T]:
@@ -280,4 +541,4 @@ class BaseRepository(Generic[T]):
             cursor = conn.cursor()
             cursor.execute(f"SELECT * FROM {self.table_name} WHERE {where_clause}", tuple(values))
             rows = cursor.fetchall()
-            return [self._map_row_to_model(dict(row)) for row in rows]
+            return self._map_rows(rows)
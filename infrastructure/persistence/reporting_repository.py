@@ -1,6 +1,46 @@
 import pandas as pd
-from typing import Optional, Tuple, List, Dict, Any
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional, Tuple, List, Dict, Any, Iterator
 from infrastructure.persistence.database_manager import DatabaseManager
+from infrastructure.persistence.traceability_repository import TraceabilityRepository
+
+
+@dataclass(frozen=True)
+class FleetWatermark:
+    """
+    Position of a fleet board client in the change stream: loads.updated_at
+    (database clock) and the last load_status_history id it has seen.
+    """
+    updated_at: str
+    history_id: int
+
+
+@dataclass(frozen=True)
+class TraceabilityFilter:
+    """
+    Client portal filters over traceability_mv, applied in SQL.
+
+    Dates are inclusive days of dispatch_time; text is a case-insensitive
+    substring of ticket, guide, plate, batch, site or driver. Only dispatched
+    loads are listed.
+    """
+    client_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    statuses: Tuple[str, ...] = ()
+    text: str = ''
+
+
+@dataclass(frozen=True)
+class TraceabilityCursor:
+    """
+    Keyset position in the client report: (dispatch_time, load_id) of the
+    last row of the previous page.
+    """
+    dispatch_time: str
+    load_id: int
+
 
 class ReportingRepository:
     """
@@ -13,17 +53,124 @@ class ReportingRepository:
 
     def get_full_traceability(self) -> pd.DataFrame:
         """
-        Fetches data from the view_full_traceability view.
+        Fetches the full traceability report (view_full_traceability columns)
+        from the materialized traceability_mv table.
         """
-        query = "SELECT * FROM view_full_traceability WHERE 1=1"
+        query = f"SELECT {', '.join(TraceabilityRepository.REPORT_COLUMNS)} FROM traceability_mv WHERE 1=1"
         with self.db_manager as conn:
             return pd.read_sql_query(query, conn)
 
-    def get_fleet_monitoring_data(self) -> pd.DataFrame:
+    TRACEABILITY_SEARCH_COLUMNS = (
+        'ticket_number', 'guide_number', 'license_plate', 'batch_code', 'site_name', 'driver_name'
+    )
+
+    def _traceability_where(self, filters: TraceabilityFilter) -> Tuple[str, List[Any]]:
         """
-        Fetches active loads for fleet monitoring.
+        WHERE clause for a client report filter. Client and date predicates
+        are served by idx_traceability_mv_client / idx_traceability_mv_dispatch.
+        """
+        clauses = ["dispatch_time IS NOT NULL"]
+        params: List[Any] = []
+        if filters.client_id is not None:
+            clauses.append("client_id = ?")
+            params.append(filters.client_id)
+        if filters.start_date:
+            clauses.append("dispatch_time >= ?")
+            params.append(filters.start_date.isoformat())
+        if filters.end_date:
+            clauses.append("dispatch_time < ?")
+            params.append((filters.end_date + timedelta(days=1)).isoformat())
+        if filters.statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in filters.statuses)})")
+            params.extend(filters.statuses)
+        text = filters.text.strip()
+        if text:
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append('(' + ' OR '.join(
+                f"{column} LIKE ? ESCAPE '\\'" for column in self.TRACEABILITY_SEARCH_COLUMNS
+            ) + ')')
+            params.extend([pattern] * len(self.TRACEABILITY_SEARCH_COLUMNS))
+        return ' AND '.join(clauses), params
+
+    def get_traceability_page(
+        self,
+        filters: TraceabilityFilter,
+        after: Optional[TraceabilityCursor] = None,
+        limit: int = 50
+    ) -> Tuple[pd.DataFrame, Optional[TraceabilityCursor]]:
         """
-        query = """
+        Fetches one page of the client report, newest dispatch first.
+
+        Keyset pagination: the page starts strictly after `after`, so its
+        cost does not grow with the page number and rows written between
+        calls do not shift later pages.
+
+        Args:
+            filters: Client report filters
+            after: Cursor returned with the previous page, or None for the first page
+            limit: Page size
+
+        Returns:
+            (rows, cursor of the next page or None on the last page)
+        """
+        where, params = self._traceability_where(filters)
+        if after is not None:
+            where += " AND (dispatch_time, load_id) < (?, ?)"
+            params += [after.dispatch_time, after.load_id]
+        query = f"""SELECT {', '.join(TraceabilityRepository.REPORT_COLUMNS)}
+                    FROM traceability_mv
+                    WHERE {where}
+                    ORDER BY dispatch_time DESC, load_id DESC
+                    LIMIT ?"""
+        with self.db_manager as conn:
+            df = pd.read_sql_query(query, conn, params=params + [limit + 1])
+
+        if len(df) <= limit:
+            return df, None
+        df = df.iloc[:limit]
+        last = df.iloc[-1]
+        return df, TraceabilityCursor(dispatch_time=last['dispatch_time'], load_id=int(last['load_id']))
+
+    def get_traceability_totals(self, filters: TraceabilityFilter) -> Dict[str, Any]:
+        """
+        Aggregates the whole filtered client report in the database.
+
+        Returns:
+            Dict with loads, net_weight_kg and by_status (loads per status)
+        """
+        where, params = self._traceability_where(filters)
+        query = f"""SELECT status, COUNT(*) AS loads, COALESCE(SUM(weight_net), 0) AS net_weight_kg
+                    FROM traceability_mv
+                    WHERE {where}
+                    GROUP BY status"""
+        with self.db_manager as conn:
+            rows = conn.execute(query, params).fetchall()
+        return {
+            'loads': sum(row['loads'] for row in rows),
+            'net_weight_kg': float(sum(row['net_weight_kg'] for row in rows)),
+            'by_status': {row['status']: row['loads'] for row in rows},
+        }
+
+    def iter_traceability(self, filters: TraceabilityFilter, chunk_size: int = 5000) -> Iterator[pd.DataFrame]:
+        """
+        Yields the whole filtered client report in keyset-paginated chunks,
+        so exports hold one chunk in memory at a time. The first chunk is
+        always yielded, empty when nothing matches.
+        """
+        cursor = None
+        while True:
+            df, cursor = self.get_traceability_page(filters, cursor, chunk_size)
+            yield df
+            if cursor is None:
+                return
+
+    # Loads on the fleet board: en route to / waiting at destination (current and legacy statuses)
+    FLEET_STATUSES = ('EN_ROUTE_DESTINATION', 'AT_DESTINATION', 'Dispatched', 'Arrived', 'IN_TRANSIT', 'ARRIVED')
+
+    # Re-read window of a delta poll; covers writes committed after a later timestamp was visible
+    FLEET_DELTA_OVERLAP_SECONDS = 5
+
+    FLEET_QUERY = """
             SELECT 
                 l.id as load_id,
                 l.status,
@@ -44,11 +191,53 @@ class ReportingRepository:
             LEFT JOIN facilities f ON l.origin_facility_id = f.id
             LEFT JOIN treatment_plants otp ON l.origin_treatment_plant_id = otp.id
             LEFT JOIN sites s ON l.destination_site_id = s.id
-            WHERE l.status IN ('Dispatched', 'Arrived', 'IN_TRANSIT', 'ARRIVED')
-            ORDER BY l.dispatch_time DESC
+    """
+
+    def get_fleet_monitoring_data(self) -> pd.DataFrame:
+        """
+        Fetches active loads for fleet monitoring.
+        """
+        return self.get_fleet_monitoring_changes(None)[0]
+
+    def get_fleet_monitoring_changes(
+        self,
+        since: Optional[FleetWatermark]
+    ) -> Tuple[pd.DataFrame, FleetWatermark]:
+        """
+        Fetches the fleet board rows changed since a client-held watermark.
+
+        Without a watermark, returns every load on the board. With one,
+        returns the loads whose updated_at or status history changed since
+        then, whatever their status: rows that left FLEET_STATUSES tell the
+        caller to drop them. Rows near the watermark may be returned again;
+        merging by load_id is idempotent.
+
+        Args:
+            since: Watermark returned by the previous call, or None for a full read
+
+        Returns:
+            (rows, watermark for the next call)
         """
         with self.db_manager as conn:
-            return pd.read_sql_query(query, conn)
+            # Watermark first: anything written after it is picked up next time
+            cursor = conn.execute(
+                "SELECT datetime('now', ?), (SELECT COALESCE(MAX(id), 0) FROM load_status_history)",
+                (f"-{self.FLEET_DELTA_OVERLAP_SECONDS} seconds",)
+            )
+            updated_at, history_id = cursor.fetchone()
+            watermark = FleetWatermark(updated_at=updated_at, history_id=history_id)
+
+            if since is None:
+                placeholders = ', '.join('?' for _ in self.FLEET_STATUSES)
+                query = f"{self.FLEET_QUERY} WHERE l.status IN ({placeholders}) ORDER BY l.dispatch_time DESC"
+                params: tuple = self.FLEET_STATUSES
+            else:
+                query = f"""{self.FLEET_QUERY}
+                    WHERE l.updated_at >= ?
+                       OR l.id IN (SELECT load_id FROM load_status_history WHERE id > ?)
+                    ORDER BY l.dispatch_time DESC"""
+                params = (since.updated_at, since.history_id)
+            return pd.read_sql_query(query, conn, params=params), watermark
 
     def get_site_plots_agronomy(self, site_id: int) -> pd.DataFrame:
         """
@@ -0,0 +1,121 @@
+import json
+import threading
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Type, TypeVar
+
+T = TypeVar('T')
+
+
+def _is_json_field(field_type: Any) -> bool:
+    """
+    Simple heuristic: field expects dict/list.
+    Note: This is a basic check, might need refinement for complex types
+    """
+    return 'Dict' in str(field_type) or 'List' in str(field_type) or field_type in (dict, list)
+
+
+def _decode_json(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value
+    return value
+
+
+def _decode_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            # Handle format "YYYY-MM-DD HH:MM:SS.ssssss" or "YYYY-MM-DD HH:MM:SS"
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+class RowMapper:
+    """
+    Row-to-model mapper compiled once for a (model class, column tuple) pair.
+
+    Column positions, JSON fields and datetime fields are resolved at compile
+    time, so mapping a row is a single pass over precomputed index lists with
+    no dataclass introspection or type-string checks.
+    """
+
+    def __init__(
+        self,
+        model_cls: Type[T],
+        columns: Tuple[str, ...],
+        datetime_fields: Tuple[str, ...] = (),
+        field_aliases: Tuple[Tuple[str, str], ...] = ()
+    ):
+        self.model_cls = model_cls
+        self.columns = columns
+
+        model_fields = {f.name: f for f in fields(model_cls)}
+        datetime_set = set(datetime_fields)
+
+        self._plain: List[Tuple[str, int]] = []
+        self._converted: List[Tuple[str, int, Callable[[Any], Any]]] = []
+        for index, column in enumerate(columns):
+            model_field = model_fields.get(column)
+            if model_field is None:
+                continue
+            if column in datetime_set:
+                self._converted.append((column, index, _decode_datetime))
+            elif _is_json_field(model_field.type):
+                self._converted.append((column, index, _decode_json))
+            else:
+                self._plain.append((column, index))
+
+        # (alias field, source column index): alias populated when source is not None
+        self._aliases: List[Tuple[str, int]] = [
+            (alias, columns.index(source))
+            for alias, source in field_aliases
+            if alias in model_fields and source in columns
+        ]
+
+        # Change-tracking entities start clean once loaded
+        self._track_changes = hasattr(model_cls, 'mark_clean')
+
+    def map(self, values: Sequence[Any]) -> T:
+        """Builds a model instance from a row (sqlite3.Row or tuple in column order)."""
+        data = {name: values[index] for name, index in self._plain}
+        for name, index, convert in self._converted:
+            data[name] = convert(values[index])
+        for alias, index in self._aliases:
+            value = values[index]
+            if value is not None:
+                data[alias] = value
+        entity = self.model_cls(**data)
+        if self._track_changes:
+            entity.mark_clean()
+        return entity
+
+    def map_all(self, rows: Iterable[Sequence[Any]]) -> List[T]:
+        """Maps every row; all rows must share this mapper's column tuple."""
+        return [self.map(row) for row in rows]
+
+
+_mappers: Dict[tuple, RowMapper] = {}
+_mappers_lock = threading.Lock()
+
+
+def get_row_mapper(
+    model_cls: Type[T],
+    columns: Tuple[str, ...],
+    datetime_fields: Tuple[str, ...] = (),
+    field_aliases: Tuple[Tuple[str, str], ...] = ()
+) -> RowMapper:
+    """
+    Returns the process-wide compiled mapper for a model and cursor column tuple,
+    compiling it on first use.
+    """
+    key = (model_cls, columns, datetime_fields, field_aliases)
+    mapper = _mappers.get(key)
+    if mapper is None:
+        mapper = RowMapper(model_cls, columns, datetime_fields, field_aliases)
+        with _mappers_lock:
+            _mappers[key] = mapper
+    return mapper
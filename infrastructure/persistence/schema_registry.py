@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    """
+    Cached column metadata for a single table.
+    """
+    table_name: str
+    columns: FrozenSet[str]
+
+    @property
+    def has_is_active(self) -> bool:
+        return 'is_active' in self.columns
+
+    @property
+    def has_updated_at(self) -> bool:
+        return 'updated_at' in self.columns
+
+
+class SchemaRegistry:
+    """
+    Process-wide cache of table column sets.
+
+    Each table is introspected with PRAGMA table_info once and reused by every
+    repository that shares the DatabaseManager. The cache is dropped either
+    explicitly via invalidate() (after running migrations) or automatically
+    when PRAGMA schema_version changes, which is checked at most once every
+    `check_interval` seconds so the hot path stays free of extra queries.
+    """
+
+    def __init__(self, check_interval: float = 30.0):
+        self.check_interval = check_interval
+        self._schemas: Dict[str, TableSchema] = {}
+        self._schema_version: Optional[int] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, conn: sqlite3.Connection, table_name: str) -> TableSchema:
+        """
+        Returns the cached schema for a table, introspecting it on first use.
+
+        Args:
+            conn: Open connection (reused; no extra connection is opened)
+            table_name: Table to describe
+        """
+        self._check_version(conn)
+
+        schema = self._schemas.get(table_name)
+        if schema is None:
+            cursor = conn.execute(f"PRAGMA table_info({table_name})")
+            # row[1] is column name
+            schema = TableSchema(table_name, frozenset(row[1] for row in cursor.fetchall()))
+            with self._lock:
+                self._schemas[table_name] = schema
+        return schema
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """
+        Drops cached metadata for one table, or for all tables if none given.
+        Call after applying migrations in-process.
+        """
+        with self._lock:
+            if table_name is None:
+                self._schemas.clear()
+                self._schema_version = None
+            else:
+                self._schemas.pop(table_name, None)
+
+    def _check_version(self, conn: sqlite3.Connection) -> None:
+        now = time.monotonic()
+        if self._schema_version is not None and now - self._last_check < self.check_interval:
+            return
+
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with self._lock:
+            if version != self._schema_version:
+                self._schemas.clear()
+                self._schema_version = version
+            self._last_check = now
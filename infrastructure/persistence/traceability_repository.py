@@ -0,0 +1,107 @@
+"""
+Repository for the materialized traceability table.
+
+traceability_mv holds one row per load with the columns of
+view_full_traceability plus the dimension ids. Triggers (migration 039)
+refresh the affected rows on every load write and master-data name change;
+this repository rebuilds it in full or refreshes explicit load ids.
+"""
+
+from typing import Iterable
+
+from infrastructure.persistence.database_manager import DatabaseManager
+
+
+class TraceabilityRepository:
+    """
+    Repository for rebuilding and refreshing the traceability_mv table.
+    """
+
+    # Columns shown to clients (same as view_full_traceability)
+    REPORT_COLUMNS = (
+        'load_id', 'ticket_number', 'guide_number', 'status', 'requested_date', 'scheduled_date',
+        'dispatch_time', 'arrival_time', 'weight_gross', 'weight_tare', 'weight_net',
+        'client_name', 'facility_name', 'batch_code', 'class_type', 'site_name', 'site_region',
+        'driver_name', 'driver_rut', 'license_plate', 'contractor_name',
+    )
+
+    COLUMNS = (
+        'load_id', 'ticket_number', 'guide_number', 'status', 'requested_date', 'scheduled_date',
+        'dispatch_time', 'arrival_time', 'weight_gross', 'weight_tare', 'weight_net',
+        'client_id', 'client_name', 'facility_id', 'facility_name', 'batch_id', 'batch_code', 'class_type',
+        'site_id', 'site_name', 'site_region', 'driver_id', 'driver_name', 'driver_rut',
+        'vehicle_id', 'license_plate', 'contractor_id', 'contractor_name',
+    )
+
+    # Row source, in COLUMNS order (kept in sync with the triggers and backfill of migration 039)
+    SOURCE_QUERY = """
+        SELECT
+            l.id, COALESCE(l.ticket_number, ''), COALESCE(l.guide_number, ''), l.status,
+            l.requested_date, l.scheduled_date, l.dispatch_time, l.arrival_time,
+            l.gross_weight, l.tare_weight,
+            COALESCE(l.net_weight, (COALESCE(l.gross_weight, 0) - COALESCE(l.tare_weight, 0))),
+            c.id, c.name, f.id, f.name, b.id, b.batch_code, b.class_type,
+            s.id, s.name, s.region, dr.id, dr.name, dr.rut,
+            v.id, v.license_plate, ctr.id, ctr.name
+        FROM loads l
+        LEFT JOIN facilities f ON l.origin_facility_id = f.id
+        LEFT JOIN clients c ON f.client_id = c.id
+        LEFT JOIN batches b ON l.batch_id = b.id
+        LEFT JOIN sites s ON l.destination_site_id = s.id
+        LEFT JOIN drivers dr ON l.driver_id = dr.id
+        LEFT JOIN contractors ctr ON dr.contractor_id = ctr.id
+        LEFT JOIN vehicles v ON l.vehicle_id = v.id
+    """
+
+    # SQLite host parameter limit headroom
+    REFRESH_BATCH_SIZE = 500
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.table_name = "traceability_mv"
+
+    def rebuild(self) -> int:
+        """
+        Recomputes the whole table from loads and master data.
+
+        Migration 039 backfills the table itself; this is needed after
+        writes that bypass the triggers (e.g. restoring a backup into an
+        existing database).
+
+        Returns:
+            Number of rows written
+        """
+        with self.db_manager as conn:
+            conn.execute(f"DELETE FROM {self.table_name}")
+            cursor = conn.execute(
+                f"INSERT INTO {self.table_name} ({', '.join(self.COLUMNS)}) {self.SOURCE_QUERY}"
+            )
+            return cursor.rowcount
+
+    def refresh(self, load_ids: Iterable[int]) -> int:
+        """
+        Recomputes the rows of specific loads; ids of deleted loads lose
+        their row.
+
+        Returns:
+            Number of rows written
+        """
+        ids = sorted(set(load_ids))
+        written = 0
+        with self.db_manager as conn:
+            for start in range(0, len(ids), self.REFRESH_BATCH_SIZE):
+                batch = ids[start:start + self.REFRESH_BATCH_SIZE]
+                placeholders = ', '.join('?' for _ in batch)
+                conn.execute(f"DELETE FROM {self.table_name} WHERE load_id IN ({placeholders})", batch)
+                cursor = conn.execute(
+                    f"INSERT INTO {self.table_name} ({', '.join(self.COLUMNS)}) "
+                    f"{self.SOURCE_QUERY} WHERE l.id IN ({placeholders})",
+                    batch
+                )
+                written += cursor.rowcount
+        return written
+
+    def count(self) -> int:
+        """Number of materialized loads."""
+        with self.db_manager as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()[0]
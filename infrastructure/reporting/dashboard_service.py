@@ -1,5 +1,7 @@
+from datetime import date
 from typing import Dict, Optional
 from infrastructure.persistence.database_manager import DatabaseManager
+from infrastructure.persistence.daily_ops_rollup_repository import DailyOpsRollupRepository
 from domain.shared.base_service import BaseService
 from infrastructure.reporting.pdf_manifest_generator import PdfManifestGenerator
 from domain.logistics.entities.load import Load
@@ -7,46 +9,42 @@ from domain.logistics.entities.load import Load
 class DashboardService(BaseService):
     """Service for dashboard operations and statistics."""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, rollup_repo: Optional[DailyOpsRollupRepository] = None):
         super().__init__(db_manager)
+        self.rollup_repo = rollup_repo or DailyOpsRollupRepository(db_manager)
         self.manifest_generator = PdfManifestGenerator()
 
     def get_stats(self) -> Dict:
-        """Get operational statistics for dashboard display."""
+        """
+        Get operational statistics for dashboard display.
+
+        Load KPIs come from daily_ops_rollup (kept current by triggers on
+        loads), not from a scan of loads.
+        """
+        today = date.today()
         with self.db_manager as conn:
             cursor = conn.cursor()
             
             # Count Clients
             cursor.execute("SELECT COUNT(*) FROM clients")
             client_count = cursor.fetchone()[0]
+
+        # Active Loads: every load not completed or cancelled
+        status_counts = self.rollup_repo.get_status_counts()
+        active_loads = sum(
+            count for status, count in status_counts.items()
+            if status not in DailyOpsRollupRepository.CLOSED_STATUSES
+        )
+
+        # Completed Loads and Tonnage Today
+        completed = self.rollup_repo.get_entries(DailyOpsRollupRepository.COMPLETED_STATUSES, today, today)
             
-            # Count Active Loads (Scheduled, InTransit, Waiting)
-            cursor.execute("SELECT COUNT(*) FROM loads WHERE status IN ('Scheduled', 'InTransit', 'Waiting')")
-            active_loads = cursor.fetchone()[0]
-            
-            # Count Completed Loads Today (Disposed)
-            try:
-                cursor.execute("SELECT COUNT(*) FROM loads WHERE status = 'Disposed' AND date(disposal_time) = date('now')")
-                completed_today = cursor.fetchone()[0]
-            except:
-                # Fallback if disposal_time column doesn't exist
-                cursor.execute("SELECT COUNT(*) FROM loads WHERE status = 'Disposed' AND date(created_at) = date('now')")
-                completed_today = cursor.fetchone()[0]
-            
-            # Total Tonnage Today
-            try:
-                cursor.execute("SELECT SUM(COALESCE(net_weight, (COALESCE(gross_weight, 0) - COALESCE(tare_weight, 0)))) FROM loads WHERE status IN ('Disposed', 'COMPLETED') AND date(COALESCE(disposal_time, updated_at)) = date('now')")
-                tonnage_today = cursor.fetchone()[0] or 0.0
-            except Exception as e:
-                # Fallback in case of any error
-                tonnage_today = 0.0
-            
-            return {
-                "clients": client_count,
-                "active_loads": active_loads,
-                "completed_today": completed_today,
-                "tonnage_today": tonnage_today
-            }
+        return {
+            "clients": client_count,
+            "active_loads": active_loads,
+            "completed_today": completed['loads'],
+            "tonnage_today": completed['net_weight_kg']
+        }
 
     def get_load_traceability(self, load_id: int) -> Optional[Dict]:
         """Get full traceability information for a specific load."""
@@ -1,7 +1,12 @@
+import io
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from infrastructure.persistence.reporting_repository import ReportingRepository
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple
+from openpyxl import Workbook
+from infrastructure.persistence.reporting_repository import (
+    ReportingRepository, FleetWatermark, TraceabilityFilter, TraceabilityCursor
+)
+from infrastructure.persistence.daily_ops_rollup_repository import DailyOpsRollupRepository
 from domain.shared.constants import MAX_N_PER_HA
 
 class ReportingService:
@@ -10,36 +15,116 @@ class ReportingService:
     Leverages the ReportingRepository for data access.
     """
 
-    def __init__(self, reporting_repository: ReportingRepository):
+    def __init__(
+        self,
+        reporting_repository: ReportingRepository,
+        rollup_repository: Optional[DailyOpsRollupRepository] = None
+    ):
         self.repository = reporting_repository
+        self.rollup_repository = rollup_repository or DailyOpsRollupRepository(reporting_repository.db_manager)
+
+    def get_operations_kpis(
+        self,
+        start_date: date,
+        end_date: date,
+        client_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Returns load KPIs for a date range from the daily operations rollup.
+
+        Returns:
+            Dict with dispatched_loads, completed_loads, net_weight_kg
+            (completed), in_progress_loads (current, not closed) and daily
+            (DataFrame with day, completed loads and net_weight_kg per day)
+        """
+        rollup = self.rollup_repository
+        dispatched = rollup.get_entries(rollup.DISPATCHED_STATUSES, start_date, end_date, client_id)
+        daily = rollup.get_daily_entries(rollup.COMPLETED_STATUSES, start_date, end_date, client_id)
+        status_counts = rollup.get_status_counts(client_id)
+
+        return {
+            'dispatched_loads': dispatched['loads'],
+            'completed_loads': sum(row['loads'] for row in daily),
+            'net_weight_kg': sum(row['net_weight_kg'] for row in daily),
+            'in_progress_loads': sum(
+                count for status, count in status_counts.items()
+                if status not in rollup.CLOSED_STATUSES
+            ),
+            'daily': pd.DataFrame(daily, columns=['day', 'loads', 'net_weight_kg']),
+        }
+
+    # Client report columns and their client-facing headers (display and Excel)
+    CLIENT_REPORT_COLUMNS = {
+        'ticket_number': 'Ticket',
+        'guide_number': 'Guía Despacho',
+        'dispatch_time': 'Fecha Despacho',
+        'site_name': 'Destino Final',
+        'weight_net': 'Kilos Netos',
+        'status': 'Estado',
+        'batch_code': 'Lote Origen',
+        'license_plate': 'Patente Camión'
+    }
 
     def get_client_report(self, client_id: Optional[int] = None, date_range: tuple = None) -> pd.DataFrame:
         """
         Returns a DataFrame for the Client Portal.
-        Filters by client_id and date range if provided.
+        Filters by client_id and date range (dispatch days, inclusive) in SQL.
         """
-        df = self.repository.get_full_traceability()
-        
-        # Post-processing
-        if date_range:
-            start_date, end_date = date_range
-            # Ensure dispatch_time is datetime
-            df['dispatch_time'] = pd.to_datetime(df['dispatch_time'])
-            # Convert date objects to Timestamp for comparison
-            start_ts = pd.Timestamp(start_date)
-            end_ts = pd.Timestamp(end_date)
-            mask = (df['dispatch_time'] >= start_ts) & (df['dispatch_time'] <= end_ts)
-            df = df.loc[mask]
-
-        if client_id:
-            # This is tricky without client_id in view. 
-            # I'll rely on the UI passing the client name or filtering by it.
-            # For now, I will return the whole DF and let the UI filter or 
-            # I will implement a 'filter_by_client_name' if needed.
-            # Let's assume the caller handles specific client filtering or we add it later.
-            pass
-            
-        return df
+        start_date, end_date = date_range if date_range else (None, None)
+        filters = TraceabilityFilter(client_id=client_id, start_date=start_date, end_date=end_date)
+        return pd.concat(self.repository.iter_traceability(filters), ignore_index=True)
+
+    def get_client_report_page(
+        self,
+        filters: TraceabilityFilter,
+        cursor: Optional[TraceabilityCursor] = None,
+        page_size: int = 50
+    ) -> Tuple[pd.DataFrame, Optional[TraceabilityCursor]]:
+        """
+        Returns one page of the client report (newest dispatch first) and
+        the cursor of the next page (None on the last page).
+        """
+        return self.repository.get_traceability_page(filters, cursor, page_size)
+
+    def get_client_report_totals(self, filters: TraceabilityFilter) -> Dict[str, Any]:
+        """
+        Returns totals of the whole filtered client report: loads,
+        net_weight_kg and by_status.
+        """
+        return self.repository.get_traceability_totals(filters)
+
+    @staticmethod
+    def certificate_name(ticket_number: Optional[str]) -> str:
+        """Disposal certificate file name of a load (pending without ticket)."""
+        return f"CERT-{ticket_number}.pdf" if ticket_number else "Pendiente"
+
+    def export_client_report_excel(self, filters: TraceabilityFilter, chunk_size: int = 5000) -> bytes:
+        """
+        Generates the Excel file of the whole filtered client report.
+
+        Rows are read in keyset chunks and appended to a write-only
+        workbook, so memory holds one chunk instead of the full report.
+
+        Returns:
+            bytes: The Excel file content
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Trazabilidad")
+        columns = list(self.CLIENT_REPORT_COLUMNS)
+        sheet.append([*self.CLIENT_REPORT_COLUMNS.values(), 'Certificado'])
+
+        for chunk in self.repository.iter_traceability(filters, chunk_size):
+            chunk = chunk[columns].astype(object).where(chunk[columns].notna(), None)
+            for row in chunk.itertuples(index=False):
+                sheet.append([*row, self.certificate_name(row.ticket_number)])
+
+        output = io.BytesIO()
+        workbook.save(output)
+        return output.getvalue()
+
+    # Fleet board statuses (current and legacy) for timing calculations
+    EN_ROUTE_STATUSES = ('EN_ROUTE_DESTINATION', 'Dispatched', 'IN_TRANSIT')
+    ARRIVED_STATUSES = ('AT_DESTINATION', 'Arrived', 'ARRIVED')
 
     def get_fleet_monitoring(self) -> pd.DataFrame:
         """
@@ -51,39 +136,72 @@ class ReportingService:
         - waiting_time: Time waiting at site (only for Arrived status)
         """
         df = self.repository.get_fleet_monitoring_data()
-            
-        if not df.empty:
-            # Convert timestamps to datetime
-            df['dispatch_time'] = pd.to_datetime(df['dispatch_time'])
-            df['arrival_time'] = pd.to_datetime(df['arrival_time'])
-            
-            now = datetime.now()
-            
-            # Calculate hours_elapsed based on status
-            def calculate_hours_elapsed(row):
-                if row['status'] == 'Dispatched':
-                    # For Dispatched: time since dispatch (ongoing trip)
-                    if pd.notna(row['dispatch_time']):
-                        return (now - row['dispatch_time']).total_seconds() / 3600
-                elif row['status'] == 'Arrived':
-                    # For Arrived: completed travel time (arrival - dispatch)
-                    if pd.notna(row['arrival_time']) and pd.notna(row['dispatch_time']):
-                        return (row['arrival_time'] - row['dispatch_time']).total_seconds() / 3600
-                return 0.0
-            
-            # Calculate waiting_time (only for Arrived)
-            def calculate_waiting_time(row):
-                if row['status'] == 'Arrived' and pd.notna(row['arrival_time']):
-                    return (now - row['arrival_time']).total_seconds() / 3600
-                return 0.0
-            
-            df['hours_elapsed'] = df.apply(calculate_hours_elapsed, axis=1)
-            df['waiting_time'] = df.apply(calculate_waiting_time, axis=1)
-        else:
+        return self._add_fleet_timings(self._parse_fleet_times(df))
+
+    def refresh_fleet_monitoring(
+        self,
+        cached: Optional[pd.DataFrame],
+        watermark: Optional[FleetWatermark]
+    ) -> Tuple[pd.DataFrame, FleetWatermark]:
+        """
+        Brings a client-cached fleet board up to date with a delta read.
+
+        Only loads changed since `watermark` are read; they replace their
+        cached rows, and loads that left the board are dropped. Without a
+        cache or watermark the board is read in full. Timings are recomputed
+        on every call (they depend on the current time).
+
+        Args:
+            cached: Frame returned by the previous call (None on first load)
+            watermark: Watermark returned by the previous call
+
+        Returns:
+            (current fleet board, watermark for the next call)
+        """
+        if cached is None or watermark is None:
+            df, watermark = self.repository.get_fleet_monitoring_changes(None)
+            return self._add_fleet_timings(self._parse_fleet_times(df)), watermark
+
+        changes, watermark = self.repository.get_fleet_monitoring_changes(watermark)
+        if changes.empty:
+            return self._add_fleet_timings(cached), watermark
+
+        changes = self._parse_fleet_times(changes)
+        kept = cached[~cached['load_id'].isin(changes['load_id'])]
+        changes = changes[changes['status'].isin(self.repository.FLEET_STATUSES)]
+        parts = [frame for frame in (kept, changes) if not frame.empty]
+        df = pd.concat(parts, ignore_index=True) if parts else cached.iloc[0:0]
+        df = df.sort_values('dispatch_time', ascending=False, na_position='last', ignore_index=True)
+        return self._add_fleet_timings(df), watermark
+
+    @staticmethod
+    def _parse_fleet_times(df: pd.DataFrame) -> pd.DataFrame:
+        """Converts dispatch/arrival timestamps to datetime."""
+        df['dispatch_time'] = pd.to_datetime(df['dispatch_time'])
+        df['arrival_time'] = pd.to_datetime(df['arrival_time'])
+        return df
+
+    def _add_fleet_timings(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds hours_elapsed (ongoing trip for en route trucks, completed
+        travel for arrived ones) and waiting_time (arrived trucks) in hours.
+        """
+        df = df.copy()
+        if df.empty:
             # Empty DataFrame with expected columns
             df['hours_elapsed'] = 0.0
             df['waiting_time'] = 0.0
-            
+            return df
+
+        now = pd.Timestamp(datetime.now())
+        en_route = df['status'].isin(self.EN_ROUTE_STATUSES)
+        arrived = df['status'].isin(self.ARRIVED_STATUSES)
+        trip_hours = (now - df['dispatch_time']).dt.total_seconds() / 3600
+        travel_hours = (df['arrival_time'] - df['dispatch_time']).dt.total_seconds() / 3600
+        waiting_hours = (now - df['arrival_time']).dt.total_seconds() / 3600
+
+        df['hours_elapsed'] = trip_hours.where(en_route, travel_hours.where(arrived)).fillna(0.0)
+        df['waiting_time'] = waiting_hours.where(arrived).fillna(0.0)
         return df
 
     def get_site_agronomy_stats(self, site_id: int) -> Dict[str, Any]:
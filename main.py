@@ -125,7 +125,7 @@ def main():
             elif report_menu == "Drill-Down Agronómico":
                 agronomy_dashboard_page(container.reporting_service, container.location_service, container.agronomy_service)
             elif report_menu == "Vista Cliente (Simulada)":
-                client_portal_page(container.reporting_service)
+                client_portal_page(container.reporting_service, container.client_service)
             elif report_menu == "Estados de Pago":
                 financial_portal_page(container)
                 
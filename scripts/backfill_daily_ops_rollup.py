@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir daily_ops_rollup desde el estado actual de las cargas.
+
+Ejecutar una vez tras aplicar la migración 037 (los triggers mantienen el
+rollup desde entonces) o para corregirlo después de cargas masivas de datos.
+"""
+import sys
+import os
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from infrastructure.persistence.database_manager import DatabaseManager
+from infrastructure.persistence.daily_ops_rollup_repository import DailyOpsRollupRepository
+
+
+def backfill_daily_ops_rollup():
+    """Reconstruye el rollup diario de operaciones."""
+    print("=" * 60)
+    print("📊 RECONSTRUCCIÓN DE ROLLUP DIARIO DE OPERACIONES")
+    print("=" * 60)
+
+    repo = DailyOpsRollupRepository(DatabaseManager())
+    rows = repo.rebuild()
+
+    print(f"\n✅ Rollup reconstruido: {rows} filas (día, cliente, planta, sitio, estado)")
+    for status, count in sorted(repo.get_status_counts().items()):
+        print(f"   {status:<25} {count:>8}")
+
+
+if __name__ == "__main__":
+    backfill_daily_ops_rollup()
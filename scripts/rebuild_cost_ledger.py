@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular el ledger de costos por carga (load_cost_ledger).
+
+CostingListener valoriza cada carga al completarse; la liquidación mensual
+solo lee el ledger. Ejecutar una vez tras aplicar la migración 035 y después
+de cambiar tarifas, proformas o distancias de un periodo abierto (los
+periodos cerrados no se modifican):
+
+    python scripts/rebuild_cost_ledger.py 2025 11          # periodo completo
+    python scripts/rebuild_cost_ledger.py 2025 11 --stale  # solo cargas desactualizadas
+"""
+import sys
+import os
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from infrastructure.persistence.database_manager import DatabaseManager
+from domain.logistics.repositories.load_repository import LoadRepository
+from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
+from domain.finance.repositories.economic_indicators_repository import EconomicIndicatorsRepository
+from domain.finance.repositories.proforma_repository import ProformaRepository
+from domain.finance.repositories.load_cost_ledger_repository import LoadCostLedgerRepository
+from domain.finance.repositories.contractor_tariffs_repository import ContractorTariffsRepository
+from domain.finance.repositories.client_tariffs_repository import ClientTariffsRepository
+from domain.finance.repositories.disposal_site_tariffs_repository import DisposalSiteTariffsRepository
+from domain.finance.services.financial_reporting_service import FinancialReportingService
+
+
+def build_service(db_manager: DatabaseManager) -> FinancialReportingService:
+    """Servicio de liquidación con los mismos repositorios que el contenedor."""
+    return FinancialReportingService(
+        load_repo=LoadRepository(db_manager),
+        economic_repo=EconomicIndicatorsRepository(db_manager),
+        contractor_tariffs_repo=ContractorTariffsRepository(db_manager),
+        client_tariffs_repo=ClientTariffsRepository(db_manager),
+        distance_repo=DistanceMatrixRepository(db_manager),
+        disposal_site_tariffs_repo=DisposalSiteTariffsRepository(db_manager),
+        proforma_repo=ProformaRepository(db_manager),
+        ledger_repo=LoadCostLedgerRepository(db_manager)
+    )
+
+
+def rebuild_cost_ledger(year: int, month: int, stale_only: bool = False):
+    """Recalcula el ledger de un periodo (completo o solo cargas desactualizadas)."""
+    print("=" * 60)
+    print(f"💰 RECÁLCULO DEL LEDGER DE COSTOS {year}-{month:02d}")
+    print("=" * 60)
+
+    service = build_service(DatabaseManager())
+    if stale_only:
+        loads = service.sync_ledger(year, month)
+        print(f"\n✅ Cargas recalculadas: {loads}")
+    else:
+        entries = service.rebuild_ledger(year, month)
+        print(f"\n✅ Periodo reconstruido: {entries} entradas")
+
+    totals = service.get_ledger_totals(year, month)
+    print(f"   Cargas: {totals['load_count']}")
+    print(f"   Costos: {totals['total_costs_uf']:.2f} UF · Ingresos: {totals['total_revenue_uf']:.2f} UF")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) != 2:
+        print(__doc__)
+        sys.exit(1)
+    try:
+        rebuild_cost_ledger(int(args[0]), int(args[1]), stale_only='--stale' in sys.argv)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
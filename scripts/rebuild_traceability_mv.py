@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir traceability_mv (trazabilidad materializada).
+
+La migración 039 materializa las cargas existentes y los triggers mantienen
+la tabla desde entonces; ejecutar después de escrituras que no pasan por los
+triggers, como restaurar un respaldo. Con ids de carga como argumentos solo recalcula
+esas cargas:
+
+    python scripts/rebuild_traceability_mv.py
+    python scripts/rebuild_traceability_mv.py 120 121 122
+"""
+import sys
+import os
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from infrastructure.persistence.database_manager import DatabaseManager
+from infrastructure.persistence.traceability_repository import TraceabilityRepository
+
+
+def rebuild_traceability_mv(load_ids=None):
+    """Reconstruye la trazabilidad materializada (completa o por cargas)."""
+    print("=" * 60)
+    print("🔎 RECONSTRUCCIÓN DE TRAZABILIDAD MATERIALIZADA")
+    print("=" * 60)
+
+    repo = TraceabilityRepository(DatabaseManager())
+    if load_ids:
+        rows = repo.refresh(load_ids)
+        print(f"\n✅ Cargas recalculadas: {rows} de {len(set(load_ids))} solicitadas")
+    else:
+        rows = repo.rebuild()
+        print(f"\n✅ Tabla reconstruida: {rows} cargas")
+    print(f"   Total en traceability_mv: {repo.count()}")
+
+
+if __name__ == "__main__":
+    rebuild_traceability_mv([int(arg) for arg in sys.argv[1:]])
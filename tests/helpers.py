@@ -0,0 +1,159 @@
+"""
+Utilidades compartidas por los tests.
+
+- TempDatabaseTestCase: BD SQLite temporal con esquema inline y migraciones del repo
+- StubProforma / StubDistanceRepo: dobles en memoria para liquidación y costeo
+- make_cycle_load / make_transport_load / make_request_load: cargas con la
+  forma que retornan las queries de liquidación, costeo por tramos y consolidación
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from infrastructure.persistence.database_manager import DatabaseManager
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'database', 'migrations'
+)
+
+
+def read_migration(name: str) -> str:
+    """Contenido de una migración de database/migrations."""
+    with open(os.path.join(MIGRATIONS_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """
+    Base con una BD temporal por test.
+
+    Las subclases declaran `schema` (SQL inline con las tablas base) y
+    `migrations` (archivos de database/migrations, en orden); setUp los aplica
+    y tearDown cierra el pool y borra el directorio.
+    """
+    schema = ""
+    migrations = ()
+    db_options = {}
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "test.db"), **self.db_options)
+        with self.db as conn:
+            if self.schema:
+                conn.executescript(self.schema)
+            for name in self.migrations:
+                conn.executescript(read_migration(name))
+
+    def tearDown(self):
+        self.db.close_all()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class StubProforma:
+    """Stub de Proforma con tarifas por tipo de vehículo."""
+    DEFAULT_TARIFFS = {'BATEA': 0.0015, 'AMPLIROLL': 0.003, 'AMPLIROLL_CARRO': 0.002}
+
+    def __init__(self, tariffs=None):
+        self.tariffs = self.DEFAULT_TARIFFS if tariffs is None else tariffs
+
+    def get_tariff_for_vehicle_type(self, vehicle_type):
+        return self.tariffs.get(vehicle_type.upper())
+
+
+class StubDistanceRepo:
+    """
+    Stub de DistanceMatrixRepository con búsqueda vectorizada sobre un dict.
+
+    Las claves son (origen, destino, tipo_destino). Con symmetric=True los
+    tramos entre plantas (FACILITY) valen en ambos sentidos. Orígenes que no
+    son plantas no tienen ruta (NaN), como en la matriz real.
+    """
+    def __init__(self, distances, symmetric=False):
+        self.distances = dict(distances)
+        if symmetric:
+            for (origin, dest, dest_type), km in distances.items():
+                if dest_type == 'FACILITY':
+                    self.distances[(dest, origin, dest_type)] = km
+
+    def get_route_distances(self, origins, destination_ids, destination_types, derive_missing=False,
+                            origin_types=None):
+        origins = list(origins)
+        origin_types = ['FACILITY'] * len(origins) if origin_types is None else list(origin_types)
+        result = []
+        for origin, origin_type, dest, dest_type in zip(origins, origin_types, destination_ids, destination_types):
+            if pd.isna(origin) or pd.isna(dest) or origin_type != 'FACILITY':
+                result.append(np.nan)
+            else:
+                result.append(self.distances.get((int(origin), int(dest), dest_type), np.nan))
+        return np.array(result, dtype=float)
+
+
+def make_cycle_load(load_id, **overrides):
+    """Dict de carga con la forma de fetch_loads_in_cycle."""
+    load = {
+        'id': load_id,
+        'manifest_number': f'M-{load_id}',
+        'vehicle_id': 1,
+        'vehicle_type': 'BATEA',
+        'distance_km': 100.0,
+        'client_id': 1,
+        'scheduled_date': '2025-11-01',
+        'net_weight_tons': 20.0,
+        'origin_facility_id': 1,
+        'origin_treatment_plant_id': None,
+        'destination_site_id': 5,
+        'destination_treatment_plant_id': None,
+        'vehicle_name': 'AB-1234',
+        'client_name': 'Cliente',
+        'origin_name': 'Planta',
+        'destination_name': 'Predio',
+    }
+    load.update(overrides)
+    return load
+
+
+def make_transport_load(load_id, **overrides):
+    """Dict de carga con la forma de fetch_transport_loads_in_cycle."""
+    load = {
+        'id': load_id,
+        'manifest_number': f'M-{load_id}',
+        'date': '2025-11-01',
+        'net_weight_tons': 10.0,
+        'segment_type': None,
+        'trip_id': None,
+        'origin_facility_id': 1,
+        'origin_treatment_plant_id': None,
+        'destination_site_id': 5,
+        'destination_treatment_plant_id': None,
+        'vehicle_plate': 'AB-1234',
+        'vehicle_type': 'BATEA',
+        'origin_is_link_point': 0,
+        'origin_name': f'Planta {load_id}',
+        'destination_name': 'Predio',
+    }
+    load.update(overrides)
+    return load
+
+
+def make_request_load(load_id, origin, is_link_point=0, **overrides):
+    """Dict de carga REQUESTED con la forma que consume TripConsolidationService."""
+    load = {
+        'id': load_id,
+        'origin_facility_id': origin,
+        'net_weight': 8000.0,  # kg
+        'vehicle_type_requested': 'AMPLIROLL',
+        'container_quantity': 1,
+        'destination_site_id': None,
+        'destination_treatment_plant_id': None,
+        'origin_name': f'Planta {origin}',
+        'is_link_point': is_link_point,
+        'allowed_vehicle_types': None,
+    }
+    load.update(overrides)
+    return load
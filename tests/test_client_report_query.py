@@ -0,0 +1,134 @@
+"""
+Test Suite para la consulta paginada del portal de cliente.
+
+Valida:
+1. Los filtros de cliente, fechas, estado y texto se aplican en SQL
+2. Paginación keyset: páginas disjuntas, en orden, con cursor final None
+3. Totales agregados en la base de datos sobre todo el filtro
+4. Exportación Excel del conjunto filtrado completo
+"""
+
+import io
+import unittest
+from datetime import date
+
+from openpyxl import load_workbook
+
+from domain.logistics.entities.load_status import LoadStatus
+from infrastructure.persistence.reporting_repository import ReportingRepository, TraceabilityFilter
+from infrastructure.reporting.reporting_service import ReportingService
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE clients (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE facilities (id INTEGER PRIMARY KEY, name TEXT, client_id INTEGER);
+    CREATE TABLE batches (id INTEGER PRIMARY KEY, batch_code TEXT, class_type TEXT);
+    CREATE TABLE sites (id INTEGER PRIMARY KEY, name TEXT, region TEXT);
+    CREATE TABLE contractors (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE drivers (id INTEGER PRIMARY KEY, name TEXT, rut TEXT, contractor_id INTEGER);
+    CREATE TABLE vehicles (id INTEGER PRIMARY KEY, license_plate TEXT);
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, ticket_number TEXT, guide_number TEXT, status TEXT,
+        requested_date DATETIME, scheduled_date DATETIME, dispatch_time DATETIME, arrival_time DATETIME,
+        gross_weight REAL, tare_weight REAL, net_weight REAL,
+        origin_facility_id INTEGER, batch_id INTEGER, destination_site_id INTEGER,
+        driver_id INTEGER, vehicle_id INTEGER
+    );
+"""
+
+
+class ClientReportTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+    migrations = ('039_traceability_mv.sql',)
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute("INSERT INTO clients VALUES (1, 'Cliente A'), (2, 'Cliente B')")
+            conn.execute("INSERT INTO facilities VALUES (10, 'Planta A', 1), (20, 'Planta B', 2)")
+            conn.execute("INSERT INTO vehicles VALUES (6, 'AB-1234'), (7, 'ZZ_9999')")
+            # Cliente A: 12 cargas en marzo (dos por día, la par completada), una sin despacho
+            conn.executemany(
+                "INSERT INTO loads (id, ticket_number, status, origin_facility_id, vehicle_id, "
+                "dispatch_time, net_weight) VALUES (?, ?, ?, 10, 6, ?, 1000)",
+                [
+                    (i, f"T-{i}", 'COMPLETED' if i % 2 == 0 else 'EN_ROUTE_DESTINATION',
+                     f"2025-03-{(i + 1) // 2:02d} 08:00:00")
+                    for i in range(1, 13)
+                ] + [(13, None, 'REQUESTED', None)]
+            )
+            # Cliente B: otra carga el mismo mes
+            conn.execute("INSERT INTO loads (id, ticket_number, status, origin_facility_id, vehicle_id, "
+                         "dispatch_time, net_weight) VALUES (50, 'T-50', 'COMPLETED', 20, 7, "
+                         "'2025-03-03 10:00:00', 5000)")
+        self.repo = ReportingRepository(self.db)
+        self.service = ReportingService(self.repo)
+        self.march_a = TraceabilityFilter(client_id=1, start_date=date(2025, 3, 1), end_date=date(2025, 3, 31))
+
+
+class TestFilters(ClientReportTestCase):
+
+    def test_client_and_inclusive_date_range(self):
+        df, _ = self.repo.get_traceability_page(
+            TraceabilityFilter(client_id=1, start_date=date(2025, 3, 2), end_date=date(2025, 3, 3))
+        )
+
+        self.assertEqual(list(df['load_id']), [6, 5, 4, 3])
+
+    def test_status_and_text(self):
+        completed = TraceabilityFilter(client_id=1, statuses=(LoadStatus.COMPLETED.value,))
+        self.assertEqual(len(self.repo.get_traceability_page(completed)[0]), 6)
+
+        by_ticket = TraceabilityFilter(client_id=1, text='t-1')
+        self.assertEqual(sorted(self.repo.get_traceability_page(by_ticket)[0]['load_id']), [1, 10, 11, 12])
+
+        # Comodines LIKE se buscan literalmente
+        self.assertEqual(list(self.repo.get_traceability_page(TraceabilityFilter(text='Z_9'))[0]['load_id']), [50])
+        self.assertTrue(self.repo.get_traceability_page(TraceabilityFilter(text='B_1'))[0].empty)
+
+
+class TestPaginationAndTotals(ClientReportTestCase):
+
+    def test_keyset_pages_cover_filter_once(self):
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            df, cursor = self.service.get_client_report_page(self.march_a, cursor, page_size=5)
+            seen.extend(df['load_id'])
+            pages += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, list(range(12, 0, -1)))  # Despacho descendente, luego id
+
+    def test_totals_cover_whole_filter(self):
+        totals = self.service.get_client_report_totals(self.march_a)
+
+        self.assertEqual(totals, {
+            'loads': 12, 'net_weight_kg': 12000.0,
+            'by_status': {'COMPLETED': 6, 'EN_ROUTE_DESTINATION': 6}
+        })
+
+    def test_client_report_filters_in_sql(self):
+        df = self.service.get_client_report(client_id=2, date_range=(date(2025, 3, 1), date(2025, 3, 31)))
+
+        self.assertEqual(list(df['load_id']), [50])
+
+
+class TestExcelExport(ClientReportTestCase):
+
+    def test_export_streams_whole_filter(self):
+        content = self.service.export_client_report_excel(self.march_a, chunk_size=5)
+
+        sheet = load_workbook(io.BytesIO(content)).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], (*ReportingService.CLIENT_REPORT_COLUMNS.values(), 'Certificado'))
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(rows[1][0], 'T-12')
+        self.assertEqual(rows[1][-1], 'CERT-T-12.pdf')
+
+
+if __name__ == '__main__':
+    unittest.main()
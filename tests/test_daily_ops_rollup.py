@@ -0,0 +1,200 @@
+"""
+Test Suite para el rollup diario de operaciones (daily_ops_rollup).
+
+Valida:
+1. Los triggers sobre loads registran altas, transiciones, cambios de destino y bajas
+2. Las correcciones de peso y los cambios de cliente de una planta llegan al rollup
+3. rebuild() reconstruye el rollup desde el estado actual de las cargas
+4. DashboardService.get_stats y ReportingService.get_operations_kpis leen el rollup
+"""
+
+import unittest
+from datetime import date
+
+from domain.logistics.entities.load_status import LoadStatus
+from infrastructure.persistence.daily_ops_rollup_repository import DailyOpsRollupRepository
+from infrastructure.persistence.reporting_repository import ReportingRepository
+from infrastructure.reporting.dashboard_service import DashboardService
+from infrastructure.reporting.reporting_service import ReportingService
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE clients (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE facilities (id INTEGER PRIMARY KEY, name TEXT, client_id INTEGER);
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, status TEXT, origin_facility_id INTEGER, destination_site_id INTEGER,
+        gross_weight REAL, tare_weight REAL, net_weight REAL,
+        dispatch_time DATETIME, arrival_time DATETIME, disposal_time DATETIME,
+        created_at DATETIME, updated_at DATETIME
+    );
+"""
+
+
+class RollupTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+    migrations = ('037_daily_ops_rollup.sql',)
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute("INSERT INTO clients VALUES (1, 'Cliente A'), (2, 'Cliente B')")
+            conn.execute("INSERT INTO facilities VALUES (10, 'Planta A', 1), (20, 'Planta B', 2)")
+            conn.executemany(
+                "INSERT INTO loads (id, status, origin_facility_id, destination_site_id) VALUES (?, ?, ?, ?)",
+                [
+                    (1, 'REQUESTED', 10, 5),
+                    (2, 'REQUESTED', 10, 5),
+                    (3, 'REQUESTED', 20, None),
+                ]
+            )
+        self.repo = DailyOpsRollupRepository(self.db)
+        self.today = date.today()
+
+    def execute(self, sql, params=()):
+        with self.db as conn:
+            conn.execute(sql, params)
+
+
+class TestRollupTriggers(RollupTestCase):
+
+    def test_transitions_move_loads_between_statuses(self):
+        self.execute("UPDATE loads SET status = 'EN_ROUTE_DESTINATION' WHERE id IN (1, 2)")
+        self.execute("UPDATE loads SET status = 'COMPLETED', gross_weight = 30000, tare_weight = 12000, "
+                     "net_weight = 18000 WHERE id = 1")
+
+        self.assertEqual(self.repo.get_status_counts(), {
+            'REQUESTED': 1, 'EN_ROUTE_DESTINATION': 1, 'COMPLETED': 1
+        })
+        completed = self.repo.get_entries(self.repo.COMPLETED_STATUSES, self.today, self.today)
+        self.assertEqual(completed, {'loads': 1, 'net_weight_kg': 18000.0})
+        dispatched = self.repo.get_entries(self.repo.DISPATCHED_STATUSES, self.today, self.today)
+        self.assertEqual(dispatched['loads'], 2)
+
+    def test_updates_without_status_change_are_ignored(self):
+        self.execute("UPDATE loads SET net_weight = 5000, updated_at = CURRENT_TIMESTAMP WHERE id = 1")
+
+        self.assertEqual(self.repo.get_status_counts(), {'REQUESTED': 3})
+
+    def test_client_dimension_and_reassignment(self):
+        self.assertEqual(self.repo.get_status_counts(client_id=2), {'REQUESTED': 1})
+
+        self.execute("UPDATE loads SET origin_facility_id = 20 WHERE id = 1")
+
+        self.assertEqual(self.repo.get_status_counts(client_id=1), {'REQUESTED': 1})
+        self.assertEqual(self.repo.get_status_counts(client_id=2), {'REQUESTED': 2})
+
+    def test_deleted_load_leaves_its_status(self):
+        self.execute("DELETE FROM loads WHERE id = 3")
+
+        self.assertEqual(self.repo.get_status_counts(), {'REQUESTED': 2})
+
+
+class TestRollupCorrections(RollupTestCase):
+
+    def complete_load_1(self):
+        self.execute("UPDATE loads SET status = 'COMPLETED', gross_weight = 30000, tare_weight = 12000, "
+                     "net_weight = 18000 WHERE id = 1")
+
+    def completed_today(self, client_id=None):
+        return self.repo.get_entries(self.repo.COMPLETED_STATUSES, self.today, self.today, client_id=client_id)
+
+    def test_weight_correction_after_completion(self):
+        self.complete_load_1()
+
+        self.execute("UPDATE loads SET net_weight = 17500 WHERE id = 1")
+
+        self.assertEqual(self.completed_today(), {'loads': 1, 'net_weight_kg': 17500.0})
+        self.assertEqual(self.repo.get_status_counts()['COMPLETED'], 1)
+
+    def test_missing_tare_counts_as_zero(self):
+        self.execute("UPDATE loads SET status = 'COMPLETED', gross_weight = 25000 WHERE id = 2")
+        self.assertEqual(self.completed_today()['net_weight_kg'], 25000.0)
+
+        self.execute("UPDATE loads SET tare_weight = 10000 WHERE id = 2")
+
+        self.assertEqual(self.completed_today()['net_weight_kg'], 15000.0)
+
+    def test_facility_client_reassignment_moves_rows(self):
+        self.complete_load_1()
+
+        self.execute("UPDATE facilities SET client_id = 2 WHERE id = 10")
+
+        self.assertEqual(self.repo.get_status_counts(client_id=1), {})
+        self.assertEqual(self.repo.get_status_counts(client_id=2), {'REQUESTED': 2, 'COMPLETED': 1})
+        self.assertEqual(self.completed_today(client_id=2), {'loads': 1, 'net_weight_kg': 18000.0})
+        self.assertEqual(self.completed_today(), {'loads': 1, 'net_weight_kg': 18000.0})
+
+    def test_triggers_match_rebuild(self):
+        self.complete_load_1()
+        self.execute("UPDATE loads SET net_weight = NULL, tare_weight = NULL WHERE id = 1")
+        self.execute("UPDATE facilities SET client_id = 2 WHERE id = 10")
+        counts = {client: self.repo.get_status_counts(client_id=client) for client in (1, 2)}
+        entries = self.completed_today()
+
+        self.execute("UPDATE loads SET disposal_time = datetime('now', 'localtime') WHERE id = 1")
+        self.repo.rebuild()
+
+        self.assertEqual({client: self.repo.get_status_counts(client_id=client) for client in (1, 2)}, counts)
+        self.assertEqual(self.completed_today(), entries)
+        self.assertEqual(entries['net_weight_kg'], 30000.0)
+
+
+class TestRollupRebuild(RollupTestCase):
+
+    def test_rebuild_from_current_loads(self):
+        self.execute("UPDATE loads SET status = 'COMPLETED', net_weight = 10000, "
+                     "disposal_time = '2025-03-10 15:00:00' WHERE id = 1")
+        self.execute("UPDATE loads SET status = 'EN_ROUTE_DESTINATION', "
+                     "dispatch_time = '2025-03-11 08:00:00' WHERE id = 2")
+        counts = self.repo.get_status_counts()
+
+        self.repo.rebuild()
+
+        self.assertEqual(self.repo.get_status_counts(), counts)
+        daily = self.repo.get_daily_entries(self.repo.COMPLETED_STATUSES, date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(daily, [{'day': '2025-03-10', 'loads': 1, 'net_weight_kg': 10000.0}])
+        dispatched = self.repo.get_entries(self.repo.DISPATCHED_STATUSES, date(2025, 3, 11), date(2025, 3, 11))
+        self.assertEqual(dispatched['loads'], 1)
+
+    def test_rebuild_converts_utc_fallback_to_localtime(self):
+        self.execute("UPDATE loads SET status = 'COMPLETED', net_weight = 10000, "
+                     "updated_at = '2025-03-10 23:30:00' WHERE id = 1")
+
+        self.repo.rebuild()
+
+        with self.db as conn:
+            local_day = conn.execute("SELECT date(datetime('2025-03-10 23:30:00', 'localtime')) AS day").fetchone()['day']
+        daily = self.repo.get_daily_entries(self.repo.COMPLETED_STATUSES, date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(daily, [{'day': local_day, 'loads': 1, 'net_weight_kg': 10000.0}])
+
+
+class TestKpiServices(RollupTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.execute("UPDATE loads SET status = ? WHERE id IN (1, 3)", (LoadStatus.EN_ROUTE_DESTINATION.value,))
+        self.execute("UPDATE loads SET status = ?, net_weight = 12000 WHERE id = 1", (LoadStatus.COMPLETED.value,))
+        self.execute("UPDATE loads SET status = 'CANCELLED' WHERE id = 2")  # Cancelada: no activa
+
+    def test_dashboard_stats(self):
+        stats = DashboardService(self.db, self.repo).get_stats()
+
+        self.assertEqual(stats, {
+            'clients': 2, 'active_loads': 1, 'completed_today': 1, 'tonnage_today': 12000.0
+        })
+
+    def test_operations_kpis_by_client(self):
+        service = ReportingService(ReportingRepository(self.db), self.repo)
+
+        kpis = service.get_operations_kpis(self.today, self.today, client_id=1)
+
+        self.assertEqual(kpis['dispatched_loads'], 1)
+        self.assertEqual(kpis['completed_loads'], 1)
+        self.assertEqual(kpis['net_weight_kg'], 12000.0)
+        self.assertEqual(kpis['in_progress_loads'], 0)
+        self.assertEqual(list(kpis['daily']['loads']), [1])
+        self.assertEqual(service.get_operations_kpis(self.today, self.today, client_id=2)['in_progress_loads'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
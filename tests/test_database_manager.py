@@ -0,0 +1,98 @@
+"""
+Test Suite para DatabaseManager (pool de conexiones por hilo).
+
+Valida:
+1. Reutilización de conexiones calientes entre bloques `with`
+2. Anidamiento correcto (commit solo en el nivel superior)
+3. Aislamiento de conexiones entre hilos
+"""
+
+import threading
+import unittest
+
+from infrastructure.persistence.database_manager import DatabaseManager
+from helpers import TempDatabaseTestCase
+
+
+class TestDatabaseManagerPool(TempDatabaseTestCase):
+    """Test Suite para el pool de conexiones de DatabaseManager."""
+    db_options = {'pool_size': 2}
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+
+    def test_connection_is_reused_between_blocks(self):
+        """Test: Bloques consecutivos reutilizan la misma conexión del pool."""
+        with self.db as first:
+            pass
+        with self.db as second:
+            pass
+        self.assertIs(first, second)
+
+    def test_nested_blocks_share_connection_and_commit_once(self):
+        """Test: Bloques anidados comparten conexión; el error revierte todo."""
+        with self.assertRaises(ValueError):
+            with self.db as outer:
+                outer.execute("INSERT INTO items (name) VALUES ('a')")
+                with self.db as inner:
+                    self.assertIs(outer, inner)
+                    inner.execute("INSERT INTO items (name) VALUES ('b')")
+                raise ValueError("boom")
+
+        with self.db as conn:
+            count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        self.assertEqual(count, 0)
+        self.assertIsNone(self.db.connection)
+
+    def test_commit_hooks_run_after_outermost_commit(self):
+        """Test: on_commit espera al commit externo; on_rollback solo corre si se revierte."""
+        events = []
+        with self.db:
+            with self.db:
+                self.db.on_commit(lambda: events.append('commit'))
+                self.db.on_rollback(lambda: events.append('rollback'))
+            self.assertEqual(events, [])
+        self.assertEqual(events, ['commit'])
+
+        events.clear()
+        with self.assertRaises(ValueError):
+            with self.db:
+                self.db.on_commit(lambda: events.append('commit'))
+                self.db.on_rollback(lambda: events.append('rollback'))
+                raise ValueError("boom")
+        self.assertEqual(events, ['rollback'])
+
+    def test_threads_get_distinct_connections(self):
+        """Test: Hilos concurrentes nunca comparten conexión."""
+        barrier = threading.Barrier(2)
+        seen = []
+
+        def worker():
+            with self.db as conn:
+                barrier.wait()
+                seen.append(id(conn))
+                conn.execute("INSERT INTO items (name) VALUES ('t')")
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(set(seen)), 2)
+        with self.db as conn:
+            count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        self.assertEqual(count, 2)
+
+    def test_pool_is_bounded(self):
+        """Test: El pool no retiene más conexiones ociosas que pool_size."""
+        conns = [self.db._acquire() for _ in range(4)]
+        for conn in conns:
+            self.db._release(conn)
+        self.assertEqual(len(self.db._idle), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
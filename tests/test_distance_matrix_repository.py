@@ -0,0 +1,135 @@
+"""
+Test Suite para DistanceMatrixRepository y su caché en memoria.
+
+Valida:
+1. Búsquedas puntuales y vectorizadas servidas desde DistanceMatrixCache
+2. Invalidación del índice en add / update / delete / upsert
+3. Distancias derivadas por camino más corto para pares no configurados
+4. Orígenes tipados: una planta de tratamiento no se confunde con la planta
+   (facility) de mismo ID
+"""
+
+import unittest
+
+import numpy as np
+
+from domain.logistics.repositories.distance_matrix_repository import DistanceMatrixRepository
+from helpers import TempDatabaseTestCase
+
+
+class TestDistanceMatrixCache(TempDatabaseTestCase):
+    """Test Suite para la matriz de distancias en memoria."""
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute("""
+                CREATE TABLE distance_matrix (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    origin_facility_id INTEGER NOT NULL,
+                    destination_id INTEGER NOT NULL,
+                    destination_type TEXT NOT NULL,
+                    distance_km REAL NOT NULL,
+                    is_link_segment INTEGER DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(origin_facility_id, destination_id, destination_type)
+                )
+            """)
+        self.repo = DistanceMatrixRepository(self.db)
+        self.route_id = self.repo.add(1, 5, 'SITE', 100.0)
+        self.repo.add(1, 2, 'FACILITY', 30.0, is_link_segment=True)
+
+    def test_scalar_and_vector_lookups(self):
+        self.assertEqual(self.repo.get_route_distance(1, 5, 'SITE'), 100.0)
+        self.assertIsNone(self.repo.get_route_distance(1, 5, 'TREATMENT_PLANT'))
+
+        distances = self.repo.get_route_distances([1, 1, None, 9], [5, 2, 5, 5], ['SITE', 'FACILITY', 'SITE', 'SITE'])
+
+        np.testing.assert_array_equal(distances, [100.0, 30.0, np.nan, np.nan])
+        self.assertEqual(
+            [r['destination_id'] for r in self.repo.get_linkable_routes(1)], [2]
+        )
+
+    def test_lookups_do_not_query_database(self):
+        self.repo.get_route_distance(1, 5, 'SITE')
+        with self.db as conn:
+            conn.execute("UPDATE distance_matrix SET distance_km = 999")
+
+        # Escritura fuera del repositorio: el índice sigue sirviendo el valor cargado
+        self.assertEqual(self.repo.get_route_distance(1, 5, 'SITE'), 100.0)
+
+    def test_repository_writes_invalidate_cache(self):
+        self.repo.get_route_distance(1, 5, 'SITE')
+
+        self.repo.update(self.route_id, distance_km=120.0)
+        self.assertEqual(self.repo.get_route_distance(1, 5, 'SITE'), 120.0)
+
+        self.repo.upsert(1, 7, 'SITE', 70.0)
+        self.assertEqual(self.repo.get_route_distance(1, 7, 'SITE'), 70.0)
+
+        self.repo.delete(self.route_id)
+        self.assertIsNone(self.repo.get_route_distance(1, 5, 'SITE'))
+
+    def test_rolled_back_write_does_not_reach_cache(self):
+        self.repo.get_route_distance(1, 5, 'SITE')
+
+        with self.assertRaises(RuntimeError):
+            with self.db:
+                self.repo.update(self.route_id, distance_km=500.0)
+                self.repo.add(1, 8, 'SITE', 80.0)
+                raise RuntimeError("falla posterior en la transacción externa")
+
+        self.assertEqual(self.repo.get_route_distance(1, 5, 'SITE'), 100.0)
+        self.assertIsNone(self.repo.get_route_distance(1, 8, 'SITE'))
+        self.assertIsNone(self.repo.get_route_distance(1, 8, 'SITE', derive_missing=True))
+
+    def test_cache_is_shared_by_repositories_on_same_database(self):
+        other = DistanceMatrixRepository(self.db)
+        self.repo.get_route_distance(1, 5, 'SITE')
+
+        other.update(self.route_id, distance_km=110.0)
+
+        self.assertEqual(self.repo.get_route_distance(1, 5, 'SITE'), 110.0)
+
+    def test_missing_route_is_derived_from_shortest_path(self):
+        self.repo.add(2, 9, 'TREATMENT_PLANT', 80.0)
+
+        self.assertIsNone(self.repo.get_route_distance(1, 9, 'TREATMENT_PLANT'))
+        self.assertEqual(self.repo.get_route_distance(1, 9, 'TREATMENT_PLANT', derive_missing=True), 110.0)
+
+        distances = self.repo.get_route_distances(
+            [1, 1, 1], [5, 9, 9], ['SITE', 'TREATMENT_PLANT', 'SITE'], derive_missing=True
+        )
+        np.testing.assert_array_equal(distances, [100.0, 110.0, np.nan])
+
+    def test_derived_distances_follow_route_edits(self):
+        link_id = self.repo.add(2, 9, 'TREATMENT_PLANT', 80.0)
+        self.repo.get_route_distance(1, 9, 'TREATMENT_PLANT', derive_missing=True)
+
+        self.repo.update(link_id, distance_km=50.0)
+        self.assertEqual(self.repo.get_route_distance(1, 9, 'TREATMENT_PLANT', derive_missing=True), 80.0)
+
+        self.repo.delete(link_id)
+        self.assertIsNone(self.repo.get_route_distance(1, 9, 'TREATMENT_PLANT', derive_missing=True))
+
+    def test_treatment_plant_origin_is_not_the_facility_with_same_id(self):
+        self.repo.add(2, 1, 'TREATMENT_PLANT', 20.0)
+
+        # La planta de tratamiento 1 no tiene filas propias: sin derivar no hay distancia
+        self.assertIsNone(self.repo.get_route_distance(1, 5, 'SITE', origin_type='TREATMENT_PLANT'))
+        # Derivada desde su propio nodo: TP1 → F2 (20) → F1 (30) → S5 (100)
+        self.assertEqual(
+            self.repo.get_route_distance(1, 5, 'SITE', derive_missing=True, origin_type='TREATMENT_PLANT'),
+            150.0
+        )
+
+        distances = self.repo.get_route_distances(
+            [1, 1, 7], [5, 5, 5], ['SITE'] * 3, derive_missing=True,
+            origin_types=['FACILITY', 'TREATMENT_PLANT', 'TREATMENT_PLANT']
+        )
+        np.testing.assert_array_equal(distances, [100.0, 150.0, np.nan])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Test Suite para la entrega asíncrona de EventBus.
+
+Valida:
+1. publish() no espera a los manejadores y flush() sí
+2. Orden FIFO por manejador y carga (load_id)
+3. Backpressure: publish() bloquea con la cola llena
+4. Errores de un manejador no detienen al resto; modo sincrónico intacto
+"""
+
+import threading
+import time
+import unittest
+
+from infrastructure.events.event_bus import Event, EventBus, EventTypes
+
+
+class TestAsyncEventBus(unittest.TestCase):
+    """Test Suite para EventBus(async_mode=True)."""
+
+    def setUp(self):
+        self.bus = EventBus(async_mode=True, max_workers=4, max_pending=10)
+
+    def tearDown(self):
+        self.bus.shutdown()
+
+    def test_publish_does_not_wait_for_handlers(self):
+        release = threading.Event()
+        received = []
+
+        def slow_handler(event):
+            release.wait(5)
+            received.append(event.data['load_id'])
+
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, slow_handler)
+        self.bus.publish(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 1}))
+        self.assertEqual(received, [])
+
+        release.set()
+        self.bus.flush()
+        self.assertEqual(received, [1])
+
+    def test_preserves_order_per_handler_and_load(self):
+        received = {}
+        lock = threading.Lock()
+
+        def handler(event):
+            time.sleep(0.001)
+            with lock:
+                received.setdefault(event.data['load_id'], []).append(event.data['seq'])
+
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, handler)
+        for seq in range(20):
+            for load_id in range(5):
+                self.bus.publish(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': load_id, 'seq': seq}))
+        self.bus.flush()
+
+        self.assertEqual(sorted(received), list(range(5)))
+        for seqs in received.values():
+            self.assertEqual(seqs, list(range(20)))
+
+    def test_backpressure_blocks_publish_when_queue_is_full(self):
+        bus = EventBus(async_mode=True, max_workers=1, max_pending=1)
+        release = threading.Event()
+        bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, lambda event: release.wait(5))
+
+        # 1 en ejecución + 1 en cola: el tercero debe esperar
+        bus.publish(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 1}))
+        time.sleep(0.05)
+        bus.publish(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 1}))
+        third = threading.Thread(
+            target=bus.publish, args=(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 1}),)
+        )
+        third.start()
+        third.join(0.1)
+        self.assertTrue(third.is_alive())
+
+        release.set()
+        third.join(5)
+        self.assertFalse(third.is_alive())
+        bus.shutdown()
+
+    def test_handler_error_does_not_stop_other_handlers(self):
+        received = []
+
+        def failing_handler(event):
+            raise RuntimeError("boom")
+
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, failing_handler)
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, lambda event: received.append(event))
+        self.bus.publish(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 7}))
+        self.bus.flush()
+
+        self.assertEqual(len(received), 1)
+
+    def test_flush_waits_for_events_published_by_handlers(self):
+        received = []
+        self.bus.subscribe(
+            EventTypes.LOAD_STATUS_CHANGED,
+            lambda event: self.bus.publish(Event(EventTypes.LOAD_DELIVERED, event.data))
+        )
+        self.bus.subscribe(EventTypes.LOAD_DELIVERED, lambda event: received.append(event.data['load_id']))
+        self.bus.publish(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 3}))
+        self.bus.flush()
+
+        self.assertEqual(received, [3])
+
+    def test_sync_mode_runs_handlers_inline(self):
+        bus = EventBus()
+        received = []
+        bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, lambda event: received.append(event))
+        bus.publish(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 1}))
+
+        self.assertEqual(len(received), 1)
+        bus.flush()  # No-op
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+"""
+Test Suite para el outbox transaccional de eventos.
+
+Valida:
+1. transition_load / transition_many escriben sus eventos en la transacción
+   (nada queda en el outbox si la transacción hace rollback)
+2. OutboxRelay entrega en lotes y avanza el offset de cada suscriptor
+3. At-least-once: un manejador que falla se reintenta sin afectar a otros
+4. Backoff entre reintentos y estacionamiento de eventos envenenados
+5. replay() vuelve a entregar desde un evento dado
+"""
+
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from infrastructure.events.event_bus import Event, EventBus, EventTypes
+from infrastructure.events.outbox import EventOutboxRepository, OutboxRelay
+from domain.logistics.entities.load_status import LoadStatus
+from domain.logistics.services.load_state_service import LoadStateService
+from helpers import TempDatabaseTestCase
+
+MIGRATIONS = ('034_event_outbox.sql', '040_event_delivery_failures.sql')
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, origin_facility_id INTEGER, destination_site_id INTEGER,
+        status TEXT, gross_weight REAL, tare_weight REAL, net_weight REAL,
+        attributes TEXT DEFAULT '{}', created_at DATETIME, updated_at DATETIME
+    );
+    CREATE TABLE load_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, load_id INTEGER NOT NULL, from_status TEXT NOT NULL,
+        to_status TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, user_id INTEGER, notes TEXT
+    );
+    CREATE TABLE distance_matrix (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, origin_facility_id INTEGER, destination_id INTEGER,
+        destination_type TEXT, distance_km REAL, is_link_segment INTEGER DEFAULT 0, updated_at DATETIME
+    );
+"""
+
+
+class OutboxTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+    migrations = MIGRATIONS
+
+    def setUp(self):
+        super().setUp()
+        self.outbox = EventOutboxRepository(self.db)
+
+    def outbox_rows(self):
+        with self.db as conn:
+            return [tuple(r) for r in conn.execute(
+                "SELECT event_type, aggregate_id FROM event_outbox ORDER BY id"
+            ).fetchall()]
+
+
+class TestLoadStateServiceOutbox(OutboxTestCase):
+    """Los eventos de transición se escriben en el outbox, no en el bus."""
+
+    def setUp(self):
+        super().setUp()
+        gate_ok = json.dumps({'gate_entry_check': True})
+        with self.db as conn:
+            conn.executemany(
+                "INSERT INTO loads (id, origin_facility_id, destination_site_id, status, attributes) VALUES (?, 1, ?, ?, ?)",
+                [
+                    (1, 5, 'EN_ROUTE_DESTINATION', gate_ok),
+                    (2, None, 'EN_ROUTE_DESTINATION', '{}'),  # Sin registro en portería
+                    (3, None, 'EN_ROUTE_DESTINATION', gate_ok),
+                ]
+            )
+        self.bus = EventBus()
+        self.published = []
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, self.published.append)
+        self.service = LoadStateService(self.db, event_bus=self.bus, outbox=self.outbox)
+
+    def test_transition_load_appends_events(self):
+        self.service.transition_load(1, LoadStatus.AT_DESTINATION, user_id=7)
+
+        self.assertEqual(self.outbox_rows(), [
+            (EventTypes.LOAD_STATUS_CHANGED, 1),
+            (EventTypes.LOAD_ARRIVED_AT_FIELD, 1),
+        ])
+        self.assertEqual(self.published, [])
+
+    def test_transition_many_appends_one_event_per_load(self):
+        result = self.service.transition_many([1, 2, 3], LoadStatus.AT_DESTINATION)
+
+        self.assertEqual(result.succeeded, [1, 3])
+        self.assertEqual(self.outbox_rows(), [
+            (EventTypes.LOAD_STATUS_CHANGED, 1),
+            (EventTypes.LOAD_ARRIVED_AT_FIELD, 1),
+            (EventTypes.LOAD_STATUS_CHANGED, 3),
+        ])
+
+    def test_rolled_back_transition_leaves_no_event(self):
+        with self.assertRaises(RuntimeError):
+            with self.db:
+                self.service.transition_load(1, LoadStatus.AT_DESTINATION)
+                raise RuntimeError("fallo posterior en la misma transacción")
+
+        self.assertEqual(self.outbox_rows(), [])
+        self.assertFalse(self.outbox.wait_for_events(0))
+
+
+class TestOutboxRelay(OutboxTestCase):
+    """Entrega por suscriptor con offsets durables."""
+
+    def setUp(self):
+        super().setUp()
+        self.outbox.append_many([
+            Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': load_id, 'to_status': 'COMPLETED'})
+            for load_id in range(1, 6)
+        ])
+        self.relay = OutboxRelay(self.outbox, batch_size=2, retry_backoff=0)
+
+    def test_delivers_in_batches_and_saves_offsets(self):
+        received = []
+        self.relay.subscribe('costing', EventTypes.LOAD_STATUS_CHANGED,
+                             lambda event: received.append(event.data['load_id']))
+
+        self.assertEqual(self.relay.run_once(), 5)
+        self.assertEqual(received, [1, 2, 3, 4, 5])
+        self.assertEqual(self.outbox.get_offset('costing'), 5)
+
+        # Sin eventos nuevos no se entrega nada
+        self.assertEqual(self.relay.run_once(), 0)
+
+        # El offset sobrevive a un nuevo relay (reinicio del proceso)
+        restarted = OutboxRelay(EventOutboxRepository(self.db))
+        restarted.subscribe('costing', EventTypes.LOAD_STATUS_CHANGED, received.append)
+        self.assertEqual(restarted.run_once(), 0)
+
+    def test_failing_handler_is_retried_without_blocking_others(self):
+        attempts = []
+        other = []
+
+        def flaky(event):
+            attempts.append(event.data['load_id'])
+            if event.data['load_id'] == 3 and attempts.count(3) == 1:
+                raise RuntimeError("rate sheet caída")
+
+        self.relay.subscribe('costing', EventTypes.LOAD_STATUS_CHANGED, flaky)
+        self.relay.subscribe('compliance', EventTypes.LOAD_STATUS_CHANGED, other.append)
+
+        self.relay.run_once()
+        self.assertEqual(attempts, [1, 2, 3])
+        self.assertEqual(self.outbox.get_offset('costing'), 2)
+        self.assertEqual(len(other), 5)
+
+        self.relay.run_once()
+        self.assertEqual(attempts, [1, 2, 3, 3, 4, 5])
+        self.assertEqual(self.outbox.get_offset('costing'), 5)
+
+    def test_poison_event_is_parked_after_max_attempts(self):
+        received = []
+
+        def poisoned(event):
+            if event.data['load_id'] == 2:
+                raise ValueError("payload inválido")
+            received.append(event.data['load_id'])
+
+        relay = OutboxRelay(self.outbox, batch_size=2, max_attempts=3, retry_backoff=0)
+        relay.subscribe('costing', EventTypes.LOAD_STATUS_CHANGED, poisoned)
+
+        relay.run_once()
+        relay.run_once()
+        self.assertEqual(received, [1])
+        self.assertEqual(self.outbox.get_offset('costing'), 1)
+
+        self.assertEqual(relay.run_once(), 3)  # Tercer fallo: se estaciona y sigue
+        self.assertEqual(received, [1, 3, 4, 5])
+        self.assertEqual(self.outbox.get_offset('costing'), 5)
+        parked = self.outbox.get_parked('costing')
+        self.assertEqual([(p['event_id'], p['attempts']) for p in parked], [(2, 3)])
+        self.assertEqual(parked[0]['event_type'], EventTypes.LOAD_STATUS_CHANGED)
+        self.assertIn('payload inválido', parked[0]['last_error'])
+
+    def test_failed_event_waits_for_backoff(self):
+        now = [datetime(2025, 3, 1, 8, 0, 0)]
+        attempts = []
+
+        def flaky(event):
+            attempts.append(event.data['load_id'])
+            if event.data['load_id'] == 1 and len(attempts) < 3:
+                raise RuntimeError("base de tarifas no disponible")
+
+        relay = OutboxRelay(self.outbox, retry_backoff=10, clock=lambda: now[0])
+        relay.subscribe('costing', EventTypes.LOAD_STATUS_CHANGED, flaky)
+
+        relay.run_once()
+        relay.run_once()  # Dentro del backoff: no se reintenta
+        self.assertEqual(attempts, [1])
+
+        now[0] += timedelta(seconds=10)
+        relay.run_once()  # Segundo fallo: el backoff se duplica
+        now[0] += timedelta(seconds=10)
+        relay.run_once()
+        self.assertEqual(attempts, [1, 1])
+
+        now[0] += timedelta(seconds=10)
+        self.assertEqual(relay.run_once(), 5)
+        self.assertEqual(self.outbox.get_failures('costing', [1]), {})
+
+    def test_replay_redelivers_parked_event(self):
+        fail = [True]
+
+        def handler(event):
+            if fail[0] and event.data['load_id'] == 1:
+                raise RuntimeError("error transitorio")
+
+        relay = OutboxRelay(self.outbox, max_attempts=1)
+        relay.subscribe('compliance', EventTypes.LOAD_STATUS_CHANGED, handler)
+        relay.run_once()
+        self.assertEqual(len(self.outbox.get_parked()), 1)
+
+        fail[0] = False
+        relay.replay('compliance', from_event_id=1)
+        self.assertEqual(relay.run_once(), 5)
+        self.assertEqual(self.outbox.get_parked(), [])
+
+    def test_only_subscribed_event_types_are_delivered(self):
+        self.outbox.append(Event(EventTypes.LOAD_ARRIVED_AT_FIELD, {'load_id': 1, 'site_id': 5}))
+        arrivals = []
+        self.relay.subscribe('agronomy', EventTypes.LOAD_ARRIVED_AT_FIELD, arrivals.append)
+
+        self.relay.run_once()
+
+        self.assertEqual([e.data for e in arrivals], [{'load_id': 1, 'site_id': 5}])
+        self.assertEqual(self.outbox.get_offset('agronomy'), 6)
+
+    def test_replay_redelivers_from_event(self):
+        received = []
+        self.relay.subscribe('compliance', EventTypes.LOAD_STATUS_CHANGED,
+                             lambda event: received.append(event.data['load_id']))
+        self.relay.run_once()
+
+        self.relay.replay('compliance', from_event_id=4)
+        self.relay.run_once()
+
+        self.assertEqual(received, [1, 2, 3, 4, 5, 4, 5])
+        with self.assertRaises(ValueError):
+            self.relay.replay('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,6 +18,7 @@ from typing import List
 from domain.finance.services.tariff_adjustment_service import TariffAdjustmentService
 from domain.finance.services.cost_calculator_service import TransportCostCalculator
 from domain.finance.services.revenue_calculator_service import ClientRevenueCalculator
+from domain.logistics.routing import ShortestPathRouter, route_nodes
 
 # Entidades y DTOs
 from domain.finance.entities.finance_entities import (
@@ -237,6 +238,87 @@ class TestTransportCostCalculator(unittest.TestCase):
                 tariff=self.tariff_batea,
                 cycle=self.cycle
             )
+    
+    def test_route_derived_through_facility(self):
+        """
+        Test: Ruta directa derivada por el camino más corto.
+        Escenario: no existe 1→20, pero sí 1→2 (enlace) y 2→20 (directa)
+        Resultado esperado: 30 + 40 = 70 km
+        """
+        route_map = [
+            DistanceRoute(origin_id=1, destination_id=2, km=30.0, is_segment_link=True),
+            DistanceRoute(origin_id=2, destination_id=20, km=40.0)
+        ]
+        
+        route = self.calculator._find_route(1, 20, route_map, is_segment=False)
+        
+        self.assertEqual(route.km, 70.0)
+        self.assertFalse(route.is_segment_link)
+    
+    def test_facility_and_site_with_same_id_are_distinct_nodes(self):
+        """
+        Test: Planta 5 y sitio 5 no son el mismo nodo del grafo.
+        Escenario: 1→sitio 5 y planta 5→sitio 20; sin camino real 1→20
+        Resultado esperado: InvalidRouteError
+        """
+        route_map = [
+            DistanceRoute(origin_id=1, destination_id=5, km=10.0),
+            DistanceRoute(origin_id=5, destination_id=20, km=10.0)
+        ]
+        
+        with self.assertRaises(InvalidRouteError):
+            self.calculator._find_route(1, 20, route_map, is_segment=False)
+    
+    def test_site_and_treatment_plant_with_same_id_are_distinct_nodes(self):
+        """
+        Test: Sitio 20 y planta de tratamiento 20 no son el mismo destino.
+        Escenario: solo existe 1→sitio 20; se pide 1→planta de tratamiento 20
+        Resultado esperado: InvalidRouteError (ni coincidencia directa ni camino)
+        """
+        route_map = [DistanceRoute(origin_id=1, destination_id=20, km=50.0)]
+        
+        with self.assertRaises(InvalidRouteError):
+            self.calculator._find_route(1, 20, route_map, is_segment=False, destination_type='TREATMENT_PLANT')
+        
+        route_map.append(DistanceRoute(origin_id=1, destination_id=20, km=65.0, destination_type='TREATMENT_PLANT'))
+        route = self.calculator._find_route(1, 20, route_map, is_segment=False, destination_type='TREATMENT_PLANT')
+        self.assertEqual(route.km, 65.0)
+    
+    def test_injected_router_derives_missing_routes(self):
+        """Test: Con el router de la matriz inyectado, se deriva sobre la matriz completa."""
+        router = ShortestPathRouter([
+            route_nodes(1, 2, 'FACILITY') + (30.0,),
+            route_nodes(2, 20, 'SITE') + (40.0,),
+        ])
+        calculator = TransportCostCalculator(router=router)
+        
+        route = calculator._find_route(1, 20, [], is_segment=False)
+        
+        self.assertEqual(route.km, 70.0)
+        self.assertIs(calculator._router_for([]), router)
+    
+    def test_route_with_wrong_segment_flag_raises_error(self):
+        """
+        Test: El par existe solo como enlace y se pide como ruta directa.
+        Resultado esperado: InvalidRouteError (no se deriva)
+        """
+        route_map = [DistanceRoute(origin_id=1, destination_id=2, km=30.0, is_segment_link=True)]
+        
+        with self.assertRaises(InvalidRouteError):
+            self.calculator._find_route(1, 2, route_map, is_segment=False)
+    
+    def test_router_is_reused_for_same_route_map(self):
+        """Test: El router se construye una vez por matriz de distancias."""
+        route_map = [
+            DistanceRoute(origin_id=1, destination_id=2, km=30.0, is_segment_link=True),
+            DistanceRoute(origin_id=2, destination_id=20, km=40.0)
+        ]
+        
+        first = self.calculator._router_for(route_map)
+        self.assertIs(self.calculator._router_for(list(route_map)), first)
+        
+        route_map.append(DistanceRoute(origin_id=1, destination_id=30, km=5.0))
+        self.assertIsNot(self.calculator._router_for(route_map), first)
 
 
 class TestClientRevenueCalculator(unittest.TestCase):
@@ -0,0 +1,222 @@
+"""
+Test Suite para FinancialReportingService (liquidación mensual vectorizada).
+
+Valida:
+1. Costos de transporte (tarifa por tipo de vehículo, peso mínimo, distancia)
+2. Ingresos de clientes y costos de disposición (merge con ventanas de vigencia)
+3. Memoización LRU de liquidaciones de periodos abiertos
+
+Arquitectura: Tests puros sin BD; los datos de cargas se entregan como dicts
+tal como los retorna FinancialReportingRepository.fetch_loads_in_cycle.
+"""
+
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from domain.finance.services.financial_reporting_service import FinancialReportingService
+from helpers import StubProforma, make_cycle_load as make_load
+
+
+def make_service(**repos) -> FinancialReportingService:
+    """Crea el servicio con repositorios stub (sin BD)."""
+    return FinancialReportingService(
+        load_repo=SimpleNamespace(db_manager=None),
+        economic_repo=None,
+        contractor_tariffs_repo=repos.get('contractor_tariffs_repo'),
+        client_tariffs_repo=repos.get('client_tariffs_repo'),
+        distance_repo=repos.get('distance_repo'),
+        disposal_site_tariffs_repo=repos.get('disposal_site_tariffs_repo'),
+    )
+
+
+class TestContractorCosts(unittest.TestCase):
+    """Test Suite para _calculate_contractor_costs."""
+
+    def setUp(self):
+        self.service = make_service()
+        self.proforma = StubProforma({'BATEA': 0.002, 'AMPLIROLL': 0.003})
+
+    def test_rates_min_weight_and_distance(self):
+        """
+        Test: Tarifa por tipo, peso mínimo garantizado y distancia.
+        Escenario: BATEA 20t (sobre mínimo 15t) y AMPLIROLL 3t (bajo mínimo 7t)
+        """
+        df = self.service._calculate_contractor_costs([
+            make_load(1),
+            make_load(2, vehicle_type='ampliroll', net_weight_tons=3.0, distance_km=50.0),
+        ], fuel_price_month=1000.0, proforma=self.proforma)
+
+        rows = df.set_index('load_id')
+        self.assertAlmostEqual(rows.loc[1, 'subtotal_uf'], 20.0 * 100.0 * 0.002)
+        self.assertEqual(rows.loc[2, 'vehicle_type'], 'AMPLIROLL')
+        self.assertAlmostEqual(rows.loc[2, 'billable_weight'], 7.0)
+        self.assertAlmostEqual(rows.loc[2, 'subtotal_uf'], 7.0 * 50.0 * 0.003)
+
+    def test_missing_route_and_vehicle_type_defaults(self):
+        """
+        Test: Sin distancia configurada → 0 km; sin tipo → AMPLIROLL.
+        Sin proforma se usan las tarifas por defecto.
+        """
+        df = self.service._calculate_contractor_costs([
+            make_load(1, distance_km=None, vehicle_type=None, net_weight_tons=None),
+        ], fuel_price_month=1000.0, proforma=None)
+
+        row = df.iloc[0]
+        self.assertEqual(row['vehicle_type'], 'AMPLIROLL')
+        self.assertEqual(row['distance_km'], 0.0)
+        self.assertAlmostEqual(row['billable_weight'], 7.0)
+        self.assertAlmostEqual(row['base_rate_uf'], FinancialReportingService.DEFAULT_TARIFFS_UF['AMPLIROLL'])
+        self.assertEqual(row['subtotal_uf'], 0.0)
+
+    def test_empty_loads(self):
+        """Test: Sin cargas retorna DataFrame vacío con columnas."""
+        df = self.service._calculate_contractor_costs([], fuel_price_month=1000.0)
+        self.assertTrue(df.empty)
+        self.assertIn('subtotal_uf', df.columns)
+
+
+
+class StubTariffsRepo:
+    """Stub de repositorio de tarifas (cliente o sitio)."""
+    def __init__(self, tariffs):
+        self.tariffs = tariffs
+
+    def get_all_active(self):
+        return [t for t in self.tariffs if t.get('valid_to') is None]
+
+    def get_effective_between(self, start_date, end_date):
+        return [
+            t for t in self.tariffs
+            if t['valid_from'] <= end_date and (t.get('valid_to') is None or t['valid_to'] >= start_date)
+        ]
+
+
+class TestClientRevenues(unittest.TestCase):
+    """Test Suite para _calculate_client_revenues."""
+
+    def setUp(self):
+        self.repo = StubTariffsRepo([
+            {'client_id': 1, 'concept': 'TRANSPORTE', 'rate_uf': 1.0,
+             'min_weight_guaranteed': 10.0, 'valid_from': '2025-01-01', 'valid_to': '2025-10-31'},
+            {'client_id': 1, 'concept': 'TRANSPORTE', 'rate_uf': 2.0,
+             'min_weight_guaranteed': 10.0, 'valid_from': '2025-11-01', 'valid_to': None},
+            {'client_id': 1, 'concept': 'DISPOSICION', 'rate_uf': 0.5,
+             'min_weight_guaranteed': 0.0, 'valid_from': '2025-01-01', 'valid_to': None},
+            {'client_id': 2, 'concept': 'TRANSPORTE', 'rate_uf': 9.0,
+             'min_weight_guaranteed': 0.0, 'valid_from': '2025-01-01', 'valid_to': None},
+        ])
+        self.service = make_service(client_tariffs_repo=self.repo)
+
+    def test_one_row_per_load_and_concept(self):
+        """
+        Test: Cada carga se expande por concepto con la tarifa vigente a su fecha.
+        Escenario: carga del 25-oct usa tarifa antigua; carga del 05-nov la nueva.
+        """
+        df = self.service._calculate_client_revenues(
+            [
+                make_load(1, scheduled_date='2025-10-25'),
+                make_load(2, scheduled_date='2025-11-05', net_weight_tons=4.0),
+                make_load(3, client_id=None),
+            ],
+            cycle_start=datetime(2025, 10, 19),
+            cycle_end=datetime(2025, 11, 18)
+        )
+
+        self.assertEqual(list(df.columns), FinancialReportingService.CLIENT_COLUMNS)
+        rows = {(r.load_id, r.concept): r for r in df.itertuples()}
+        self.assertEqual(set(rows), {(1, 'TRANSPORTE'), (1, 'DISPOSICION'), (2, 'TRANSPORTE'), (2, 'DISPOSICION')})
+        self.assertAlmostEqual(rows[(1, 'TRANSPORTE')].subtotal_uf, 20.0 * 1.0)
+        self.assertAlmostEqual(rows[(2, 'TRANSPORTE')].weight, 10.0)  # Peso mínimo
+        self.assertAlmostEqual(rows[(2, 'TRANSPORTE')].subtotal_uf, 10.0 * 2.0)
+        self.assertAlmostEqual(rows[(2, 'DISPOSICION')].subtotal_uf, 4.0 * 0.5)
+
+    def test_without_cycle_uses_active_tariffs(self):
+        """Test: Sin fechas de ciclo se usan solo tarifas activas."""
+        df = self.service._calculate_client_revenues([make_load(1, scheduled_date='2025-11-05')])
+        transporte = df[df['concept'] == 'TRANSPORTE'].iloc[0]
+        self.assertAlmostEqual(transporte['rate_uf'], 2.0)
+
+
+class TestDisposalCosts(unittest.TestCase):
+    """Test Suite para _calculate_disposal_costs."""
+
+    def test_merge_by_site(self):
+        """
+        Test: Solo cargas a sitios con tarifa; aplica peso mínimo del sitio.
+        """
+        repo = StubTariffsRepo([
+            {'site_id': 5, 'site_name': 'Sitio 5', 'rate_uf': 0.3,
+             'min_weight_guaranteed': 25.0, 'valid_from': '2025-01-01', 'valid_to': None},
+        ])
+        service = make_service(disposal_site_tariffs_repo=repo)
+        df = service._calculate_disposal_costs(
+            [
+                make_load(1),
+                make_load(2, destination_site_id=None, destination_treatment_plant_id=3),
+                make_load(3, destination_site_id=6),
+            ],
+            cycle_start=datetime(2025, 10, 19),
+            cycle_end=datetime(2025, 11, 18)
+        )
+
+        self.assertEqual(list(df.columns), FinancialReportingService.DISPOSAL_COLUMNS)
+        self.assertEqual(df['load_id'].tolist(), [1])
+        self.assertEqual(df.iloc[0]['site_name'], 'Sitio 5')
+        self.assertAlmostEqual(df.iloc[0]['subtotal_uf'], 25.0 * 0.3)
+
+
+class TestSettlementMemoization(unittest.TestCase):
+    """Test Suite para la caché de get_monthly_settlement (periodos abiertos)."""
+
+    def setUp(self):
+        self.service = FinancialReportingService(
+            load_repo=SimpleNamespace(db_manager=None),
+            economic_repo=SimpleNamespace(get_by_period=lambda year, month: {
+                'period_key': f'{year}-{month:02d}', 'uf_value': 38000.0,
+                'fuel_price': 1000.0, 'status': 'OPEN'
+            }),
+            contractor_tariffs_repo=None,
+            client_tariffs_repo=None,
+            distance_repo=None,
+        )
+        self.version = 'v1'
+        self.service.reporting_repo = SimpleNamespace(
+            get_settlement_fingerprint=lambda start, end: (self.version,)
+        )
+        self.service.ledger_repo = SimpleNamespace()
+        self.fetched = 0
+
+        def read_ledger(year, month, cycle_info):
+            self.fetched += 1
+            return SimpleNamespace(cycle_info=cycle_info)
+        self.service._settlement_from_ledger = read_ledger
+
+    def test_unchanged_data_reuses_result(self):
+        first = self.service.get_monthly_settlement(2025, 11)
+        second = self.service.get_monthly_settlement(2025, 11)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.fetched, 1)
+
+    def test_changed_fingerprint_recomputes(self):
+        first = self.service.get_monthly_settlement(2025, 11)
+        self.version = 'v2'
+        second = self.service.get_monthly_settlement(2025, 11)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.fetched, 2)
+        self.assertEqual(len(self.service._settlement_cache), 1)
+
+    def test_lru_eviction(self):
+        self.service.SETTLEMENT_CACHE_SIZE = 2
+        self.service.get_monthly_settlement(2025, 9)
+        self.service.get_monthly_settlement(2025, 10)
+        self.service.get_monthly_settlement(2025, 9)   # 9 pasa a ser el más reciente
+        self.service.get_monthly_settlement(2025, 11)  # expulsa 10
+
+        self.assertEqual([key[:2] for key in self.service._settlement_cache], [(2025, 9), (2025, 11)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Test Suite para la lectura incremental del tablero de flota.
+
+Valida:
+1. Lectura completa: solo cargas en ruta / en destino, con watermark
+2. Delta: solo cargas con updated_at o historial de estados posterior al watermark
+3. refresh_fleet_monitoring fusiona el delta con el tablero cacheado
+   (reemplaza, agrega y elimina cargas que salen del circuito)
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from infrastructure.persistence.reporting_repository import ReportingRepository
+from infrastructure.reporting.reporting_service import ReportingService
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, status TEXT, vehicle_id INTEGER, driver_id INTEGER,
+        origin_facility_id INTEGER, origin_treatment_plant_id INTEGER, destination_site_id INTEGER,
+        dispatch_time DATETIME, arrival_time DATETIME, gross_weight REAL, tare_weight REAL,
+        net_weight REAL, weight_gross_reception REAL, ticket_number TEXT, guide_number TEXT,
+        updated_at DATETIME
+    );
+    CREATE INDEX idx_loads_updated_at ON loads(updated_at);
+    CREATE TABLE load_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, load_id INTEGER NOT NULL, from_status TEXT NOT NULL,
+        to_status TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, user_id INTEGER, notes TEXT
+    );
+    CREATE TABLE vehicles (id INTEGER PRIMARY KEY, license_plate TEXT);
+    CREATE TABLE drivers (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE facilities (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE treatment_plants (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE sites (id INTEGER PRIMARY KEY, name TEXT);
+"""
+
+OLD = '2020-01-01 00:00:00'
+
+
+class FleetDeltaTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+
+    def setUp(self):
+        super().setUp()
+        dispatched = (datetime.now() - timedelta(hours=5)).strftime('%Y-%m-%d %H:%M:%S')
+        arrived = (datetime.now() - timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
+        with self.db as conn:
+            conn.execute("INSERT INTO vehicles VALUES (1, 'AB-1234')")
+            conn.execute("INSERT INTO facilities VALUES (1, 'Planta')")
+            conn.execute("INSERT INTO sites VALUES (5, 'Predio')")
+            conn.executemany(
+                "INSERT INTO loads (id, status, vehicle_id, origin_facility_id, destination_site_id, "
+                "dispatch_time, arrival_time, net_weight, updated_at) VALUES (?, ?, 1, 1, 5, ?, ?, 18000, ?)",
+                [
+                    (1, 'EN_ROUTE_DESTINATION', dispatched, None, OLD),
+                    (2, 'AT_DESTINATION', dispatched, arrived, OLD),
+                    (3, 'COMPLETED', dispatched, arrived, OLD),
+                    (4, 'ASSIGNED', None, None, OLD),
+                ]
+            )
+        self.repo = ReportingRepository(self.db)
+        self.service = ReportingService(self.repo)
+
+    def execute(self, sql, params=()):
+        with self.db as conn:
+            conn.execute(sql, params)
+
+
+class TestFleetMonitoringChanges(FleetDeltaTestCase):
+
+    def test_full_read_returns_board_and_watermark(self):
+        df, watermark = self.repo.get_fleet_monitoring_changes(None)
+
+        self.assertEqual(sorted(df['load_id']), [1, 2])
+        self.assertEqual(df.loc[df['load_id'] == 1, 'site_name'].iloc[0], 'Predio')
+        self.assertEqual(watermark.history_id, 0)
+
+    def test_delta_returns_only_changed_loads(self):
+        _, watermark = self.repo.get_fleet_monitoring_changes(None)
+        self.assertTrue(self.repo.get_fleet_monitoring_changes(watermark)[0].empty)
+
+        self.execute("UPDATE loads SET status = 'EN_ROUTE_DESTINATION', updated_at = CURRENT_TIMESTAMP WHERE id = 4")
+        self.execute("INSERT INTO load_status_history (load_id, from_status, to_status) "
+                     "VALUES (3, 'AT_DESTINATION', 'COMPLETED')")
+
+        df, next_watermark = self.repo.get_fleet_monitoring_changes(watermark)
+
+        self.assertEqual(sorted(df['load_id']), [3, 4])
+        self.assertEqual(next_watermark.history_id, 1)
+
+
+class TestRefreshFleetMonitoring(FleetDeltaTestCase):
+
+    def test_merges_delta_into_cached_board(self):
+        board, watermark = self.service.refresh_fleet_monitoring(None, None)
+        self.assertEqual(sorted(board['load_id']), [1, 2])
+
+        # 1 llega a destino, 2 se completa, 4 sale a ruta
+        self.execute("UPDATE loads SET status = 'AT_DESTINATION', arrival_time = ?, "
+                     "updated_at = CURRENT_TIMESTAMP WHERE id = 1",
+                     ((datetime.now() - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),))
+        self.execute("UPDATE loads SET status = 'COMPLETED', updated_at = CURRENT_TIMESTAMP WHERE id = 2")
+        self.execute("UPDATE loads SET status = 'EN_ROUTE_DESTINATION', dispatch_time = ?, "
+                     "updated_at = CURRENT_TIMESTAMP WHERE id = 4",
+                     (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+
+        board, _ = self.service.refresh_fleet_monitoring(board, watermark)
+
+        self.assertEqual(list(board['load_id']), [4, 1])  # Por hora de despacho descendente
+        self.assertEqual(board.set_index('load_id').loc[1, 'status'], 'AT_DESTINATION')
+        self.assertAlmostEqual(board.set_index('load_id').loc[1, 'waiting_time'], 1.0, places=1)
+        self.assertAlmostEqual(board.set_index('load_id').loc[1, 'hours_elapsed'], 4.0, places=1)
+
+    def test_unchanged_board_keeps_cache_and_refreshes_timings(self):
+        board, watermark = self.service.refresh_fleet_monitoring(None, None)
+
+        refreshed, _ = self.service.refresh_fleet_monitoring(board, watermark)
+
+        self.assertEqual(sorted(refreshed['load_id']), [1, 2])
+        timings = refreshed.set_index('load_id')
+        self.assertAlmostEqual(timings.loc[1, 'hours_elapsed'], 5.0, places=1)
+        self.assertAlmostEqual(timings.loc[2, 'hours_elapsed'], 2.0, places=1)
+        self.assertAlmostEqual(timings.loc[2, 'waiting_time'], 3.0, places=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Test Suite para BaseRepository y su infraestructura de persistencia.
+
+Valida:
+1. SchemaRegistry (caché de metadatos de tablas)
+2. RowMapper (mapeo compilado fila → modelo)
+3. CRUD genérico sobre una BD SQLite temporal
+4. Escrituras masivas (add_many / update_many / upsert_many)
+"""
+
+import unittest
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any
+
+from infrastructure.persistence.generic_repository import BaseRepository
+from infrastructure.persistence.row_mapper import get_row_mapper
+from helpers import TempDatabaseTestCase
+
+
+@dataclass
+class Widget:
+    """Modelo simplificado para testing."""
+    id: Optional[int] = None
+    name: str = ""
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    is_active: bool = True
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class RepositoryTestCase(TempDatabaseTestCase):
+    """Base con una BD temporal y la tabla `widgets`."""
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute("""
+                CREATE TABLE widgets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    attributes TEXT,
+                    is_active INTEGER DEFAULT 1,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+        self.repo = BaseRepository(self.db, Widget, "widgets")
+
+
+class TestSchemaRegistry(RepositoryTestCase):
+    """Test Suite para SchemaRegistry."""
+
+    def test_schema_is_cached(self):
+        """Test: La tabla se introspecciona una sola vez."""
+        with self.db as conn:
+            first = self.db.schema_registry.get(conn, "widgets")
+            second = self.db.schema_registry.get(conn, "widgets")
+        self.assertIs(first, second)
+        self.assertTrue(first.has_is_active)
+        self.assertTrue(first.has_updated_at)
+
+    def test_schema_change_is_detected(self):
+        """Test: Un ALTER TABLE invalida la caché vía PRAGMA schema_version."""
+        self.db.schema_registry.check_interval = 0
+        with self.db as conn:
+            self.db.schema_registry.get(conn, "widgets")
+            conn.execute("ALTER TABLE widgets ADD COLUMN color TEXT")
+            schema = self.db.schema_registry.get(conn, "widgets")
+        self.assertIn("color", schema.columns)
+
+    def test_explicit_invalidate(self):
+        """Test: invalidate() fuerza una nueva introspección."""
+        with self.db as conn:
+            first = self.db.schema_registry.get(conn, "widgets")
+            self.db.schema_registry.invalidate("widgets")
+            second = self.db.schema_registry.get(conn, "widgets")
+        self.assertIsNot(first, second)
+
+
+class TestRowMapper(unittest.TestCase):
+    """Test Suite para RowMapper."""
+
+    def test_mapper_is_compiled_once_per_column_tuple(self):
+        """Test: La misma combinación (modelo, columnas) reutiliza el mapper."""
+        columns = ("id", "name")
+        self.assertIs(get_row_mapper(Widget, columns), get_row_mapper(Widget, columns))
+
+    def test_json_datetime_and_unknown_columns(self):
+        """Test: Decodifica JSON y fechas; ignora columnas fuera del modelo."""
+        mapper = get_row_mapper(
+            Widget,
+            ("id", "name", "attributes", "created_at", "extra"),
+            datetime_fields=("created_at",)
+        )
+        widget = mapper.map((1, "a", '{"k": 1}', "2025-01-02 03:04:05", "ignored"))
+        self.assertEqual(widget.attributes, {"k": 1})
+        self.assertEqual(widget.created_at, datetime(2025, 1, 2, 3, 4, 5))
+
+    def test_invalid_values_are_kept_raw(self):
+        """Test: JSON o fechas inválidas se preservan sin lanzar error."""
+        mapper = get_row_mapper(Widget, ("attributes", "created_at"), datetime_fields=("created_at",))
+        widget = mapper.map(("not-json", "not-a-date"))
+        self.assertEqual(widget.attributes, "not-json")
+        self.assertEqual(widget.created_at, "not-a-date")
+
+    def test_alias_is_filled_from_source(self):
+        """Test: El alias toma el valor de la columna origen si no es NULL."""
+        mapper = get_row_mapper(Widget, ("name",), field_aliases=(("updated_at", "name"),))
+        self.assertEqual(mapper.map(("x",)).updated_at, "x")
+        self.assertIsNone(mapper.map((None,)).updated_at)
+
+
+class TestBaseRepositoryCrud(RepositoryTestCase):
+    """Test Suite para CRUD genérico."""
+
+    def test_add_update_soft_delete(self):
+        """Test: Ciclo completo add → update → delete (soft)."""
+        widget = self.repo.add(Widget(name="a", attributes={"k": 1}))
+        self.assertIsNotNone(widget.id)
+
+        widget.name = "b"
+        self.assertTrue(self.repo.update(widget))
+        loaded = self.repo.get_by_id(widget.id)
+        self.assertEqual(loaded.name, "b")
+        self.assertEqual(loaded.attributes, {"k": 1})
+
+        self.assertTrue(self.repo.delete(widget.id))
+        self.assertEqual(self.repo.get_all(), [])
+        self.assertEqual(len(self.repo.get_all(active_only=False)), 1)
+
+
+class TestBaseRepositoryBulk(RepositoryTestCase):
+    """Test Suite para escrituras masivas."""
+
+    def test_add_many_assigns_ids(self):
+        """Test: add_many asigna el ID de cada fila y serializa JSON."""
+        widgets = self.repo.add_many([
+            Widget(name=f"w{i}", attributes={"i": i}) for i in range(5)
+        ])
+        ids = [w.id for w in widgets]
+        self.assertEqual(len(set(ids)), 5)
+        for widget in widgets:
+            loaded = self.repo.get_by_id(widget.id)
+            self.assertEqual(loaded.name, widget.name)
+            self.assertEqual(loaded.attributes, widget.attributes)
+
+    def test_add_many_is_atomic(self):
+        """Test: Un error en el lote revierte todas las inserciones."""
+        with self.assertRaises(Exception):
+            self.repo.add_many([Widget(name="dup"), Widget(name="dup")])
+        self.assertEqual(self.repo.get_all(), [])
+
+    def test_update_many(self):
+        """Test: update_many actualiza todas las filas del lote."""
+        widgets = self.repo.add_many([Widget(name=f"w{i}") for i in range(3)])
+        for widget in widgets:
+            widget.attributes = {"updated": True}
+        self.assertEqual(self.repo.update_many(widgets), 3)
+        loaded = self.repo.get_by_ids([w.id for w in widgets])
+        self.assertTrue(all(w.attributes == {"updated": True} for w in loaded))
+
+    def test_upsert_many(self):
+        """Test: upsert_many inserta nuevas filas y actualiza existentes."""
+        self.repo.add(Widget(name="a", attributes={"v": 1}))
+        self.repo.upsert_many(
+            [Widget(name="a", attributes={"v": 2}), Widget(name="b")],
+            conflict_columns=("name",)
+        )
+        by_name = {w.name: w for w in self.repo.get_all()}
+        self.assertEqual(set(by_name), {"a", "b"})
+        self.assertEqual(by_name["a"].attributes, {"v": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Test Suite para seguimiento de cambios en Load (UPDATE parcial).
+
+Valida:
+1. Una carga leída de BD solo escribe las columnas modificadas
+2. Mutaciones in-place de attributes se detectan
+3. merge_attributes mezcla claves en SQLite sin pisar formularios concurrentes
+"""
+
+import unittest
+
+from domain.logistics.entities.load import Load
+from domain.logistics.repositories.load_repository import LoadRepository
+from domain.logistics.services.load_state_service import LoadStateService
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, origin_facility_id INTEGER, vehicle_id INTEGER,
+        destination_site_id INTEGER, status TEXT, net_weight REAL,
+        attributes TEXT DEFAULT '{}', sync_status TEXT DEFAULT 'SYNCED', last_updated_local DATETIME,
+        created_at DATETIME, updated_at DATETIME
+    );
+"""
+
+
+class TestLoadChangeTracking(TempDatabaseTestCase):
+    """Test Suite para dirty tracking y merge de atributos."""
+    schema = SCHEMA
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute(
+                "INSERT INTO loads (id, origin_facility_id, vehicle_id, destination_site_id, status, net_weight, attributes) "
+                "VALUES (1, 1, 7, 5, 'REQUESTED', 10.0, '{\"gate\": true}')"
+            )
+            conn.execute("INSERT INTO loads (id, origin_facility_id, status) VALUES (2, 1, 'REQUESTED')")
+        self.repo = LoadRepository(self.db)
+
+    def column(self, name):
+        with self.db as conn:
+            return conn.execute(f"SELECT {name} FROM loads WHERE id = 1").fetchone()[0]
+
+    def test_untracked_entity_has_no_dirty_fields(self):
+        self.assertIsNone(Load(id=None, origin_facility_id=1).dirty_fields())
+
+    def test_loaded_entity_writes_only_modified_columns(self):
+        stale = self.repo.get_by_id(1)
+        fresh = self.repo.get_by_id(1)
+        self.assertEqual(fresh.dirty_fields(), frozenset())
+
+        fresh.status = 'ASSIGNED'
+        self.assertTrue(self.repo.update(fresh))
+        self.assertEqual(fresh.dirty_fields(), frozenset())
+
+        # La copia desactualizada cambia otra columna: no revierte el estado
+        stale.net_weight = 12.5
+        self.assertEqual(stale.dirty_fields(), frozenset({'net_weight'}))
+        self.repo.update(stale)
+
+        self.assertEqual(self.column('status'), 'ASSIGNED')
+        self.assertEqual(self.column('net_weight'), 12.5)
+
+    def test_setting_none_clears_column(self):
+        load = self.repo.get_by_id(1)
+        load.destination_site_id = None
+        self.repo.update(load)
+
+        self.assertIsNone(self.column('destination_site_id'))
+
+    def test_in_place_attribute_mutation_is_detected(self):
+        load = self.repo.get_by_id(1)
+        load.attributes['ph'] = 7.1
+
+        self.assertEqual(load.dirty_fields(), frozenset({'attributes'}))
+        self.repo.update_many([load])
+        self.assertEqual(self.repo.get_by_id(1).attributes, {'gate': True, 'ph': 7.1})
+
+    def test_update_many_counts_only_existing_rows(self):
+        changed, unchanged = self.repo.get_by_ids([1, 2])
+        deleted = self.repo.get_by_id(2)
+        with self.db as conn:
+            conn.execute("DELETE FROM loads WHERE id = 2")
+        changed.status = 'ASSIGNED'
+        deleted.status = 'ASSIGNED'
+
+        self.assertEqual(self.repo.update_many([changed, unchanged, deleted]), 1)
+        self.assertEqual(changed.dirty_fields(), frozenset())
+        self.assertEqual(deleted.dirty_fields(), frozenset({'status'}))  # No se escribió
+        self.assertFalse(self.repo.update(unchanged))
+
+    def test_concurrent_attribute_merges_keep_both_keys(self):
+        service = LoadStateService(self.db)
+        service.update_load_attributes(1, {'lab_analysis_result': {'ph': 7.2}})
+        service.update_load_attributes(1, {'gross_weight': 30000, 'gate': False})
+
+        self.assertEqual(self.repo.get_by_id(1).attributes, {
+            'gate': False,
+            'lab_analysis_result': {'ph': 7.2},
+            'gross_weight': 30000,
+        })
+
+    def test_merge_attributes_marks_load_pending_sync(self):
+        self.assertTrue(self.repo.merge_attributes(1, {'gate': False}))
+
+        self.assertEqual(self.column('sync_status'), 'PENDING')
+        self.assertIsNotNone(self.column('last_updated_local'))
+
+    def test_merge_attributes_on_missing_load(self):
+        with self.assertRaises(ValueError):
+            LoadStateService(self.db).update_load_attributes(99, {'x': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
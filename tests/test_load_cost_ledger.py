@@ -0,0 +1,326 @@
+"""
+Test Suite para el ledger de costos por carga.
+
+Valida:
+1. refresh_ledger valoriza transporte, disposición e ingresos con las reglas
+   de la liquidación y en el periodo (ciclo 19 a 18) de la carga
+2. Recalcular una carga reemplaza sus entradas (idempotente)
+3. Los totales del ledger (SUM ... GROUP BY) coinciden con la liquidación
+4. El ciclo incluye las cargas del día 19 (límites por fecha de calendario)
+5. get_monthly_settlement solo lee el ledger; sync_ledger recalcula solo
+   cargas modificadas y los periodos cerrados no se recalculan
+6. CostingListener escribe el ledger al completar una carga
+"""
+
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from infrastructure.events.event_bus import Event, EventTypes
+from domain.finance.repositories.load_cost_ledger_repository import LoadCostLedgerRepository
+from domain.finance.services.financial_reporting_service import FinancialReportingService
+from domain.finance.services.costing_listener import CostingListener
+from helpers import TempDatabaseTestCase
+
+MIGRATIONS = ('035_load_cost_ledger.sql', '042_table_change_counters.sql')
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, manifest_code TEXT, vehicle_id INTEGER, status TEXT,
+        scheduled_date DATETIME, net_weight REAL, origin_facility_id INTEGER,
+        origin_treatment_plant_id INTEGER, destination_site_id INTEGER,
+        destination_treatment_plant_id INTEGER, updated_at DATETIME
+    );
+    CREATE TABLE vehicles (id INTEGER PRIMARY KEY, type TEXT, license_plate TEXT, updated_at DATETIME);
+    CREATE TABLE facilities (id INTEGER PRIMARY KEY, name TEXT, client_id INTEGER, updated_at DATETIME);
+    CREATE TABLE clients (id INTEGER PRIMARY KEY, name TEXT, updated_at DATETIME);
+    CREATE TABLE treatment_plants (id INTEGER PRIMARY KEY, name TEXT, updated_at DATETIME);
+    CREATE TABLE sites (id INTEGER PRIMARY KEY, name TEXT, updated_at DATETIME);
+    CREATE TABLE client_tariffs (id INTEGER PRIMARY KEY, updated_at DATETIME);
+    CREATE TABLE disposal_site_tariffs (id INTEGER PRIMARY KEY, updated_at DATETIME);
+    CREATE TABLE proformas (id INTEGER PRIMARY KEY, updated_at DATETIME);
+    CREATE TABLE economic_indicators (id INTEGER PRIMARY KEY, updated_at DATETIME);
+    CREATE TABLE distance_matrix (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, origin_facility_id INTEGER, destination_id INTEGER,
+        destination_type TEXT, distance_km REAL, is_link_segment INTEGER DEFAULT 0, updated_at DATETIME
+    );
+"""
+
+
+class StubTariffsRepo:
+    """Stub de repositorio de tarifas (cliente o sitio)."""
+    def __init__(self, tariffs):
+        self.tariffs = tariffs
+
+    def get_all_active(self):
+        return [t for t in self.tariffs if t.get('valid_to') is None]
+
+    def get_effective_between(self, start_date, end_date):
+        return [
+            t for t in self.tariffs
+            if t['valid_from'] <= end_date and (t.get('valid_to') is None or t['valid_to'] >= start_date)
+        ]
+
+
+class StubProformaRepo:
+    """Proforma por periodo con tarifas por tipo de vehículo."""
+    def __init__(self, tariffs_by_period):
+        self.tariffs_by_period = tariffs_by_period
+
+    def get_by_period(self, year, month):
+        tariffs = self.tariffs_by_period.get((year, month))
+        if tariffs is None:
+            return None
+        return SimpleNamespace(
+            proforma_code=f"PF-{year}-{month:02d}", uf_value=38000.0, fuel_price=1000.0,
+            extra_indicators={}, is_closed=False,
+            get_period_key=lambda: f"{year}-{month:02d}",
+            get_tariff_for_vehicle_type=tariffs.get
+        )
+
+
+class LedgerTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+    migrations = MIGRATIONS
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute("INSERT INTO vehicles (id, type, license_plate) "
+                         "VALUES (1, 'batea', 'AB-1234'), (2, 'AMPLIROLL', 'CD-5678')")
+            conn.execute("INSERT INTO clients (id, name) VALUES (1, 'Cliente')")
+            conn.execute("INSERT INTO facilities (id, name, client_id) VALUES (1, 'Planta', 1)")
+            conn.execute("INSERT INTO sites (id, name) VALUES (5, 'Predio')")
+            conn.execute("INSERT INTO proformas (id, updated_at) VALUES (1, '2025-01-01 00:00:00')")
+            conn.execute(
+                "INSERT INTO distance_matrix (origin_facility_id, destination_id, destination_type, distance_km) "
+                "VALUES (1, 5, 'SITE', 100.0)"
+            )
+            conn.executemany(
+                "INSERT INTO loads (id, manifest_code, vehicle_id, status, scheduled_date, net_weight, "
+                "origin_facility_id, destination_site_id) VALUES (?, ?, ?, ?, ?, ?, 1, 5)",
+                [
+                    (1, 'M-1', 1, 'COMPLETED', '2025-11-01 08:00:00', 20000.0),
+                    (2, 'M-2', 2, 'COMPLETED', '2025-11-10 08:00:00', 3000.0),   # Bajo el mínimo
+                    (3, 'M-3', 1, 'COMPLETED', '2025-11-20 08:00:00', 18000.0),  # Periodo diciembre
+                    (4, 'M-4', 1, 'EN_ROUTE_DESTINATION', '2025-11-05 08:00:00', 18000.0),
+                ]
+            )
+        self.ledger_repo = LoadCostLedgerRepository(self.db)
+        self.service = FinancialReportingService(
+            load_repo=SimpleNamespace(db_manager=self.db),
+            economic_repo=None,
+            contractor_tariffs_repo=None,
+            client_tariffs_repo=StubTariffsRepo([
+                {'client_id': 1, 'concept': 'TRANSPORTE', 'rate_uf': 0.5,
+                 'min_weight_guaranteed': 10.0, 'valid_from': '2025-01-01', 'valid_to': None},
+                {'client_id': 1, 'concept': 'DISPOSICION', 'rate_uf': 0.2,
+                 'min_weight_guaranteed': 0.0, 'valid_from': '2025-01-01', 'valid_to': None},
+            ]),
+            distance_repo=None,
+            disposal_site_tariffs_repo=StubTariffsRepo([
+                {'site_id': 5, 'site_name': 'Predio', 'rate_uf': 0.1,
+                 'min_weight_guaranteed': 5.0, 'valid_from': '2025-01-01', 'valid_to': None},
+            ]),
+            proforma_repo=StubProformaRepo({
+                (2025, 11): {'BATEA': 0.002, 'AMPLIROLL': 0.003},
+                (2025, 12): {'BATEA': 0.004, 'AMPLIROLL': 0.005},
+            }),
+            ledger_repo=self.ledger_repo
+        )
+
+
+class TestRefreshLedger(LedgerTestCase):
+
+    def test_prices_load_with_settlement_rules(self):
+        written = self.service.refresh_ledger([1])
+
+        entries = {(e['entry_type'], e['concept']): e for e in self.ledger_repo.get_by_load(1)}
+        self.assertEqual(written, 4)
+        self.assertEqual(sorted(entries), [
+            ('DISPOSAL', 'DISPOSICION'), ('REVENUE', 'DISPOSICION'),
+            ('REVENUE', 'TRANSPORTE'), ('TRANSPORT', 'TRANSPORTE'),
+        ])
+        transport = entries[('TRANSPORT', 'TRANSPORTE')]
+        self.assertEqual((transport['period_year'], transport['period_month']), (2025, 11))
+        self.assertAlmostEqual(transport['amount_uf'], 20.0 * 100.0 * 0.002)
+        self.assertEqual(transport['distance_km'], 100.0)
+        self.assertAlmostEqual(entries[('DISPOSAL', 'DISPOSICION')]['amount_uf'], 20.0 * 0.1)
+        self.assertAlmostEqual(entries[('REVENUE', 'TRANSPORTE')]['amount_uf'], 20.0 * 0.5)
+
+    def test_minimum_weight_and_period_of_load(self):
+        self.service.refresh_ledger([2, 3])
+
+        transport_2 = [e for e in self.ledger_repo.get_by_load(2) if e['entry_type'] == 'TRANSPORT'][0]
+        self.assertAlmostEqual(transport_2['quantity_tons'], 7.0)  # Mínimo AMPLIROLL
+        self.assertAlmostEqual(transport_2['amount_uf'], 7.0 * 100.0 * 0.003)
+
+        # Desde el día 19 la carga pertenece al periodo siguiente (tarifas de diciembre)
+        transport_3 = [e for e in self.ledger_repo.get_by_load(3) if e['entry_type'] == 'TRANSPORT'][0]
+        self.assertEqual((transport_3['period_year'], transport_3['period_month']), (2025, 12))
+        self.assertAlmostEqual(transport_3['amount_uf'], 18.0 * 100.0 * 0.004)
+
+    def test_refresh_is_idempotent_and_skips_incomplete_loads(self):
+        self.service.refresh_ledger([1, 4])
+        with self.db as conn:
+            conn.execute("UPDATE loads SET net_weight = 25000 WHERE id = 1")
+        self.service.refresh_ledger([1, 4])
+
+        entries = self.ledger_repo.get_by_load(1)
+        self.assertEqual(len(entries), 4)
+        transport = [e for e in entries if e['entry_type'] == 'TRANSPORT'][0]
+        self.assertAlmostEqual(transport['amount_uf'], 25.0 * 100.0 * 0.002)
+        self.assertEqual(self.ledger_repo.get_by_load(4), [])
+
+    def test_ledger_totals_match_settlement(self):
+        self.service.refresh_ledger([1, 2, 3, 4])
+
+        cycle_start, cycle_end = self.service._calculate_cycle_dates(2025, 11)
+        loads = self.service._fetch_loads_in_cycle(cycle_start, cycle_end)
+        proforma = self.service.proforma_repo.get_by_period(2025, 11)
+        transport = self.service._calculate_contractor_costs(loads, 1000.0, proforma)['subtotal_uf'].sum()
+        disposal = self.service._calculate_disposal_costs(loads, cycle_start, cycle_end)['subtotal_uf'].sum()
+        revenue = self.service._calculate_client_revenues(loads, cycle_start, cycle_end)['subtotal_uf'].sum()
+
+        totals = self.service.get_ledger_totals(2025, 11)
+        self.assertEqual(totals['load_count'], 2)
+        self.assertAlmostEqual(totals['total_transport_costs_uf'], transport)
+        self.assertAlmostEqual(totals['total_disposal_costs_uf'], disposal)
+        self.assertAlmostEqual(totals['total_revenue_uf'], revenue)
+        self.assertAlmostEqual(totals['margin_uf'], revenue - transport - disposal)
+
+        margins = self.ledger_repo.get_load_margins(2025, 11)
+        self.assertEqual([m['load_id'] for m in margins], [1, 2])
+        self.assertAlmostEqual(sum(m['margin_uf'] for m in margins), totals['margin_uf'])
+
+    def test_rebuild_period_recomputes_all_loads(self):
+        self.service.refresh_ledger([1])
+        self.service.proforma_repo.tariffs_by_period[(2025, 11)] = {'BATEA': 0.01, 'AMPLIROLL': 0.01}
+
+        self.assertEqual(self.service.rebuild_ledger(2025, 11), 8)
+
+        transport = [e for e in self.ledger_repo.get_by_load(1) if e['entry_type'] == 'TRANSPORT'][0]
+        self.assertAlmostEqual(transport['amount_uf'], 20.0 * 100.0 * 0.01)
+        self.assertEqual(self.service.get_ledger_totals(2025, 12)['load_count'], 0)
+
+    def test_requires_ledger_repository(self):
+        self.service.ledger_repo = None
+        with self.assertRaises(ValueError):
+            self.service.refresh_ledger([1])
+
+
+class TestCycleBounds(LedgerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute(
+                "INSERT INTO loads (id, manifest_code, vehicle_id, status, scheduled_date, net_weight, "
+                "origin_facility_id, destination_site_id) "
+                "VALUES (5, 'M-5', 1, 'COMPLETED', '2025-10-19 08:00:00', 10000.0, 1, 5)"
+            )
+
+    def test_cycle_includes_loads_on_the_19th(self):
+        cycle_start, cycle_end = self.service._calculate_cycle_dates(2025, 11)
+
+        loads = self.service._fetch_loads_in_cycle(cycle_start, cycle_end)
+
+        self.assertEqual([load['id'] for load in loads], [5, 1, 2])
+        self.assertEqual(self.service._period_of('2025-10-19 08:00:00'), (2025, 11))
+        self.assertEqual(self.service._period_of('2025-11-18T23:59:00'), (2025, 11))
+
+    def test_rebuild_keeps_loads_on_the_19th(self):
+        self.service.refresh_ledger([5])
+
+        self.service.rebuild_ledger(2025, 11)
+
+        transport = [e for e in self.ledger_repo.get_by_load(5) if e['entry_type'] == 'TRANSPORT'][0]
+        self.assertEqual((transport['period_year'], transport['period_month']), (2025, 11))
+        self.assertEqual(self.service.get_ledger_totals(2025, 11)['load_count'], 3)
+
+
+class TestSettlementFromLedger(LedgerTestCase):
+
+    def test_settlement_aggregates_ledger(self):
+        self.service.rebuild_ledger(2025, 11)
+
+        settlement = self.service.get_monthly_settlement(2025, 11)
+
+        cycle_start, cycle_end = self.service._calculate_cycle_dates(2025, 11)
+        loads = self.service._fetch_loads_in_cycle(cycle_start, cycle_end)
+        proforma = self.service.proforma_repo.get_by_period(2025, 11)
+        contractor_df = self.service._calculate_contractor_costs(loads, 1000.0, proforma)
+        disposal = self.service._calculate_disposal_costs(loads, cycle_start, cycle_end)['subtotal_uf'].sum()
+        revenue = self.service._calculate_client_revenues(loads, cycle_start, cycle_end)['subtotal_uf'].sum()
+
+        self.assertAlmostEqual(settlement.total_transport_costs_uf, contractor_df['subtotal_uf'].sum())
+        self.assertAlmostEqual(settlement.total_disposal_costs_uf, disposal)
+        self.assertAlmostEqual(settlement.total_revenue_uf, revenue)
+        self.assertEqual(list(settlement.contractor_df.columns), list(contractor_df.columns))
+        self.assertEqual(list(settlement.contractor_df['load_id']), [1, 2])
+        self.assertEqual(list(settlement.contractor_df['vehicle_plate']), ['AB-1234', 'CD-5678'])
+        self.assertEqual(list(settlement.disposal_df.columns), FinancialReportingService.DISPOSAL_COLUMNS)
+        self.assertEqual(list(settlement.client_df.columns), FinancialReportingService.CLIENT_COLUMNS)
+        self.assertEqual(set(settlement.client_df['client_name']), {'Cliente'})
+        self.assertEqual(settlement.cycle_info['proforma_code'], 'PF-2025-11')
+
+    def test_settlement_read_does_not_write_ledger(self):
+        settlement = self.service.get_monthly_settlement(2025, 11)
+
+        self.assertEqual(settlement.total_costs_uf, 0.0)
+        self.assertTrue(settlement.contractor_df.empty)
+        self.assertEqual(self.service.get_ledger_totals(2025, 11)['load_count'], 0)
+
+    def test_ledger_write_invalidates_memoized_settlement(self):
+        first = self.service.get_monthly_settlement(2025, 11)
+
+        self.service.refresh_ledger([1])
+        second = self.service.get_monthly_settlement(2025, 11)
+
+        self.assertIsNot(first, second)
+        self.assertAlmostEqual(second.total_transport_costs_uf, 20.0 * 100.0 * 0.002)
+
+    def test_sync_reprices_only_stale_loads(self):
+        self.service.rebuild_ledger(2025, 11)
+        calls = []
+        refresh_ledger = self.service.refresh_ledger
+        self.service.refresh_ledger = lambda load_ids: calls.append(list(load_ids)) or refresh_ledger(load_ids)
+
+        with self.db as conn:
+            conn.execute("UPDATE loads SET net_weight = 30000, updated_at = CURRENT_TIMESTAMP WHERE id = 1")
+            conn.execute("UPDATE loads SET status = 'REQUESTED', updated_at = CURRENT_TIMESTAMP WHERE id = 2")
+        self.assertEqual(self.service.sync_ledger(2025, 11), 2)
+
+        self.assertEqual(calls, [[1, 2]])
+        settlement = self.service.get_monthly_settlement(2025, 11)
+        self.assertEqual(list(settlement.contractor_df['load_id']), [1])
+        self.assertAlmostEqual(settlement.total_transport_costs_uf, 30.0 * 100.0 * 0.002)
+
+    def test_closed_period_is_not_rebuilt(self):
+        self.service.refresh_ledger([1])
+        proforma_repo = self.service.proforma_repo
+        closed = proforma_repo.get_by_period(2025, 11)
+        closed.is_closed = True
+        self.service.proforma_repo = SimpleNamespace(get_by_period=lambda year, month: closed)
+
+        with self.assertRaises(ValueError):
+            self.service.rebuild_ledger(2025, 11)
+        with self.assertRaises(ValueError):
+            self.service.sync_ledger(2025, 11)
+        self.assertEqual(self.service.get_ledger_totals(2025, 11)['load_count'], 1)
+
+
+class TestCostingListenerLedger(LedgerTestCase):
+
+    def test_completed_load_is_written_to_ledger(self):
+        listener = CostingListener(self.db, reporting_service=self.service)
+
+        listener.handle_load_completed(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 1, 'to_status': 'COMPLETED'}))
+        listener.handle_load_completed(Event(EventTypes.LOAD_STATUS_CHANGED, {'load_id': 2, 'to_status': 'AT_DESTINATION'}))
+
+        self.assertEqual(len(self.ledger_repo.get_by_load(1)), 4)
+        self.assertEqual(self.ledger_repo.get_by_load(2), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+"""
+Test Suite para la foto de carga adjunta a LOAD_STATUS_CHANGED.
+
+Valida:
+1. transition_load / transition_many adjuntan LoadSnapshot (vehículo, contratista
+   resuelto desde el vehículo, distancia de la matriz y pesos)
+2. CostingListener, ComplianceListener y MaintenanceListener usan la foto sin
+   volver a consultar la carga
+3. MaintenanceListener suma la distancia de cada carga una sola vez
+"""
+
+import json
+import unittest
+
+from infrastructure.events.event_bus import Event, EventBus, EventTypes
+from domain.logistics.entities.load_snapshot import LoadSnapshot
+from domain.logistics.entities.load_status import LoadStatus
+from domain.logistics.services.load_state_service import LoadStateService
+from domain.finance.services.costing_listener import CostingListener
+from domain.compliance.services.compliance_listener import ComplianceListener
+from domain.maintenance.services.maintenance_listener import MaintenanceListener
+from domain.maintenance.entities.maintenance_plan import MaintenanceStrategy
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, origin_facility_id INTEGER, origin_treatment_plant_id INTEGER,
+        destination_site_id INTEGER, vehicle_id INTEGER, contractor_id INTEGER, manifest_code TEXT,
+        status TEXT, gross_weight REAL, tare_weight REAL, net_weight REAL,
+        attributes TEXT DEFAULT '{}', created_at DATETIME, updated_at DATETIME
+    );
+    CREATE TABLE load_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, load_id INTEGER NOT NULL, from_status TEXT NOT NULL,
+        to_status TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, user_id INTEGER, notes TEXT
+    );
+    CREATE TABLE distance_matrix (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, origin_facility_id INTEGER, destination_id INTEGER,
+        destination_type TEXT, distance_km REAL, is_link_segment INTEGER DEFAULT 0, updated_at DATETIME
+    );
+    CREATE TABLE vehicles (
+        id INTEGER PRIMARY KEY, contractor_id INTEGER, license_plate TEXT,
+        tare_weight REAL, max_gross_weight REAL, current_odometer INTEGER, current_hourmeter REAL
+    );
+    CREATE TABLE maintenance_plans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id INTEGER NOT NULL, maintenance_type TEXT NOT NULL,
+        frequency_value REAL NOT NULL, strategy TEXT NOT NULL, last_service_at_meter REAL DEFAULT 0.0,
+        last_service_date DATETIME, is_active BOOLEAN DEFAULT 1, created_at DATETIME, updated_at DATETIME
+    );
+    CREATE TABLE maintenance_orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, plan_id INTEGER NOT NULL, asset_id INTEGER NOT NULL,
+        status TEXT DEFAULT 'PENDING', due_at_meter REAL NOT NULL, generated_at DATETIME,
+        completed_at DATETIME, notes TEXT
+    );
+    CREATE TABLE rate_sheets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, client_id INTEGER, activity_type TEXT NOT NULL,
+        unit_price REAL NOT NULL, unit_type TEXT NOT NULL, currency TEXT DEFAULT 'CLP',
+        valid_from DATETIME, valid_to DATETIME
+    );
+    CREATE TABLE cost_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, related_entity_id INTEGER NOT NULL,
+        related_entity_type TEXT NOT NULL, amount REAL NOT NULL, currency TEXT DEFAULT 'CLP',
+        calculated_at DATETIME, rate_sheet_id INTEGER
+    );
+    CREATE TABLE regulatory_documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, doc_type TEXT NOT NULL, related_load_id INTEGER,
+        snapshot_data TEXT, generated_at DATETIME, pdf_url TEXT
+    );
+"""
+
+
+class _NoLoadQueries:
+    """LoadRepository de reemplazo: falla si un listener vuelve a consultar la carga."""
+
+    def get_by_id(self, load_id):
+        raise AssertionError(f"Load {load_id} was re-fetched")
+
+
+class SnapshotTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+    migrations = ('041_asset_meter_entries.sql',)
+
+    def setUp(self):
+        super().setUp()
+        attrs = json.dumps({'gate_entry_check': True, 'gross_weight': 30000, 'tare_weight': 12000})
+        with self.db as conn:
+            conn.execute("INSERT INTO vehicles (id, contractor_id, license_plate) VALUES (10, 4, 'AB-1234')")
+            conn.execute(
+                "INSERT INTO distance_matrix (origin_facility_id, destination_id, destination_type, distance_km) "
+                "VALUES (1, 5, 'SITE', 42.5)"
+            )
+            conn.executemany(
+                "INSERT INTO loads (id, origin_facility_id, destination_site_id, vehicle_id, contractor_id, "
+                "manifest_code, status, attributes) VALUES (?, 1, 5, ?, ?, ?, 'EN_ROUTE_DESTINATION', ?)",
+                [
+                    (1, 10, None, 'MAN-1', attrs),  # Contratista desde el vehículo
+                    (2, 10, 9, 'MAN-2', attrs),
+                ]
+            )
+        self.bus = EventBus()
+        self.events = []
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED, self.events.append)
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED_BATCH, self.events.append)
+        self.service = LoadStateService(self.db, event_bus=self.bus)
+
+
+class TestLoadStateServiceSnapshot(SnapshotTestCase):
+
+    def test_transition_load_attaches_snapshot(self):
+        self.service.transition_load(1, LoadStatus.AT_DESTINATION)
+
+        snapshot = LoadSnapshot.from_event(self.events[0])
+        self.assertEqual(snapshot.load_id, 1)
+        self.assertEqual(snapshot.status, 'AT_DESTINATION')
+        self.assertEqual(snapshot.vehicle_id, 10)
+        self.assertEqual(snapshot.contractor_id, 4)
+        self.assertEqual(snapshot.distance_km, 42.5)
+        self.assertEqual(snapshot.net_weight, 18000.0)
+        self.assertEqual(snapshot.manifest_code, 'MAN-1')
+
+    def test_transition_many_attaches_snapshot_per_load(self):
+        self.service.transition_many([1, 2], LoadStatus.AT_DESTINATION)
+
+        transitions = self.events[0].data['transitions']
+        self.assertEqual([t['load']['contractor_id'] for t in transitions], [4, 9])
+        self.assertEqual([t['load']['distance_km'] for t in transitions], [42.5, 42.5])
+
+    def test_snapshot_without_route_has_no_distance(self):
+        with self.db as conn:
+            conn.execute("DELETE FROM distance_matrix")
+        self.service.distance_repo.cache.invalidate()
+
+        self.service.transition_load(1, LoadStatus.AT_DESTINATION)
+
+        self.assertIsNone(LoadSnapshot.from_event(self.events[0]).distance_km)
+
+    def test_treatment_plant_origin_does_not_use_facility_route(self):
+        # Planta de tratamiento 1 no es la instalación 1: sin ruta propia no hay distancia
+        with self.db as conn:
+            conn.execute(
+                "INSERT INTO loads (id, origin_treatment_plant_id, destination_site_id, vehicle_id, status, attributes) "
+                "VALUES (3, 1, 5, 10, 'EN_ROUTE_DESTINATION', '{\"gate_entry_check\": true}')"
+            )
+
+        self.service.transition_load(3, LoadStatus.AT_DESTINATION)
+
+        self.assertIsNone(LoadSnapshot.from_event(self.events[0]).distance_km)
+
+
+class TestListenersUseSnapshot(SnapshotTestCase):
+
+    def completed_event(self):
+        self.service.transition_load(1, LoadStatus.AT_DESTINATION)
+        data = dict(self.events[0].data, to_status='COMPLETED')
+        return Event(EventTypes.LOAD_STATUS_CHANGED, data)
+
+    def test_costing_uses_snapshot_distance(self):
+        with self.db as conn:
+            conn.execute(
+                "INSERT INTO rate_sheets (activity_type, unit_price, unit_type) VALUES ('TRANSPORTE', 1000, 'POR_KM')"
+            )
+        listener = CostingListener(self.db)
+        listener.load_repo = _NoLoadQueries()
+
+        listener.handle_load_completed(self.completed_event())
+
+        with self.db as conn:
+            amount = conn.execute("SELECT amount FROM cost_records WHERE related_entity_id = 1").fetchone()[0]
+        self.assertEqual(amount, 42500.0)
+
+    def test_compliance_uses_snapshot(self):
+        listener = ComplianceListener(self.db)
+        listener.load_repo = _NoLoadQueries()
+
+        listener.handle_load_completed(self.completed_event())
+
+        with self.db as conn:
+            snapshot = json.loads(conn.execute(
+                "SELECT snapshot_data FROM regulatory_documents WHERE related_load_id = 1"
+            ).fetchone()[0])
+        self.assertEqual(snapshot['manifest'], 'MAN-1')
+        self.assertEqual(snapshot['weight_net'], 18000.0)
+
+    def test_maintenance_adds_route_distance_to_odometer(self):
+        listener = MaintenanceListener(self.db)
+        calls = []
+        listener._update_meter_and_check_plans = lambda **kwargs: calls.append(kwargs)
+
+        listener.handle_load_completed(self.completed_event())
+
+        self.assertEqual(calls, [{
+            'asset_id': 10, 'increment': 42.5, 'strategy': MaintenanceStrategy.BY_KM,
+            'source_type': 'LOAD', 'source_id': 1
+        }])
+
+    def test_maintenance_redelivery_counts_distance_once(self):
+        listener = MaintenanceListener(self.db)
+        event = self.completed_event()
+
+        listener.handle_load_completed(event)
+        listener.handle_load_completed(event)  # Reentrega del outbox / replay
+
+        with self.db as conn:
+            odometer = conn.execute("SELECT current_odometer FROM vehicles WHERE id = 10").fetchone()[0]
+            entries = conn.execute("SELECT COUNT(*) FROM asset_meter_entries").fetchone()[0]
+        self.assertEqual(odometer, 42.5)
+        self.assertEqual(entries, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
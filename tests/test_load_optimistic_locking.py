@@ -0,0 +1,175 @@
+"""
+Test Suite para control de concurrencia optimista en cargas (columna version).
+
+Valida:
+1. UPDATE compare-and-swap: una copia desactualizada lanza ConcurrencyConflictError
+2. update_many hace rollback del lote completo ante un conflicto
+3. transition_load / accept_trip reintentan releyendo la carga
+4. Las escrituras en bloque también incrementan la versión
+"""
+
+import unittest
+
+from domain.logistics.entities.load_status import LoadStatus
+from domain.logistics.repositories.load_repository import LoadRepository
+from domain.logistics.services.dispatch_service import LogisticsDomainService
+from domain.logistics.services.load_dispatch_service import LoadDispatchService
+from domain.logistics.services.load_state_service import LoadStateService
+from domain.shared.exceptions import ConcurrencyConflictError
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, origin_facility_id INTEGER, destination_site_id INTEGER,
+        status TEXT, net_weight REAL, attributes TEXT DEFAULT '{}',
+        trip_id TEXT, segment_type TEXT, financial_status TEXT, created_at DATETIME, updated_at DATETIME, version INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE load_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, load_id INTEGER NOT NULL, from_status TEXT NOT NULL,
+        to_status TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, user_id INTEGER, notes TEXT
+    );
+"""
+
+
+class TestOptimisticLocking(TempDatabaseTestCase):
+    """Test Suite para UPDATE versionado y reintentos."""
+    schema = SCHEMA
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.executemany(
+                "INSERT INTO loads (id, origin_facility_id, status, attributes) VALUES (?, 1, 'ASSIGNED', ?)",
+                [(1, '{"driver_acceptance": true}'), (2, '{}')]
+            )
+        self.repo = LoadRepository(self.db)
+
+    def row(self, load_id):
+        with self.db as conn:
+            return dict(conn.execute("SELECT * FROM loads WHERE id = ?", (load_id,)).fetchone())
+
+    def history_count(self):
+        with self.db as conn:
+            return conn.execute("SELECT COUNT(*) FROM load_status_history").fetchone()[0]
+
+    def test_update_increments_version(self):
+        load = self.repo.get_by_id(1)
+        load.net_weight = 10.0
+        self.assertTrue(self.repo.update(load))
+
+        self.assertEqual(load.version, 1)
+        self.assertEqual(self.row(1)['version'], 1)
+
+    def test_stale_update_raises_conflict(self):
+        first = self.repo.get_by_id(1)
+        second = self.repo.get_by_id(1)
+        first.status = 'ACCEPTED'
+        self.repo.update(first)
+
+        second.net_weight = 5.0
+        with self.assertRaises(ConcurrencyConflictError):
+            self.repo.update(second)
+        self.assertIsNone(self.row(1)['net_weight'])
+
+    def test_missing_row_is_not_a_conflict(self):
+        load = self.repo.get_by_id(1)
+        with self.db as conn:
+            conn.execute("DELETE FROM loads WHERE id = 1")
+        load.status = 'ACCEPTED'
+
+        self.assertFalse(self.repo.update(load))
+
+    def test_update_many_conflict_rolls_back_batch(self):
+        loads = self.repo.get_by_ids([1, 2])
+        self.repo.merge_attributes(2, {'gate': True})  # Otra sesión bumpea la versión de 2
+        for load in loads:
+            load.status = 'ACCEPTED'
+
+        with self.assertRaises(ConcurrencyConflictError):
+            self.repo.update_many(loads)
+        self.assertEqual(self.row(1)['status'], 'ASSIGNED')
+
+    def test_update_many_missing_row_is_not_a_conflict(self):
+        loads = self.repo.get_by_ids([1, 2])
+        with self.db as conn:
+            conn.execute("DELETE FROM loads WHERE id = 2")
+        for load in loads:
+            load.status = 'ACCEPTED'
+
+        self.assertEqual(self.repo.update_many(loads), 1)
+        self.assertEqual([load.version for load in loads], [1, 0])
+        self.assertEqual(self.row(1)['status'], 'ACCEPTED')
+
+    def test_transition_retries_after_conflict(self):
+        service = LoadStateService(self.db)
+        original_get = service.load_repo.get_by_id
+        calls = []
+
+        def racing_get(load_id):
+            load = original_get(load_id)
+            if not calls:
+                # Otra sesión escribe entre la lectura y el UPDATE
+                self.repo.merge_attributes(load_id, {'note': 'gate'})
+            calls.append(load_id)
+            return load
+
+        service.load_repo.get_by_id = racing_get
+        self.assertTrue(service.transition_load(1, LoadStatus.ACCEPTED))
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.row(1)['status'], 'ACCEPTED')
+        self.assertEqual(self.history_count(), 1)  # El historial del intento fallido hizo rollback
+
+    def test_legacy_service_transition_retries_without_orphan_history(self):
+        service = LogisticsDomainService(self.db, compliance_service=None, agronomy_service=None)
+        state_repo = service.load_state_service.load_repo
+        original_get = state_repo.get_by_id
+        calls = []
+
+        def racing_get(load_id):
+            load = original_get(load_id)
+            if not calls:
+                self.repo.merge_attributes(load_id, {'note': 'gate'})
+            calls.append(load_id)
+            return load
+
+        state_repo.get_by_id = racing_get
+        self.assertTrue(service.transition_load(1, LoadStatus.ACCEPTED))
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.history_count(), 1)
+        self.assertTrue(service.start_trip(1))
+        self.assertEqual(self.row(1)['status'], LoadStatus.EN_ROUTE_DESTINATION.value)
+
+    def test_bulk_updates_increment_version(self):
+        stale = self.repo.get_by_id(1)
+        self.repo.update_trip_id_bulk([1, 2], 'TRIP-1', {1: 'PICKUP_SEGMENT'})
+        self.repo.update_financial_status_bulk([1], 'CLOSED')
+
+        self.assertEqual(self.row(1)['version'], 2)
+        self.assertEqual(self.row(2)['version'], 1)
+        stale.status = 'ACCEPTED'
+        with self.assertRaises(ConcurrencyConflictError):
+            self.repo.update(stale)
+
+    def test_retry_is_idempotent_when_other_session_applied_same_transition(self):
+        service = LoadDispatchService(self.db)
+        original_get = service.load_repo.get_by_id
+        calls = []
+
+        def racing_get(load_id):
+            load = original_get(load_id)
+            if not calls:
+                other = original_get(load_id)
+                other.status = LoadStatus.ACCEPTED.value
+                self.repo.update(other)
+            calls.append(load_id)
+            return load
+
+        service.load_repo.get_by_id = racing_get
+        self.assertTrue(service.accept_trip(1))
+        self.assertEqual(self.row(1)['version'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
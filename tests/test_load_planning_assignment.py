@@ -0,0 +1,195 @@
+"""
+Test Suite para el motor de asignación diaria de LoadPlanningService.
+
+Valida:
+1. solve_assignment (método húngaro) contra fuerza bruta
+2. plan_assignments respeta tipo de vehículo, conductores libres y viajes enlazados
+3. commit_assignment_plan aplica todo en una transacción y revalida conflictos
+"""
+
+import itertools
+import unittest
+from datetime import date
+
+import numpy as np
+
+from domain.logistics.assignment import solve_assignment
+from domain.logistics.services.load_planning_service import LoadPlanningService
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE facilities (
+        id INTEGER PRIMARY KEY, name TEXT, allowed_vehicle_types TEXT,
+        is_link_point INTEGER DEFAULT 0, is_active INTEGER DEFAULT 1
+    );
+    CREATE TABLE vehicles (
+        id INTEGER PRIMARY KEY, contractor_id INTEGER, license_plate TEXT, type TEXT,
+        tare_weight REAL, max_gross_weight REAL, is_active INTEGER DEFAULT 1,
+        asset_type TEXT DEFAULT 'ROAD_VEHICLE'
+    );
+    CREATE TABLE drivers (
+        id INTEGER PRIMARY KEY, contractor_id INTEGER, name TEXT, is_active INTEGER DEFAULT 1
+    );
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, origin_facility_id INTEGER, vehicle_id INTEGER, driver_id INTEGER,
+        destination_site_id INTEGER, destination_treatment_plant_id INTEGER,
+        origin_treatment_plant_id INTEGER, container_quantity INTEGER, vehicle_type_requested TEXT,
+        net_weight REAL, status TEXT, requested_date DATE, scheduled_date DATE,
+        trip_id TEXT, segment_type TEXT DEFAULT 'DIRECT',
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME
+    );
+    CREATE TABLE distance_matrix (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, origin_facility_id INTEGER, destination_id INTEGER,
+        destination_type TEXT, distance_km REAL, is_link_segment INTEGER DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+
+class TestSolveAssignment(unittest.TestCase):
+    """Test Suite para solve_assignment."""
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        for _ in range(100):
+            n, m = int(rng.integers(1, 6)), int(rng.integers(1, 6))
+            cost = rng.integers(0, 40, (n, m)).astype(float)
+            k = min(n, m)
+            best = min(
+                sum(cost[r, c] for r, c in zip(rows, cols))
+                for rows in itertools.combinations(range(n), k)
+                for cols in itertools.permutations(range(m), k)
+            )
+
+            pairs = solve_assignment(cost)
+
+            self.assertEqual(len(pairs), k)
+            self.assertEqual(len({c for _, c in pairs}), k)
+            self.assertAlmostEqual(sum(cost[r, c] for r, c in pairs), best)
+
+
+class TestPlanAssignments(TempDatabaseTestCase):
+    """Test Suite para plan_assignments / commit_assignment_plan."""
+    schema = SCHEMA
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.executemany("INSERT INTO facilities (id, name, allowed_vehicle_types) VALUES (?, ?, ?)", [
+                (1, 'Planta Batea', 'BATEA,AMPLIROLL'), (2, 'Planta Ampliroll', 'AMPLIROLL'),
+            ])
+            conn.executemany(
+                "INSERT INTO vehicles (id, contractor_id, license_plate, type, tare_weight, max_gross_weight) "
+                "VALUES (?, ?, ?, ?, ?, ?)", [
+                    (1, 1, 'BA-0001', 'BATEA', 15000, 45000),
+                    (2, 1, 'AM-0002', 'AMPLIROLL', 12000, 30000),
+                    (3, 2, 'AM-0003', 'AMPLIROLL', 12000, 30000),
+                ])
+            conn.executemany("INSERT INTO drivers (id, contractor_id, name) VALUES (?, ?, ?)", [
+                (1, 1, 'Conductor 1'), (2, 1, 'Conductor 2'), (3, 2, 'Conductor 3'),
+            ])
+            conn.executemany("INSERT INTO distance_matrix (origin_facility_id, destination_id, destination_type, distance_km) "
+                             "VALUES (?, ?, ?, ?)", [(1, 5, 'SITE', 10.0), (2, 5, 'SITE', 60.0)])
+            # Historial: vehículo 1 terminó en el sitio 5; vehículo 3 tiene un viaje activo
+            conn.execute("INSERT INTO loads (id, origin_facility_id, vehicle_id, driver_id, destination_site_id, status) "
+                         "VALUES (1, 1, 1, 1, 5, 'COMPLETED')")
+            conn.execute("INSERT INTO loads (id, origin_facility_id, vehicle_id, driver_id, destination_site_id, status) "
+                         "VALUES (2, 2, 3, 3, 5, 'EN_ROUTE_DESTINATION')")
+        self.service = LoadPlanningService(self.db)
+
+    def add_request(self, load_id, facility_id, **fields):
+        columns = {'id': load_id, 'origin_facility_id': facility_id, 'status': 'REQUESTED',
+                   'requested_date': '2025-11-03', 'net_weight': 10000.0, **fields}
+        with self.db as conn:
+            conn.execute(
+                f"INSERT INTO loads ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                tuple(columns.values())
+            )
+
+    def plan(self):
+        return self.service.plan_assignments(date(2025, 11, 3), site_id=5)
+
+    def test_assigns_compatible_vehicles_with_minimum_deadhead(self):
+        self.add_request(10, 1)
+        self.add_request(11, 2)
+
+        plan = self.plan()
+
+        by_load = {a.load_ids[0]: a for a in plan.assignments}
+        self.assertEqual(by_load[10].vehicle_id, 1)  # Batea ya está en el sitio 5 (10 km)
+        self.assertEqual(by_load[10].driver_id, 1)  # Último conductor del vehículo
+        self.assertEqual(by_load[10].deadhead_km, 10.0)
+        self.assertEqual(by_load[11].vehicle_id, 2)  # La planta 2 solo admite AMPLIROLL
+        self.assertEqual(by_load[11].driver_id, 2)
+        self.assertEqual(plan.unassigned, {})
+
+    def test_contractor_cannot_use_more_vehicles_than_free_drivers(self):
+        with self.db as conn:
+            conn.execute("UPDATE drivers SET is_active = 0 WHERE id = 2")
+        self.add_request(10, 1)
+        self.add_request(11, 2)
+
+        plan = self.plan()
+
+        self.assertEqual(len(plan.assignments), 1)
+        self.assertEqual(len(plan.unassigned), 1)
+
+    def test_linked_trip_requires_ampliroll_and_is_assigned_as_unit(self):
+        self.add_request(10, 1, trip_id='TRIP-1', segment_type='MAIN_HAUL', net_weight=8000.0)
+        self.add_request(11, 2, trip_id='TRIP-1', segment_type='PICKUP_SEGMENT', net_weight=8000.0)
+
+        plan = self.plan()
+
+        # La Batea está más cerca de la planta 1, pero el viaje enlazado exige AMPLIROLL
+        self.assertEqual([(a.load_ids, a.vehicle_id) for a in plan.assignments], [([11, 10], 2)])
+        self.assertEqual(plan.unassigned, {})
+
+    def test_max_gross_weight_is_respected(self):
+        self.add_request(11, 2, net_weight=19000.0)  # 12 t tara + 19 t > 30 t del AMPLIROLL
+
+        plan = self.plan()
+
+        self.assertEqual(plan.unassigned, {11: "Sin vehículo compatible"})
+
+    def test_load_within_gross_weight_is_assigned(self):
+        self.add_request(11, 2, net_weight=18000.0)  # 12 t tara + 18 t = 30 t del AMPLIROLL
+
+        plan = self.plan()
+
+        self.assertEqual([(a.load_ids, a.vehicle_id) for a in plan.assignments], [([11], 2)])
+
+    def test_containers_exclude_batea(self):
+        self.add_request(10, 1, container_quantity=2)
+        with self.db as conn:
+            conn.execute("UPDATE vehicles SET is_active = 0 WHERE id = 2")
+
+        plan = self.plan()
+
+        self.assertEqual(plan.assignments, [])
+        self.assertEqual(plan.unassigned, {10: "Sin vehículo compatible"})
+
+    def test_missing_destination_is_reported(self):
+        self.add_request(10, 1)
+
+        plan = self.service.plan_assignments(date(2025, 11, 3))
+
+        self.assertEqual(plan.unassigned, {10: "Sin destino definido"})
+
+    def test_commit_applies_plan_and_rejects_stale_plan(self):
+        self.add_request(10, 1)
+        self.add_request(11, 2)
+        plan = self.plan()
+
+        self.assertEqual(self.service.commit_assignment_plan(plan), 2)
+
+        with self.db as conn:
+            rows = conn.execute(
+                "SELECT id, status, vehicle_id, destination_site_id FROM loads WHERE id IN (10, 11) ORDER BY id"
+            ).fetchall()
+        self.assertEqual([tuple(r) for r in rows], [(10, 'ASSIGNED', 1, 5), (11, 'ASSIGNED', 2, 5)])
+        with self.assertRaises(ValueError):
+            self.service.commit_assignment_plan(plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
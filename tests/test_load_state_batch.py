@@ -0,0 +1,106 @@
+"""
+Test Suite para transiciones de estado en lote (LoadStateService.transition_many).
+
+Valida:
+1. Cargas válidas se transicionan; inválidas se informan sin bloquear el lote
+2. Historial y cargas se escriben en una sola transacción
+3. Un único evento LOAD_STATUS_CHANGED_BATCH (y su adaptador por carga)
+"""
+
+import json
+import unittest
+
+from infrastructure.events.event_bus import EventBus, EventTypes, expand_status_batch
+from domain.logistics.entities.load_status import LoadStatus
+from domain.logistics.services.load_state_service import LoadStateService
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, origin_facility_id INTEGER, destination_site_id INTEGER,
+        status TEXT, gross_weight REAL, tare_weight REAL, net_weight REAL,
+        attributes TEXT DEFAULT '{}', created_at DATETIME, updated_at DATETIME
+    );
+    CREATE TABLE load_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, load_id INTEGER NOT NULL, from_status TEXT NOT NULL,
+        to_status TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, user_id INTEGER, notes TEXT
+    );
+    CREATE TABLE distance_matrix (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, origin_facility_id INTEGER, destination_id INTEGER,
+        destination_type TEXT, distance_km REAL, is_link_segment INTEGER DEFAULT 0, updated_at DATETIME
+    );
+"""
+
+
+class TestTransitionMany(TempDatabaseTestCase):
+    """Test Suite para transition_many."""
+    schema = SCHEMA
+
+    def setUp(self):
+        super().setUp()
+        gate_ok = json.dumps({'gate_entry_check': True, 'gross_weight': 30000, 'tare_weight': 12000})
+        with self.db as conn:
+            conn.executemany(
+                "INSERT INTO loads (id, origin_facility_id, destination_site_id, status, attributes) VALUES (?, 1, ?, ?, ?)",
+                [
+                    (1, 5, 'EN_ROUTE_DESTINATION', gate_ok),
+                    (2, None, 'EN_ROUTE_DESTINATION', '{}'),  # Sin registro en portería
+                    (3, None, 'ASSIGNED', gate_ok),  # Transición no permitida
+                    (4, None, 'EN_ROUTE_DESTINATION', gate_ok),
+                ]
+            )
+        self.bus = EventBus()
+        self.events = []
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED_BATCH, self.events.append)
+        self.bus.subscribe(EventTypes.LOAD_ARRIVED_AT_FIELD, self.events.append)
+        self.service = LoadStateService(self.db, event_bus=self.bus)
+
+    def test_reports_each_load_and_persists_successes(self):
+        result = self.service.transition_many([1, 2, 3, 4, 99], LoadStatus.AT_DESTINATION, user_id=7)
+
+        self.assertEqual(result.succeeded, [1, 4])
+        self.assertEqual(sorted(result.failed), [2, 3, 99])
+        self.assertIn('gate_entry_check', result.failed[2])
+        self.assertFalse(result.all_succeeded)
+
+        with self.db as conn:
+            statuses = dict(conn.execute("SELECT id, status FROM loads").fetchall())
+            history = conn.execute(
+                "SELECT load_id, from_status, to_status, user_id FROM load_status_history ORDER BY load_id"
+            ).fetchall()
+            net_weight = conn.execute("SELECT net_weight FROM loads WHERE id = 1").fetchone()[0]
+        self.assertEqual(statuses, {1: 'AT_DESTINATION', 2: 'EN_ROUTE_DESTINATION',
+                                    3: 'ASSIGNED', 4: 'AT_DESTINATION'})
+        self.assertEqual([tuple(r) for r in history], [
+            (1, 'EN_ROUTE_DESTINATION', 'AT_DESTINATION', 7),
+            (4, 'EN_ROUTE_DESTINATION', 'AT_DESTINATION', 7),
+        ])
+        self.assertEqual(net_weight, 18000)  # Promoción de atributos
+
+    def test_publishes_single_batch_event(self):
+        self.service.transition_many([1, 4], LoadStatus.AT_DESTINATION)
+
+        batch, arrival = self.events
+        self.assertEqual(batch.event_type, EventTypes.LOAD_STATUS_CHANGED_BATCH)
+        self.assertEqual([t['load_id'] for t in batch.data['transitions']], [1, 4])
+        self.assertEqual(arrival.event_type, EventTypes.LOAD_ARRIVED_AT_FIELD)
+        self.assertEqual(arrival.data['load_id'], 1)
+
+    def test_expand_status_batch_invokes_handler_per_load(self):
+        received = []
+        self.bus.subscribe(EventTypes.LOAD_STATUS_CHANGED_BATCH, expand_status_batch(received.append))
+
+        self.service.transition_many([1, 4], LoadStatus.AT_DESTINATION)
+
+        self.assertEqual([e.event_type for e in received], [EventTypes.LOAD_STATUS_CHANGED] * 2)
+        self.assertEqual([e.data['load_id'] for e in received], [1, 4])
+
+    def test_empty_batch_writes_nothing(self):
+        result = self.service.transition_many([2, 3], LoadStatus.AT_DESTINATION)
+
+        self.assertEqual(result.succeeded, [])
+        self.assertEqual(self.events, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Test Suite para el índice persistido de tareas pendientes (bandeja de entrada).
+
+Valida:
+1. El primer sync indexa todas las cargas activas (sin el tope de 50 de get_all)
+2. Tareas por rol con role_rank (top 3 por carga) y siguiente estado lógico
+3. update_load_attributes / transition_load / transition_many recalculan solo
+   las cargas afectadas, en su transacción
+4. sync() recoge cargas modificadas por otros servicios (cambio de versión)
+5. TaskResolver arma la bandeja desde el índice con la carga como payload
+"""
+
+import json
+import unittest
+
+from domain.logistics.entities.load_status import LoadStatus
+from domain.logistics.services.load_state_service import LoadStateService
+from domain.logistics.services.pending_task_index import PendingTaskIndex
+from ui.utils.task_resolver import TaskResolver
+from helpers import TempDatabaseTestCase
+
+SCHEMA = """
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, origin_facility_id INTEGER, destination_site_id INTEGER,
+        status TEXT, gross_weight REAL, tare_weight REAL, net_weight REAL,
+        attributes TEXT DEFAULT '{}', version INTEGER NOT NULL DEFAULT 0,
+        created_at DATETIME, updated_at DATETIME
+    );
+    CREATE TABLE load_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, load_id INTEGER NOT NULL, from_status TEXT NOT NULL,
+        to_status TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, user_id INTEGER, notes TEXT
+    );
+"""
+
+ACTIVE_LOADS = 60  # Más que el tope de LoadRepository.get_all
+
+
+class PendingTaskTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+    migrations = ('036_pending_tasks.sql',)
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.executemany(
+                "INSERT INTO loads (id, status, attributes) VALUES (?, ?, ?)",
+                [(load_id, 'EN_ROUTE_DESTINATION', '{}') for load_id in range(1, ACTIVE_LOADS + 1)]
+            )
+            conn.executemany(
+                "INSERT INTO loads (id, status, attributes) VALUES (?, ?, ?)",
+                [
+                    (100, 'AT_DESTINATION', json.dumps({'entry_weight_ticket': 'TKT-1'})),
+                    (101, 'COMPLETED', '{}'),
+                    (102, 'ASSIGNED', '{}'),  # Aceptación del conductor: sin formulario
+                ]
+            )
+        self.index = PendingTaskIndex(self.db, sync_interval=3600)
+        self.index.sync(force=True)
+        self.service = LoadStateService(self.db, task_index=self.index)
+
+    def task_keys(self, role):
+        return {(t['load_id'], t['form_type']) for t in self.index.task_repo.get_by_role(role)}
+
+
+class TestPendingTaskIndex(PendingTaskTestCase):
+
+    def test_sync_indexes_every_active_load(self):
+        gate_tasks = self.task_keys('GATE_KEEPER')
+
+        self.assertEqual(
+            {load_id for load_id, form in gate_tasks if form == 'gate_check'},
+            set(range(1, ACTIVE_LOADS + 1))
+        )
+        self.assertEqual(self.index.task_repo.get_by_load(101), [])
+        self.assertEqual(self.index.task_repo.get_by_load(102), [])
+        self.assertEqual(self.index.sync(force=True), 0)
+
+    def test_tasks_ranked_per_role(self):
+        tasks = self.index.task_repo.get_by_load(100)
+        by_role = {}
+        for task in tasks:
+            by_role.setdefault(task['allowed_role'], []).append((task['role_rank'], task['form_type']))
+
+        # Pesaje de entrada registrado: faltan laboratorio y ticket final
+        self.assertEqual(by_role['ADMIN'], [(1, 'lab_check'), (2, 'ticket_upload')])
+        self.assertEqual(by_role['LAB_TECH'], [(1, 'lab_check')])
+        self.assertNotIn('GATE_KEEPER', by_role)
+        self.assertEqual({t['target_status'] for t in tasks}, {'COMPLETED'})
+
+    def test_update_attributes_recomputes_load(self):
+        self.service.update_load_attributes(1, {'gate_entry_check': True})
+
+        self.assertNotIn((1, 'gate_check'), self.task_keys('GATE_KEEPER'))
+        self.assertIn((2, 'gate_check'), self.task_keys('GATE_KEEPER'))
+
+    def test_transition_recomputes_load(self):
+        self.service.update_load_attributes(1, {'gate_entry_check': True})
+        self.service.transition_load(1, LoadStatus.AT_DESTINATION)
+
+        tasks = self.index.task_repo.get_by_load(1)
+        self.assertEqual(
+            {t['form_type'] for t in tasks},
+            {'weight_check', 'lab_check', 'ticket_upload'}
+        )
+        self.assertEqual(self.index.sync(force=True), 0)
+
+    def test_transition_many_recomputes_loads(self):
+        with self.db as conn:
+            conn.execute("UPDATE loads SET attributes = ? WHERE id IN (1, 2)",
+                         (json.dumps({'gate_entry_check': True}),))
+        self.index.refresh_ids([1, 2])
+
+        self.service.transition_many([1, 2], LoadStatus.AT_DESTINATION)
+
+        lab_loads = {load_id for load_id, _ in self.task_keys('LAB_TECH')}
+        self.assertEqual(lab_loads, {1, 2, 100})
+
+    def test_sync_picks_up_external_writes(self):
+        with self.db as conn:
+            conn.execute("UPDATE loads SET status = 'COMPLETED', version = version + 1 WHERE id = 100")
+            conn.execute("DELETE FROM loads WHERE id = 2")
+            conn.execute("INSERT INTO loads (id, status, attributes) VALUES (200, 'EN_ROUTE_DESTINATION', '{}')")
+
+        self.assertEqual(self.index.sync(force=True), 2)  # La carga eliminada sale por cascada
+
+        self.assertEqual(self.index.task_repo.get_by_load(100), [])
+        self.assertEqual(self.index.task_repo.get_by_load(2), [])
+        self.assertIn((200, 'gate_check'), self.task_keys('GATE_KEEPER'))
+
+    def test_rebuild(self):
+        self.assertEqual(self.index.rebuild(), ACTIVE_LOADS + 2)
+
+
+class TestTaskResolver(PendingTaskTestCase):
+
+    def test_inbox_from_index(self):
+        resolver = TaskResolver(self.service.load_repo, None, self.index)
+
+        tasks = resolver.get_pending_tasks('LAB_TECH', user_id=1)
+
+        self.assertEqual(len(tasks), 1)
+        task = tasks[0]
+        self.assertEqual(task.id, 'LOAD-100-lab_check')
+        self.assertEqual(task.entity_id, 100)
+        self.assertEqual(task.payload['load'].attributes, {'entry_weight_ticket': 'TKT-1'})
+        self.assertEqual(task.payload['target_status'], 'COMPLETED')
+
+    def test_inbox_sorted_by_priority(self):
+        resolver = TaskResolver(self.service.load_repo, None, self.index)
+
+        tasks = resolver.get_pending_tasks('GATE_KEEPER', user_id=1)
+
+        self.assertEqual(len(tasks), ACTIVE_LOADS)
+        self.assertTrue(all(t.form_type == 'gate_check' and t.priority == 'Medium' for t in tasks))
+
+
+if __name__ == '__main__':
+    unittest.main()
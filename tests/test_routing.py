@@ -0,0 +1,78 @@
+"""
+Test Suite para ShortestPathRouter (caminos más cortos sobre la matriz de distancias).
+
+Valida:
+1. Caminos compuestos sobre aristas no dirigidas
+2. Actualizaciones incrementales (arista nueva, más corta, más larga, eliminada)
+3. Consultas vectorizadas con nodos desconocidos
+4. Consultas concurrentes con ediciones de rutas (router compartido)
+"""
+
+import threading
+import unittest
+
+import numpy as np
+
+from domain.logistics.routing import ShortestPathRouter
+
+
+class TestShortestPathRouter(unittest.TestCase):
+    """Test Suite para ShortestPathRouter."""
+
+    def setUp(self):
+        self.router = ShortestPathRouter([('A', 'B', 10.0), ('B', 'C', 20.0), ('A', 'C', 50.0)])
+
+    def test_shortest_path_is_undirected(self):
+        self.assertEqual(self.router.distance('A', 'C'), 30.0)
+        self.assertEqual(self.router.distance('C', 'A'), 30.0)
+        self.assertEqual(self.router.distance('A', 'A'), 0.0)
+        self.assertIsNone(self.router.distance('A', 'Z'))
+
+    def test_incremental_updates(self):
+        self.router.update_edge('C', 'D', 5.0)
+        self.assertEqual(self.router.distance('A', 'D'), 35.0)
+
+        self.router.update_edge('A', 'C', 12.0)
+        self.assertEqual(self.router.distance('A', 'D'), 17.0)
+
+        # Arista más larga o eliminada: recálculo completo
+        self.router.update_edge('A', 'C', 40.0)
+        self.assertEqual(self.router.distance('A', 'D'), 35.0)
+
+        self.router.update_edge('B', 'C', None)
+        self.assertEqual(self.router.distance('A', 'D'), 45.0)
+
+    def test_vector_distances(self):
+        distances = self.router.distances(['A', 'B', 'A', None], ['C', 'A', 'Z', 'C'])
+
+        np.testing.assert_array_equal(distances, [30.0, 10.0, np.nan, np.nan])
+
+    def test_concurrent_reads_and_edits(self):
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            try:
+                while not stop.is_set():
+                    distances = self.router.distances(['A', 'A'], ['C', 'N50'])
+                    self.assertLessEqual(distances[0], 50.0)
+            except Exception as exc:  # pragma: no cover - se reporta abajo
+                errors.append(exc)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for i in range(200):
+            # Nodos nuevos (crece la matriz), aristas más cortas y más largas
+            self.router.update_edge('C', f'N{i}', float(i + 1))
+            self.router.update_edge('A', 'C', 12.0 if i % 2 else 45.0)
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.router.distance('A', 'N199'), 12.0 + 200.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
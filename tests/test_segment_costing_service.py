@@ -0,0 +1,102 @@
+"""
+Test Suite para SegmentCostingService (costeo por tramos de viajes enlazados).
+
+Valida:
+1. Viajes directos (tarifa y mínimo por tipo de vehículo, distancia por tipo de destino)
+2. Viajes enlazados (expansión T1/T2, distancias vía punto de enlace)
+3. Rutas faltantes (distancia 0)
+
+Arquitectura: Tests puros sin BD; la matriz de distancias es un stub en memoria.
+"""
+
+import unittest
+
+import pandas as pd
+
+from domain.finance.services.segment_costing_service import (
+    SegmentCostingService, SEGMENT_DIRECT, SEGMENT_T1, SEGMENT_T2
+)
+from helpers import StubDistanceRepo, StubProforma, make_transport_load as make_load
+
+
+class TestSegmentCosting(unittest.TestCase):
+    """Test Suite para build_segments."""
+
+    def setUp(self):
+        distance_repo = StubDistanceRepo({
+            (1, 5, 'SITE'): 100.0,
+            (1, 2, 'FACILITY'): 30.0,
+            (2, 9, 'TREATMENT_PLANT'): 80.0,
+        })
+        self.service = SegmentCostingService(reporting_repo=None, distance_repo=distance_repo)
+
+    def build(self, loads):
+        return self.service.build_segments(pd.DataFrame(loads), StubProforma())
+
+    def test_direct_trip_uses_vehicle_tariff_and_min_weight(self):
+        df = self.build([make_load(1)])
+
+        row = df.iloc[0]
+        self.assertEqual(row['segment_desc'], SEGMENT_DIRECT)
+        self.assertEqual(row['billable_weight'], 15.0)  # mínimo BATEA
+        self.assertEqual(row['distance_km'], 100.0)
+        self.assertAlmostEqual(row['subtotal_uf'], 15.0 * 100.0 * 0.0015)
+
+    def test_linked_trip_expands_into_t1_and_t2(self):
+        loads = [
+            make_load(10, trip_id='TRIP-1', origin_facility_id=2, origin_is_link_point=1,
+                      destination_site_id=None, destination_treatment_plant_id=9, net_weight_tons=8.0),
+            make_load(11, trip_id='TRIP-1', destination_site_id=None,
+                      destination_treatment_plant_id=9, net_weight_tons=12.0),
+            make_load(12),
+        ]
+        df = self.build(loads)
+
+        self.assertEqual(df['segment_desc'].tolist(), [SEGMENT_DIRECT, SEGMENT_T1, SEGMENT_T2, SEGMENT_T2])
+        self.assertEqual(df['id'].tolist(), [12, 11, 11, 10])
+
+        t1 = df.iloc[1]
+        self.assertEqual(t1['tariff_type'], 'AMPLIROLL')
+        self.assertEqual(t1['distance_km'], 30.0)
+        self.assertEqual(t1['dist_to_link'], 30.0)
+        self.assertEqual(t1['link_point_name'], 'Planta 10')
+        self.assertEqual(t1['destination_name'], '-')
+        self.assertAlmostEqual(t1['subtotal_uf'], 12.0 * 30.0 * 0.003)
+
+        t2 = df.iloc[2:]
+        self.assertTrue((t2['tariff_type'] == 'AMPLIROLL_CARRO').all())
+        self.assertEqual(t2['distance_km'].tolist(), [80.0, 80.0])
+        self.assertEqual(t2['billable_weight'].tolist(), [12.0, 8.0])
+
+    def test_missing_route_and_unknown_vehicle(self):
+        df = self.build([make_load(1, destination_site_id=77, vehicle_type=None, net_weight_tons=None)])
+
+        row = df.iloc[0]
+        self.assertEqual(row['distance_km'], 0.0)
+        self.assertEqual(row['tariff_uf'], 0.0)
+        self.assertEqual(row['billable_weight'], 7.0)
+        self.assertEqual(row['subtotal_uf'], 0.0)
+
+    def test_single_load_trip_is_direct(self):
+        df = self.build([make_load(1, trip_id='TRIP-9')])
+
+        self.assertEqual(df['segment_desc'].tolist(), [SEGMENT_DIRECT])
+
+    def test_rows_follow_trip_id_order(self):
+        """Mismo orden que el reporte original: sin trip_id, luego por trip_id."""
+        loads = [
+            make_load(1, trip_id='TRIP-B'),
+            make_load(2),
+            make_load(10, trip_id='TRIP-A', origin_facility_id=2, origin_is_link_point=1,
+                      destination_site_id=None, destination_treatment_plant_id=9),
+            make_load(11, trip_id='TRIP-A', destination_site_id=None, destination_treatment_plant_id=9),
+        ]
+        df = self.build(loads)
+
+        self.assertEqual(df['id'].tolist(), [2, 11, 11, 10, 1])
+        self.assertEqual(df['segment_desc'].tolist(),
+                         [SEGMENT_DIRECT, SEGMENT_T1, SEGMENT_T2, SEGMENT_T2, SEGMENT_DIRECT])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Test Suite para FinancialReportingRepository.get_settlement_fingerprint.
+
+Valida:
+1. Altas y ediciones cambian la huella
+2. Borrados físicos (tarifas, distancias) cambian la huella aunque MAX(updated_at) no cambie
+3. Cambios en datos maestros leídos por la liquidación (planta → cliente) cambian la huella
+4. Ediciones dentro del mismo segundo de updated_at cambian la huella (contadores de cambios)
+"""
+
+import unittest
+from datetime import datetime
+
+from domain.finance.repositories.financial_reporting_repository import FinancialReportingRepository
+from helpers import TempDatabaseTestCase
+
+TABLES = ('client_tariffs', 'disposal_site_tariffs', 'proformas', 'economic_indicators',
+          'distance_matrix', 'vehicles', 'facilities', 'clients', 'sites', 'treatment_plants')
+
+SCHEMA = """
+    CREATE TABLE loads (id INTEGER PRIMARY KEY, scheduled_date DATETIME, updated_at DATETIME);
+    CREATE TABLE load_cost_ledger (id INTEGER PRIMARY KEY, amount_uf REAL);
+""" + "".join(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, updated_at DATETIME);\n" for table in TABLES)
+
+
+class TestSettlementFingerprint(TempDatabaseTestCase):
+    """Test Suite para la huella de datos de una liquidación."""
+    schema = SCHEMA
+    migrations = ('042_table_change_counters.sql',)
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            for table in TABLES:
+                conn.executemany(
+                    f"INSERT INTO {table} (updated_at) VALUES (?)",
+                    [('2025-11-01 10:00:00',), ('2025-11-01 09:00:00',)]
+                )
+        self.repo = FinancialReportingRepository(self.db)
+        self.start, self.end = datetime(2025, 10, 19), datetime(2025, 11, 18)
+
+    def fingerprint(self):
+        return self.repo.get_settlement_fingerprint(self.start, self.end)
+
+    def test_insert_changes_fingerprint(self):
+        before = self.fingerprint()
+        with self.db as conn:
+            conn.execute("INSERT INTO vehicles (updated_at) VALUES ('2025-10-01 00:00:00')")
+
+        self.assertNotEqual(self.fingerprint(), before)
+
+    def test_hard_delete_changes_fingerprint(self):
+        for table in ('distance_matrix', 'client_tariffs'):
+            before = self.fingerprint()
+            with self.db as conn:
+                # Borra la fila más antigua: MAX(id) y MAX(updated_at) no cambian
+                conn.execute(f"DELETE FROM {table} WHERE id = 2")
+
+            self.assertNotEqual(self.fingerprint(), before, table)
+
+    def test_facility_client_reassignment_changes_fingerprint(self):
+        with self.db as conn:
+            conn.execute("ALTER TABLE facilities ADD COLUMN client_id INTEGER")
+        before = self.fingerprint()
+        with self.db as conn:
+            conn.execute("UPDATE facilities SET client_id = 2, updated_at = '2025-11-02 08:00:00' WHERE id = 1")
+
+        self.assertNotEqual(self.fingerprint(), before)
+
+    def test_same_second_edits_change_fingerprint(self):
+        with self.db as conn:
+            conn.execute("INSERT INTO loads VALUES (1, '2025-11-01 08:00:00', '2025-11-02 08:00:00')")
+        for table in ('loads', 'client_tariffs'):
+            before = self.fingerprint()
+            with self.db as conn:
+                # Misma fila, mismo updated_at: COUNT, MAX(id) y MAX(updated_at) no cambian
+                conn.execute(f"UPDATE {table} SET updated_at = updated_at WHERE id = 1")
+
+            self.assertNotEqual(self.fingerprint(), before, table)
+
+    def test_ledger_write_changes_fingerprint(self):
+        before = self.fingerprint()
+        with self.db as conn:
+            conn.execute("INSERT INTO load_cost_ledger (amount_uf) VALUES (1.5)")
+
+        self.assertNotEqual(self.fingerprint(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+"""
+Test Suite para snapshots de liquidación de proformas cerradas.
+
+Valida:
+1. SettlementSnapshotRepository (persistencia y reconstrucción del SettlementResult)
+2. FinancialReportingService sirve periodos cerrados desde el snapshot
+3. AccountingClosureService.close_period congela el snapshot al cerrar
+"""
+
+import unittest
+from types import SimpleNamespace
+
+import pandas as pd
+
+from domain.finance.entities.financial_reporting_dtos import SettlementResult
+from domain.finance.repositories.settlement_snapshot_repository import SettlementSnapshotRepository
+from domain.finance.services.financial_reporting_service import FinancialReportingService
+from domain.finance.services.accounting_closure_service import AccountingClosureService
+from helpers import TempDatabaseTestCase
+
+
+def make_settlement(proforma_code='PROF 25-11') -> SettlementResult:
+    contractor_df = pd.DataFrame([
+        {'load_id': 2, 'vehicle_type': 'BATEA', 'billable_weight': 15.0, 'subtotal_uf': 2.19},
+        {'load_id': 1, 'vehicle_type': 'AMPLIROLL', 'billable_weight': 7.5, 'subtotal_uf': 1.11},
+    ])
+    client_df = pd.DataFrame([
+        {'load_id': 1, 'client_name': 'Cliente', 'concept': 'TRANSPORTE', 'subtotal_uf': 3.0},
+    ])
+    return SettlementResult(
+        cycle_info={'period_key': '2025-11', 'proforma_code': proforma_code, 'uf_value': 38000.0,
+                    'fuel_price': 1000.0, 'start_date': '2025-10-19', 'end_date': '2025-11-18',
+                    'is_closed': False},
+        contractor_df=contractor_df,
+        disposal_df=pd.DataFrame(columns=['load_id', 'site_name', 'subtotal_uf']),
+        client_df=client_df,
+        total_transport_costs_uf=3.3,
+        total_disposal_costs_uf=0.0,
+        total_costs_uf=3.3,
+        total_revenue_uf=3.0
+    )
+
+
+class TestSettlementSnapshotRepository(TempDatabaseTestCase):
+    """Test Suite para SettlementSnapshotRepository."""
+    migrations = ('032_settlement_snapshots.sql',)
+
+    def setUp(self):
+        super().setUp()
+        self.repo = SettlementSnapshotRepository(self.db)
+
+    def test_round_trip_preserves_rows_order_and_totals(self):
+        self.repo.save(make_settlement(), 2025, 11, closed_by=7)
+
+        snapshot = self.repo.get_by_code('PROF 25-11')
+
+        self.assertTrue(snapshot.cycle_info['is_closed'])
+        self.assertEqual(snapshot.contractor_df['load_id'].tolist(), [2, 1])
+        self.assertEqual(list(snapshot.contractor_df.columns),
+                         ['load_id', 'vehicle_type', 'billable_weight', 'subtotal_uf'])
+        self.assertEqual(snapshot.client_df['concept'].tolist(), ['TRANSPORTE'])
+        self.assertTrue(snapshot.disposal_df.empty)
+        self.assertEqual(list(snapshot.disposal_df.columns), ['load_id', 'site_name', 'subtotal_uf'])
+        self.assertAlmostEqual(snapshot.total_costs_uf, 3.3)
+        self.assertAlmostEqual(snapshot.get_margin_uf(), -0.3)
+
+    def test_save_replaces_existing_snapshot(self):
+        self.repo.save(make_settlement(), 2025, 11)
+        replacement = make_settlement()
+        replacement.contractor_df = replacement.contractor_df.head(1)
+        self.repo.save(replacement, 2025, 11)
+
+        snapshot = self.repo.get_by_code('PROF 25-11')
+
+        self.assertEqual(len(snapshot.contractor_df), 1)
+
+    def test_missing_snapshot_returns_none(self):
+        self.assertIsNone(self.repo.get_by_code('PROF 20-01'))
+        self.assertFalse(self.repo.exists('PROF 20-01'))
+
+
+class StubSnapshotRepo:
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot
+        self.saved = []
+
+    def get_by_code(self, proforma_code):
+        return self.snapshot
+
+    def save(self, settlement, year, month, closed_by=None):
+        self.saved.append(settlement)
+
+
+class TestClosedPeriodSettlement(unittest.TestCase):
+    """FinancialReportingService sirve periodos cerrados desde el snapshot."""
+
+    def make_service(self, is_closed, snapshot_repo):
+        economic_repo = SimpleNamespace(get_by_period=lambda year, month: {
+            'period_key': '2025-11', 'proforma_code': 'PROF 25-11',
+            'uf_value': 38000.0, 'fuel_price': 1000.0,
+            'status': 'CLOSED' if is_closed else 'OPEN'
+        })
+        service = FinancialReportingService(
+            load_repo=SimpleNamespace(db_manager=None),
+            economic_repo=economic_repo,
+            contractor_tariffs_repo=None,
+            client_tariffs_repo=None,
+            distance_repo=None,
+            snapshot_repo=snapshot_repo
+        )
+        service.reporting_repo = SimpleNamespace(get_settlement_fingerprint=lambda start, end: ('v1',))
+        service.ledger_repo = SimpleNamespace()
+        service.fetched = 0
+
+        def read_ledger(year, month, cycle_info):
+            service.fetched += 1
+            return SimpleNamespace(cycle_info=cycle_info)
+        service._settlement_from_ledger = read_ledger
+        return service
+
+    def test_closed_period_is_served_from_snapshot(self):
+        snapshot = make_settlement()
+        service = self.make_service(is_closed=True, snapshot_repo=StubSnapshotRepo(snapshot))
+
+        result = service.get_monthly_settlement(2025, 11)
+
+        self.assertIs(result, snapshot)
+        self.assertEqual(service.fetched, 0)
+
+    def test_closed_period_without_snapshot_is_not_frozen_on_read(self):
+        snapshot_repo = StubSnapshotRepo()
+        service = self.make_service(is_closed=True, snapshot_repo=snapshot_repo)
+
+        result = service.get_monthly_settlement(2025, 11)
+
+        self.assertEqual(service.fetched, 1)
+        self.assertEqual(snapshot_repo.saved, [])  # Solo close_period congela
+        self.assertTrue(result.cycle_info['is_closed'])
+
+    def test_open_period_is_recomputed(self):
+        snapshot_repo = StubSnapshotRepo(make_settlement())
+        service = self.make_service(is_closed=False, snapshot_repo=snapshot_repo)
+
+        service.get_monthly_settlement(2025, 11)
+
+        self.assertEqual(service.fetched, 1)
+        self.assertEqual(snapshot_repo.saved, [])
+
+
+
+class StubTransaction:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __enter__(self):
+        return SimpleNamespace(in_transaction=False, execute=lambda sql: self.calls.append(('sql', sql)))
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TestClosePeriod(unittest.TestCase):
+    """close_period congela snapshot, cierra la proforma y las cargas."""
+
+    def setUp(self):
+        self.calls = []
+        self.snapshot_repo = StubSnapshotRepo()
+        self.proforma = SimpleNamespace(id=7, is_closed=False)
+        self.service = AccountingClosureService(
+            economic_repo=SimpleNamespace(update_status=lambda key, is_closed: self.calls.append(('period', key))),
+            load_repo=SimpleNamespace(
+                db_manager=StubTransaction(self.calls),
+                update_financial_status_bulk=lambda ids, status: self.calls.append(('loads', ids, status))
+            ),
+            reporting_service=SimpleNamespace(get_monthly_settlement=self.settle),
+            snapshot_repo=self.snapshot_repo,
+            proforma_repo=SimpleNamespace(
+                get_by_period=lambda year, month: self.proforma,
+                close_proforma=lambda pid, auto_create_next: self.calls.append(('proforma', pid, auto_create_next))
+            )
+        )
+
+    def settle(self, year, month):
+        self.calls.append(('settlement', year, month))
+        return make_settlement()
+
+    def test_close_period_freezes_snapshot(self):
+        result = self.service.close_period(2025, 11, user_id=3)
+
+        self.assertEqual(len(self.snapshot_repo.saved), 1)
+        self.assertEqual(result['loads_closed_count'], 2)
+        self.assertIn(('proforma', 7, False), self.calls)
+        self.assertIn(('loads', [2, 1], 'CLOSED'), self.calls)
+
+    def test_settlement_is_computed_under_write_lock(self):
+        self.service.close_period(2025, 11, user_id=3)
+
+        self.assertEqual(self.calls[:2], [('sql', 'BEGIN IMMEDIATE'), ('settlement', 2025, 11)])
+
+    def test_missing_indicators_propagate_value_error(self):
+        def fail(year, month):
+            raise ValueError("Faltan Indicadores Económicos")
+        self.service.reporting_service = SimpleNamespace(get_monthly_settlement=fail)
+
+        with self.assertRaises(ValueError):
+            self.service.close_period(2025, 11, user_id=3)
+        self.assertEqual(self.snapshot_repo.saved, [])
+
+    def test_auto_create_next_is_opt_in(self):
+        self.service.close_period(2025, 11, user_id=3, auto_create_next=True)
+
+        self.assertIn(('proforma', 7, True), self.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Test Suite para la trazabilidad materializada (traceability_mv).
+
+Valida:
+1. Los triggers sobre loads materializan, actualizan y eliminan la fila de la carga
+2. Los cambios de nombre en datos maestros se propagan a las filas afectadas
+3. La migración materializa las cargas existentes
+4. rebuild() y refresh() recalculan la tabla igual que view_full_traceability
+5. ReportingRepository.get_full_traceability lee la tabla materializada
+"""
+
+import unittest
+
+from infrastructure.persistence.reporting_repository import ReportingRepository
+from infrastructure.persistence.traceability_repository import TraceabilityRepository
+from helpers import TempDatabaseTestCase, read_migration
+
+SCHEMA = """
+    CREATE TABLE clients (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE facilities (id INTEGER PRIMARY KEY, name TEXT, client_id INTEGER);
+    CREATE TABLE batches (id INTEGER PRIMARY KEY, batch_code TEXT, class_type TEXT);
+    CREATE TABLE sites (id INTEGER PRIMARY KEY, name TEXT, region TEXT);
+    CREATE TABLE contractors (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE drivers (id INTEGER PRIMARY KEY, name TEXT, rut TEXT, contractor_id INTEGER);
+    CREATE TABLE vehicles (id INTEGER PRIMARY KEY, license_plate TEXT);
+    CREATE TABLE loads (
+        id INTEGER PRIMARY KEY, ticket_number TEXT, guide_number TEXT, status TEXT,
+        requested_date DATETIME, scheduled_date DATETIME, dispatch_time DATETIME, arrival_time DATETIME,
+        gross_weight REAL, tare_weight REAL, net_weight REAL,
+        origin_facility_id INTEGER, batch_id INTEGER, destination_site_id INTEGER,
+        driver_id INTEGER, vehicle_id INTEGER, notes TEXT
+    );
+    CREATE VIEW view_full_traceability AS
+    SELECT
+        l.id AS load_id,
+        COALESCE(l.ticket_number, '') AS ticket_number,
+        COALESCE(l.guide_number, '') AS guide_number,
+        l.status, l.requested_date, l.scheduled_date, l.dispatch_time, l.arrival_time,
+        l.gross_weight AS weight_gross, l.tare_weight AS weight_tare,
+        COALESCE(l.net_weight, (COALESCE(l.gross_weight, 0) - COALESCE(l.tare_weight, 0))) AS weight_net,
+        c.name AS client_name, f.name AS facility_name, b.batch_code, b.class_type,
+        s.name AS site_name, s.region AS site_region, dr.name AS driver_name, dr.rut AS driver_rut,
+        v.license_plate, ctr.name AS contractor_name
+    FROM loads l
+    LEFT JOIN facilities f ON l.origin_facility_id = f.id
+    LEFT JOIN clients c ON f.client_id = c.id
+    LEFT JOIN batches b ON l.batch_id = b.id
+    LEFT JOIN sites s ON l.destination_site_id = s.id
+    LEFT JOIN drivers dr ON l.driver_id = dr.id
+    LEFT JOIN contractors ctr ON dr.contractor_id = ctr.id
+    LEFT JOIN vehicles v ON l.vehicle_id = v.id;
+"""
+
+
+class TraceabilityTestCase(TempDatabaseTestCase):
+    schema = SCHEMA
+    migrations = ('039_traceability_mv.sql',)
+
+    def setUp(self):
+        super().setUp()
+        with self.db as conn:
+            conn.execute("INSERT INTO clients VALUES (1, 'Cliente A'), (2, 'Cliente B')")
+            conn.execute("INSERT INTO facilities VALUES (10, 'Planta A', 1), (20, 'Planta B', 2)")
+            conn.execute("INSERT INTO batches VALUES (7, 'LOTE-7', 'A')")
+            conn.execute("INSERT INTO sites VALUES (5, 'Predio Norte', 'Biobío')")
+            conn.execute("INSERT INTO contractors VALUES (3, 'Transportes Sur')")
+            conn.execute("INSERT INTO drivers VALUES (4, 'Juan Pérez', '11.111.111-1', 3)")
+            conn.execute("INSERT INTO vehicles VALUES (6, 'AB-1234')")
+            conn.executemany(
+                "INSERT INTO loads (id, status, origin_facility_id, batch_id, destination_site_id, "
+                "driver_id, vehicle_id, dispatch_time, gross_weight, tare_weight) "
+                "VALUES (?, ?, ?, 7, 5, 4, 6, ?, 30000, 12000)",
+                [
+                    (1, 'EN_ROUTE_DESTINATION', 10, '2025-03-10 08:00:00'),
+                    (2, 'COMPLETED', 10, '2025-03-11 09:00:00'),
+                    (3, 'REQUESTED', 20, None),
+                ]
+            )
+        self.repo = TraceabilityRepository(self.db)
+
+    def execute(self, sql, params=()):
+        with self.db as conn:
+            conn.execute(sql, params)
+
+    def mv_rows(self):
+        with self.db as conn:
+            rows = conn.execute("SELECT * FROM traceability_mv ORDER BY load_id").fetchall()
+            return {row['load_id']: dict(row) for row in rows}
+
+    def view_rows(self):
+        with self.db as conn:
+            rows = conn.execute("SELECT * FROM view_full_traceability ORDER BY load_id").fetchall()
+            return [dict(row) for row in rows]
+
+    def assert_matches_view(self):
+        columns = TraceabilityRepository.REPORT_COLUMNS
+        materialized = [{c: row[c] for c in columns} for row in self.mv_rows().values()]
+        self.assertEqual(materialized, self.view_rows())
+
+
+class TestLoadTriggers(TraceabilityTestCase):
+
+    def test_insert_materializes_joined_row(self):
+        row = self.mv_rows()[1]
+
+        self.assertEqual(row['client_id'], 1)
+        self.assertEqual(row['client_name'], 'Cliente A')
+        self.assertEqual(row['contractor_name'], 'Transportes Sur')
+        self.assertEqual(row['weight_net'], 18000.0)
+        self.assert_matches_view()
+
+    def test_update_and_delete_refresh_only_that_load(self):
+        self.execute("UPDATE loads SET status = 'COMPLETED', ticket_number = 'T-1', "
+                     "origin_facility_id = 20 WHERE id = 1")
+        self.execute("DELETE FROM loads WHERE id = 3")
+
+        rows = self.mv_rows()
+        self.assertEqual(sorted(rows), [1, 2])
+        self.assertEqual(rows[1]['status'], 'COMPLETED')
+        self.assertEqual(rows[1]['ticket_number'], 'T-1')
+        self.assertEqual(rows[1]['client_name'], 'Cliente B')
+        self.assert_matches_view()
+
+    def test_update_of_other_columns_is_ignored(self):
+        self.execute("DELETE FROM traceability_mv WHERE load_id = 1")
+
+        self.execute("UPDATE loads SET notes = 'x' WHERE id = 1")
+
+        self.assertNotIn(1, self.mv_rows())
+
+
+class TestMasterDataTriggers(TraceabilityTestCase):
+
+    def test_name_changes_propagate(self):
+        self.execute("UPDATE clients SET name = 'Cliente A SpA' WHERE id = 1")
+        self.execute("UPDATE sites SET name = 'Predio Sur', region = 'Ñuble' WHERE id = 5")
+        self.execute("UPDATE drivers SET name = 'Juan P.' WHERE id = 4")
+        self.execute("UPDATE contractors SET name = 'TS Ltda' WHERE id = 3")
+        self.execute("UPDATE vehicles SET license_plate = 'CD-5678' WHERE id = 6")
+        self.execute("UPDATE batches SET batch_code = 'LOTE-7B' WHERE id = 7")
+
+        rows = self.mv_rows()
+        self.assertEqual(rows[1]['client_name'], 'Cliente A SpA')
+        self.assertEqual(rows[3]['client_name'], 'Cliente B')
+        self.assertEqual(rows[2]['site_region'], 'Ñuble')
+        self.assertEqual(rows[2]['license_plate'], 'CD-5678')
+        self.assert_matches_view()
+
+    def test_facility_client_and_driver_contractor_reassignment(self):
+        self.execute("INSERT INTO contractors VALUES (9, 'Fletes Norte')")
+        self.execute("UPDATE facilities SET client_id = 2 WHERE id = 10")
+        self.execute("UPDATE drivers SET contractor_id = 9 WHERE id = 4")
+
+        rows = self.mv_rows()
+        self.assertEqual(rows[1]['client_id'], 2)
+        self.assertEqual(rows[1]['contractor_id'], 9)
+        self.assert_matches_view()
+
+
+class TestRebuildAndRefresh(TraceabilityTestCase):
+
+    def test_migration_backfills_existing_loads(self):
+        self.execute("DELETE FROM traceability_mv")
+
+        with self.db as conn:
+            conn.executescript(read_migration('039_traceability_mv.sql'))
+
+        self.assertEqual(sorted(self.mv_rows()), [1, 2, 3])
+        self.assert_matches_view()
+
+    def test_rebuild_restores_table(self):
+        self.execute("DELETE FROM traceability_mv")
+
+        self.assertEqual(self.repo.rebuild(), 3)
+
+        self.assert_matches_view()
+
+    def test_refresh_recomputes_given_loads(self):
+        self.execute("UPDATE traceability_mv SET client_name = 'obsoleto'")
+        self.execute("INSERT INTO traceability_mv (load_id) VALUES (99)")  # Carga ya eliminada
+
+        self.assertEqual(self.repo.refresh([1, 99]), 1)
+
+        rows = self.mv_rows()
+        self.assertEqual(rows[1]['client_name'], 'Cliente A')
+        self.assertEqual(rows[2]['client_name'], 'obsoleto')
+        self.assertNotIn(99, rows)
+
+    def test_full_traceability_reads_materialized_table(self):
+        df = ReportingRepository(self.db).get_full_traceability()
+
+        self.assertEqual(list(df.columns), list(TraceabilityRepository.REPORT_COLUMNS))
+        self.assertEqual(sorted(df['load_id']), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
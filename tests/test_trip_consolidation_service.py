@@ -0,0 +1,105 @@
+"""
+Test Suite para TripConsolidationService (optimizador de viajes enlazados).
+
+Valida:
+1. Selección del par de mayor ahorro (T1 AMPLIROLL + T2 AMPLIROLL_CARRO vs directo)
+2. Restricciones AMPLIROLL (BATEA, 2 contenedores, planta sin AMPLIROLL, destinos distintos)
+3. Búsqueda local mejora el greedy y nunca empeora el plan
+
+Arquitectura: Tests puros sin BD; la matriz de distancias es un stub en memoria.
+"""
+
+import itertools
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from domain.logistics.services.trip_consolidation_service import TripConsolidationService
+from helpers import StubDistanceRepo, make_request_load as make_load
+
+
+def make_service(distances):
+    service = TripConsolidationService.__new__(TripConsolidationService)
+    service.distance_repo = StubDistanceRepo(distances, symmetric=True)
+    return service
+
+
+class TestTripConsolidation(unittest.TestCase):
+    """Test Suite para optimize."""
+
+    def setUp(self):
+        self.service = make_service({
+            (1, 9, 'TREATMENT_PLANT'): 100.0,
+            (2, 9, 'TREATMENT_PLANT'): 80.0,
+            (3, 9, 'TREATMENT_PLANT'): 90.0,
+            (1, 2, 'FACILITY'): 30.0,
+            (1, 3, 'FACILITY'): 10.0,
+        })
+
+    def optimize(self, loads):
+        return self.service.optimize(pd.DataFrame(loads), proforma=None, destination_id=9)
+
+    def test_picks_pair_with_largest_savings(self):
+        plan = self.optimize([make_load(10, 1), make_load(20, 2, 1), make_load(30, 3, 1)])
+
+        self.assertEqual([p.load_ids for p in plan.proposals], [[10, 30]])
+        proposal = plan.proposals[0]
+        self.assertAlmostEqual(proposal.direct_cost_uf, 0.002962 * 8 * 100 + 0.002962 * 8 * 90)
+        self.assertAlmostEqual(
+            proposal.linked_cost_uf, 0.002962 * 8 * 10 + 0.001793 * 16 * 90
+        )
+        self.assertAlmostEqual(plan.planned_cost_uf, plan.direct_cost_uf - proposal.savings_uf)
+
+    def test_ampliroll_constraints_exclude_loads(self):
+        cases = [
+            dict(vehicle_type_requested='BATEA'),
+            dict(vehicle_type_requested=None),
+            dict(container_quantity=2),
+            dict(allowed_vehicle_types='BATEA'),
+            dict(destination_site_id=5),
+        ]
+        for overrides in cases:
+            with self.subTest(**overrides):
+                plan = self.optimize([make_load(10, 1), make_load(30, 3, 1, **overrides)])
+                self.assertEqual(plan.proposals, [])
+
+    def test_loads_without_route_are_reported(self):
+        plan = self.optimize([make_load(10, 1), make_load(40, 4, 1)])
+
+        self.assertEqual(plan.unpriced_load_ids, [40])
+        self.assertEqual(plan.proposals, [])
+
+    def test_local_search_escapes_greedy_trap(self):
+        savings = np.full((4, 4), -np.inf)
+        savings[0, 1], savings[0, 2], savings[3, 1] = 5.0, 4.0, 4.0
+
+        greedy = self.service._greedy(savings)
+        improved = self.service._local_search(savings, list(greedy))
+
+        self.assertEqual(greedy, [(0, 1)])
+        self.assertEqual(sorted(improved), [(0, 2), (3, 1)])
+
+    def test_local_search_never_worse_than_greedy(self):
+        rng = random.Random(7)
+        for _ in range(30):
+            n = 7
+            savings = np.full((n, n), -np.inf)
+            for p, l in itertools.permutations(range(n), 2):
+                if rng.random() < 0.5:
+                    savings[p, l] = rng.uniform(-1, 5)
+
+            greedy = self.service._greedy(savings)
+            improved = self.service._local_search(savings, list(greedy))
+
+            loads = [load for pair in improved for load in pair]
+            self.assertEqual(len(loads), len(set(loads)))
+            self.assertGreaterEqual(
+                sum(savings[pair] for pair in improved) + 1e-9,
+                sum(savings[pair] for pair in greedy)
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
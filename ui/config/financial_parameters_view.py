@@ -348,7 +348,12 @@ def _render_proformas_list(proforma_repo, proformas, first_proforma):
         
         if close_clicked:
             try:
-                proforma_repo.close_proforma(selected_proforma.id, auto_create_next=True)
+                # Cierre contable completo: congela la liquidación y las cargas del período
+                user = st.session_state.get('user')
+                get_container().accounting_closure_service.close_period(
+                    selected_proforma.period_year, selected_proforma.period_month,
+                    user_id=getattr(user, 'id', None), auto_create_next=True
+                )
                 st.session_state.finance_success_msg = f"✅ Proforma {selected_proforma.proforma_code} cerrada. Se creó la siguiente proforma automáticamente."
                 st.rerun()
             except Exception as e:
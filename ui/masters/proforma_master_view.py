@@ -338,6 +338,7 @@ def _render_close_confirmation(proforma, proforma_repo):
     
     **Al cerrar:**
     - ✅ Los valores quedan inmutables
+    - ✅ Se congela la liquidación y las cargas del período
     - ✅ Se crea automáticamente la siguiente proforma
     """)
     
@@ -353,7 +354,12 @@ def _render_close_confirmation(proforma, proforma_repo):
                     next_year += 1
                 next_code = Proforma.generate_code(next_year, next_month)
                 
-                proforma_repo.close_proforma(proforma.id, auto_create_next=True)
+                # Cierre contable completo: congela la liquidación y las cargas del período
+                user = st.session_state.get('user')
+                get_container().accounting_closure_service.close_period(
+                    proforma.period_year, proforma.period_month,
+                    user_id=getattr(user, 'id', None), auto_create_next=True
+                )
                 st.session_state.proforma_success_msg = f"✅ {proforma.proforma_code} cerrada. Creada {next_code}"
                 st.session_state.proforma_editing_id = None
                 st.rerun()
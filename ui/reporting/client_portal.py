@@ -4,23 +4,49 @@ Client Portal - Vista de portal para clientes.
 Refactorizado para:
 - Recibir reporting_service como dependencia inyectada correctamente
 - Eliminar import directo de get_container
+- Filtrar en SQL (cliente, fechas, estado, texto) y paginar por keyset:
+  cada cliente lee solo su porción de la trazabilidad materializada
 """
 
+import math
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 
+from domain.logistics.entities.load_status import LoadStatus
+from infrastructure.persistence.reporting_repository import TraceabilityFilter
+from ui.state import AppState
+
+PAGE_SIZE = 50
+
+
+def _next_page(next_cursor):
+    st.session_state[AppState.CLIENT_REPORT_CURSORS].append(next_cursor)
+
 
-def client_portal_page(reporting_service):
+def _previous_page():
+    st.session_state[AppState.CLIENT_REPORT_CURSORS].pop()
+
+
+def client_portal_page(reporting_service, client_service):
     st.header("Portal de Cliente")
     st.markdown("Bienvenido. Aquí puede revisar la trazabilidad completa de sus residuos.")
 
     # Initialize Service
     service = reporting_service
 
+    # Cliente (vista simulada: en producción vendría de la sesión del usuario)
+    clients = client_service.get_all()
+    if not clients:
+        st.warning("No hay clientes configurados.")
+        return
+    client_options = {c.name: c.id for c in clients}
+
     # Filters
     col1, col2 = st.columns(2)
     with col1:
+        selected_client = st.selectbox("Cliente", options=list(client_options.keys()))
         # Date Range Picker
         today = datetime.now()
         start_date = today - timedelta(days=30)
@@ -29,43 +55,57 @@ def client_portal_page(reporting_service):
             value=(start_date, today),
             format="DD/MM/YYYY"
         )
-    
-    # Fetch Data
-    # In a real app, we would filter by the logged-in user's client_id
-    # For this demo, we'll fetch all and maybe filter by a selected client if admin, 
-    # or just show everything for the "Client View" demo.
-    
+    with col2:
+        statuses = st.multiselect(
+            "Estado",
+            options=[status.value for status in LoadStatus],
+            format_func=lambda value: LoadStatus(value).display_name
+        )
+        search = st.text_input("Buscar", placeholder="Ticket, guía, patente, lote, destino o conductor")
+
     # Handle date range tuple
-    if isinstance(date_range, tuple) and len(date_range) == 2:
-        df = service.get_client_report(date_range=date_range)
-    else:
+    if not (isinstance(date_range, tuple) and len(date_range) == 2):
         st.info("Seleccione un rango de fechas válido.")
         return
 
-    if df.empty:
+    client_id = client_options[selected_client]
+    filters = TraceabilityFilter(
+        client_id=client_id,
+        start_date=date_range[0],
+        end_date=date_range[1],
+        statuses=tuple(statuses),
+        text=search
+    )
+
+    # KPIs del período desde el rollup diario
+    kpis = service.get_operations_kpis(*date_range, client_id=client_id)
+    kpi1, kpi2, kpi3 = st.columns(3)
+    kpi1.metric("Cargas Despachadas", kpis['dispatched_loads'])
+    kpi2.metric("Cargas Dispuestas", kpis['completed_loads'])
+    kpi3.metric("Toneladas Dispuestas", f"{kpis['net_weight_kg'] / 1000:.1f} t")
+
+    # Totales de la selección (agregados en la base de datos)
+    totals = service.get_client_report_totals(filters)
+    if totals['loads'] == 0:
         st.warning("No se encontraron registros para este período.")
         return
+    st.caption(f"{totals['loads']} registros · {totals['net_weight_kg'] / 1000:.1f} t netas en la selección")
+
+    # Paginación: al cambiar el filtro se vuelve a la primera página
+    if st.session_state.get(AppState.CLIENT_REPORT_FILTER) != filters:
+        st.session_state[AppState.CLIENT_REPORT_FILTER] = filters
+        st.session_state[AppState.CLIENT_REPORT_CURSORS] = [None]
+    cursors = st.session_state[AppState.CLIENT_REPORT_CURSORS]
+    df, next_cursor = service.get_client_report_page(filters, cursors[-1], PAGE_SIZE)
 
     # Data Cleaning for Presentation
     # Select and Rename Columns for the Client
-    display_cols = {
-        'ticket_number': 'Ticket',
-        'guide_number': 'Guía Despacho',
-        'dispatch_time': 'Fecha Despacho',
-        'site_name': 'Destino Final',
-        'weight_net': 'Kilos Netos',
-        'status': 'Estado',
-        'batch_code': 'Lote Origen',
-        'license_plate': 'Patente Camión'
-    }
-    
-    # Filter columns that exist in the dataframe
-    available_cols = [c for c in display_cols.keys() if c in df.columns]
-    df_display = df[available_cols].rename(columns=display_cols)
-    
+    display_cols = service.CLIENT_REPORT_COLUMNS
+    df_display = df[list(display_cols)].rename(columns=display_cols)
+    df_display['Fecha Despacho'] = pd.to_datetime(df_display['Fecha Despacho'])
+
     # Add a simulated "Certificate" link
-    # We'll just create a string column that looks like a filename
-    df_display['Certificado'] = df_display['Ticket'].apply(lambda x: f"CERT-{x}.pdf" if x else "Pendiente")
+    df_display['Certificado'] = df_display['Ticket'].apply(service.certificate_name)
 
     # Display Configuration
     st.dataframe(
@@ -83,10 +123,16 @@ def client_portal_page(reporting_service):
         }
     )
 
-    # Download Button for Excel
+    nav1, nav2, nav3 = st.columns([1, 2, 1])
+    nav1.button("← Anterior", disabled=len(cursors) == 1, on_click=_previous_page)
+    nav2.caption(f"Página {len(cursors)} de {math.ceil(totals['loads'] / PAGE_SIZE)}")
+    nav3.button("Siguiente →", disabled=next_cursor is None, on_click=_next_page, args=(next_cursor,))
+
+    # Download Button for Excel (se genera al hacer clic, con todo el filtro)
     st.download_button(
         label="Descargar Reporte Excel",
-        data=df_display.to_csv(index=False).encode('utf-8'),
-        file_name='reporte_trazabilidad.csv',
-        mime='text/csv'
+        data=lambda: service.export_client_report_excel(filters),
+        file_name='reporte_trazabilidad.xlsx',
+        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        on_click="ignore"
     )
@@ -35,6 +35,7 @@ def financial_portal_page(container):
     """
     # Extraer servicios del container
     financial_reporting_service = container.financial_reporting_service
+    segment_costing_service = container.segment_costing_service
     contractor_service = container.contractor_service
     client_service = container.client_service
     
@@ -61,7 +62,7 @@ def financial_portal_page(container):
     # Tab 2: Transportistas (Costos - lo que pagamos)
     # --------------------------------------------
     with tab_transportistas:
-        _render_transport_settlement_tab(financial_reporting_service, contractor_service)
+        _render_transport_settlement_tab(financial_reporting_service, segment_costing_service, contractor_service)
     
     # --------------------------------------------
     # Tab 3: Disposición (Costos - lo que pagamos)
@@ -272,7 +273,7 @@ def _display_client_detail(client_df, uf_value):
 # ============================================
 # TAB: TRANSPORTISTAS
 # ============================================
-def _render_transport_settlement_tab(financial_reporting_service, contractor_service):
+def _render_transport_settlement_tab(financial_reporting_service, segment_costing_service, contractor_service):
     """
     Renderiza la pestaña de estados de pago para transportistas.
     Muestra siempre la tabla de viajes, el botón Calcular muestra los totales.
@@ -315,7 +316,7 @@ def _render_transport_settlement_tab(financial_reporting_service, contractor_ser
     st.markdown("---")
     
     # Siempre cargar los viajes del período (sin cálculos de costo)
-    trips_df = _get_transport_trips_for_period(financial_reporting_service, selected_proforma)
+    trips_df = _get_transport_trips_for_period(segment_costing_service, selected_proforma)
     
     if trips_df.empty:
         st.info("No hay viajes registrados para este período.")
@@ -378,7 +379,7 @@ def _render_transport_settlement_tab(financial_reporting_service, contractor_ser
         st.caption("👆 Presione **Calcular Totales** para ver el resumen de costos y exportar.")
 
 
-def _get_transport_trips_for_period(financial_reporting_service, proforma):
+def _get_transport_trips_for_period(segment_costing_service, proforma):
     """
     Obtiene los viajes del período CON datos de cálculo para auditoría.
     
@@ -386,264 +387,10 @@ def _get_transport_trips_for_period(financial_reporting_service, proforma):
     - Tramo 1: Planta A → Punto Enlace (tarifa AMPLIROLL)
     - Tramo 2: Punto Enlace → Destino Final (tarifa AMPLIROLL_CARRO)
     
-    Convierte pesos de kg a toneladas.
+    El cálculo lo realiza SegmentCostingService (capa de dominio).
     """
-    from datetime import datetime
-    from dateutil.relativedelta import relativedelta
-    
-    # Calcular fechas del ciclo
-    year = proforma.period_year
-    month = proforma.period_month
-    cycle_end = datetime(year, month, 18)
-    previous_month = datetime(year, month, 1) - relativedelta(months=1)
-    cycle_start = datetime(previous_month.year, previous_month.month, 19)
-    
-    # Pesos mínimos garantizados por tipo de vehículo
-    MIN_WEIGHTS = {
-        'BATEA': 15.0,
-        'AMPLIROLL': 7.0,
-        'AMPLIROLL_SIMPLE': 7.0,
-        'AMPLIROLL_CARRO': 7.0
-    }
-    
-    # Query para obtener viajes con información completa
-    # Incluye is_link_point de facility para detectar puntos de enlace
-    query = """
-        SELECT 
-            l.id,
-            l.manifest_code as manifest_number,
-            l.scheduled_date as date,
-            l.net_weight / 1000.0 as net_weight_tons,
-            l.segment_type,
-            l.trip_id,
-            l.origin_facility_id,
-            l.origin_treatment_plant_id,
-            l.destination_site_id,
-            l.destination_treatment_plant_id,
-            v.license_plate as vehicle_plate,
-            v.type as vehicle_type,
-            f_origin.is_link_point as origin_is_link_point,
-            COALESCE(f_origin.name, tp_origin.name, 'N/A') as origin_name,
-            COALESCE(s.name, tp_dest.name, 'N/A') as destination_name
-        FROM loads l
-        LEFT JOIN vehicles v ON l.vehicle_id = v.id
-        LEFT JOIN facilities f_origin ON l.origin_facility_id = f_origin.id
-        LEFT JOIN treatment_plants tp_origin ON l.origin_treatment_plant_id = tp_origin.id
-        LEFT JOIN sites s ON l.destination_site_id = s.id
-        LEFT JOIN treatment_plants tp_dest ON l.destination_treatment_plant_id = tp_dest.id
-        WHERE l.status IN ('ARRIVED', 'COMPLETED')
-          AND l.scheduled_date BETWEEN ? AND ?
-        ORDER BY l.scheduled_date ASC, l.trip_id ASC, l.segment_type ASC
-    """
-    
     try:
-        with financial_reporting_service.load_repo.db_manager as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (cycle_start.isoformat(), cycle_end.isoformat()))
-            rows = cursor.fetchall()
-            
-            if not rows:
-                return pd.DataFrame()
-            
-            df = pd.DataFrame([dict(row) for row in rows])
-            
-            # === PROCESAR VIAJES ENLAZADOS ===
-            # Agrupar por trip_id para identificar viajes enlazados
-            processed_rows = []
-            
-            # Obtener tarifas desde proforma
-            def get_tariff(vtype):
-                if proforma:
-                    tariff = proforma.get_tariff_for_vehicle_type(vtype)
-                    if tariff:
-                        return tariff
-                defaults = {'BATEA': 0.001460, 'AMPLIROLL': 0.002962, 'AMPLIROLL_SIMPLE': 0.002962, 'AMPLIROLL_CARRO': 0.001793}
-                return defaults.get(str(vtype).upper() if vtype else '', 0.0)
-            
-            tariff_ampliroll = get_tariff('AMPLIROLL')
-            tariff_ampliroll_carro = get_tariff('AMPLIROLL_CARRO')
-            
-            # Separar viajes directos de enlazados
-            linked_trips = df[df['trip_id'].notna() & (df['trip_id'] != '')].groupby('trip_id')
-            direct_trips = df[df['trip_id'].isna() | (df['trip_id'] == '')]
-            
-            # Procesar viajes directos (sin cambios)
-            for _, row in direct_trips.iterrows():
-                row_dict = row.to_dict()
-                row_dict['tariff_type'] = row_dict.get('vehicle_type', 'N/A')
-                row_dict['tariff_uf'] = get_tariff(row_dict.get('vehicle_type'))
-                row_dict['min_weight'] = MIN_WEIGHTS.get(str(row_dict.get('vehicle_type', '')).upper(), 7.0)
-                row_dict['segment_desc'] = 'Directo'
-                processed_rows.append(row_dict)
-            
-            # Procesar viajes enlazados (generar tramos)
-            for trip_id, trip_loads in linked_trips:
-                trip_list = trip_loads.to_dict('records')
-                
-                # Ordenar: primero la planta NO enlace, luego la enlace
-                trip_list.sort(key=lambda x: x.get('origin_is_link_point', 0) or 0)
-                
-                if len(trip_list) >= 2:
-                    # Carga de la planta origen (NO es punto de enlace)
-                    primary_load = trip_list[0]
-                    # Carga del punto de enlace
-                    link_load = trip_list[1]
-                    
-                    # Calcular distancias
-                    dist_to_link = 0.0  # Distancia: Planta Origen → Punto Enlace
-                    dist_from_link = 0.0  # Distancia: Punto Enlace → Destino Final
-                    
-                    origin_fac = primary_load.get('origin_facility_id')
-                    link_fac = link_load.get('origin_facility_id')
-                    dest_tp = primary_load.get('destination_treatment_plant_id')
-                    
-                    if origin_fac and link_fac:
-                        try:
-                            # Distancia planta origen a punto enlace
-                            dist_to_link = financial_reporting_service.distance_repo.get_route_distance(
-                                int(origin_fac), int(link_fac), 'FACILITY'
-                            ) or 0.0
-                        except:
-                            dist_to_link = 0.0
-                    
-                    if link_fac and dest_tp:
-                        try:
-                            # Distancia punto enlace a destino final
-                            dist_from_link = financial_reporting_service.distance_repo.get_route_distance(
-                                int(link_fac), int(dest_tp), 'TREATMENT_PLANT'
-                            ) or 0.0
-                        except:
-                            dist_from_link = 0.0
-                    
-                    # TRAMO 1: Planta Origen → Punto de Enlace (tarifa AMPLIROLL)
-                    # Solo peso de la carga primaria
-                    tramo1 = primary_load.copy()
-                    tramo1['segment_desc'] = 'T1: Origen→Enlace'
-                    tramo1['tariff_type'] = 'AMPLIROLL'
-                    tramo1['tariff_uf'] = tariff_ampliroll
-                    tramo1['min_weight'] = MIN_WEIGHTS['AMPLIROLL']
-                    tramo1['_dest_facility_id'] = link_load.get('origin_facility_id')
-                    tramo1['_dest_type'] = 'FACILITY'
-                    tramo1['link_point_name'] = link_load.get('origin_name', '')
-                    tramo1['dist_to_link'] = dist_to_link
-                    tramo1['_fixed_distance'] = dist_to_link  # Forzar esta distancia
-                    tramo1['_original_origin'] = primary_load.get('origin_name', '')  # Mantener planta original
-                    # Ocultar destino final para T1 - solo mostrar el enlace
-                    tramo1['destination_name'] = '-'
-                    processed_rows.append(tramo1)
-                    
-                    # TRAMO 2A: Punto Enlace → Destino (tarifa AMPLIROLL_CARRO)
-                    # Carga primaria en el segundo tramo - MANTENER ORIGEN ORIGINAL
-                    tramo2a = primary_load.copy()
-                    tramo2a['segment_desc'] = 'T2: Enlace→Destino'
-                    tramo2a['tariff_type'] = 'AMPLIROLL_CARRO'
-                    tramo2a['tariff_uf'] = tariff_ampliroll_carro
-                    tramo2a['min_weight'] = MIN_WEIGHTS['AMPLIROLL_CARRO']
-                    # NO sobrescribir origin_name - mantener la planta original (Los Álamos)
-                    tramo2a['_original_origin'] = primary_load.get('origin_name', '')
-                    tramo2a['_segment_origin'] = link_load.get('origin_name', 'Enlace')  # Solo para referencia
-                    tramo2a['link_point_name'] = '-'
-                    tramo2a['dist_to_link'] = 0
-                    tramo2a['_fixed_distance'] = dist_from_link  # Forzar esta distancia
-                    processed_rows.append(tramo2a)
-                    
-                    # TRAMO 2B: Punto Enlace → Destino (tarifa AMPLIROLL_CARRO)
-                    # Carga del punto de enlace
-                    tramo2b = link_load.copy()
-                    tramo2b['segment_desc'] = 'T2: Enlace→Destino'
-                    tramo2b['tariff_type'] = 'AMPLIROLL_CARRO'
-                    tramo2b['tariff_uf'] = tariff_ampliroll_carro
-                    tramo2b['min_weight'] = MIN_WEIGHTS['AMPLIROLL_CARRO']
-                    # origin_name de link_load ya es correcto (Cañete)
-                    tramo2b['_original_origin'] = link_load.get('origin_name', '')
-                    tramo2b['link_point_name'] = '-'
-                    tramo2b['dist_to_link'] = 0
-                    tramo2b['_fixed_distance'] = dist_from_link  # Forzar esta distancia
-                    processed_rows.append(tramo2b)
-                else:
-                    # Solo una carga con trip_id (caso raro), procesar como directo
-                    for load in trip_list:
-                        load['tariff_type'] = load.get('vehicle_type', 'N/A')
-                        load['tariff_uf'] = get_tariff(load.get('vehicle_type'))
-                        load['min_weight'] = MIN_WEIGHTS.get(str(load.get('vehicle_type', '')).upper(), 7.0)
-                        load['segment_desc'] = 'Directo'
-                        processed_rows.append(load)
-            
-            # Convertir a DataFrame
-            result_df = pd.DataFrame(processed_rows)
-            
-            if result_df.empty:
-                return result_df
-            
-            # === CALCULAR DISTANCIAS Y SUBTOTALES ===
-            
-            # Peso facturable = max(peso_real, peso_mínimo)
-            result_df['billable_weight'] = result_df.apply(
-                lambda row: max(row.get('net_weight_tons') or 0, row.get('min_weight', 7.0)),
-                axis=1
-            )
-            
-            # Obtener distancias
-            distances = []
-            for idx, row in result_df.iterrows():
-                row_dict = row.to_dict()
-                
-                # Si hay distancia fija (_fixed_distance), usarla directamente
-                if '_fixed_distance' in row_dict and pd.notna(row_dict.get('_fixed_distance')):
-                    distances.append(row_dict.get('_fixed_distance'))
-                    continue
-                
-                # Para tramos de enlace T1, usar destino especial (_dest_facility_id)
-                if '_dest_facility_id' in row_dict and pd.notna(row_dict.get('_dest_facility_id')):
-                    origin_id = row_dict.get('origin_facility_id')
-                    dest_id = row_dict.get('_dest_facility_id')
-                    dest_type = 'FACILITY'
-                else:
-                    # Determinar origen
-                    origin_id = row_dict.get('origin_facility_id') if pd.notna(row_dict.get('origin_facility_id')) else row_dict.get('origin_treatment_plant_id')
-                    
-                    # Determinar destino y su tipo
-                    if pd.notna(row_dict.get('destination_site_id')):
-                        dest_id = row_dict.get('destination_site_id')
-                        dest_type = 'SITE'
-                    elif pd.notna(row_dict.get('destination_treatment_plant_id')):
-                        dest_id = row_dict.get('destination_treatment_plant_id')
-                        dest_type = 'TREATMENT_PLANT'
-                    else:
-                        dest_id = None
-                        dest_type = None
-                
-                distance = 0.0
-                # Validar que los IDs sean válidos (no NaN, no None)
-                origin_valid = pd.notna(origin_id) and origin_id is not None
-                dest_valid = pd.notna(dest_id) and dest_id is not None
-                
-                if origin_valid and dest_valid and dest_type:
-                    try:
-                        origin_int = int(origin_id)
-                        dest_int = int(dest_id)
-                        distance = financial_reporting_service.distance_repo.get_route_distance(
-                            origin_int, dest_int, dest_type
-                        ) or 0.0
-                    except (ValueError, TypeError):
-                        distance = 0.0
-                distances.append(distance)
-            
-            result_df['distance_km'] = distances
-            
-            # Redondear valores para que el cálculo coincida con lo que ve el usuario
-            # Peso facturable: 2 decimales (como se muestra en tabla)
-            # Distancia: 1 decimal
-            # Tarifa: 6 decimales
-            result_df['billable_weight'] = result_df['billable_weight'].round(2)
-            result_df['distance_km'] = result_df['distance_km'].round(1)
-            result_df['tariff_uf'] = result_df['tariff_uf'].round(6)
-            
-            # Calcular subtotal = peso_facturable × distancia × tarifa
-            result_df['subtotal_uf'] = result_df['billable_weight'] * result_df['distance_km'] * result_df['tariff_uf']
-            
-            return result_df
-            
+        return segment_costing_service.get_transport_segments(proforma)
     except Exception as e:
         st.error(f"Error al cargar viajes: {str(e)}")
         import traceback
@@ -1,19 +1,64 @@
 import streamlit as st
 import pandas as pd
+from datetime import datetime
 from container import get_container
 from domain.logistics.entities.load_status import LoadStatus
 from ui.presenters.logistics_presenter import LogisticsPresenter
+from ui.state import AppState
+
+# Intervalos de actualización automática (segundos; None = manual)
+AUTO_REFRESH_OPTIONS = {
+    "Manual": None,
+    "Cada 30 segundos": 30,
+    "Cada 1 minuto": 60,
+    "Cada 5 minutos": 300,
+}
+
 
 def logistics_dashboard_page(reporting_service):
     st.header("🚛 Torre de Control Logística")
     st.markdown("**Monitoreo en Tiempo Real** - Datos reales del sistema")
     
-    service = reporting_service
-    df = service.get_fleet_monitoring()
+    col_refresh, col_reload = st.columns([3, 1])
+    refresh_label = col_refresh.selectbox("Actualización automática", list(AUTO_REFRESH_OPTIONS))
+    if col_reload.button("🔄 Recargar todo"):
+        # Descarta el tablero cacheado: la próxima lectura es completa
+        st.session_state.pop(AppState.FLEET_FRAME, None)
+        st.session_state.pop(AppState.FLEET_WATERMARK, None)
+    
+    # Solo el tablero se vuelve a ejecutar en cada intervalo
+    st.fragment(run_every=AUTO_REFRESH_OPTIONS[refresh_label])(_render_fleet_board)(reporting_service)
+
+
+def _load_fleet_board(service) -> pd.DataFrame:
+    """
+    Tablero de flota cacheado en la sesión, actualizado solo con las cargas
+    que cambiaron desde la última lectura (watermark).
+    """
+    df, watermark = service.refresh_fleet_monitoring(
+        st.session_state.get(AppState.FLEET_FRAME),
+        st.session_state.get(AppState.FLEET_WATERMARK)
+    )
+    st.session_state[AppState.FLEET_FRAME] = df
+    st.session_state[AppState.FLEET_WATERMARK] = watermark
+    return df
+
+
+def _render_fleet_board(service):
+    df = _load_fleet_board(service)
     
     # === METRICS SECTION ===
     st.markdown("### 📊 Resumen Operacional")
     
+    # KPIs del día desde el rollup diario (sin recorrer la tabla de cargas)
+    today = datetime.now().date()
+    kpis = service.get_operations_kpis(today, today)
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    kpi1.metric("📋 Cargas Activas", kpis['in_progress_loads'])
+    kpi2.metric("🚛 Despachadas Hoy", kpis['dispatched_loads'])
+    kpi3.metric("✅ Completadas Hoy", kpis['completed_loads'])
+    kpi4.metric("⚖️ Toneladas Hoy", f"{kpis['net_weight_kg'] / 1000:.1f} t")
+    
     if df.empty:
         st.info("✅ Sin camiones en circuito. Todos los viajes han sido completados.")
         return
@@ -121,4 +166,4 @@ def logistics_dashboard_page(reporting_service):
                 st.warning(f"⚠️ {metrics.espera_larga} camión(es) esperando más de {LogisticsPresenter.WAITING_ALERT_HOURS}h. Priorizar descarga.")
     
     st.divider()
-    st.caption("💡 Datos actualizados en tiempo real desde la base de datos. Refresque la página para actualizar.")
+    st.caption("💡 Cada actualización lee solo las cargas modificadas desde la anterior. Use 'Recargar todo' para una lectura completa.")
@@ -44,6 +44,8 @@ class AppState:
     CURRENT_DISPATCH_ID = 'current_dispatch_id'
     SELECTED_VEHICLE_ID = 'selected_vehicle_id'
     SELECTED_DRIVER_ID = 'selected_driver_id'
+    FLEET_FRAME = 'fleet_frame'  # Tablero de flota cacheado (se actualiza por deltas)
+    FLEET_WATERMARK = 'fleet_watermark'
     
     # ==========================================
     # TRATAMIENTO
@@ -79,6 +81,8 @@ class AppState:
     DATE_RANGE_END = 'date_range_end'
     SEARCH_QUERY = 'search_query'
     FILTER_STATUS = 'filter_status'
+    CLIENT_REPORT_FILTER = 'client_report_filter'  # Filtro vigente del portal de cliente
+    CLIENT_REPORT_CURSORS = 'client_report_cursors'  # Cursores de inicio de cada página visitada
     
     # ==========================================
     # TAREAS (INBOX)